@@ -36,6 +36,16 @@ class WorkerOptions(TypedDict):
     install_signal_handlers: NotRequired[bool]
     update_heartbeat_interval: NotRequired[float]
     stalled_worker_timeout: NotRequired[float]
+    ack_batch_size: NotRequired[int]
+    ack_batch_interval: NotRequired[float]
+    process_pool_size: NotRequired[int | None]
+    thread_pool_size: NotRequired[int | None]
+    thread_pools: NotRequired[dict[str, int]]
+    run_periodic_deferrer: NotRequired[bool]
+    metrics_port: NotRequired[int | None]
+    profile_tasks: NotRequired[Iterable[str] | None]
+    profile_rate: NotRequired[float]
+    profile_directory: NotRequired[str]
 
 
 class App(blueprints.Blueprint):
@@ -324,6 +334,51 @@ class App(blueprints.Blueprint):
             Time in seconds after which a worker is considered stalled if no heartbeat has
             been received. A worker prunes stalled workers from the database at startup.
             (defaults to 30)
+        ack_batch_size: ``int``
+            Maximum number of job completions the worker acknowledges to the database
+            in a single query. With a value above 1, completions are buffered and
+            written in batches, which saves round-trips for short tasks.
+            (defaults to 1, meaning each job is acknowledged as soon as it ends)
+        ack_batch_interval: ``float``
+            Maximum time in seconds a job completion waits in the buffer before being
+            acknowledged. Only used when ``ack_batch_size`` is above 1.
+            (defaults to 0.05)
+        process_pool_size: ``Optional[int]``
+            Number of child processes running the jobs of tasks declared with
+            ``executor="process"``. The pool is only started if there are such tasks.
+            (defaults to ``None``, meaning the number of CPUs of the machine)
+        thread_pool_size: ``Optional[int]``
+            Number of threads of the pool dedicated to synchronous tasks. With
+            ``None``, synchronous tasks share the default executor of the event loop,
+            which is capped at ``min(32, cpu_count + 4)`` threads.
+            (defaults to ``None``)
+        thread_pools: ``Optional[Dict[str, int]]``
+            Additional named thread pools, as a mapping of pool name to number of
+            threads. Tasks declared with ``executor="<name>"`` run in the pool of that
+            name, so that slow tasks cannot starve the others.
+            (defaults to ``None``)
+        run_periodic_deferrer: ``bool``
+            Whether this worker defers the jobs of periodic tasks. When several
+            workers run side by side, it is enough for one of them to do it.
+            (defaults to ``True``)
+        metrics_port: ``Optional[int]``
+            Port of an HTTP endpoint serving the metrics of the worker (jobs started
+            and ended, durations, fetch latency, running jobs...) in the Prometheus
+            text format, on ``/metrics``. Metrics are only collected when set.
+            (defaults to ``None``)
+        profile_tasks: ``Optional[Iterable[str]]``
+            Names of the tasks whose jobs are all profiled with cProfile. Profiles
+            are aggregated per task, and written to ``profile_directory``. Only one
+            job is profiled at a time, and jobs of tasks declared with
+            ``executor="process"`` are not profiled.
+            (defaults to ``None``)
+        profile_rate: ``float``
+            Fraction of the jobs of the other tasks that are profiled, between 0
+            and 1. (defaults to 0)
+        profile_directory: ``str``
+            Directory where the profiles are written, as ``<task name>.prof``
+            files, readable with ``python -m pstats``.
+            (defaults to ``procrastinate-profiles``)
         """
         self.perform_import_paths()
         worker = self._worker(**kwargs)
@@ -348,6 +403,17 @@ class App(blueprints.Blueprint):
     def check_connection(self) -> bool:
         return self.job_manager.check_connection()
 
+    @property
+    def query_stats(self) -> connector_module.QueryStats | None:
+        """
+        Per-query latency stats of the connector (see `QueryStats.summary`), or None
+        if its instrumentation was replaced or disabled.
+        """
+        instrumentation = self.connector.instrumentation
+        if isinstance(instrumentation, connector_module.QueryStats):
+            return instrumentation
+        return None
+
     @property
     def schema_manager(self) -> schema.SchemaManager:
         return schema.SchemaManager(connector=self.connector)
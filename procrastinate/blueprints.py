@@ -207,6 +207,7 @@ class Blueprint:
         aliases: list[str] | None = None,
         retry: retry.RetryValue = False,
         pass_context: Literal[False] = False,
+        executor: str | None = None,
         queue: str = jobs.DEFAULT_QUEUE,
         priority: int = jobs.DEFAULT_PRIORITY,
         lock: str | None = None,
@@ -249,6 +250,13 @@ class Blueprint:
             Default is no retry.
         pass_context :
             Passes the task execution context in the task as first
+        executor :
+            How the jobs of a synchronous task are run. By default, they run in a
+            thread of the worker. With ``"process"``, they run in the worker process
+            pool, which lets CPU-bound tasks use several cores. The task must then
+            be defined at the top level of a module. Any other value is the name of
+            a thread pool configured on the worker with ``thread_pools`` (see
+            `howto/production/concurrency`).
         """
         ...
 
@@ -261,6 +269,7 @@ class Blueprint:
         aliases: list[str] | None = None,
         retry: retry.RetryValue = False,
         pass_context: Literal[True],
+        executor: str | None = None,
         queue: str = jobs.DEFAULT_QUEUE,
         priority: int = jobs.DEFAULT_PRIORITY,
         lock: str | None = None,
@@ -295,6 +304,7 @@ class Blueprint:
         aliases: list[str] | None = None,
         retry: retry.RetryValue = False,
         pass_context: bool = False,
+        executor: str | None = None,
         queue: str = jobs.DEFAULT_QUEUE,
         priority: int = jobs.DEFAULT_PRIORITY,
         lock: str | None = None,
@@ -329,6 +339,7 @@ class Blueprint:
                 aliases=aliases,
                 retry=retry,
                 pass_context=pass_context,
+                executor=executor,
             )
             self._register_task(task)
 
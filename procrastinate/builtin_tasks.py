@@ -14,7 +14,9 @@ async def remove_old_jobs(
     remove_failed: bool | None = False,
     remove_cancelled: bool | None = False,
     remove_aborted: bool | None = False,
-) -> None:
+    chunk_size: int | None = None,
+    chunk_pause: float = 0,
+) -> int:
     """
     This task cleans your database by removing old jobs. Note that jobs and linked
     events will be irreversibly removed from the database when running this task.
@@ -35,11 +37,156 @@ async def remove_old_jobs(
     remove_aborted:
         By default only successful jobs will be removed. When this parameter is True
         aborted jobs will also be deleted.
+    chunk_size:
+        If set, jobs are deleted in several transactions of at most ``chunk_size``
+        jobs, which is gentler on large tables. By default, they are all deleted at
+        once.
+    chunk_pause:
+        Time to wait, in seconds, between two chunks.
+
+    Returns
+    -------
+    :
+        The number of deleted jobs
     """
-    await context.app.job_manager.delete_old_jobs(
+    return await context.app.job_manager.delete_old_jobs(
         nb_hours=max_hours,
         queue=queue,
         include_failed=remove_failed,
         include_cancelled=remove_cancelled,
         include_aborted=remove_aborted,
+        chunk_size=chunk_size,
+        chunk_pause=chunk_pause,
+    )
+
+
+@builtin.task(pass_context=True, queue="builtin")
+async def archive_old_jobs(
+    context: job_context.JobContext,
+    *,
+    max_hours: int,
+    queue: str | None = None,
+    archive_failed: bool | None = False,
+    archive_cancelled: bool | None = False,
+    archive_aborted: bool | None = False,
+    chunk_size: int | None = None,
+    chunk_pause: float = 0,
+) -> int:
+    """
+    This task keeps the jobs table small by moving old jobs and their events to the
+    ``procrastinate_jobs_archive`` and ``procrastinate_events_archive`` tables, where
+    they can still be read.
+
+    Parameters
+    ----------
+    max_hours :
+        Only jobs which were finished more than ``max_hours`` ago will be archived.
+    queue :
+        The name of the queue in which jobs will be archived. If not specified, the
+        task will archive jobs from all queues.
+    archive_failed:
+        By default only successful jobs will be archived. When this parameter is True
+        failed jobs will also be archived.
+    archive_cancelled:
+        By default only successful jobs will be archived. When this parameter is True
+        cancelled jobs will also be archived.
+    archive_aborted:
+        By default only successful jobs will be archived. When this parameter is True
+        aborted jobs will also be archived.
+    chunk_size:
+        If set, jobs are archived in several transactions of at most ``chunk_size``
+        jobs. By default, they are all archived at once.
+    chunk_pause:
+        Time to wait, in seconds, between two chunks.
+
+    Returns
+    -------
+    :
+        The number of archived jobs
+    """
+    return await context.app.job_manager.archive_old_jobs(
+        nb_hours=max_hours,
+        queue=queue,
+        include_failed=archive_failed,
+        include_cancelled=archive_cancelled,
+        include_aborted=archive_aborted,
+        chunk_size=chunk_size,
+        chunk_pause=chunk_pause,
+    )
+
+
+@builtin.task(pass_context=True, queue="builtin")
+async def remove_archived_jobs(
+    context: job_context.JobContext,
+    *,
+    max_hours: int,
+    queue: str | None = None,
+    chunk_size: int | None = None,
+    chunk_pause: float = 0,
+) -> int:
+    """
+    This task prunes the archive tables filled by `archive_old_jobs`. Note that
+    archived jobs and their events will be irreversibly removed from the database
+    when running this task.
+
+    Parameters
+    ----------
+    max_hours :
+        Only archived jobs which were finished more than ``max_hours`` ago will be
+        deleted.
+    queue :
+        The name of the queue in which archived jobs will be deleted. If not
+        specified, the task will delete archived jobs from all queues.
+    chunk_size:
+        If set, jobs are deleted in several transactions of at most ``chunk_size``
+        jobs. By default, they are all deleted at once.
+    chunk_pause:
+        Time to wait, in seconds, between two chunks.
+
+    Returns
+    -------
+    :
+        The number of deleted archived jobs
+    """
+    return await context.app.job_manager.delete_archived_jobs(
+        nb_hours=max_hours,
+        queue=queue,
+        chunk_size=chunk_size,
+        chunk_pause=chunk_pause,
     )
+
+
+@builtin.task(pass_context=True, queue="builtin")
+async def manage_events_partitions(
+    context: job_context.JobContext,
+    *,
+    days_ahead: int = 7,
+    keep_days: int | None = None,
+) -> None:
+    """
+    This task maintains the daily partitions of the ``procrastinate_events`` table,
+    when it is partitioned: it creates the partitions of the next days ahead of time
+    and, optionally, drops the partitions of the old events.
+
+    Parameters
+    ----------
+    days_ahead :
+        Partitions are created from today to ``days_ahead`` days ahead.
+    keep_days :
+        If set, the partitions whose events are all older than ``keep_days`` days
+        are dropped. By default, no partition is dropped.
+    """
+    job_manager = context.app.job_manager
+    await job_manager.create_events_partitions(days_ahead=days_ahead)
+    if keep_days is not None:
+        await job_manager.drop_events_partitions(nb_days=keep_days)
+
+
+@builtin.task(pass_context=True, queue="builtin")
+async def compact_job_counts(context: job_context.JobContext) -> None:
+    """
+    This task sums up the changes recorded in the ``procrastinate_job_counts`` table,
+    when job counting is enabled (see `JobManager.enable_job_counts_async`). It
+    should run every few minutes, so that reading the counts stays cheap.
+    """
+    await context.app.job_manager.compact_job_counts_async()
@@ -12,7 +12,7 @@ from collections.abc import Awaitable
 from typing import Any, Callable, Literal, Union
 
 import procrastinate
-from procrastinate import connector, exceptions, jobs, shell, types, utils
+from procrastinate import connector, exceptions, jobs, shell, supervisor, types, utils
 
 logger = logging.getLogger(__name__)
 
@@ -290,6 +290,59 @@ def configure_worker_parser(subparsers: argparse._SubParsersAction):
         help="Number of parallel asynchronous jobs to process at once",
         envvar="WORKER_CONCURRENCY",
     )
+    add_argument(
+        worker_parser,
+        "--processes",
+        type=int,
+        help="Number of worker processes to fork and supervise (defaults to running "
+        "the worker in the current process)",
+        envvar="WORKER_PROCESSES",
+    )
+    add_argument(
+        worker_parser,
+        "--process-pool-size",
+        type=int,
+        help="Number of processes running the jobs of tasks with executor='process'",
+        envvar="WORKER_PROCESS_POOL_SIZE",
+    )
+    add_argument(
+        worker_parser,
+        "--thread-pool-size",
+        type=int,
+        help="Number of threads running synchronous tasks "
+        "(defaults to the event loop default executor)",
+        envvar="WORKER_THREAD_POOL_SIZE",
+    )
+    add_argument(
+        worker_parser,
+        "--metrics-port",
+        type=int,
+        help="Serve the worker metrics in the Prometheus format on this port "
+        "(with --processes, worker processes use consecutive ports)",
+        envvar="WORKER_METRICS_PORT",
+    )
+    add_argument(
+        worker_parser,
+        "--profile-tasks",
+        type=cast_queues,
+        help="Comma-separated names of the tasks whose jobs are all profiled",
+        envvar="WORKER_PROFILE_TASKS",
+    )
+    add_argument(
+        worker_parser,
+        "--profile-rate",
+        type=float,
+        help="Fraction of the jobs of the other tasks that are profiled "
+        "(between 0 and 1)",
+        envvar="WORKER_PROFILE_RATE",
+    )
+    add_argument(
+        worker_parser,
+        "--profile-directory",
+        help="Directory where the profiles are written (with --processes, each "
+        "worker process writes to a numbered subdirectory)",
+        envvar="WORKER_PROFILE_DIRECTORY",
+    )
     add_argument(
         worker_parser,
         "-p",
@@ -480,6 +533,13 @@ def configure_schema_parser(subparsers: argparse._SubParsersAction):
         dest="action",
         help="Output the path to the directory containing the migration scripts",
     )
+    add_argument(
+        schema_parser,
+        "--partitioned-events",
+        action="store_true",
+        help="When applying the schema, partition the events table by day, so that "
+        "old events can be dropped by partition",
+    )
 
 
 def configure_healthchecks_parser(
@@ -552,6 +612,15 @@ async def worker_(
     Values default to App.worker_defaults and then App.run_worker() defaults values.
     """
     queues = kwargs.get("queues")
+    processes = kwargs.pop("processes", None)
+    if processes and processes > 1:
+        print_stderr(
+            f"Launching {processes} worker processes on "
+            f"{'all queues' if not queues else ', '.join(queues)}"
+        )
+        await supervisor.Supervisor(app, processes=processes, **kwargs).run()
+        return
+
     print_stderr(
         f"Launching a worker on {'all queues' if not queues else ', '.join(queues)}"
     )
@@ -624,7 +693,7 @@ def configure_task(
     )
 
 
-async def schema(app: procrastinate.App, action: str):
+async def schema(app: procrastinate.App, action: str, partitioned_events: bool = False):
     """
     Apply SQL schema to the empty database. This won't work if the schema has already
     been applied.
@@ -633,7 +702,7 @@ async def schema(app: procrastinate.App, action: str):
     schema_manager = app.schema_manager
     if action == "apply":
         print_stderr("Applying schema")
-        await schema_manager.apply_schema_async()
+        await schema_manager.apply_schema_async(partitioned_events=partitioned_events)
         print_stderr("Done")
     elif action == "read":
         print(schema_manager.get_schema().strip())
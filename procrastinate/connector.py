@@ -1,25 +1,214 @@
 from __future__ import annotations
 
-from collections.abc import Awaitable, Iterable
+import collections
+import contextlib
+import functools
+import logging
+import math
+import time
+from collections.abc import Awaitable, Iterable, Iterator, Sequence
 from typing import Any, Callable, Protocol
 
 from typing_extensions import LiteralString
 
-from procrastinate import exceptions, utils
+from procrastinate import exceptions, sql, utils
+
+logger = logging.getLogger(__name__)
 
 Pool = Any
 Engine = Any
 
 LISTEN_TIMEOUT = 30.0
 
+#: Number of calls of each query kept by `QueryStats` to compute its percentiles
+QUERY_STATS_WINDOW = 1000
+
 
 class Notify(Protocol):
     def __call__(self, *, channel: str, payload: str) -> Awaitable[None]: ...
 
 
+class QueryInstrumentation(Protocol):
+    """
+    Called by the connectors after each query, with the name of the query (its key in
+    ``sql.queries``, or ``"query"`` for other queries), the time spent waiting for a
+    connection from the pool (None if the connector has no pool), the time spent
+    executing the query, the number of rows returned or affected (None if unknown)
+    and the exception raised, if any. Durations are in seconds.
+    """
+
+    def __call__(
+        self,
+        *,
+        query_name: str,
+        pool_wait: float | None,
+        duration: float,
+        row_count: int | None,
+        error: BaseException | None,
+    ) -> None: ...
+
+
+class QueryTimer:
+    """
+    Measures a query, see `BaseConnector.measure_query`.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.pool_wait: float | None = None
+        self.row_count: int | None = None
+
+    def acquired(self) -> None:
+        """
+        Mark the moment the connection was obtained from the pool: the time until
+        now is the pool wait, and the time after it is the execution time.
+        """
+        now = time.perf_counter()
+        self.pool_wait = now - self.started_at
+        self.started_at = now
+
+    def set_row_count(self, row_count: int) -> None:
+        # Drivers use -1 when the number of rows is not known
+        self.row_count = row_count if row_count >= 0 else None
+
+
+def _percentile(sorted_values: Sequence[float], percentile: float) -> float:
+    index = math.ceil(percentile / 100 * len(sorted_values)) - 1
+    return sorted_values[max(index, 0)]
+
+
+class QueryStats:
+    """
+    Default `QueryInstrumentation`: keeps, for each query, the number of calls and
+    errors, and the execution times and pool waits of its last ``window`` calls.
+    """
+
+    def __init__(self, window: int = QUERY_STATS_WINDOW):
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls: collections.Counter[str] = collections.Counter()
+        self.errors: collections.Counter[str] = collections.Counter()
+        self.durations: dict[str, collections.deque[float]] = {}
+        self.pool_waits: dict[str, collections.deque[float]] = {}
+
+    def __call__(
+        self,
+        *,
+        query_name: str,
+        pool_wait: float | None,
+        duration: float,
+        row_count: int | None,
+        error: BaseException | None,
+    ) -> None:
+        self.calls[query_name] += 1
+        if error is not None:
+            self.errors[query_name] += 1
+
+        if query_name not in self.durations:
+            self.durations[query_name] = collections.deque(maxlen=self.window)
+            self.pool_waits[query_name] = collections.deque(maxlen=self.window)
+        self.durations[query_name].append(duration)
+        if pool_wait is not None:
+            self.pool_waits[query_name].append(pool_wait)
+
+    def summary(self) -> dict[str, dict[str, float | int | None]]:
+        """
+        For each query: the number of ``calls`` and ``errors`` since the stats were
+        created (or reset), and the mean, 50th, 95th and 99th percentiles and maximum
+        of the execution time (``duration_*``) and of the pool wait
+        (``pool_wait_*``, None without pool) over the last calls, in seconds.
+        """
+        return {
+            query_name: {
+                "calls": calls,
+                "errors": self.errors[query_name],
+                **self._describe("duration", self.durations[query_name]),
+                **self._describe("pool_wait", self.pool_waits[query_name]),
+            }
+            for query_name, calls in sorted(self.calls.items())
+        }
+
+    @staticmethod
+    def _describe(
+        prefix: str, values: Iterable[float]
+    ) -> dict[str, float | int | None]:
+        sorted_values = sorted(values)
+        if not sorted_values:
+            return dict.fromkeys(
+                [f"{prefix}_{key}" for key in ("mean", "p50", "p95", "p99", "max")]
+            )
+        return {
+            f"{prefix}_mean": sum(sorted_values) / len(sorted_values),
+            f"{prefix}_p50": _percentile(sorted_values, 50),
+            f"{prefix}_p95": _percentile(sorted_values, 95),
+            f"{prefix}_p99": _percentile(sorted_values, 99),
+            f"{prefix}_max": sorted_values[-1],
+        }
+
+
 class BaseConnector:
     json_dumps: Callable | None = None
     json_loads: Callable | None = None
+    _pool_externally_set: bool = False
+
+    @property
+    def pool_externally_set(self) -> bool:
+        """
+        Whether the connector was opened with a pool created outside of
+        Procrastinate. Such a pool is not closed by the connector.
+        """
+        return self._pool_externally_set
+
+    @property
+    def queries_are_atomic(self) -> bool:
+        """
+        Whether `execute_queries_async` runs the queries in a single transaction:
+        if one of them fails, none of them is applied.
+        """
+        return False
+
+    @functools.cached_property
+    def instrumentation(self) -> QueryInstrumentation | None:
+        """
+        Called after each query (see `QueryInstrumentation`). Defaults to a
+        `QueryStats`. Set it to another callable to plug your own instrumentation,
+        or to None to disable it.
+        """
+        return QueryStats()
+
+    @contextlib.contextmanager
+    def measure_query(self, query: str) -> Iterator[QueryTimer]:
+        """
+        Measure the query executed in the block, and pass the measures to the
+        instrumentation. Connectors using a pool call `QueryTimer.acquired` once
+        they obtained a connection, and `QueryTimer.set_row_count` once the query
+        is executed.
+        """
+        timer = QueryTimer()
+        error: BaseException | None = None
+        try:
+            yield timer
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            instrumentation = self.instrumentation
+            if instrumentation is not None:
+                try:
+                    instrumentation(
+                        query_name=sql.query_names.get(query, "query"),
+                        pool_wait=timer.pool_wait,
+                        duration=time.perf_counter() - timer.started_at,
+                        row_count=timer.row_count,
+                        error=error,
+                    )
+                except Exception:
+                    logger.exception(
+                        "Error in the query instrumentation",
+                        extra={"action": "query_instrumentation_error"},
+                    )
 
     def get_sync_connector(self) -> BaseConnector:
         raise NotImplementedError
@@ -62,6 +251,21 @@ class BaseConnector:
     ) -> list[dict[str, Any]]:
         raise exceptions.SyncConnectorConfigurationError
 
+    async def execute_queries_async(
+        self, queries: Sequence[dict[str, Any]]
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Execute independent queries, and return the rows of each one. Each query is
+        a dict with the query under ``"query"``, and its arguments. Connectors that
+        support it send all the queries at once, and wait for a single round-trip
+        to the database (see `PsycopgConnector`), the other ones execute them one
+        after the other.
+
+        If a query fails, its error is raised. The other queries are not applied if
+        `queries_are_atomic` is True, otherwise some of them may have been.
+        """
+        return [await self.execute_query_all_async(**query) for query in queries]
+
     async def listen_notify(
         self,
         on_notification: Notify,
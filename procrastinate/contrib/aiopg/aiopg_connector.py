@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import functools
 import logging
 import re
-from collections.abc import AsyncGenerator, Coroutine, Iterable
+from collections.abc import AsyncGenerator, AsyncIterator, Coroutine, Iterable
 from typing import Any, Callable, TypeVar, cast
 
 import aiopg
@@ -14,7 +15,7 @@ import psycopg2.extras
 import psycopg2.sql
 from psycopg2.extras import Json, RealDictCursor
 
-from procrastinate import connector, exceptions, manager, sql, utils
+from procrastinate import connector, exceptions, manager, sql, tracing, utils
 from procrastinate.contrib.psycopg2 import psycopg2_connector
 
 logger = logging.getLogger(__name__)
@@ -253,16 +254,25 @@ class AiopgConnector(connector.BaseAsyncConnector):
     def _wrap_json(self, arguments: dict[str, Any]):
         return {key: self._wrap_value(value) for key, value in arguments.items()}
 
+    @contextlib.asynccontextmanager
+    async def _get_cursor(self, query: str) -> AsyncIterator[aiopg.Cursor]:
+        with self.measure_query(query) as timer:
+            with await self.pool.cursor() as cursor:
+                timer.acquired()
+                yield cursor
+                timer.set_row_count(cursor.rowcount)
+
     # Pools and single connections do not exactly share their cursor API:
     # - connection.cursor() is an async context manager (async with)
     # - pool.cursor() is a coroutine returning a sync context manage (with await)
     # Because of this, it's easier to have 2 distinct methods for executing from
     # a pool or from a connection
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     async def execute_query_async(self, query: str, **arguments: Any) -> None:
-        with await self.pool.cursor() as cursor:
+        async with self._get_cursor(query) as cursor:
             await cursor.execute(query, self._wrap_json(arguments))
 
     @wrap_exceptions()
@@ -273,22 +283,24 @@ class AiopgConnector(connector.BaseAsyncConnector):
         async with connection.cursor() as cursor:
             await cursor.execute(query, self._wrap_json(arguments))
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     async def execute_query_one_async(
         self, query: str, **arguments: Any
     ) -> dict[str, Any]:
-        with await self.pool.cursor() as cursor:
+        async with self._get_cursor(query) as cursor:
             await cursor.execute(query, self._wrap_json(arguments))
 
             return await cursor.fetchone()
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     async def execute_query_all_async(
         self, query: str, **arguments: Any
     ) -> list[dict[str, Any]]:
-        with await self.pool.cursor() as cursor:
+        async with self._get_cursor(query) as cursor:
             await cursor.execute(query, self._wrap_json(arguments))
 
             return await cursor.fetchall()
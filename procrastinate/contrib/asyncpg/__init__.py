@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+from .asyncpg_connector import AsyncpgConnector
+
+__all__ = ["AsyncpgConnector"]
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import re
+from collections.abc import AsyncGenerator, Iterable
+from typing import Any, Callable
+
+import asyncpg
+
+from procrastinate import connector, exceptions, manager, tracing, utils
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+
+# Types of the parameters that asyncpg only accepts as str
+TEXT_TYPES = frozenset({"text", "varchar", "bpchar", "name"})
+
+JSONB_VERSION = b"\x01"
+
+
+@functools.lru_cache(maxsize=512)
+def convert_query(query: str) -> tuple[str, tuple[str, ...]]:
+    """
+    Replace the ``%(name)s`` placeholders of the query by the ``$1`` placeholders
+    used by asyncpg. Return the converted query, and the name of each parameter
+    in order.
+    """
+    names: list[str] = []
+
+    def replace(match: re.Match) -> str:
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    return PLACEHOLDER.sub(replace, query).replace("%%", "%"), tuple(names)
+
+
+def get_row_count(status: str) -> int:
+    """Number of rows from a command status, like ``"UPDATE 3"``"""
+    count = status.rsplit(" ", 1)[-1]
+    return int(count) if count.isdigit() else -1
+
+
+@utils.async_context_decorator
+async def wrap_exceptions() -> AsyncGenerator[None, None]:
+    """
+    Wrap asyncpg errors as connector exceptions.
+
+    This decorator is expected to be used on coroutine functions only.
+    """
+    try:
+        yield
+    except asyncpg.UniqueViolationError as exc:
+        constraint_name = exc.constraint_name
+        queueing_lock = None
+        if constraint_name == manager.QUEUEING_LOCK_CONSTRAINT:
+            assert exc.detail
+            match = re.search(r"Key \((.*?)\)=\((.*?)\)", exc.detail)
+            assert match
+            column, queueing_lock = match.groups()
+            assert column == "queueing_lock"
+
+        raise exceptions.UniqueViolation(
+            constraint_name=constraint_name, queueing_lock=queueing_lock
+        )
+    except (asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+        raise exceptions.ConnectorException from exc
+
+
+class AsyncpgConnector(connector.BaseAsyncConnector):
+    def __init__(
+        self,
+        *,
+        json_dumps: Callable | None = None,
+        json_loads: Callable | None = None,
+        **kwargs: Any,
+    ):
+        """
+        Create a PostgreSQL connector using asyncpg. The connector uses an
+        ``asyncpg.Pool``, which is created internally, or set into the connector by
+        calling `App.open_async`.
+
+        All other arguments than ``json_dumps`` and ``json_loads`` are passed to
+        :py:func:`asyncpg.create_pool` (see asyncpg documentation__). If you use
+        PgBouncer in transaction or statement mode, pass ``statement_cache_size=0``,
+        as asyncpg prepares the statements it runs.
+
+        asyncpg has no synchronous API: used synchronously, the connector runs its
+        queries in the event loop of the pool. This is the case of the synchronous
+        tasks run by the worker, but not of a synchronous program: use a synchronous
+        connector there (see `sync-defer`).
+
+        .. __: https://magicstack.github.io/asyncpg/current/api/index.html#asyncpg.pool.create_pool
+
+        Parameters
+        ----------
+        json_dumps:
+            The JSON dumps function to use for serializing job arguments. Defaults to
+            `json.dumps`. Unused if the pool is externally created and set into the
+            connector through the ``App.open_async`` method.
+        json_loads:
+            The JSON loads function to use for deserializing job arguments. Defaults
+            to `json.loads`. Unused if the pool is externally created and set into
+            the connector through the ``App.open_async`` method.
+        init: ``Optional[Callable]``
+            Passed to asyncpg, and called after the JSON codecs are set on each new
+            connection.
+        max_size: ``int``
+            Passed to asyncpg. If value is 1, then listen/notify feature will be
+            deactivated.
+        """
+        self._pool: asyncpg.Pool | None = None
+        self._pool_externally_set: bool = False
+        self.json_dumps = json_dumps
+        self.json_loads = json_loads
+        self._pool_args = self._adapt_pool_args(kwargs, json_dumps, json_loads)
+        # Indexes of the parameters of each query that asyncpg only accepts as str
+        self._text_parameters: dict[str, frozenset[int]] = {}
+
+    def get_sync_connector(self) -> connector.BaseConnector:
+        return self
+
+    @staticmethod
+    def _adapt_pool_args(
+        pool_args: dict[str, Any],
+        json_dumps: Callable | None,
+        json_loads: Callable | None,
+    ) -> dict[str, Any]:
+        """
+        Adapt the pool args for ``asyncpg``, setting the JSON codecs on the
+        connections.
+        """
+        base_init = pool_args.pop("init", None)
+
+        dumps = json_dumps or json.dumps
+        loads = json_loads or json.loads
+
+        async def init(connection: asyncpg.Connection) -> None:
+            # The codecs use the binary format, as asyncpg can only encode the
+            # composite types (``procrastinate_job_to_defer_v2[]``) when all their
+            # fields are binary. The binary format of jsonb is its text, prefixed
+            # with a version number.
+            await connection.set_type_codec(
+                "json",
+                encoder=lambda value: dumps(value).encode(),
+                decoder=lambda data: loads(data.decode()),
+                schema="pg_catalog",
+                format="binary",
+            )
+            await connection.set_type_codec(
+                "jsonb",
+                encoder=lambda value: JSONB_VERSION + dumps(value).encode(),
+                decoder=lambda data: loads(data[1:].decode()),
+                schema="pg_catalog",
+                format="binary",
+            )
+            if base_init:
+                await base_init(connection)
+
+        return {**pool_args, "init": init}
+
+    @property
+    def pool(self) -> asyncpg.Pool:
+        if self._pool is None:  # Set by open_async
+            raise exceptions.AppNotOpen
+        return self._pool
+
+    async def open_async(self, pool: asyncpg.Pool | None = None) -> None:
+        if self._pool:
+            return
+        if pool:
+            self._pool_externally_set = True
+            self._pool = pool
+        else:
+            self._pool = await self._create_pool(self._pool_args)
+
+    @wrap_exceptions()
+    async def _create_pool(self, pool_args: dict[str, Any]) -> asyncpg.Pool:
+        return await asyncpg.create_pool(**pool_args)
+
+    @wrap_exceptions()
+    async def close_async(self) -> None:
+        """
+        Close the pool and awaits all connections to be released.
+        """
+        if not self._pool or self._pool_externally_set:
+            return
+        await self._pool.close()
+        self._pool = None
+
+    async def _get_arguments(
+        self, connection: asyncpg.Connection, query: str, arguments: dict[str, Any]
+    ) -> tuple[str, list[Any]]:
+        query, names = convert_query(query)
+        values = [arguments[name] for name in names]
+
+        # asyncpg checks that the values match the types of the parameters, where
+        # psycopg lets the server convert them (e.g. in ``%(nb_hours)s || 'HOUR'``)
+        text_parameters = self._text_parameters.get(query)
+        if text_parameters is None:
+            statement = await connection.prepare(query)
+            text_parameters = self._text_parameters[query] = frozenset(
+                index
+                for index, parameter in enumerate(statement.get_parameters())
+                if parameter.kind == "scalar" and parameter.name in TEXT_TYPES
+            )
+        for index in text_parameters:
+            if values[index] is not None and not isinstance(values[index], str):
+                values[index] = str(values[index])
+
+        return query, values
+
+    async def _execute(self, method: str, query: str, arguments: dict[str, Any]):
+        with self.measure_query(query) as timer:
+            async with self.pool.acquire() as connection:
+                timer.acquired()
+                values: list[Any] = []
+                if arguments:
+                    query, values = await self._get_arguments(
+                        connection, query, arguments
+                    )
+                result = await getattr(connection, method)(query, *values)
+
+            if method == "execute":
+                timer.set_row_count(get_row_count(result))
+            elif method == "fetch":
+                timer.set_row_count(len(result))
+            else:
+                timer.set_row_count(0 if result is None else 1)
+        return result
+
+    @tracing.traced_query
+    @wrap_exceptions()
+    async def execute_query_async(self, query: str, **arguments: Any) -> None:
+        await self._execute("execute", query, arguments)
+
+    @tracing.traced_query
+    @wrap_exceptions()
+    async def execute_query_one_async(
+        self, query: str, **arguments: Any
+    ) -> dict[str, Any]:
+        result = await self._execute("fetchrow", query, arguments)
+
+        if result is None:
+            raise exceptions.NoResult
+        return dict(result)
+
+    @tracing.traced_query
+    @wrap_exceptions()
+    async def execute_query_all_async(
+        self, query: str, **arguments: Any
+    ) -> list[dict[str, Any]]:
+        result = await self._execute("fetch", query, arguments)
+
+        return [dict(row) for row in result]
+
+    @wrap_exceptions()
+    async def listen_notify(
+        self, on_notification: connector.Notify, channels: Iterable[str]
+    ) -> None:
+        # We need to acquire a dedicated connection, and register the listeners on
+        # it.
+        if self.pool.get_max_size() == 1:
+            logger.warning(
+                "Listen/Notify capabilities disabled because maximum pool size"
+                "is set to 1",
+                extra={"action": "listen_notify_disabled"},
+            )
+            return
+
+        async def notify(
+            connection: asyncpg.Connection, pid: int, channel: str, payload: str
+        ) -> None:
+            await on_notification(channel=channel, payload=payload)
+
+        channels = list(channels)
+        while True:
+            async with self.pool.acquire() as connection:
+                try:
+                    for channel_name in channels:
+                        await connection.add_listener(channel_name, notify)
+                    await self._loop_notify(connection=connection)
+                finally:
+                    # asyncpg warns when a connection is released with listeners
+                    with contextlib.suppress(
+                        asyncpg.PostgresError, asyncpg.InterfaceError, OSError
+                    ):
+                        for channel_name in channels:
+                            await connection.remove_listener(channel_name, notify)
+
+    async def _loop_notify(
+        self,
+        connection: asyncpg.Connection,
+        timeout: float = connector.LISTEN_TIMEOUT,
+    ) -> None:
+        # asyncpg calls the listeners by itself: we only check regularly that the
+        # connection is alive. We'll leave this loop with a CancelledError, when we
+        # get cancelled
+        while True:
+            await asyncio.sleep(timeout)
+            try:
+                await connection.execute("SELECT 1")
+            except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError):
+                # Connection is dead, we need to reconnect
+                return
@@ -4,7 +4,7 @@ import json
 
 from django.apps import apps
 from django.contrib import admin
-from django.db.models import Prefetch, QuerySet
+from django.db.models import QuerySet
 from django.http.request import HttpRequest
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -32,6 +32,20 @@ class ProcrastinateEventInline(admin.StackedInline):
     model = models.ProcrastinateEvent
 
 
+def get_last_event(instance: models.ProcrastinateJob) -> dict | None:
+    """
+    Latest step of the job lifecycle, read from the timestamp columns of the job
+    rather than from its events, which may not all be recorded.
+    """
+    if instance.finished_at:
+        return {"type": instance.status, "at": instance.finished_at}
+    if instance.status == Status.DOING.value and instance.started_at:
+        return {"type": "started", "at": instance.started_at}
+    if instance.created_at:
+        return {"type": "deferred", "at": instance.created_at}
+    return None
+
+
 @admin.register(models.ProcrastinateJob)
 class ProcrastinateJobAdmin(admin.ModelAdmin):
     fields = [
@@ -45,6 +59,9 @@ class ProcrastinateJobAdmin(admin.ModelAdmin):
         "priority",
         "scheduled_at",
         "attempts",
+        "created_at",
+        "started_at",
+        "finished_at",
     ]
     list_display = [
         "pk",
@@ -84,18 +101,6 @@ class ProcrastinateJobAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         return False
 
-    def get_queryset(self, request):
-        return (
-            super()
-            .get_queryset(request)
-            .prefetch_related(
-                Prefetch(
-                    "procrastinateevent_set",
-                    queryset=models.ProcrastinateEvent.objects.order_by("-at"),
-                )
-            )
-        )
-
     @admin.display(description="Status")
     def pretty_status(self, instance: models.ProcrastinateJob) -> str:
         emoji = JOB_STATUS_EMOJI_MAPPING.get(instance.status, "")
@@ -122,7 +127,7 @@ class ProcrastinateJobAdmin(admin.ModelAdmin):
 
     @admin.display(description="Summary")
     def summary(self, instance: models.ProcrastinateJob) -> str:
-        if last_event := instance.procrastinateevent_set.first():  # type: ignore[attr-defined]
+        if last_event := get_last_event(instance):
             return mark_safe(
                 render_to_string(
                     "procrastinate/admin/summary.html",
@@ -14,7 +14,7 @@ from django.db import connections
 from django.db.backends.base.base import BaseDatabaseWrapper
 from typing_extensions import LiteralString
 
-from procrastinate import connector
+from procrastinate import connector, tracing
 from procrastinate.contrib.django import settings, utils
 
 if TYPE_CHECKING:
@@ -124,25 +124,31 @@ class DjangoConnector(connector.BaseAsyncConnector):
     def _wrap_json(self, arguments: dict[str, Any]) -> dict[str, Any]:
         return {key: self._wrap_value(value) for key, value in arguments.items()}
 
+    @tracing.traced_query
     @wrap_exceptions()
     def execute_query(self, query: LiteralString, **arguments: Any) -> None:
-        with self.connection.cursor() as cursor:
+        with self.measure_query(query) as timer, self.connection.cursor() as cursor:
             cursor.execute(query, self._wrap_json(arguments))
+            timer.set_row_count(cursor.rowcount)
 
+    @tracing.traced_query
     @wrap_exceptions()
     def execute_query_one(
         self, query: LiteralString, **arguments: Any
     ) -> dict[str, Any]:
-        with self.connection.cursor() as cursor:
+        with self.measure_query(query) as timer, self.connection.cursor() as cursor:
             cursor.execute(query, self._wrap_json(arguments))
+            timer.set_row_count(cursor.rowcount)
             return next(self._dictfetch(cursor))
 
+    @tracing.traced_query
     @wrap_exceptions()
     def execute_query_all(
         self, query: LiteralString, **arguments: Any
     ) -> list[dict[str, Any]]:
-        with self.connection.cursor() as cursor:
+        with self.measure_query(query) as timer, self.connection.cursor() as cursor:
             cursor.execute(query, self._wrap_json(arguments))
+            timer.set_row_count(cursor.rowcount)
             return list(self._dictfetch(cursor))
 
     async def listen_notify(
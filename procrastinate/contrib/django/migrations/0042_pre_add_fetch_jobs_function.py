@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_01_pre_add_fetch_jobs_function.sql"
+        ),
+    ]
+    name = "0042_pre_add_fetch_jobs_function"
+    dependencies = [
+        ("procrastinate", "0041_post_retry_failed_job"),
+    ]
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_02_pre_add_finish_jobs_functions.sql"
+        ),
+    ]
+    name = "0043_pre_add_finish_jobs_functions"
+    dependencies = [
+        ("procrastinate", "0042_pre_add_fetch_jobs_function"),
+    ]
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_04_pre_coalesce_job_inserted_notifications.sql"
+        ),
+    ]
+    name = "0045_pre_coalesce_job_inserted_notifications"
+    dependencies = [
+        ("procrastinate", "0044_pre_add_finish_job_and_fetch_next_function"),
+    ]
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_06_pre_add_event_settings.sql"
+        ),
+    ]
+    name = "0047_pre_add_event_settings"
+    dependencies = [
+        ("procrastinate", "0046_pre_statement_level_event_triggers"),
+    ]
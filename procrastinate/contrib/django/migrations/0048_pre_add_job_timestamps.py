@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_07_pre_add_job_timestamps.sql"
+        ),
+        migrations.AddField(
+            "procrastinatejob",
+            "created_at",
+            models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            "procrastinatejob",
+            "started_at",
+            models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            "procrastinatejob",
+            "finished_at",
+            models.DateTimeField(blank=True, null=True),
+        ),
+    ]
+    name = "0048_pre_add_job_timestamps"
+    dependencies = [
+        ("procrastinate", "0047_pre_add_event_settings"),
+    ]
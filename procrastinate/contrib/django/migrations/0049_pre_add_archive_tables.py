@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+import procrastinate.contrib.django.models
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_08_pre_add_archive_tables.sql"
+        ),
+        migrations.CreateModel(
+            name="ProcrastinateJobArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("queue_name", models.CharField(max_length=128)),
+                ("task_name", models.CharField(max_length=128)),
+                ("priority", models.IntegerField()),
+                ("lock", models.TextField(blank=True, null=True)),
+                ("args", models.JSONField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("todo", "todo"),
+                            ("doing", "doing"),
+                            ("succeeded", "succeeded"),
+                            ("failed", "failed"),
+                            ("cancelled", "cancelled"),
+                            ("aborted", "aborted"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("scheduled_at", models.DateTimeField(blank=True, null=True)),
+                ("attempts", models.IntegerField()),
+                ("queueing_lock", models.TextField(blank=True, null=True)),
+                ("abort_requested", models.BooleanField()),
+                ("worker_id", models.BigIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(blank=True, null=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "procrastinate_jobs_archive",
+                "managed": False,
+            },
+            bases=(
+                procrastinate.contrib.django.models.ProcrastinateReadOnlyModelMixin,
+                models.Model,
+            ),
+        ),
+        migrations.CreateModel(
+            name="ProcrastinateEventArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=models.CASCADE,
+                        to="procrastinate.procrastinatejobarchive",
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("deferred", "deferred"),
+                            ("started", "started"),
+                            ("deferred_for_retry", "deferred_for_retry"),
+                            ("failed", "failed"),
+                            ("succeeded", "succeeded"),
+                            ("cancelled", "cancelled"),
+                            ("abort_requested", "abort_requested"),
+                            ("aborted", "aborted"),
+                            ("scheduled", "scheduled"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "procrastinate_events_archive",
+                "get_latest_by": "at",
+                "managed": False,
+            },
+            bases=(
+                procrastinate.contrib.django.models.ProcrastinateReadOnlyModelMixin,
+                models.Model,
+            ),
+        ),
+    ]
+    name = "0049_pre_add_archive_tables"
+    dependencies = [
+        ("procrastinate", "0048_pre_add_job_timestamps"),
+    ]
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_09_pre_add_events_partitioning.sql"
+        ),
+    ]
+    name = "0050_pre_add_events_partitioning"
+    dependencies = [
+        ("procrastinate", "0049_pre_add_archive_tables"),
+    ]
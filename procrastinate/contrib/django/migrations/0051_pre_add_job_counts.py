@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(name="03.05.00_10_pre_add_job_counts.sql"),
+    ]
+    name = "0051_pre_add_job_counts"
+    dependencies = [
+        ("procrastinate", "0050_pre_add_events_partitioning"),
+    ]
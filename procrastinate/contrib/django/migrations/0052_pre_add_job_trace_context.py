@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_11_pre_add_job_trace_context.sql"
+        ),
+        migrations.AddField(
+            "procrastinatejob",
+            "trace_context",
+            models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            "procrastinatejobarchive",
+            "trace_context",
+            models.JSONField(blank=True, null=True),
+        ),
+    ]
+    name = "0052_pre_add_job_trace_context"
+    dependencies = [
+        ("procrastinate", "0051_pre_add_job_counts"),
+    ]
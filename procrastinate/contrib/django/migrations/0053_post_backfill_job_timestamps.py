@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_50_post_backfill_job_timestamps.sql"
+        ),
+    ]
+    name = "0053_post_backfill_job_timestamps"
+    dependencies = [
+        ("procrastinate", "0052_pre_add_job_trace_context"),
+    ]
@@ -97,6 +97,10 @@ class ProcrastinateJob(ProcrastinateReadOnlyModelMixin, models.Model):
     worker = models.ForeignKey(
         ProcrastinateWorker, on_delete=models.SET_NULL, blank=True, null=True
     )
+    created_at = models.DateTimeField(blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    trace_context = models.JSONField(blank=True, null=True)
 
     objects = ProcrastinateReadOnlyManager()
 
@@ -118,6 +122,10 @@ class ProcrastinateJob(ProcrastinateReadOnlyModelMixin, models.Model):
             attempts=self.attempts,
             abort_requested=self.abort_requested,
             queueing_lock=self.queueing_lock,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            trace_context=self.trace_context,
         )
 
     def __str__(self) -> str:
@@ -152,6 +160,76 @@ class ProcrastinateEvent(ProcrastinateReadOnlyModelMixin, models.Model):
         return f"Event {self.id} - Job {self.job_id}: {self.type} at {self.at}"  # type: ignore
 
 
+class ProcrastinateJobArchive(ProcrastinateReadOnlyModelMixin, models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    queue_name = models.CharField(max_length=128)
+    task_name = models.CharField(max_length=128)
+    priority = models.IntegerField()
+    lock = models.TextField(blank=True, null=True)
+    args = models.JSONField()
+    status = models.CharField(
+        max_length=32, choices=[(e, e) for e in ProcrastinateJob.STATUSES]
+    )
+    scheduled_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.IntegerField()
+    queueing_lock = models.TextField(blank=True, null=True)
+    abort_requested = models.BooleanField()
+    worker_id = models.BigIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    trace_context = models.JSONField(blank=True, null=True)
+
+    objects = ProcrastinateReadOnlyManager()
+
+    class Meta:  # type: ignore
+        managed = False
+        db_table = "procrastinate_jobs_archive"
+
+    @property
+    def procrastinate_job(self) -> jobs.Job:
+        return jobs.Job(
+            id=self.id,
+            queue=self.queue_name,
+            task_name=self.task_name,
+            task_kwargs=self.args,
+            priority=self.priority,
+            lock=self.lock,
+            status=self.status,
+            scheduled_at=self.scheduled_at,
+            attempts=self.attempts,
+            abort_requested=self.abort_requested,
+            queueing_lock=self.queueing_lock,
+            worker_id=self.worker_id,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            trace_context=self.trace_context,
+        )
+
+    def __str__(self) -> str:
+        return self.procrastinate_job.call_string
+
+
+class ProcrastinateEventArchive(ProcrastinateReadOnlyModelMixin, models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    job = models.ForeignKey(ProcrastinateJobArchive, on_delete=models.CASCADE)
+    type = models.CharField(
+        max_length=32, choices=[(e, e) for e in ProcrastinateEvent.TYPES]
+    )
+    at = models.DateTimeField(blank=True, null=True)
+
+    objects = ProcrastinateReadOnlyManager()
+
+    class Meta:  # type: ignore
+        managed = False
+        db_table = "procrastinate_events_archive"
+        get_latest_by = "at"
+
+    def __str__(self) -> str:
+        return f"Event {self.id} - Job {self.job_id}: {self.type} at {self.at}"  # type: ignore
+
+
 class ProcrastinatePeriodicDefer(ProcrastinateReadOnlyModelMixin, models.Model):
     id = models.BigAutoField(primary_key=True)
     task_name = models.CharField(max_length=128)
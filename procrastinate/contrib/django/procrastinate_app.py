@@ -44,6 +44,7 @@ class FutureApp(blueprints.Blueprint):
             "run_worker_async",
             "run_worker",
             "schema_manager",
+            "query_stats",
             "with_connector",
             "replace_connector",
             "will_configure_task",
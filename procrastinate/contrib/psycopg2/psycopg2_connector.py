@@ -12,7 +12,7 @@ import psycopg2.errors
 import psycopg2.pool
 from psycopg2.extras import Json, RealDictCursor
 
-from procrastinate import connector, exceptions, manager
+from procrastinate import connector, exceptions, manager, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -205,29 +205,38 @@ class Psycopg2Connector(connector.BaseConnector):
             connection.commit()
             self.pool.putconn(connection)
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     def execute_query(self, query: str, **arguments: Any) -> None:
-        with self._connection() as connection:
+        with self.measure_query(query) as timer, self._connection() as connection:
+            timer.acquired()
             with connection.cursor() as cursor:
                 cursor.execute(query, self._wrap_json(arguments))
+                timer.set_row_count(cursor.rowcount)
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     def execute_query_one(self, query: str, **arguments: Any) -> dict[str, Any]:
-        with self._connection() as connection:
+        with self.measure_query(query) as timer, self._connection() as connection:
+            timer.acquired()
             with connection.cursor() as cursor:
                 cursor.execute(query, self._wrap_json(arguments))
+                timer.set_row_count(cursor.rowcount)
                 # psycopg2's type say it returns a tuple, but it actually returns a
                 # dict when configured with RealDictCursor
                 return cursor.fetchone()  # type: ignore
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     def execute_query_all(self, query: str, **arguments: Any) -> dict[str, Any]:
-        with self._connection() as connection:
+        with self.measure_query(query) as timer, self._connection() as connection:
+            timer.acquired()
             with connection.cursor() as cursor:
                 cursor.execute(query, self._wrap_json(arguments))
+                timer.set_row_count(cursor.rowcount)
                 # psycopg2's type say it returns a tuple, but it actually returns a
                 # dict when configured with RealDictCursor
                 return cursor.fetchall()  # type: ignore
@@ -11,7 +11,7 @@ import sqlalchemy
 import sqlalchemy.exc
 from psycopg2.extras import Json
 
-from procrastinate import connector, exceptions, manager
+from procrastinate import connector, exceptions, manager, tracing
 
 
 @contextlib.contextmanager
@@ -159,35 +159,44 @@ class SQLAlchemyPsycopg2Connector(connector.BaseConnector):
     def _wrap_json(self, arguments: dict[str, Any]):
         return {key: self._wrap_value(value) for key, value in arguments.items()}
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     def execute_query(self, query: str, **arguments: Any) -> None:
-        with self.engine.begin() as connection:
-            connection.exec_driver_sql(
+        with self.measure_query(query) as timer, self.engine.begin() as connection:
+            timer.acquired()
+            cursor_result = connection.exec_driver_sql(
                 PERCENT_PATTERN.sub("%%", query), self._wrap_json(arguments)
             )
+            timer.set_row_count(cursor_result.rowcount)
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     def execute_query_one(self, query: str, **arguments: Any) -> Mapping[str, Any]:
-        with self.engine.begin() as connection:
+        with self.measure_query(query) as timer, self.engine.begin() as connection:
+            timer.acquired()
             cursor_result = connection.exec_driver_sql(
                 PERCENT_PATTERN.sub("%%", query), self._wrap_json(arguments)
             )
+            timer.set_row_count(cursor_result.rowcount)
             mapping = cursor_result.mappings()
             # psycopg2's type say it returns a tuple, but it actually returns a
             # dict when configured with RealDictCursor
             return mapping.fetchone()  # type: ignore
 
+    @tracing.traced_query
     @wrap_exceptions()
     @wrap_query_exceptions
     def execute_query_all(
         self, query: str, **arguments: Any
     ) -> list[Mapping[str, Any]]:
-        with self.engine.begin() as connection:
+        with self.measure_query(query) as timer, self.engine.begin() as connection:
+            timer.acquired()
             cursor_result = connection.exec_driver_sql(
                 PERCENT_PATTERN.sub("%%", query), self._wrap_json(arguments)
             )
+            timer.set_row_count(cursor_result.rowcount)
             mapping = cursor_result.mappings()
             # psycopg2's type say it returns a tuple, but it actually returns a
             # dict when configured with RealDictCursor
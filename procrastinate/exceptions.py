@@ -114,6 +114,14 @@ class SyncConnectorConfigurationError(ProcrastinateException):
     """
 
 
+class ExternalPoolNotSupported(ProcrastinateException):
+    """
+    Worker processes cannot be forked when the app was opened with a pool created
+    outside of Procrastinate, as the pool cannot be closed before forking. Open
+    the app without passing a pool to run several worker processes.
+    """
+
+
 class CallerModuleUnknown(ProcrastinateException):
     """
     Unable to determine the module name of the caller.
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import concurrent.futures.process
+import functools
+import logging
+import multiprocessing
+from collections.abc import Iterable
+from typing import Any, Callable
+
+from asgiref import sync
+
+from procrastinate import job_context, utils
+from procrastinate import tasks as tasks_module
+
+logger = logging.getLogger(__name__)
+
+#: Name of the executor running synchronous tasks in a pool of processes
+PROCESS_EXECUTOR = "process"
+
+
+class ThreadPools:
+    """
+    Dedicated thread pools running synchronous tasks. Tasks run in the pool named
+    after their executor, or in the default pool. Without a default pool size,
+    the default executor of the event loop is used.
+    """
+
+    def __init__(self, default_size: int | None, sizes: dict[str, int]):
+        if PROCESS_EXECUTOR in sizes:
+            raise ValueError(
+                f"{PROCESS_EXECUTOR!r} is reserved for the process pool and cannot "
+                "be used as a thread pool name"
+            )
+        self.default_size = default_size
+        self.sizes = sizes
+        self._default_executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._executors: dict[str, concurrent.futures.ThreadPoolExecutor] = {}
+
+    def start(self) -> None:
+        if self.default_size:
+            self._default_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.default_size, thread_name_prefix="procrastinate"
+            )
+        self._executors = {
+            name: concurrent.futures.ThreadPoolExecutor(
+                max_workers=size, thread_name_prefix=f"procrastinate-{name}"
+            )
+            for name, size in self.sizes.items()
+        }
+
+    async def shutdown(self) -> None:
+        executors = list(self._executors.values())
+        if self._default_executor:
+            executors.append(self._default_executor)
+        for executor in executors:
+            await utils.sync_to_async(executor.shutdown, wait=True)
+        self._default_executor = None
+        self._executors = {}
+
+    def get_executor(
+        self, name: str | None
+    ) -> concurrent.futures.ThreadPoolExecutor | None:
+        if name is not None and name in self._executors:
+            return self._executors[name]
+        return self._default_executor
+
+    async def run(self, task: tasks_module.Task, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run ``task(*args, **kwargs)`` in the thread pool of the task.
+        """
+        return await self.run_in_pool(task.executor, task, *args, **kwargs)
+
+    async def run_in_pool(
+        self, name: str | None, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """
+        Run ``func(*args, **kwargs)`` in the thread pool with the given name.
+        """
+        return await sync.sync_to_async(
+            func, thread_sensitive=False, executor=self.get_executor(name)
+        )(*args, **kwargs)
+
+
+class ProcessPool:
+    """
+    Runs synchronous tasks in a pool of child processes, so that CPU-bound tasks
+    can use several cores instead of being serialised by the GIL of the worker.
+
+    Child processes are spawned (not forked) and import the given modules when they
+    start. Tasks are then looked up in the child processes by their dotted path, so
+    they need to be defined at the top level of a module. Task arguments, results,
+    exceptions and the additional context must be picklable.
+    """
+
+    def __init__(self, size: int | None, import_paths: Iterable[str]):
+        self.size = size
+        self.import_paths = list(import_paths)
+        self._executor: concurrent.futures.ProcessPoolExecutor | None = None
+        self._manager: Any = None
+        self._abort_requests: Any = None
+        self._abort_requests_writer: concurrent.futures.ThreadPoolExecutor | None = None
+        self._aborted_job_ids: set[int] = set()
+
+    async def start(self) -> None:
+        mp_context = multiprocessing.get_context("spawn")
+        # Abort requests are shared with the child processes through a manager,
+        # so that JobContext.should_abort works for jobs running in the pool.
+        # Starting the manager waits for its process, and each access to the
+        # shared dict is a round-trip to it, so they don't run on the event loop.
+        # The writes go through a single thread, so that they stay in order.
+        self._manager = await utils.sync_to_async(mp_context.Manager)
+        self._abort_requests = await utils.sync_to_async(self._manager.dict)
+        self._abort_requests_writer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="procrastinate-abort-requests"
+        )
+        self._executor = self._create_executor()
+        logger.debug(
+            "Started process pool",
+            extra={"action": "start_process_pool", "size": self.size},
+        )
+
+    def _create_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=utils.import_all,
+            initargs=(self.import_paths,),
+        )
+
+    def _replace_broken_executor(
+        self, executor: concurrent.futures.ProcessPoolExecutor
+    ) -> None:
+        # A broken executor fails all its jobs, and can't run new ones. The
+        # executor is replaced only once, by the first of its failed jobs.
+        if self._executor is not executor:
+            return
+        logger.error(
+            "A child process of the process pool terminated abruptly, the jobs "
+            "running in the pool failed. Restarting the pool.",
+            extra={"action": "restart_process_pool"},
+        )
+        executor.shutdown(wait=False)
+        self._executor = self._create_executor()
+
+    async def shutdown(self) -> None:
+        if self._executor:
+            await utils.sync_to_async(self._executor.shutdown, wait=True)
+            self._executor = None
+        if self._abort_requests_writer:
+            await utils.sync_to_async(self._abort_requests_writer.shutdown, wait=True)
+            self._abort_requests_writer = None
+        if self._manager:
+            await utils.sync_to_async(self._manager.shutdown)
+            self._manager = None
+        self._aborted_job_ids = set()
+        logger.debug("Stopped process pool", extra={"action": "stop_process_pool"})
+
+    def request_abort(self, job_id: int, reason: job_context.AbortReason) -> None:
+        assert self._abort_requests_writer, "The process pool is not started"
+        self._aborted_job_ids.add(job_id)
+        self._abort_requests_writer.submit(
+            self._abort_requests.__setitem__, job_id, reason.value
+        )
+
+    async def run(self, task: tasks_module.Task, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run ``task(*args, **kwargs)`` in a child process. A `JobContext` in
+        ``args`` is sent without its app and abort callback, which are rebuilt
+        in the child process.
+
+        If a child process terminates abruptly (e.g. killed, or crashed), the
+        jobs running in the pool raise ``BrokenProcessPool``, and the pool is
+        restarted for the next jobs.
+        """
+        executor = self._executor
+        assert executor, "The process pool is not started"
+        job_ids = set()
+        child_args = []
+        for arg in args:
+            if isinstance(arg, job_context.JobContext):
+                job_ids.add(arg.job.id)
+                arg = arg.evolve(app=None, abort_reason=None)
+            child_args.append(arg)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                executor,
+                functools.partial(
+                    _run_task,
+                    task.full_path,
+                    self._abort_requests,
+                    *child_args,
+                    **kwargs,
+                ),
+            )
+        except concurrent.futures.process.BrokenProcessPool:
+            self._replace_broken_executor(executor)
+            raise
+        finally:
+            for job_id in job_ids & self._aborted_job_ids:
+                self._aborted_job_ids.discard(job_id)
+                if self._abort_requests_writer:
+                    self._abort_requests_writer.submit(
+                        self._abort_requests.pop, job_id, None
+                    )
+
+
+def _get_abort_reason(
+    abort_requests: Any, job_id: int
+) -> job_context.AbortReason | None:
+    reason = abort_requests.get(job_id)
+    return job_context.AbortReason(reason) if reason else None
+
+
+def _run_task(task_path: str, abort_requests: Any, *args: Any, **kwargs: Any) -> Any:
+    """
+    Entrypoint of the child processes
+    """
+    task = utils.load_from_path(task_path, tasks_module.Task)
+    task_args = [
+        arg.evolve(
+            app=task.blueprint,
+            abort_reason=functools.partial(
+                _get_abort_reason, abort_requests, arg.job.id
+            ),
+        )
+        if isinstance(arg, job_context.JobContext)
+        else arg
+        for arg in args
+    ]
+    return task.func(*task_args, **kwargs)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import contextlib
 import datetime
 import functools
 import logging
@@ -9,7 +10,7 @@ from typing import TYPE_CHECKING, Any, TypedDict, Union
 import attr
 from typing_extensions import Literal
 
-from procrastinate import types
+from procrastinate import tracing, types
 
 if TYPE_CHECKING:
     from procrastinate import manager
@@ -25,7 +26,8 @@ cached_property = getattr(functools, "cached_property", property)
 
 class JobInserted(TypedDict):
     type: Literal["job_inserted"]
-    job_id: int
+    #: Number of jobs inserted in the queue(s) of the channel by a single statement
+    job_count: int
 
 
 class AbortJobRequested(TypedDict):
@@ -100,6 +102,14 @@ class Job:
     abort_requested: bool = False
     #: ID of the worker that is processing the job
     worker_id: int | None = None
+    #: Date and time at which the job was created.
+    created_at: datetime.datetime | None = None
+    #: Date and time at which the job last started running.
+    started_at: datetime.datetime | None = None
+    #: Date and time at which the job reached a final status.
+    finished_at: datetime.datetime | None = None
+    #: Trace context of the span that deferred the job, if tracing is enabled.
+    trace_context: dict[str, str] | None = None
 
     @classmethod
     def from_row(cls, row: dict[str, Any]) -> Job:
@@ -116,6 +126,10 @@ class Job:
             attempts=row["attempts"],
             abort_requested=row.get("abort_requested", False),
             worker_id=row.get("worker_id"),
+            created_at=row.get("created_at"),
+            started_at=row.get("started_at"),
+            finished_at=row.get("finished_at"),
+            trace_context=row.get("trace_context"),
         )
 
     def asdict(self) -> dict[str, Any]:
@@ -124,8 +138,9 @@ class Job:
     def log_context(self) -> types.JSONDict:
         context = self.asdict()
 
-        if context["scheduled_at"]:
-            context["scheduled_at"] = context["scheduled_at"].isoformat()
+        for key in ("scheduled_at", "created_at", "started_at", "finished_at"):
+            if context[key]:
+                context[key] = context[key].isoformat()
 
         context["call_string"] = self.call_string
         return context
@@ -156,7 +171,23 @@ class JobDeferrer:
         final_kwargs = self.job.task_kwargs.copy()
         final_kwargs.update(task_kwargs)
 
-        return self.job.evolve(task_kwargs=final_kwargs)
+        return self.job.evolve(task_kwargs=final_kwargs, trace_context=tracing.inject())
+
+    def _defer_span(self, job_count: int) -> contextlib.AbstractContextManager[Any]:
+        """
+        Span of the deferral, whose trace context is stored in the deferred jobs
+        """
+        attributes: dict[str, Any] = {
+            "messaging.system": "procrastinate",
+            "messaging.operation.type": "send",
+            "messaging.destination.name": self.job.queue,
+            "procrastinate.task.name": self.job.task_name,
+        }
+        if job_count != 1:
+            attributes["messaging.batch.message_count"] = job_count
+        return tracing.start_span(
+            f"defer {self.job.task_name}", kind="producer", attributes=attributes
+        )
 
     def _log_before_defer_jobs(self, jobs: list[Job]) -> None:
         job_count = len(jobs)
@@ -183,21 +214,24 @@ class JobDeferrer:
         See `Task.defer_async` for details.
         """
         # Make sure this code stays synchronized with .defer()
-        job = self.make_new_job(**task_kwargs)
-        self._log_before_defer_jobs(jobs=[job])
-        job = await self.job_manager.defer_job_async(job=job)
-        self._log_after_defer_jobs(jobs=[job])
-        assert job.id  # for mypy
+        with self._defer_span(job_count=1):
+            job = self.make_new_job(**task_kwargs)
+            self._log_before_defer_jobs(jobs=[job])
+            job = await self.job_manager.defer_job_async(job=job)
+            self._log_after_defer_jobs(jobs=[job])
+            assert job.id  # for mypy
+            tracing.set_attributes({"messaging.message.id": str(job.id)})
         return job.id
 
     async def batch_defer_async(self, *task_kwargs: types.JSONDict) -> list[int]:
         """
         See `Task.batch_defer_async` for details.
         """
-        jobs = [self.make_new_job(**kwargs) for kwargs in task_kwargs]
-        self._log_before_defer_jobs(jobs=jobs)
-        jobs = await self.job_manager.batch_defer_jobs_async(jobs=jobs)
-        self._log_after_defer_jobs(jobs=jobs)
+        with self._defer_span(job_count=len(task_kwargs)):
+            jobs = [self.make_new_job(**kwargs) for kwargs in task_kwargs]
+            self._log_before_defer_jobs(jobs=jobs)
+            jobs = await self.job_manager.batch_defer_jobs_async(jobs=jobs)
+            self._log_after_defer_jobs(jobs=jobs)
 
         job_ids: list[int] = []
         for job in jobs:
@@ -210,21 +244,24 @@ class JobDeferrer:
         See `Task.defer` for details.
         """
         # Make sure this code stays synchronized with .defer_async()
-        job = self.make_new_job(**task_kwargs)
-        self._log_before_defer_jobs(jobs=[job])
-        job = self.job_manager.defer_job(job=job)
-        self._log_after_defer_jobs(jobs=[job])
-        assert job.id  # for mypy
+        with self._defer_span(job_count=1):
+            job = self.make_new_job(**task_kwargs)
+            self._log_before_defer_jobs(jobs=[job])
+            job = self.job_manager.defer_job(job=job)
+            self._log_after_defer_jobs(jobs=[job])
+            assert job.id  # for mypy
+            tracing.set_attributes({"messaging.message.id": str(job.id)})
         return job.id
 
     def batch_defer(self, *task_kwargs: types.JSONDict) -> list[int]:
         """
         See `Task.batch_defer` for details.
         """
-        jobs = [self.make_new_job(**kwargs) for kwargs in task_kwargs]
-        self._log_before_defer_jobs(jobs=jobs)
-        jobs = self.job_manager.batch_defer_jobs(jobs=jobs)
-        self._log_after_defer_jobs(jobs=jobs)
+        with self._defer_span(job_count=len(task_kwargs)):
+            jobs = [self.make_new_job(**kwargs) for kwargs in task_kwargs]
+            self._log_before_defer_jobs(jobs=jobs)
+            jobs = self.job_manager.batch_defer_jobs(jobs=jobs)
+            self._log_after_defer_jobs(jobs=jobs)
 
         job_ids: list[int] = []
         for job in jobs:
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import json
 import logging
 import warnings
-from collections.abc import Awaitable, Iterable
-from typing import Any, NoReturn, Protocol
+from collections.abc import AsyncIterator, Awaitable, Iterable
+from typing import Any, Callable, NoReturn, Protocol
 
-from procrastinate import connector, exceptions, sql, types, utils
+from procrastinate import connector, exceptions, sql, tracing, types
 from procrastinate import jobs as jobs_module
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,12 @@ QUEUEING_LOCK_CONSTRAINT = "procrastinate_jobs_queueing_lock_idx_v1"
 # We can remove this in the next minor version.
 QUEUEING_LOCK_CONSTRAINT_LEGACY = "procrastinate_jobs_queueing_lock_idx"
 
+# Queue name of the event settings applying to all the queues
+ALL_QUEUES = "*"
+
+#: Number of jobs fetched at once by `JobManager.iter_jobs_async`
+LIST_JOBS_PAGE_SIZE = 1000
+
 
 class NotificationCallback(Protocol):
     def __call__(
@@ -25,6 +32,22 @@ class NotificationCallback(Protocol):
     ) -> Awaitable[None]: ...
 
 
+def get_final_statuses(
+    include_failed: bool | None = False,
+    include_cancelled: bool | None = False,
+    include_aborted: bool | None = False,
+) -> list[str]:
+    # We only consider succeeded jobs by default
+    statuses = [jobs_module.Status.SUCCEEDED.value]
+    if include_failed:
+        statuses.append(jobs_module.Status.FAILED.value)
+    if include_cancelled:
+        statuses.append(jobs_module.Status.CANCELLED.value)
+    if include_aborted:
+        statuses.append(jobs_module.Status.ABORTED.value)
+    return statuses
+
+
 def get_channel_for_queues(queues: Iterable[str] | None = None) -> Iterable[str]:
     if queues is None:
         return ["procrastinate_any_queue_v1"]
@@ -115,6 +138,7 @@ class JobManager:
                     queueing_lock=job.queueing_lock,
                     args=job.task_kwargs,
                     scheduled_at=job.scheduled_at,
+                    trace_context=job.trace_context,
                 )
                 for job in jobs
             ],
@@ -188,9 +212,10 @@ class JobManager:
             None if no suitable job was found. The job otherwise.
         """
 
-        row = await self.connector.execute_query_one_async(
-            query=sql.queries["fetch_job"], queues=queues, worker_id=worker_id
-        )
+        with tracing.start_span("fetch job", attributes=self._fetch_attributes(queues)):
+            row = await self.connector.execute_query_one_async(
+                query=sql.queries["fetch_job"], queues=queues, worker_id=worker_id
+            )
 
         # fetch_tasks will always return a row, but is there's no relevant
         # value, it will all be None
@@ -199,6 +224,50 @@ class JobManager:
 
         return jobs_module.Job.from_row(row)
 
+    async def fetch_jobs(
+        self, queues: Iterable[str] | None, worker_id: int, limit: int = 1
+    ) -> list[jobs_module.Job]:
+        """
+        Select up to ``limit`` jobs in the queue, and mark them as doing, using
+        a single query. Jobs are selected with the same priority and lock rules
+        as `fetch_job`.
+
+        Parameters
+        ----------
+        queues:
+            Filter by job queue names
+        worker_id:
+            The ID of the worker fetching the jobs
+        limit:
+            Maximum number of jobs to fetch
+
+        Returns
+        -------
+        :
+            The fetched jobs, highest priority first. The list is empty if no
+            suitable job was found.
+        """
+        with tracing.start_span(
+            "fetch jobs",
+            attributes={**self._fetch_attributes(queues), "procrastinate.limit": limit},
+        ):
+            rows = await self.connector.execute_query_all_async(
+                query=sql.queries["fetch_jobs"],
+                queues=queues,
+                worker_id=worker_id,
+                limit=limit,
+            )
+            tracing.set_attributes({"messaging.batch.message_count": len(rows)})
+
+        return [jobs_module.Job.from_row(row) for row in rows]
+
+    def _fetch_attributes(self, queues: Iterable[str] | None) -> dict[str, Any]:
+        return {
+            "messaging.system": "procrastinate",
+            "messaging.operation.type": "receive",
+            "procrastinate.queues": list(queues or []),
+        }
+
     async def get_stalled_jobs(
         self,
         nb_seconds: int | None = None,
@@ -258,7 +327,9 @@ class JobManager:
         include_failed: bool | None = False,
         include_cancelled: bool | None = False,
         include_aborted: bool | None = False,
-    ) -> None:
+        chunk_size: int | None = None,
+        chunk_pause: float = 0,
+    ) -> int:
         """
         Delete jobs that have reached a final state (``succeeded``, ``failed``,
         ``cancelled``, or ``aborted``). By default, only considers jobs that have
@@ -276,23 +347,301 @@ class JobManager:
             If ``True``, also consider cancelled jobs. ``False`` by default.
         include_aborted:
             If ``True``, also consider aborted jobs. ``False`` by default.
+        chunk_size:
+            If set, delete the jobs (and their events) in several transactions of at
+            most ``chunk_size`` jobs, oldest first, so that deleting a large number
+            of jobs doesn't hold locks for a long time. By default, all the jobs are
+            deleted at once. Must be at least ``1``.
+        chunk_pause:
+            Time to wait, in seconds, between two chunks. ``0`` by default.
+
+        Returns
+        -------
+        :
+            The number of deleted jobs
         """
-        # We only consider finished jobs by default
-        statuses = [jobs_module.Status.SUCCEEDED.value]
-        if include_failed:
-            statuses.append(jobs_module.Status.FAILED.value)
-        if include_cancelled:
-            statuses.append(jobs_module.Status.CANCELLED.value)
-        if include_aborted:
-            statuses.append(jobs_module.Status.ABORTED.value)
+        return await self._process_old_jobs(
+            query="delete_old_jobs",
+            verb="Deleted",
+            nb_hours=nb_hours,
+            queue=queue,
+            statuses=get_final_statuses(
+                include_failed=include_failed,
+                include_cancelled=include_cancelled,
+                include_aborted=include_aborted,
+            ),
+            chunk_size=chunk_size,
+            chunk_pause=chunk_pause,
+        )
 
-        await self.connector.execute_query_async(
-            query=sql.queries["delete_old_jobs"],
+    async def archive_old_jobs(
+        self,
+        nb_hours: int,
+        queue: str | None = None,
+        include_failed: bool | None = False,
+        include_cancelled: bool | None = False,
+        include_aborted: bool | None = False,
+        chunk_size: int | None = None,
+        chunk_pause: float = 0,
+    ) -> int:
+        """
+        Move jobs that have reached a final state, and their events, to the
+        ``procrastinate_jobs_archive`` and ``procrastinate_events_archive`` tables.
+        By default, only considers jobs that have succeeded. Archived jobs are not
+        seen by the workers anymore, but can still be listed.
+
+        Parameters
+        ----------
+        nb_hours:
+            Consider jobs that been in a final state for more than ``nb_hours``
+        queue:
+            Filter by job queue name
+        include_failed:
+            If ``True``, also consider errored jobs. ``False`` by default
+        include_cancelled:
+            If ``True``, also consider cancelled jobs. ``False`` by default.
+        include_aborted:
+            If ``True``, also consider aborted jobs. ``False`` by default.
+        chunk_size:
+            If set, archive the jobs in several transactions of at most
+            ``chunk_size`` jobs, oldest first. By default, all the jobs are archived
+            at once. Must be at least ``1``.
+        chunk_pause:
+            Time to wait, in seconds, between two chunks. ``0`` by default.
+
+        Returns
+        -------
+        :
+            The number of archived jobs
+        """
+        return await self._process_old_jobs(
+            query="archive_old_jobs",
+            verb="Archived",
             nb_hours=nb_hours,
             queue=queue,
-            statuses=statuses,
+            statuses=get_final_statuses(
+                include_failed=include_failed,
+                include_cancelled=include_cancelled,
+                include_aborted=include_aborted,
+            ),
+            chunk_size=chunk_size,
+            chunk_pause=chunk_pause,
+        )
+
+    async def delete_archived_jobs(
+        self,
+        nb_hours: int,
+        queue: str | None = None,
+        chunk_size: int | None = None,
+        chunk_pause: float = 0,
+    ) -> int:
+        """
+        Delete jobs from the ``procrastinate_jobs_archive`` table, along with their
+        events in ``procrastinate_events_archive``, whatever their status.
+
+        Parameters
+        ----------
+        nb_hours:
+            Consider archived jobs that have finished more than ``nb_hours`` ago
+        queue:
+            Filter by job queue name
+        chunk_size:
+            If set, delete the jobs in several transactions of at most
+            ``chunk_size`` jobs, oldest first. By default, all the jobs are deleted
+            at once. Must be at least ``1``.
+        chunk_pause:
+            Time to wait, in seconds, between two chunks. ``0`` by default.
+
+        Returns
+        -------
+        :
+            The number of deleted jobs
+        """
+        return await self._process_old_jobs(
+            query="delete_archived_jobs",
+            verb="Deleted",
+            nb_hours=nb_hours,
+            queue=queue,
+            chunk_size=chunk_size,
+            chunk_pause=chunk_pause,
+        )
+
+    async def _process_old_jobs(
+        self,
+        query: str,
+        verb: str,
+        chunk_size: int | None,
+        chunk_pause: float,
+        **arguments: Any,
+    ) -> int:
+        """
+        Run a query processing old jobs until it has processed all of them, in
+        chunks of at most ``chunk_size`` jobs. Return the number of processed jobs.
+        ``arguments`` are passed to the query, along with ``chunk_size``.
+        """
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+
+        processed = 0
+        while True:
+            result = await self.connector.execute_query_one_async(
+                query=sql.queries[query],
+                chunk_size=chunk_size,
+                **arguments,
+            )
+            processed += result["count"]
+            if chunk_size is None or result["count"] < chunk_size:
+                break
+
+            logger.info(
+                f"{verb} {processed} old jobs so far",
+                extra={"action": f"{query}_progress", "count": processed},
+            )
+            if chunk_pause:
+                await asyncio.sleep(chunk_pause)
+
+        logger.info(
+            f"{verb} {processed} old jobs",
+            extra={"action": query, "count": processed},
+        )
+        return processed
+
+    async def set_recorded_events_async(
+        self, event_types: Iterable[str] | None, queue: str | None = None
+    ) -> None:
+        """
+        Set the types of the events recorded in the ``procrastinate_events`` table
+        for the jobs of a queue, or of all the queues. Recording fewer events makes
+        deferring and processing jobs cheaper, at the expense of the job history.
+
+        Parameters
+        ----------
+        event_types:
+            Types of the events to record (e.g. ``["failed"]``). An empty list turns
+            event recording off, ``None`` records all events.
+        queue:
+            Name of the queue. If not set, applies to the queues without a setting
+            of their own.
+        """
+        await self.connector.execute_query_async(
+            query=sql.queries["set_recorded_events"],
+            queue=queue or ALL_QUEUES,
+            event_types=None if event_types is None else list(event_types),
+        )
+
+    def set_recorded_events(
+        self, event_types: Iterable[str] | None, queue: str | None = None
+    ) -> None:
+        """
+        Sync version of `set_recorded_events_async`.
+        """
+        self.connector.get_sync_connector().execute_query(
+            query=sql.queries["set_recorded_events"],
+            queue=queue or ALL_QUEUES,
+            event_types=None if event_types is None else list(event_types),
+        )
+
+    async def enable_job_counts_async(self) -> None:
+        """
+        Start counting the jobs per queue, task and status in the
+        ``procrastinate_job_counts`` table, which is then used to list the queues
+        and tasks instead of scanning the jobs table. The counts are maintained by
+        triggers, which make writing jobs a bit more expensive. Each change adds
+        a row to the table, so the rows need to be summed up regularly by
+        scheduling the ``compact_job_counts`` builtin task, e.g.::
+
+            @app.periodic(cron="*/5 * * * *")
+            @app.task(queueing_lock="compact_job_counts", pass_context=True)
+            async def compact_job_counts(context, timestamp):
+                await builtin_tasks.compact_job_counts(context)
+
+        Otherwise, the table keeps growing and reading the counts gets slower.
+        """
+        await self.connector.execute_query_async(query=sql.queries["enable_job_counts"])
+
+    def enable_job_counts(self) -> None:
+        """
+        Sync version of `enable_job_counts_async`.
+        """
+        self.connector.get_sync_connector().execute_query(
+            query=sql.queries["enable_job_counts"]
+        )
+
+    async def disable_job_counts_async(self) -> None:
+        """
+        Stop counting the jobs in the ``procrastinate_job_counts`` table.
+        """
+        await self.connector.execute_query_async(
+            query=sql.queries["disable_job_counts"]
+        )
+
+    def disable_job_counts(self) -> None:
+        """
+        Sync version of `disable_job_counts_async`.
+        """
+        self.connector.get_sync_connector().execute_query(
+            query=sql.queries["disable_job_counts"]
+        )
+
+    async def compact_job_counts_async(self) -> None:
+        """
+        Sum up the changes recorded in the ``procrastinate_job_counts`` table, so
+        that reading the counts stays cheap.
+        """
+        await self.connector.execute_query_async(
+            query=sql.queries["compact_job_counts"]
         )
 
+    async def create_events_partitions(self, days_ahead: int) -> int:
+        """
+        Create the daily partitions of the ``procrastinate_events`` table from today
+        to ``days_ahead`` days ahead, if they don't exist yet. The table needs to be
+        partitioned (see `SchemaManager.partition_events_async`).
+
+        Parameters
+        ----------
+        days_ahead:
+            Number of days after today to create partitions for
+
+        Returns
+        -------
+        :
+            The number of created partitions
+        """
+        result = await self.connector.execute_query_one_async(
+            query=sql.queries["create_events_partitions"], days_ahead=days_ahead
+        )
+        logger.info(
+            f"Created {result['count']} events partitions",
+            extra={"action": "create_events_partitions", "count": result["count"]},
+        )
+        return result["count"]
+
+    async def drop_events_partitions(self, nb_days: int) -> int:
+        """
+        Drop the daily partitions of the ``procrastinate_events`` table whose events
+        are all older than ``nb_days`` days. This removes old events without the
+        cost of deleting rows. Does nothing if the table is not partitioned.
+
+        Parameters
+        ----------
+        nb_days:
+            Number of days of events to keep
+
+        Returns
+        -------
+        :
+            The number of dropped partitions
+        """
+        result = await self.connector.execute_query_one_async(
+            query=sql.queries["drop_events_partitions"], nb_days=nb_days
+        )
+        logger.info(
+            f"Dropped {result['count']} events partitions",
+            extra={"action": "drop_events_partitions", "count": result["count"]},
+        )
+        return result["count"]
+
     async def finish_job(
         self,
         job: jobs_module.Job,
@@ -326,6 +675,84 @@ class JobManager:
             delete_job=delete_job,
         )
 
+    async def finish_job_and_fetch_next(
+        self,
+        job: jobs_module.Job,
+        status: jobs_module.Status,
+        delete_job: bool,
+        queues: Iterable[str] | None,
+        worker_id: int,
+    ) -> jobs_module.Job | None:
+        """
+        Set a job to its final state, then select the next job in the queue and
+        mark it as doing, in a single query. This is equivalent to calling
+        `finish_job` then `fetch_job`, with one round-trip instead of two.
+
+        Parameters
+        ----------
+        job:
+        status:
+            ``succeeded``, ``failed`` or ``aborted``
+        queues:
+            Filter the next job by job queue names
+
+        Returns
+        -------
+        :
+            None if no suitable job was found. The next job otherwise.
+        """
+        assert job.id
+        row = await self.connector.execute_query_one_async(
+            query=sql.queries["finish_job_and_fetch_next"],
+            job_id=job.id,
+            status=status.value,
+            delete_job=delete_job,
+            queues=queues,
+            worker_id=worker_id,
+        )
+
+        if row["id"] is None:
+            return None
+
+        return jobs_module.Job.from_row(row)
+
+    async def finish_jobs_by_ids_async(
+        self,
+        job_ids: list[int],
+        statuses: list[jobs_module.Status],
+        delete_jobs: list[bool],
+    ) -> None:
+        """
+        Set several jobs to their final state in a single query.
+
+        Parameters
+        ----------
+        job_ids:
+            The ids of the jobs to finish
+        statuses:
+            For each job, ``succeeded``, ``failed`` or ``aborted``
+        delete_jobs:
+            For each job, whether it should be deleted instead of being updated
+        """
+        await self.connector.execute_query_async(
+            **self._finish_jobs_query_kwargs(
+                job_ids=job_ids, statuses=statuses, delete_jobs=delete_jobs
+            )
+        )
+
+    def _finish_jobs_query_kwargs(
+        self,
+        job_ids: list[int],
+        statuses: list[jobs_module.Status],
+        delete_jobs: list[bool],
+    ) -> dict[str, Any]:
+        return {
+            "query": sql.queries["finish_jobs"],
+            "job_ids": job_ids,
+            "statuses": [status.value for status in statuses],
+            "delete_jobs": delete_jobs,
+        }
+
     def cancel_job_by_id(
         self, job_id: int, abort: bool = False, delete_job: bool = False
     ) -> bool:
@@ -455,7 +882,8 @@ class JobManager:
         retry_at:
             If set at present time or in the past, the job may be retried immediately.
             Otherwise, the job will be retried no sooner than this date & time.
-            Should be timezone-aware (even if UTC). Defaults to present time.
+            Should be timezone-aware (even if UTC). If not set, the job may be retried
+            immediately.
         priority:
             If set, the job will be retried with this priority. If not set, the priority
             remains unchanged.
@@ -469,7 +897,7 @@ class JobManager:
         assert job.id  # TODO remove this
         await self.retry_job_by_id_async(
             job_id=job.id,
-            retry_at=retry_at or utils.utcnow(),
+            retry_at=retry_at,
             priority=priority,
             queue=queue,
             lock=lock,
@@ -478,7 +906,7 @@ class JobManager:
     async def retry_job_by_id_async(
         self,
         job_id: int,
-        retry_at: datetime.datetime,
+        retry_at: datetime.datetime | None,
         priority: int | None = None,
         queue: str | None = None,
         lock: str | None = None,
@@ -490,9 +918,9 @@ class JobManager:
         ----------
         job_id:
         retry_at:
-            If set at present time or in the past, the job may be retried immediately.
-            Otherwise, the job will be retried no sooner than this date & time.
-            Should be timezone-aware (even if UTC).
+            If None, or set at present time or in the past, the job may be retried
+            immediately. Otherwise, the job will be retried no sooner than this date
+            & time. Should be timezone-aware (even if UTC).
         priority:
             If set, the job will be retried with this priority. If not set, the priority
             remains unchanged.
@@ -515,7 +943,7 @@ class JobManager:
     def retry_job_by_id(
         self,
         job_id: int,
-        retry_at: datetime.datetime,
+        retry_at: datetime.datetime | None,
         priority: int | None = None,
         queue: str | None = None,
         lock: str | None = None,
@@ -532,6 +960,46 @@ class JobManager:
             new_lock=lock,
         )
 
+    async def retry_jobs_by_ids_async(
+        self,
+        job_ids: list[int],
+        retry_ats: list[datetime.datetime | None],
+        priorities: list[int | None],
+        queues: list[str | None],
+        locks: list[str | None],
+    ) -> None:
+        """
+        Indicates that several jobs should be retried later, in a single query.
+        All the lists are read in parallel, see `retry_job_by_id_async` for the
+        meaning of each value.
+        """
+        await self.connector.execute_query_async(
+            **self._retry_jobs_query_kwargs(
+                job_ids=job_ids,
+                retry_ats=retry_ats,
+                priorities=priorities,
+                queues=queues,
+                locks=locks,
+            )
+        )
+
+    def _retry_jobs_query_kwargs(
+        self,
+        job_ids: list[int],
+        retry_ats: list[datetime.datetime | None],
+        priorities: list[int | None],
+        queues: list[str | None],
+        locks: list[str | None],
+    ) -> dict[str, Any]:
+        return {
+            "query": sql.queries["retry_jobs"],
+            "job_ids": job_ids,
+            "retry_ats": retry_ats,
+            "new_priorities": priorities,
+            "new_queue_names": queues,
+            "new_locks": locks,
+        }
+
     async def listen_for_jobs(
         self,
         *,
@@ -601,9 +1069,14 @@ class JobManager:
         lock: str | None = None,
         queueing_lock: str | None = None,
         worker_id: int | None = None,
+        include_archived: bool = False,
+        limit: int | None = None,
+        after_id: int | None = None,
     ) -> Iterable[jobs_module.Job]:
         """
-        List all procrastinate jobs given query filters.
+        List all procrastinate jobs given query filters, ordered by id. Use ``limit``
+        and ``after_id`` to page through a large number of jobs, or
+        `iter_jobs_async`.
 
         Parameters
         ----------
@@ -621,6 +1094,14 @@ class JobManager:
             Filter by job queueing_lock
         worker_id:
             Filter by worker ID
+        include_archived:
+            If ``True``, also list the jobs moved to the archive table (see
+            `archive_old_jobs`). ``False`` by default.
+        limit:
+            Maximum number of jobs to list. By default, all the jobs are listed.
+        after_id:
+            Only list the jobs with a greater ID, e.g. the ID of the last job of
+            the previous page.
 
         Returns
         -------
@@ -635,6 +1116,9 @@ class JobManager:
             lock=lock,
             queueing_lock=queueing_lock,
             worker_id=worker_id,
+            include_archived=include_archived,
+            limit=limit,
+            after_id=after_id,
         )
         return [jobs_module.Job.from_row(row) for row in rows]
 
@@ -647,6 +1131,9 @@ class JobManager:
         lock: str | None = None,
         queueing_lock: str | None = None,
         worker_id: int | None = None,
+        include_archived: bool = False,
+        limit: int | None = None,
+        after_id: int | None = None,
     ) -> list[jobs_module.Job]:
         """
         Sync version of `list_jobs_async`
@@ -660,9 +1147,55 @@ class JobManager:
             lock=lock,
             queueing_lock=queueing_lock,
             worker_id=worker_id,
+            include_archived=include_archived,
+            limit=limit,
+            after_id=after_id,
         )
         return [jobs_module.Job.from_row(row) for row in rows]
 
+    async def iter_jobs_async(
+        self,
+        id: int | None = None,
+        queue: str | None = None,
+        task: str | None = None,
+        status: str | None = None,
+        lock: str | None = None,
+        queueing_lock: str | None = None,
+        worker_id: int | None = None,
+        include_archived: bool = False,
+        after_id: int | None = None,
+        page_size: int = LIST_JOBS_PAGE_SIZE,
+    ) -> AsyncIterator[jobs_module.Job]:
+        """
+        Iterate over all procrastinate jobs given query filters, ordered by id.
+        Unlike `list_jobs_async`, the jobs are fetched ``page_size`` at a time, each
+        page starting after the last job of the previous one, so that going through
+        a large number of jobs uses a bounded amount of memory and never holds a
+        transaction open.
+
+        The other parameters are the same as for `list_jobs_async`.
+        """
+        while True:
+            jobs = list(
+                await self.list_jobs_async(
+                    id=id,
+                    queue=queue,
+                    task=task,
+                    status=status,
+                    lock=lock,
+                    queueing_lock=queueing_lock,
+                    worker_id=worker_id,
+                    include_archived=include_archived,
+                    limit=page_size,
+                    after_id=after_id,
+                )
+            )
+            for job in jobs:
+                yield job
+            if len(jobs) < page_size:
+                return
+            after_id = jobs[-1].id
+
     async def list_queues_async(
         self,
         queue: str | None = None,
@@ -907,6 +1440,13 @@ class JobManager:
         )
         return [row["id"] for row in rows]
 
+    def pipeline(self) -> JobManagerPipeline:
+        """
+        Record several operations, to execute them together (see
+        `JobManagerPipeline`).
+        """
+        return JobManagerPipeline(job_manager=self)
+
     async def register_worker(self) -> int:
         """
         Register a newly started worker (with a initial heartbeat) in the database.
@@ -969,3 +1509,103 @@ class JobManager:
             seconds_since_heartbeat=seconds_since_heartbeat,
         )
         return [row["worker_id"] for row in rows]
+
+
+class JobManagerPipeline:
+    """
+    Operations of a `JobManager`, recorded by calling the methods named after the
+    `JobManager` ones, and executed together by `execute_async`: in a single
+    round-trip to the database if the connector supports it (see
+    `BaseConnector.execute_queries_async`).
+
+    The operations must not depend on each other. If one of them fails, the
+    error is raised, and the other ones may have been applied, unless the
+    connector runs them atomically (see `BaseConnector.queries_are_atomic`).
+    """
+
+    def __init__(self, job_manager: JobManager):
+        self.job_manager = job_manager
+        self._queries: list[dict[str, Any]] = []
+        self._results: list[Callable[[list[dict[str, Any]]], Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def _add(
+        self,
+        query_kwargs: dict[str, Any],
+        result: Callable[[list[dict[str, Any]]], Any] = lambda rows: None,
+    ) -> int:
+        self._queries.append(query_kwargs)
+        self._results.append(result)
+        return len(self._queries) - 1
+
+    def finish_jobs_by_ids(
+        self,
+        job_ids: list[int],
+        statuses: list[jobs_module.Status],
+        delete_jobs: list[bool],
+    ) -> int:
+        """
+        See `JobManager.finish_jobs_by_ids_async`. Returns the index of the
+        operation in the results of `execute_async`.
+        """
+        return self._add(
+            self.job_manager._finish_jobs_query_kwargs(
+                job_ids=job_ids, statuses=statuses, delete_jobs=delete_jobs
+            )
+        )
+
+    def retry_jobs_by_ids(
+        self,
+        job_ids: list[int],
+        retry_ats: list[datetime.datetime | None],
+        priorities: list[int | None],
+        queues: list[str | None],
+        locks: list[str | None],
+    ) -> int:
+        """
+        See `JobManager.retry_jobs_by_ids_async`. Returns the index of the
+        operation in the results of `execute_async`.
+        """
+        return self._add(
+            self.job_manager._retry_jobs_query_kwargs(
+                job_ids=job_ids,
+                retry_ats=retry_ats,
+                priorities=priorities,
+                queues=queues,
+                locks=locks,
+            )
+        )
+
+    def update_heartbeat(self, worker_id: int) -> int:
+        """
+        See `JobManager.update_heartbeat`. Returns the index of the operation in
+        the results of `execute_async`.
+        """
+        return self._add(
+            {"query": sql.queries["update_heartbeat"], "worker_id": worker_id}
+        )
+
+    def list_jobs_to_abort(self, queue: str | None = None) -> int:
+        """
+        See `JobManager.list_jobs_to_abort_async`. Returns the index of the
+        operation in the results of `execute_async`.
+        """
+        return self._add(
+            {"query": sql.queries["list_jobs_to_abort"], "queue_name": queue},
+            result=lambda rows: [row["id"] for row in rows],
+        )
+
+    async def execute_async(self) -> list[Any]:
+        """
+        Execute the recorded operations.
+
+        Returns
+        -------
+        :
+            The result of each operation, in the order they were recorded, as
+            returned by the `JobManager` method (None if it returns nothing)
+        """
+        rows = await self.job_manager.connector.execute_queries_async(self._queries)
+        return [result(result_rows) for result, result_rows in zip(self._results, rows)]
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import math
+from collections.abc import Iterable, Sequence
+from typing import Callable
+
+from procrastinate import jobs
+
+logger = logging.getLogger(__name__)
+
+#: Upper bounds of the buckets of the duration histograms, in seconds
+DURATION_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+    900.0,
+    3600.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """
+    A metric, rendered in the Prometheus text exposition format. Label values are
+    passed positionally, in the order of ``labelnames``.
+    """
+
+    type: str
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[tuple[str, dict[str, str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labels, value in self.samples():
+            labels_string = ",".join(
+                f'{key}="{_escape(label)}"' for key, label in labels.items()
+            )
+            if labels_string:
+                name = f"{name}{{{labels_string}}}"
+            lines.append(f"{name} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[tuple[str, dict[str, str], float]]:
+        for labels, value in self.values.items():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Gauge(Metric):
+    """
+    A gauge whose value is read from ``function`` when the metrics are rendered
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def samples(self) -> Iterable[tuple[str, dict[str, str], float]]:
+        yield self.name, {}, self.function()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: the number of observations in each bucket (the last
+        # one being +Inf, not cumulative), and the sum of the observations
+        self.counts: dict[Labels, list[int]] = {}
+        self.sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[labels] = self.sums.get(labels, 0.0) + value
+
+    def samples(self) -> Iterable[tuple[str, dict[str, str], float]]:
+        for labels, counts in self.counts.items():
+            label_dict = dict(zip(self.labelnames, labels))
+            total = 0
+            for upper_bound, count in zip((*self.buckets, math.inf), counts):
+                total += count
+                yield (
+                    f"{self.name}_bucket",
+                    {**label_dict, "le": _format_value(upper_bound)},
+                    total,
+                )
+            yield f"{self.name}_sum", label_dict, self.sums[labels]
+            yield f"{self.name}_count", label_dict, total
+
+
+class WorkerMetrics:
+    """
+    Counters and histograms describing the activity of a worker. The gauges read
+    the number of running jobs from ``running_jobs``.
+    """
+
+    def __init__(self, concurrency: int, running_jobs: Callable[[], int]):
+        labelnames = ("task", "queue")
+        self.jobs_started = Counter(
+            "procrastinate_jobs_started_total",
+            "Number of jobs started by the worker",
+            labelnames,
+        )
+        self.jobs_ended = Counter(
+            "procrastinate_jobs_ended_total",
+            "Number of jobs ended by the worker, per outcome (succeeded, failed, "
+            "aborted or retried)",
+            (*labelnames, "outcome"),
+        )
+        self.job_duration = Histogram(
+            "procrastinate_job_duration_seconds",
+            "Time spent running the jobs",
+            labelnames,
+        )
+        self.job_queue_wait = Histogram(
+            "procrastinate_job_queue_wait_seconds",
+            "Time between the moment the jobs could run (deferral or schedule) "
+            "and the moment they started",
+            labelnames,
+        )
+        self.fetch_duration = Histogram(
+            "procrastinate_fetch_duration_seconds",
+            "Time spent fetching jobs from the database",
+        )
+        self.concurrency = Gauge(
+            "procrastinate_worker_concurrency",
+            "Maximum number of jobs running at once on the worker",
+            lambda: concurrency,
+        )
+        self.running_jobs = Gauge(
+            "procrastinate_worker_running_jobs",
+            "Number of jobs running on the worker",
+            running_jobs,
+        )
+        self.saturation = Gauge(
+            "procrastinate_worker_saturation",
+            "Fraction of the job slots of the worker in use",
+            lambda: running_jobs() / concurrency,
+        )
+
+    @property
+    def metrics(self) -> list[Metric]:
+        return [
+            self.jobs_started,
+            self.jobs_ended,
+            self.job_duration,
+            self.job_queue_wait,
+            self.fetch_duration,
+            self.concurrency,
+            self.running_jobs,
+            self.saturation,
+        ]
+
+    def job_started(self, job: jobs.Job) -> None:
+        self.jobs_started.inc(job.task_name, job.queue)
+        if job.created_at and job.started_at:
+            # Retried jobs are scheduled at the time of the retry
+            ready_at = max(job.created_at, job.scheduled_at or job.created_at)
+            self.job_queue_wait.observe(
+                max((job.started_at - ready_at).total_seconds(), 0.0),
+                job.task_name,
+                job.queue,
+            )
+
+    def job_ended(self, job: jobs.Job, outcome: str, duration: float | None) -> None:
+        self.jobs_ended.inc(job.task_name, job.queue, outcome)
+        if duration is not None:
+            self.job_duration.observe(duration, job.task_name, job.queue)
+
+    def jobs_fetched(self, duration: float) -> None:
+        self.fetch_duration.observe(duration)
+
+    def render(self) -> str:
+        return "\n".join(line for m in self.metrics for line in m.render()) + "\n"
+
+
+async def start_http_server(
+    metrics: WorkerMetrics, port: int, host: str | None = None
+) -> asyncio.Server:
+    """
+    Serve the metrics over HTTP, on ``/metrics`` (and ``/``), in the Prometheus
+    text exposition format. The server runs in the current event loop, until it is
+    closed.
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            # Skip the headers
+            while (await reader.readline()).strip():
+                pass
+            method, path, *_ = request_line.decode("latin-1").split() or ["", ""]
+            if method not in ("GET", "HEAD"):
+                status, body = "405 Method Not Allowed", b""
+            elif path.split("?")[0] not in ("/", "/metrics"):
+                status, body = "404 Not Found", b""
+            else:
+                status, body = "200 OK", metrics.render().encode()
+            headers = (
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(headers.encode("latin-1"))
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+        except (ConnectionError, ValueError) as exc:
+            logger.debug(
+                "Could not serve the metrics",
+                exc_info=exc,
+                extra={"action": "serve_metrics_error"},
+            )
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host=host, port=port)
+    logger.info(
+        f"Serving metrics on port {port}",
+        extra={"action": "start_metrics_server", "port": port},
+    )
+    return server
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import logging
+import pathlib
+import pstats
+import random
+import time
+from collections.abc import Awaitable, Generator, Iterable, Iterator
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIRECTORY = "procrastinate-profiles"
+#: Minimum time, in seconds, between two writes of the profiles
+PROFILE_WRITE_INTERVAL = 10.0
+
+
+class Profiler:
+    """
+    Profiles a sample of the jobs run by a worker with cProfile: the jobs of the
+    tasks named in ``task_names``, and a random fraction (``rate``) of the other
+    jobs. The profiles are aggregated per task, and written to
+    ``<directory>/<task name>.prof``, to be read with `pstats` (e.g.
+    ``python -m pstats``) or tools like snakeviz.
+
+    Writing the profiles blocks the event loop, so they are written after a
+    profiled job at most every ``write_interval`` seconds, and by `write` (which
+    the worker calls when it stops).
+
+    Only one job is profiled at a time: jobs sampled while another job is being
+    profiled are not profiled.
+    """
+
+    def __init__(
+        self,
+        task_names: Iterable[str] = (),
+        rate: float = 0.0,
+        directory: str | pathlib.Path = PROFILE_DIRECTORY,
+        write_interval: float = PROFILE_WRITE_INTERVAL,
+    ):
+        self.task_names = frozenset(task_names)
+        self.rate = rate
+        self.directory = pathlib.Path(directory)
+        self.write_interval = write_interval
+        #: Aggregated stats of the profiled jobs, per task name
+        self.stats: dict[str, pstats.Stats] = {}
+        self._profiling = False
+        # Tasks whose stats changed since they were last written
+        self._unwritten: set[str] = set()
+        self._written_at = time.monotonic()
+
+    def should_profile(self, task_name: str) -> bool:
+        if self._profiling:
+            return False
+        return task_name in self.task_names or random.random() < self.rate
+
+    @contextlib.contextmanager
+    def profile(self, task_name: str) -> Iterator[cProfile.Profile]:
+        """
+        Yield a profile to enable while the job runs (see `profile_function` and
+        `profile_coroutine_function`), and add it to the stats of the task once the
+        job is done.
+        """
+        profile = cProfile.Profile()
+        self._profiling = True
+        try:
+            yield profile
+        finally:
+            self._profiling = False
+            self._add(task_name, profile)
+
+    def _add(self, task_name: str, profile: cProfile.Profile) -> None:
+        profile.create_stats()
+        # The job may have been aborted before it started
+        if not profile.stats:  # type: ignore
+            return
+
+        stats = self.stats.get(task_name)
+        if stats is None:
+            stats = self.stats[task_name] = pstats.Stats(profile)
+        else:
+            stats.add(profile)
+
+        self._unwritten.add(task_name)
+        if time.monotonic() - self._written_at >= self.write_interval:
+            self.write()
+
+    def write(self) -> None:
+        """
+        Write the stats of the tasks profiled since the last write
+        """
+        self._written_at = time.monotonic()
+        while self._unwritten:
+            self._write(self._unwritten.pop())
+
+    def _write(self, task_name: str) -> None:
+        path = self.directory / f"{task_name}.prof"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.stats[task_name].dump_stats(path)
+        except OSError as exc:
+            logger.warning(
+                f"Could not write the profile of task {task_name} to {path}",
+                exc_info=exc,
+                extra={"action": "write_profile_error", "task_name": task_name},
+            )
+            return
+
+        logger.debug(
+            f"Wrote the profile of task {task_name} to {path}",
+            extra={"action": "write_profile", "task_name": task_name, "path": path},
+        )
+
+
+def _enable(profile: cProfile.Profile) -> bool:
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is active, which is not supported from Python 3.12
+        return False
+    return True
+
+
+def profile_function(
+    func: Callable[..., Any], profile: cProfile.Profile
+) -> Callable[..., Any]:
+    """
+    Wrap a synchronous function so that it is profiled, in the thread it runs in
+    """
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        enabled = _enable(profile)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if enabled:
+                profile.disable()
+
+    return wrapper
+
+
+def profile_coroutine_function(
+    func: Callable[..., Awaitable], profile: cProfile.Profile
+) -> Callable[..., Awaitable]:
+    """
+    Wrap a coroutine function so that its coroutine is profiled each time it is
+    resumed, and not while it is suspended (when other coroutines run)
+    """
+
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await _ProfiledAwaitable(func(*args, **kwargs), profile)
+
+    return wrapper
+
+
+class _ProfiledAwaitable:
+    def __init__(self, awaitable: Awaitable, profile: cProfile.Profile):
+        self.awaitable = awaitable
+        self.profile = profile
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        iterator = self.awaitable.__await__()
+        send: Callable[[Any], Any] = iterator.send
+        message: Any = None
+        while True:
+            enabled = _enable(self.profile)
+            try:
+                yielded = send(message)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if enabled:
+                    self.profile.disable()
+
+            try:
+                message = yield yielded
+            except BaseException as exc:
+                send, message = iterator.throw, exc
+            else:
+                send = iterator.send
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import contextlib
 import logging
-from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable, Sequence
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -11,7 +11,14 @@ from typing import (
 
 from typing_extensions import LiteralString
 
-from procrastinate import connector, exceptions, sql, sync_psycopg_connector, utils
+from procrastinate import (
+    connector,
+    exceptions,
+    sql,
+    sync_psycopg_connector,
+    tracing,
+    utils,
+)
 
 if TYPE_CHECKING:
     import psycopg
@@ -49,6 +56,7 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         pool_factory: Callable[
             ..., psycopg_pool.AsyncConnectionPool
         ] = psycopg_pool.AsyncConnectionPool,
+        prepare_statements: bool = True,
         **kwargs: Any,
     ):
         """
@@ -58,8 +66,9 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         custom callable which returns ``psycopg_pool.AsyncConnectionPool`` instance
         as ``pool_factory`` kwarg.
 
-        All other arguments than ``pool_factory``, ``json_dumps`` and ``json_loads`` are passed
-        to ``pool_factory`` callable (see psycopg documentation__).
+        All other arguments than ``pool_factory``, ``json_dumps``, ``json_loads`` and
+        ``prepare_statements`` are passed to ``pool_factory`` callable (see psycopg
+        documentation__).
 
         ``json_dumps`` and ``json_loads`` are used to configure new connections
         created by the pool with ``psycopg.types.json.set_json_dumps`` and
@@ -84,6 +93,12 @@ class PsycopgConnector(connector.BaseAsyncConnector):
             Default is ``psycopg_pool.AsyncConnectionPool``.
             You can set this to ``psycopg_pool.AsyncNullConnectionPool`` to disable
             pooling.
+        prepare_statements :
+            If True (the default), the queries run by the workers for each job
+            (fetching, finishing and retrying jobs, heartbeats...) are prepared on the
+            server the first time they run on a connection, which saves parsing and
+            planning them on each call. Set it to False to never prepare statements,
+            e.g. behind PgBouncer in transaction pooling mode.
         """
         self._async_pool: psycopg_pool.AsyncConnectionPool | None = None
         self._pool_factory: Callable[..., psycopg_pool.AsyncConnectionPool] = (
@@ -92,6 +107,7 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         self._pool_externally_set: bool = False
         self._json_loads = json_loads
         self._json_dumps = json_dumps
+        self._prepare_statements = prepare_statements
         self._pool_args = kwargs
         self._sync_connector: connector.BaseConnector | None = None
 
@@ -106,6 +122,7 @@ class PsycopgConnector(connector.BaseAsyncConnector):
             self._sync_connector = sync_psycopg_connector.SyncPsycopgConnector(
                 json_dumps=self._json_dumps,
                 json_loads=self._json_loads,
+                prepare_statements=self._prepare_statements,
                 **self._pool_args,
             )
         return self._sync_connector
@@ -118,6 +135,11 @@ class PsycopgConnector(connector.BaseAsyncConnector):
             raise exceptions.AppNotOpen
         return self._async_pool
 
+    @property
+    def queries_are_atomic(self) -> bool:
+        # The connections of an autocommit pool commit each query on its own
+        return not self.pool.kwargs.get("autocommit", False)
+
     async def open_async(
         self, pool: psycopg_pool.AsyncConnectionPool | None = None
     ) -> None:
@@ -186,32 +208,51 @@ class PsycopgConnector(connector.BaseAsyncConnector):
 
     @contextlib.asynccontextmanager
     async def _get_cursor(
-        self,
+        self, query: LiteralString
     ) -> AsyncIterator[psycopg.AsyncCursor[psycopg.rows.DictRow]]:
-        async with self.pool.connection() as connection:
-            async with connection.cursor(row_factory=psycopg.rows.dict_row) as cursor:
-                if self._json_loads:
-                    psycopg.types.json.set_json_loads(
-                        loads=self._json_loads, context=cursor
-                    )
-
-                if self._json_dumps:
-                    psycopg.types.json.set_json_dumps(
-                        dumps=self._json_dumps, context=cursor
-                    )
-                yield cursor
+        with self.measure_query(query) as timer:
+            async with self.pool.connection() as connection:
+                timer.acquired()
+                async with self._make_cursor(connection) as cursor:
+                    yield cursor
+                    timer.set_row_count(cursor.rowcount)
+
+    def _make_cursor(
+        self, connection: psycopg.AsyncConnection
+    ) -> psycopg.AsyncCursor[psycopg.rows.DictRow]:
+        cursor = connection.cursor(row_factory=psycopg.rows.dict_row)
+        if self._json_loads:
+            psycopg.types.json.set_json_loads(loads=self._json_loads, context=cursor)
+
+        if self._json_dumps:
+            psycopg.types.json.set_json_dumps(dumps=self._json_dumps, context=cursor)
+        return cursor
+
+    async def _execute(
+        self,
+        cursor: psycopg.AsyncCursor[psycopg.rows.DictRow],
+        query: LiteralString,
+        arguments: dict[str, Any],
+    ) -> None:
+        await cursor.execute(
+            query,
+            self._wrap_json(arguments),
+            prepare=sync_psycopg_connector.get_prepare(query, self._prepare_statements),
+        )
 
+    @tracing.traced_query
     @wrap_exceptions()
     async def execute_query_async(self, query: LiteralString, **arguments: Any) -> None:
-        async with self._get_cursor() as cursor:
-            await cursor.execute(query, self._wrap_json(arguments))
+        async with self._get_cursor(query) as cursor:
+            await self._execute(cursor, query, arguments)
 
+    @tracing.traced_query
     @wrap_exceptions()
     async def execute_query_one_async(
         self, query: LiteralString, **arguments: Any
     ) -> dict[str, Any]:
-        async with self._get_cursor() as cursor:
-            await cursor.execute(query, self._wrap_json(arguments))
+        async with self._get_cursor(query) as cursor:
+            await self._execute(cursor, query, arguments)
 
             result = await cursor.fetchone()
 
@@ -219,15 +260,62 @@ class PsycopgConnector(connector.BaseAsyncConnector):
                 raise exceptions.NoResult
             return result
 
+    @tracing.traced_query
     @wrap_exceptions()
     async def execute_query_all_async(
         self, query: LiteralString, **arguments: Any
     ) -> list[dict[str, Any]]:
-        async with self._get_cursor() as cursor:
-            await cursor.execute(query, self._wrap_json(arguments))
+        async with self._get_cursor(query) as cursor:
+            await self._execute(cursor, query, arguments)
 
             return await cursor.fetchall()
 
+    @wrap_exceptions()
+    async def execute_queries_async(
+        self, queries: Sequence[dict[str, Any]]
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Execute the queries in pipeline mode: they are all sent at once, and
+        their results are read after a single round-trip to the database. They
+        run in the same transaction, unless the connections of the pool are in
+        autocommit mode: if a query fails, none of them is applied (see
+        `queries_are_atomic`).
+        """
+        with tracing.start_span(
+            "pipeline",
+            kind="client",
+            attributes={
+                "db.system.name": "postgresql",
+                "db.operation.batch.size": len(queries),
+            },
+        ):
+            async with contextlib.AsyncExitStack() as stack:
+                timers = [
+                    stack.enter_context(self.measure_query(query["query"]))
+                    for query in queries
+                ]
+                connection = await stack.enter_async_context(self.pool.connection())
+                for timer in timers:
+                    timer.acquired()
+
+                cursors = []
+                async with connection.pipeline():
+                    for query in queries:
+                        arguments = dict(query)
+                        cursor = await stack.enter_async_context(
+                            self._make_cursor(connection)
+                        )
+                        await self._execute(cursor, arguments.pop("query"), arguments)
+                        cursors.append(cursor)
+
+                results = []
+                for timer, cursor in zip(timers, cursors):
+                    results.append(
+                        await cursor.fetchall() if cursor.description else []
+                    )
+                    timer.set_row_count(cursor.rowcount)
+                return results
+
     def _make_dynamic_query(
         self,
         query: LiteralString,
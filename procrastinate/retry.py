@@ -57,7 +57,8 @@ class RetryDecision:
         retry_at:
             If set at present time or in the past, the job may be retried immediately.
             Otherwise, the job will be retried no sooner than this date & time.
-            Should be timezone-aware (even if UTC). Defaults to present time.
+            Should be timezone-aware (even if UTC). If neither ``retry_at`` nor
+            ``retry_in`` is set, the job may be retried immediately.
         retry_in:
             If set, the job will be retried after this duration. If not set, the job will
             be retried immediately.
@@ -10,6 +10,8 @@ from procrastinate import connector as connector_module
 
 migrations_path = pathlib.Path(__file__).parent / "sql" / "migrations"
 
+PARTITION_EVENTS_QUERY: LiteralString = "SELECT procrastinate_partition_events_v1()"
+
 
 class SchemaManager:
     def __init__(self, connector: connector_module.BaseConnector):
@@ -29,12 +31,36 @@ class SchemaManager:
     def get_migrations_path() -> str:
         return str(migrations_path)
 
-    def apply_schema(self) -> None:
+    def apply_schema(self, partitioned_events: bool = False) -> None:
+        """
+        Apply the schema to an empty database. With ``partitioned_events``, the
+        ``procrastinate_events`` table is partitioned by day (see `partition_events`).
+        """
         queries = self.get_schema()
         queries = queries.replace("%", "%%")
         self.connector.get_sync_connector().execute_query(query=queries)
+        if partitioned_events:
+            self.partition_events()
 
-    async def apply_schema_async(self) -> None:
+    async def apply_schema_async(self, partitioned_events: bool = False) -> None:
         queries = self.get_schema()
         queries = queries.replace("%", "%%")
         await self.connector.execute_query_async(query=queries)
+        if partitioned_events:
+            await self.partition_events_async()
+
+    def partition_events(self) -> None:
+        """
+        Turn the ``procrastinate_events`` table into a table partitioned by day, so
+        that old events can be removed by dropping partitions (see the
+        ``manage_events_partitions`` builtin task). The existing events are copied to
+        the new partitions, which locks the table for a while on large databases.
+        Does nothing if the table is already partitioned.
+        """
+        self.connector.get_sync_connector().execute_query(query=PARTITION_EVENTS_QUERY)
+
+    async def partition_events_async(self) -> None:
+        """
+        Async version of `partition_events`.
+        """
+        await self.connector.execute_query_async(query=PARTITION_EVENTS_QUERY)
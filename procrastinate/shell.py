@@ -57,18 +57,38 @@ class ProcrastinateShell(cmd.Cmd):
         List jobs.
         Usage: list_jobs [id=ID] [queue=QUEUE_NAME] [task=TASK_NAME] [status=STATUS]
                          [lock=LOCK] [queueing_lock=QUEUEING_LOCK] [details]
+                         [archived] [after=ID] [limit=LIMIT]
 
         Jobs can be filtered by id, queue name, task name, status and lock.
-        Use the details argument to get more info about jobs.
+        Use the details argument to get more info about jobs, and the archived
+        argument to also list archived jobs. Use after and limit to only list
+        some of the jobs, from the job following the given id.
 
         Example: list_jobs queue=default task=sums status=failed details
         """
         kwargs: dict[str, Any] = parse_argument(arg)
         details = kwargs.pop("details", None) is not None
+        kwargs["include_archived"] = kwargs.pop("archived", None) is not None
+        limit = int(kwargs.pop("limit")) if "limit" in kwargs else None
+        if "after" in kwargs:
+            kwargs["after_id"] = int(kwargs.pop("after"))
         if "id" in kwargs:
             kwargs["id"] = int(kwargs["id"])
-        for job in self.async_to_sync(self.job_manager.list_jobs_async, **kwargs):
-            print_job(job, details=details)
+        if limit is not None:
+            kwargs["page_size"] = min(limit, manager.LIST_JOBS_PAGE_SIZE)
+
+        # Jobs are printed as they are fetched, one page at a time
+        async def print_jobs() -> None:
+            printed = 0
+            if limit == 0:
+                return
+            async for job in self.job_manager.iter_jobs_async(**kwargs):
+                print_job(job, details=details)
+                printed += 1
+                if printed == limit:
+                    break
+
+        self.async_to_sync(print_jobs)
 
     def do_list_queues(self, arg: str) -> None:
         """
@@ -35,3 +35,22 @@ def get_queries() -> dict[str, LiteralString]:
 
 
 queries = get_queries()
+#: Names of the queries (keys of ``queries``), by query
+query_names = {query: name for name, query in queries.items()}
+#: Queries run by the workers for each job or on a short interval, which the
+#: connectors prepare on the server
+prepared_queries = frozenset(
+    queries[name]
+    for name in (
+        "defer_jobs",
+        "fetch_job",
+        "fetch_jobs",
+        "finish_job",
+        "finish_job_and_fetch_next",
+        "finish_jobs",
+        "retry_job",
+        "retry_jobs",
+        "update_heartbeat",
+        "list_jobs_to_abort",
+    )
+)
@@ -0,0 +1,100 @@
+-- Add array-based functions to finish or retry several jobs in a single query
+CREATE FUNCTION procrastinate_finish_jobs_v1(
+    job_ids bigint[],
+    end_statuses procrastinate_job_status[],
+    delete_jobs boolean[]
+)
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _deleted_count integer;
+    _updated_count integer;
+BEGIN
+    IF EXISTS (
+        SELECT FROM unnest(end_statuses) AS end_status
+            WHERE end_status NOT IN ('succeeded', 'failed', 'aborted')
+    ) THEN
+        RAISE 'End statuses should be either "succeeded", "failed" or "aborted" (job ids: %)', job_ids;
+    END IF;
+    -- A single statement per operation, whatever the number of jobs, so that the
+    -- statement-level triggers only run once
+    DELETE FROM procrastinate_jobs
+        USING unnest(job_ids, delete_jobs) AS jobs(id, delete_job)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND jobs.delete_job
+            AND procrastinate_jobs.status IN ('todo', 'doing');
+    GET DIAGNOSTICS _deleted_count = ROW_COUNT;
+    UPDATE procrastinate_jobs
+        SET status = jobs.end_status,
+            abort_requested = false,
+            attempts = CASE procrastinate_jobs.status
+                WHEN 'doing' THEN procrastinate_jobs.attempts + 1 ELSE procrastinate_jobs.attempts
+            END
+        FROM unnest(job_ids, end_statuses, delete_jobs) AS jobs(id, end_status, delete_job)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND NOT jobs.delete_job
+            AND procrastinate_jobs.status IN ('todo', 'doing');
+    GET DIAGNOSTICS _updated_count = ROW_COUNT;
+    IF _deleted_count + _updated_count <> cardinality(job_ids) THEN
+        RAISE 'Some jobs were not found or not in "doing" or "todo" status (job ids: %)', job_ids;
+    END IF;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_retry_jobs_v1(
+    job_ids bigint[],
+    retry_ats timestamp with time zone[],
+    new_priorities integer[],
+    new_queue_names character varying[],
+    new_locks character varying[]
+)
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _updated_count integer;
+BEGIN
+    -- Like procrastinate_retry_job_v2, but in a single statement: the jobs whose
+    -- abortion was requested fail, the other ones are retried
+    UPDATE procrastinate_jobs
+        SET status = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN 'failed'::procrastinate_job_status
+                ELSE 'todo'::procrastinate_job_status
+            END,
+            attempts = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.attempts
+                ELSE procrastinate_jobs.attempts + 1
+            END,
+            scheduled_at = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.scheduled_at
+                ELSE jobs.retry_at
+            END,
+            priority = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.priority
+                ELSE COALESCE(jobs.new_priority, procrastinate_jobs.priority)
+            END,
+            queue_name = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.queue_name
+                ELSE COALESCE(jobs.new_queue_name, procrastinate_jobs.queue_name)
+            END,
+            lock = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.lock
+                ELSE COALESCE(jobs.new_lock, procrastinate_jobs.lock)
+            END
+        FROM unnest(job_ids, retry_ats, new_priorities, new_queue_names, new_locks)
+            AS jobs(id, retry_at, new_priority, new_queue_name, new_lock)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND procrastinate_jobs.status IN ('doing', 'failed');
+    GET DIAGNOSTICS _updated_count = ROW_COUNT;
+    IF _updated_count <> cardinality(job_ids) THEN
+        RAISE 'Some jobs were not found or have an invalid status to retry (job ids: %)', job_ids;
+    END IF;
+END;
+$$;
@@ -0,0 +1,16 @@
+-- Add a function to finish a job and fetch the next one in a single query
+CREATE FUNCTION procrastinate_finish_job_and_fetch_next_v1(
+    job_id bigint,
+    end_status procrastinate_job_status,
+    delete_job boolean,
+    target_queue_names character varying[],
+    p_worker_id bigint
+)
+    RETURNS procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM procrastinate_finish_job_v1(job_id, end_status, delete_job);
+    RETURN procrastinate_fetch_job_v2(target_queue_names, p_worker_id);
+END;
+$$;
@@ -0,0 +1,46 @@
+-- Replace the row-level job_inserted notification trigger by a statement-level
+-- trigger sending a single notification per queue and per statement, with the
+-- number of inserted jobs. Workers only look at the type of the notification, so
+-- this is compatible with the workers of the previous version.
+CREATE FUNCTION procrastinate_notify_queue_jobs_inserted_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _queue record;
+    _total_count bigint := 0;
+BEGIN
+    -- Statement-level trigger: a single notification is sent per queue, whatever
+    -- the number of jobs inserted by the statement
+    FOR _queue IN
+        SELECT queue_name, count(*) AS job_count
+        FROM new_jobs
+        WHERE status = 'todo'::procrastinate_job_status
+        GROUP BY queue_name
+    LOOP
+        PERFORM pg_notify(
+            'procrastinate_queue_v1#' || _queue.queue_name,
+            json_build_object('type', 'job_inserted', 'job_count', _queue.job_count)::text
+        );
+        _total_count := _total_count + _queue.job_count;
+    END LOOP;
+
+    IF _total_count > 0 THEN
+        PERFORM pg_notify(
+            'procrastinate_any_queue_v1',
+            json_build_object('type', 'job_inserted', 'job_count', _total_count)::text
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS procrastinate_jobs_notify_queue_job_inserted_v1 ON procrastinate_jobs;
+
+CREATE TRIGGER procrastinate_jobs_notify_queue_jobs_inserted_v1
+    AFTER INSERT ON procrastinate_jobs
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_notify_queue_jobs_inserted_v1();
+
+DROP FUNCTION IF EXISTS procrastinate_notify_queue_job_inserted_v1;
@@ -0,0 +1,63 @@
+-- Record the events of inserted jobs with statement-level triggers: the events of
+-- all the jobs inserted by a statement are inserted in a single INSERT ... SELECT
+-- reading the transition table, instead of one INSERT per job.
+--
+-- Transition tables cannot be used in triggers on a column list, so the update
+-- triggers stay row-level, to only fire when the status (or the schedule) of a job
+-- changes. They get a WHEN clause so that the trigger function isn't even called
+-- otherwise, and the scheduled events trigger is split in two.
+
+CREATE FUNCTION procrastinate_trigger_function_status_events_insert_v2()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO procrastinate_events(job_id, type)
+        SELECT new_jobs.id, 'deferred'::procrastinate_job_event_type
+        FROM new_jobs
+        WHERE new_jobs.status = 'todo'::procrastinate_job_status;
+	RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_trigger_function_scheduled_events_v2()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO procrastinate_events(job_id, type, at)
+        SELECT new_jobs.id, 'scheduled'::procrastinate_job_event_type, new_jobs.scheduled_at
+        FROM new_jobs
+        WHERE new_jobs.scheduled_at IS NOT NULL
+            AND new_jobs.status = 'todo'::procrastinate_job_status;
+	RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS procrastinate_trigger_status_events_update_v1 ON procrastinate_jobs;
+DROP TRIGGER IF EXISTS procrastinate_trigger_status_events_insert_v1 ON procrastinate_jobs;
+DROP TRIGGER IF EXISTS procrastinate_trigger_scheduled_events_v1 ON procrastinate_jobs;
+
+CREATE TRIGGER procrastinate_trigger_status_events_update_v2
+    AFTER UPDATE OF status ON procrastinate_jobs
+    FOR EACH ROW WHEN ((old.status IS DISTINCT FROM new.status))
+    EXECUTE PROCEDURE procrastinate_trigger_function_status_events_update_v1();
+
+CREATE TRIGGER procrastinate_trigger_status_events_insert_v2
+    AFTER INSERT ON procrastinate_jobs
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_status_events_insert_v2();
+
+CREATE TRIGGER procrastinate_trigger_scheduled_events_insert_v2
+    AFTER INSERT ON procrastinate_jobs
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_scheduled_events_v2();
+
+CREATE TRIGGER procrastinate_trigger_scheduled_events_update_v2
+    AFTER UPDATE OF status, scheduled_at ON procrastinate_jobs
+    FOR EACH ROW WHEN ((new.scheduled_at IS NOT NULL AND new.status = 'todo'::procrastinate_job_status AND (old.status IS DISTINCT FROM new.status OR old.scheduled_at IS DISTINCT FROM new.scheduled_at)))
+    EXECUTE PROCEDURE procrastinate_trigger_function_scheduled_events_v1();
+
+DROP FUNCTION IF EXISTS procrastinate_trigger_function_status_events_insert_v1;
@@ -0,0 +1,131 @@
+-- Allow turning event recording off, or down to some event types, for all the
+-- queues or for some of them. The trigger functions recording the events check
+-- procrastinate_event_settings through procrastinate_event_recorded_v1.
+CREATE TABLE procrastinate_event_settings (
+    queue_name character varying(128) PRIMARY KEY,
+    event_types procrastinate_job_event_type[]
+);
+
+CREATE FUNCTION procrastinate_event_recorded_v1(
+    p_queue_name character varying,
+    p_type procrastinate_job_event_type
+)
+    RETURNS boolean
+    LANGUAGE sql
+    STABLE
+AS $$
+    SELECT coalesce((
+        SELECT settings.event_types IS NULL OR p_type = ANY(settings.event_types)
+        FROM procrastinate_event_settings settings
+        WHERE settings.queue_name IN (p_queue_name, '*')
+        ORDER BY settings.queue_name = '*'
+        LIMIT 1
+    ), true);
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_trigger_function_status_events_insert_v2()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO procrastinate_events(job_id, type)
+        SELECT new_jobs.id, 'deferred'::procrastinate_job_event_type
+        FROM new_jobs
+        WHERE new_jobs.status = 'todo'::procrastinate_job_status
+            AND procrastinate_event_recorded_v1(
+                new_jobs.queue_name, 'deferred'::procrastinate_job_event_type
+            );
+	RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_trigger_function_status_events_update_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    WITH t AS (
+        SELECT CASE
+            WHEN OLD.status = 'todo'::procrastinate_job_status
+                AND NEW.status = 'doing'::procrastinate_job_status
+                THEN 'started'::procrastinate_job_event_type
+            WHEN OLD.status = 'doing'::procrastinate_job_status
+                AND NEW.status = 'todo'::procrastinate_job_status
+                THEN 'deferred_for_retry'::procrastinate_job_event_type
+            WHEN OLD.status = 'doing'::procrastinate_job_status
+                AND NEW.status = 'failed'::procrastinate_job_status
+                THEN 'failed'::procrastinate_job_event_type
+            WHEN OLD.status = 'doing'::procrastinate_job_status
+                AND NEW.status = 'succeeded'::procrastinate_job_status
+                THEN 'succeeded'::procrastinate_job_event_type
+            WHEN OLD.status = 'todo'::procrastinate_job_status
+                AND (
+                    NEW.status = 'cancelled'::procrastinate_job_status
+                    OR NEW.status = 'failed'::procrastinate_job_status
+                    OR NEW.status = 'succeeded'::procrastinate_job_status
+                )
+                THEN 'cancelled'::procrastinate_job_event_type
+            WHEN OLD.status = 'doing'::procrastinate_job_status
+                AND NEW.status = 'aborted'::procrastinate_job_status
+                THEN 'aborted'::procrastinate_job_event_type
+            WHEN OLD.status = 'failed'::procrastinate_job_status
+                AND NEW.status = 'todo'::procrastinate_job_status
+                THEN 'retried'::procrastinate_job_event_type
+            ELSE NULL
+        END as event_type
+    )
+    INSERT INTO procrastinate_events(job_id, type)
+        SELECT NEW.id, t.event_type
+        FROM t
+        WHERE t.event_type IS NOT NULL
+            AND procrastinate_event_recorded_v1(NEW.queue_name, t.event_type);
+	RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_trigger_function_scheduled_events_v2()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO procrastinate_events(job_id, type, at)
+        SELECT new_jobs.id, 'scheduled'::procrastinate_job_event_type, new_jobs.scheduled_at
+        FROM new_jobs
+        WHERE new_jobs.scheduled_at IS NOT NULL
+            AND new_jobs.status = 'todo'::procrastinate_job_status
+            AND procrastinate_event_recorded_v1(
+                new_jobs.queue_name, 'scheduled'::procrastinate_job_event_type
+            );
+	RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_trigger_function_scheduled_events_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF procrastinate_event_recorded_v1(
+        NEW.queue_name, 'scheduled'::procrastinate_job_event_type
+    ) THEN
+        INSERT INTO procrastinate_events(job_id, type, at)
+            VALUES (NEW.id, 'scheduled'::procrastinate_job_event_type, NEW.scheduled_at);
+    END IF;
+	RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_trigger_abort_requested_events_procedure_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF procrastinate_event_recorded_v1(
+        NEW.queue_name, 'abort_requested'::procrastinate_job_event_type
+    ) THEN
+        INSERT INTO procrastinate_events(job_id, type)
+            VALUES (NEW.id, 'abort_requested'::procrastinate_job_event_type);
+    END IF;
+    RETURN NEW;
+END;
+$$;
@@ -0,0 +1,372 @@
+-- Add lifecycle timestamps to the jobs, so that finding old or stalled jobs
+-- doesn't need to aggregate the events. They are set by the functions fetching,
+-- finishing, cancelling and retrying jobs.
+ALTER TABLE procrastinate_jobs
+    ADD COLUMN created_at timestamp with time zone DEFAULT NOW(),
+    ADD COLUMN started_at timestamp with time zone,
+    ADD COLUMN finished_at timestamp with time zone;
+
+-- The timestamps of the existing jobs are initialized from their events by
+-- 03.05.00_50_post_backfill_job_timestamps.sql, batch by batch, with this function.
+-- It only updates the timestamp columns, so that no trigger fires, and only the
+-- jobs whose timestamps change, so that running it again has nothing to write.
+-- started_at is only set for the jobs being processed, and finished_at for the
+-- finished jobs (to now if they have no event). Returns the number of updated jobs.
+CREATE FUNCTION procrastinate_backfill_job_timestamps_v1(p_from_id bigint, p_to_id bigint)
+    RETURNS bigint
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _updated_count bigint;
+BEGIN
+    UPDATE procrastinate_jobs
+        SET created_at = backfill.created_at,
+            started_at = backfill.started_at,
+            finished_at = backfill.finished_at
+        FROM (
+            SELECT jobs.id,
+                COALESCE(events.created_at, jobs.created_at) AS created_at,
+                CASE
+                    WHEN jobs.status = 'doing'
+                        THEN COALESCE(jobs.started_at, events.started_at)
+                    ELSE jobs.started_at
+                END AS started_at,
+                CASE
+                    WHEN jobs.status IN ('succeeded', 'failed', 'cancelled', 'aborted')
+                        THEN COALESCE(jobs.finished_at, events.finished_at, NOW())
+                    ELSE jobs.finished_at
+                END AS finished_at
+            FROM procrastinate_jobs AS jobs
+            LEFT JOIN (
+                SELECT job_id,
+                    min(at) FILTER (WHERE type = 'deferred') AS created_at,
+                    max(at) FILTER (WHERE type = 'started') AS started_at,
+                    max(at) AS finished_at
+                FROM procrastinate_events
+                WHERE job_id >= p_from_id AND job_id < p_to_id
+                GROUP BY job_id
+            ) AS events ON events.job_id = jobs.id
+            WHERE jobs.id >= p_from_id AND jobs.id < p_to_id
+        ) AS backfill
+        WHERE procrastinate_jobs.id = backfill.id
+            AND (
+                procrastinate_jobs.created_at,
+                procrastinate_jobs.started_at,
+                procrastinate_jobs.finished_at
+            ) IS DISTINCT FROM (
+                backfill.created_at, backfill.started_at, backfill.finished_at
+            );
+    GET DIAGNOSTICS _updated_count = ROW_COUNT;
+    RETURN _updated_count;
+END;
+$$;
+
+-- These are used to delete old jobs and find stalled jobs without reading the events
+CREATE INDEX procrastinate_jobs_started_at_idx_v1 ON procrastinate_jobs(started_at) WHERE status = 'doing'::procrastinate_job_status;
+CREATE INDEX procrastinate_jobs_finished_at_idx_v1 ON procrastinate_jobs(finished_at) WHERE finished_at IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION procrastinate_fetch_jobs_v1(
+    target_queue_names character varying[],
+    p_worker_id bigint,
+    p_limit integer
+)
+    RETURNS SETOF procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT jobs.id
+            FROM procrastinate_jobs AS jobs
+            WHERE
+                -- reject the job if its lock has earlier or higher priority jobs
+                NOT EXISTS (
+                    SELECT 1
+                        FROM procrastinate_jobs AS other_jobs
+                        WHERE
+                            jobs.lock IS NOT NULL
+                            AND other_jobs.lock = jobs.lock
+                            AND (
+                                -- job with same lock is already running
+                                other_jobs.status = 'doing'
+                                OR
+                                -- job with same lock is waiting and has higher priority (or same priority but was queued first)
+                                (
+                                    other_jobs.status = 'todo'
+                                    AND (
+                                        other_jobs.priority > jobs.priority
+                                        OR (
+                                        other_jobs.priority = jobs.priority
+                                        AND other_jobs.id < jobs.id
+                                        )
+                                    )
+                                )
+                            )
+                )
+                AND jobs.status = 'todo'
+                AND (target_queue_names IS NULL OR jobs.queue_name = ANY( target_queue_names ))
+                AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+            ORDER BY jobs.priority DESC, jobs.id ASC LIMIT p_limit
+            FOR UPDATE OF jobs SKIP LOCKED
+    )
+    UPDATE procrastinate_jobs
+        SET status = 'doing', worker_id = p_worker_id, started_at = NOW()
+        FROM candidates
+        WHERE procrastinate_jobs.id = candidates.id
+        RETURNING procrastinate_jobs.*;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_finish_job_v1(job_id bigint, end_status procrastinate_job_status, delete_job boolean)
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _job_id bigint;
+BEGIN
+    IF end_status NOT IN ('succeeded', 'failed', 'aborted') THEN
+        RAISE 'End status should be either "succeeded", "failed" or "aborted" (job id: %)', job_id;
+    END IF;
+    IF delete_job THEN
+        DELETE FROM procrastinate_jobs
+        WHERE id = job_id AND status IN ('todo', 'doing')
+        RETURNING id INTO _job_id;
+    ELSE
+        UPDATE procrastinate_jobs
+        SET status = end_status,
+            abort_requested = false,
+            finished_at = NOW(),
+            attempts = CASE status
+                WHEN 'doing' THEN attempts + 1 ELSE attempts
+            END
+        WHERE id = job_id AND status IN ('todo', 'doing')
+        RETURNING id INTO _job_id;
+    END IF;
+    IF _job_id IS NULL THEN
+        RAISE 'Job was not found or not in "doing" or "todo" status (job id: %)', job_id;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_cancel_job_v1(job_id bigint, abort boolean, delete_job boolean)
+    RETURNS bigint
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _job_id bigint;
+BEGIN
+    IF delete_job THEN
+        DELETE FROM procrastinate_jobs
+        WHERE id = job_id AND status = 'todo'
+        RETURNING id INTO _job_id;
+    END IF;
+    IF _job_id IS NULL THEN
+        IF abort THEN
+            UPDATE procrastinate_jobs
+            SET abort_requested = true,
+                status = CASE status
+                    WHEN 'todo' THEN 'cancelled'::procrastinate_job_status ELSE status
+                END,
+                finished_at = CASE status
+                    WHEN 'todo' THEN NOW() ELSE finished_at
+                END
+            WHERE id = job_id AND status IN ('todo', 'doing')
+            RETURNING id INTO _job_id;
+        ELSE
+            UPDATE procrastinate_jobs
+            SET status = 'cancelled'::procrastinate_job_status,
+                finished_at = NOW()
+            WHERE id = job_id AND status = 'todo'
+            RETURNING id INTO _job_id;
+        END IF;
+    END IF;
+    RETURN _job_id;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_retry_job_v1(
+    job_id bigint,
+    retry_at timestamp with time zone,
+    new_priority integer,
+    new_queue_name character varying,
+    new_lock character varying
+) RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    _job_id bigint;
+    _abort_requested boolean;
+BEGIN
+    SELECT abort_requested FROM procrastinate_jobs
+    WHERE id = job_id AND status = 'doing'
+    FOR UPDATE
+    INTO _abort_requested;
+    IF _abort_requested THEN
+        UPDATE procrastinate_jobs
+        SET status = 'failed'::procrastinate_job_status,
+            finished_at = NOW()
+        WHERE id = job_id AND status = 'doing'
+        RETURNING id INTO _job_id;
+    ELSE
+        UPDATE procrastinate_jobs
+        SET status = 'todo'::procrastinate_job_status,
+            attempts = attempts + 1,
+            scheduled_at = retry_at,
+            priority = COALESCE(new_priority, priority),
+            queue_name = COALESCE(new_queue_name, queue_name),
+            lock = COALESCE(new_lock, lock),
+            finished_at = NULL
+        WHERE id = job_id AND status = 'doing'
+        RETURNING id INTO _job_id;
+    END IF;
+
+    IF _job_id IS NULL THEN
+        RAISE 'Job was not found or not in "doing" status (job id: %)', job_id;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_retry_job_v2(
+    job_id bigint,
+    retry_at timestamp with time zone,
+    new_priority integer,
+    new_queue_name character varying,
+    new_lock character varying
+) RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    _job_id bigint;
+    _abort_requested boolean;
+    _current_status procrastinate_job_status;
+BEGIN
+    SELECT status, abort_requested FROM procrastinate_jobs
+    WHERE id = job_id AND status IN ('doing', 'failed')
+    FOR UPDATE
+    INTO _current_status, _abort_requested;
+    IF _current_status = 'doing' AND _abort_requested THEN
+        UPDATE procrastinate_jobs
+        SET status = 'failed'::procrastinate_job_status,
+            finished_at = NOW()
+        WHERE id = job_id AND status = 'doing'
+        RETURNING id INTO _job_id;
+    ELSE
+        UPDATE procrastinate_jobs
+        SET status = 'todo'::procrastinate_job_status,
+            attempts = attempts + 1,
+            scheduled_at = retry_at,
+            priority = COALESCE(new_priority, priority),
+            queue_name = COALESCE(new_queue_name, queue_name),
+            lock = COALESCE(new_lock, lock),
+            finished_at = NULL
+        WHERE id = job_id AND status IN ('doing', 'failed')
+        RETURNING id INTO _job_id;
+    END IF;
+
+    IF _job_id IS NULL THEN
+        RAISE 'Job was not found or has an invalid status to retry (job id: %)', job_id;
+    END IF;
+
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_finish_jobs_v1(
+    job_ids bigint[],
+    end_statuses procrastinate_job_status[],
+    delete_jobs boolean[]
+)
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _deleted_count integer;
+    _updated_count integer;
+BEGIN
+    IF EXISTS (
+        SELECT FROM unnest(end_statuses) AS end_status
+            WHERE end_status NOT IN ('succeeded', 'failed', 'aborted')
+    ) THEN
+        RAISE 'End statuses should be either "succeeded", "failed" or "aborted" (job ids: %)', job_ids;
+    END IF;
+    -- A single statement per operation, whatever the number of jobs, so that the
+    -- statement-level triggers only run once
+    DELETE FROM procrastinate_jobs
+        USING unnest(job_ids, delete_jobs) AS jobs(id, delete_job)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND jobs.delete_job
+            AND procrastinate_jobs.status IN ('todo', 'doing');
+    GET DIAGNOSTICS _deleted_count = ROW_COUNT;
+    UPDATE procrastinate_jobs
+        SET status = jobs.end_status,
+            abort_requested = false,
+            finished_at = NOW(),
+            attempts = CASE procrastinate_jobs.status
+                WHEN 'doing' THEN procrastinate_jobs.attempts + 1 ELSE procrastinate_jobs.attempts
+            END
+        FROM unnest(job_ids, end_statuses, delete_jobs) AS jobs(id, end_status, delete_job)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND NOT jobs.delete_job
+            AND procrastinate_jobs.status IN ('todo', 'doing');
+    GET DIAGNOSTICS _updated_count = ROW_COUNT;
+    IF _deleted_count + _updated_count <> cardinality(job_ids) THEN
+        RAISE 'Some jobs were not found or not in "doing" or "todo" status (job ids: %)', job_ids;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_retry_jobs_v1(
+    job_ids bigint[],
+    retry_ats timestamp with time zone[],
+    new_priorities integer[],
+    new_queue_names character varying[],
+    new_locks character varying[]
+)
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _updated_count integer;
+BEGIN
+    -- Like procrastinate_retry_job_v2, but in a single statement: the jobs whose
+    -- abortion was requested fail, the other ones are retried
+    UPDATE procrastinate_jobs
+        SET status = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN 'failed'::procrastinate_job_status
+                ELSE 'todo'::procrastinate_job_status
+            END,
+            attempts = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.attempts
+                ELSE procrastinate_jobs.attempts + 1
+            END,
+            scheduled_at = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.scheduled_at
+                ELSE jobs.retry_at
+            END,
+            priority = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.priority
+                ELSE COALESCE(jobs.new_priority, procrastinate_jobs.priority)
+            END,
+            queue_name = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.queue_name
+                ELSE COALESCE(jobs.new_queue_name, procrastinate_jobs.queue_name)
+            END,
+            finished_at = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN NOW()
+            END,
+            lock = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.lock
+                ELSE COALESCE(jobs.new_lock, procrastinate_jobs.lock)
+            END
+        FROM unnest(job_ids, retry_ats, new_priorities, new_queue_names, new_locks)
+            AS jobs(id, retry_at, new_priority, new_queue_name, new_lock)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND procrastinate_jobs.status IN ('doing', 'failed');
+    GET DIAGNOSTICS _updated_count = ROW_COUNT;
+    IF _updated_count <> cardinality(job_ids) THEN
+        RAISE 'Some jobs were not found or have an invalid status to retry (job ids: %)', job_ids;
+    END IF;
+END;
+$$;
@@ -0,0 +1,29 @@
+-- Finished jobs and their events can be moved to these tables (see the
+-- archive_old_jobs builtin task), so that procrastinate_jobs stays small
+CREATE TABLE procrastinate_jobs_archive (
+    id bigint PRIMARY KEY,
+    queue_name character varying(128) NOT NULL,
+    task_name character varying(128) NOT NULL,
+    priority integer NOT NULL,
+    lock text,
+    queueing_lock text,
+    args jsonb NOT NULL,
+    status procrastinate_job_status NOT NULL,
+    scheduled_at timestamp with time zone NULL,
+    attempts integer NOT NULL,
+    abort_requested boolean NOT NULL,
+    worker_id bigint,
+    created_at timestamp with time zone,
+    started_at timestamp with time zone,
+    finished_at timestamp with time zone
+);
+
+CREATE TABLE procrastinate_events_archive (
+    id bigint PRIMARY KEY,
+    job_id bigint NOT NULL REFERENCES procrastinate_jobs_archive ON DELETE CASCADE,
+    type procrastinate_job_event_type,
+    at timestamp with time zone NULL
+);
+
+CREATE INDEX procrastinate_jobs_archive_finished_at_idx_v1 ON procrastinate_jobs_archive(finished_at);
+CREATE INDEX procrastinate_events_archive_job_id_fkey_v1 ON procrastinate_events_archive(job_id);
@@ -0,0 +1,134 @@
+-- procrastinate_events can optionally be partitioned by day (UTC) on the "at"
+-- column, so that old events are removed by dropping partitions instead of
+-- deleting rows. Daily partitions are named procrastinate_events_YYYYMMDD, events
+-- that fall outside of them go to procrastinate_events_default.
+CREATE FUNCTION procrastinate_create_events_partitions_v1(
+    start_at timestamp with time zone,
+    end_at timestamp with time zone
+)
+    RETURNS integer
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    partition_day date;
+    partition_name text;
+    partition_start timestamp with time zone;
+    partition_end timestamp with time zone;
+    created integer := 0;
+BEGIN
+    IF NOT EXISTS (
+        SELECT FROM pg_partitioned_table WHERE partrelid = 'procrastinate_events'::regclass
+    ) THEN
+        RAISE 'procrastinate_events is not partitioned'
+            USING ERRCODE = 'object_not_in_prerequisite_state';
+    END IF;
+
+    FOR partition_day IN
+        SELECT generate_series(
+            (start_at AT TIME ZONE 'UTC')::date,
+            (end_at AT TIME ZONE 'UTC')::date,
+            '1 day'::interval
+        )::date
+    LOOP
+        partition_name := 'procrastinate_events_' || to_char(partition_day, 'YYYYMMDD');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        partition_start := partition_day::timestamp AT TIME ZONE 'UTC';
+        partition_end := (partition_day + 1)::timestamp AT TIME ZONE 'UTC';
+        -- The events of that day that went to the default partition (e.g. scheduled
+        -- events) are moved to the new partition before attaching it
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE procrastinate_events INCLUDING DEFAULTS)',
+            partition_name
+        );
+        EXECUTE format(
+            'WITH moved AS ('
+            '    DELETE FROM procrastinate_events_default WHERE at >= %L AND at < %L'
+            '    RETURNING *'
+            ') INSERT INTO %I SELECT * FROM moved',
+            partition_start, partition_end, partition_name
+        );
+        EXECUTE format(
+            'ALTER TABLE procrastinate_events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, partition_start, partition_end
+        );
+        created := created + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_drop_events_partitions_v1(before timestamp with time zone)
+    RETURNS integer
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    partition_name text;
+    dropped integer := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'procrastinate_events'::regclass
+            AND child.relname ~ '^procrastinate_events_[0-9]{8}$'
+            AND (to_date(right(child.relname, 8), 'YYYYMMDD') + 1)::timestamp
+                AT TIME ZONE 'UTC' <= before
+        ORDER BY child.relname
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE procrastinate_events DETACH PARTITION %I', partition_name
+        );
+        EXECUTE format('DROP TABLE %I', partition_name);
+        dropped := dropped + 1;
+    END LOOP;
+    RETURN dropped;
+END;
+$$;
+
+-- Turns procrastinate_events into a partitioned table, with partitions for its
+-- existing events and for the next 7 days. The events are copied, so this locks
+-- the table for a while on large databases.
+CREATE FUNCTION procrastinate_partition_events_v1()
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    first_at timestamp with time zone;
+BEGIN
+    IF EXISTS (
+        SELECT FROM pg_partitioned_table WHERE partrelid = 'procrastinate_events'::regclass
+    ) THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE procrastinate_events
+        DROP CONSTRAINT procrastinate_events_pkey,
+        DROP CONSTRAINT procrastinate_events_job_id_fkey;
+    DROP INDEX procrastinate_events_job_id_fkey_v1;
+    ALTER TABLE procrastinate_events RENAME TO procrastinate_events_unpartitioned;
+
+    -- The partition key has to be part of the primary key
+    CREATE TABLE procrastinate_events (
+        id bigint DEFAULT nextval('procrastinate_events_id_seq') NOT NULL,
+        job_id bigint NOT NULL,
+        type procrastinate_job_event_type,
+        at timestamp with time zone DEFAULT NOW() NOT NULL,
+        CONSTRAINT procrastinate_events_pkey PRIMARY KEY (id, at),
+        CONSTRAINT procrastinate_events_job_id_fkey FOREIGN KEY (job_id)
+            REFERENCES procrastinate_jobs ON DELETE CASCADE
+    ) PARTITION BY RANGE (at);
+    CREATE INDEX procrastinate_events_job_id_fkey_v1 ON procrastinate_events(job_id);
+    CREATE TABLE procrastinate_events_default PARTITION OF procrastinate_events DEFAULT;
+    ALTER SEQUENCE procrastinate_events_id_seq OWNED BY procrastinate_events.id;
+
+    SELECT min(events.at) INTO first_at FROM procrastinate_events_unpartitioned events;
+    PERFORM procrastinate_create_events_partitions_v1(
+        LEAST(first_at, NOW()), NOW() + '7 days'::interval
+    );
+    INSERT INTO procrastinate_events (id, job_id, type, at)
+        SELECT events.id, events.job_id, events.type, COALESCE(events.at, '-infinity')
+        FROM procrastinate_events_unpartitioned events;
+    DROP TABLE procrastinate_events_unpartitioned;
+END;
+$$;
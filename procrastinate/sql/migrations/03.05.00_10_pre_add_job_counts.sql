@@ -0,0 +1,118 @@
+-- Opt-in counters of the jobs per queue, task and status, used to list the queues
+-- and tasks without scanning procrastinate_jobs
+CREATE TABLE procrastinate_job_counts (
+    queue_name character varying(128) NOT NULL,
+    task_name character varying(128) NOT NULL,
+    status procrastinate_job_status NOT NULL,
+    count bigint NOT NULL
+);
+
+CREATE INDEX procrastinate_job_counts_queue_name_task_name_status_idx_v1 ON procrastinate_job_counts(queue_name, task_name, status);
+
+CREATE FUNCTION procrastinate_trigger_function_job_counts_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+            SELECT new_jobs.queue_name, new_jobs.task_name, new_jobs.status, count(*)
+            FROM new_jobs
+            GROUP BY new_jobs.queue_name, new_jobs.task_name, new_jobs.status;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+            SELECT old_jobs.queue_name, old_jobs.task_name, old_jobs.status, -count(*)
+            FROM old_jobs
+            GROUP BY old_jobs.queue_name, old_jobs.task_name, old_jobs.status;
+    ELSE
+        INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+            SELECT changes.queue_name, changes.task_name, changes.status, sum(changes.delta)
+            FROM (
+                SELECT new_jobs.queue_name, new_jobs.task_name, new_jobs.status, 1 AS delta
+                FROM new_jobs
+                UNION ALL
+                SELECT old_jobs.queue_name, old_jobs.task_name, old_jobs.status, -1 AS delta
+                FROM old_jobs
+            ) AS changes
+            GROUP BY changes.queue_name, changes.task_name, changes.status
+            HAVING sum(changes.delta) <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_job_counts_enabled_v1()
+    RETURNS boolean
+    LANGUAGE sql
+    STABLE
+AS $$
+    SELECT EXISTS (
+        SELECT FROM pg_trigger
+        WHERE tgrelid = 'procrastinate_jobs'::regclass
+            AND tgname = 'procrastinate_trigger_job_counts_insert_v1'
+    );
+$$;
+
+CREATE FUNCTION procrastinate_enable_job_counts_v1()
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF procrastinate_job_counts_enabled_v1() THEN
+        RETURN;
+    END IF;
+
+    -- Creating the triggers blocks the writes to procrastinate_jobs until the end
+    -- of the transaction, so the initial counts can't miss a change
+    CREATE TRIGGER procrastinate_trigger_job_counts_insert_v1
+        AFTER INSERT ON procrastinate_jobs
+        REFERENCING NEW TABLE AS new_jobs
+        FOR EACH STATEMENT
+        EXECUTE PROCEDURE procrastinate_trigger_function_job_counts_v1();
+    CREATE TRIGGER procrastinate_trigger_job_counts_update_v1
+        AFTER UPDATE ON procrastinate_jobs
+        REFERENCING OLD TABLE AS old_jobs NEW TABLE AS new_jobs
+        FOR EACH STATEMENT
+        EXECUTE PROCEDURE procrastinate_trigger_function_job_counts_v1();
+    CREATE TRIGGER procrastinate_trigger_job_counts_delete_v1
+        AFTER DELETE ON procrastinate_jobs
+        REFERENCING OLD TABLE AS old_jobs
+        FOR EACH STATEMENT
+        EXECUTE PROCEDURE procrastinate_trigger_function_job_counts_v1();
+
+    DELETE FROM procrastinate_job_counts;
+    INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+        SELECT queue_name, task_name, status, count(*)
+        FROM procrastinate_jobs
+        GROUP BY queue_name, task_name, status;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_disable_job_counts_v1()
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    DROP TRIGGER IF EXISTS procrastinate_trigger_job_counts_insert_v1 ON procrastinate_jobs;
+    DROP TRIGGER IF EXISTS procrastinate_trigger_job_counts_update_v1 ON procrastinate_jobs;
+    DROP TRIGGER IF EXISTS procrastinate_trigger_job_counts_delete_v1 ON procrastinate_jobs;
+    DELETE FROM procrastinate_job_counts;
+END;
+$$;
+
+-- Sums up the deltas recorded by the triggers. Concurrent deltas are left for the
+-- next call, so this can run anytime.
+CREATE FUNCTION procrastinate_compact_job_counts_v1()
+    RETURNS void
+    LANGUAGE sql
+AS $$
+    WITH deltas AS (
+        DELETE FROM procrastinate_job_counts
+        RETURNING queue_name, task_name, status, count
+    )
+    INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+        SELECT queue_name, task_name, status, sum(count)
+        FROM deltas
+        GROUP BY queue_name, task_name, status
+        HAVING sum(count) <> 0;
+$$;
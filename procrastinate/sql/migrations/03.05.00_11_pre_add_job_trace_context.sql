@@ -0,0 +1,43 @@
+-- Store the trace context of the span deferring a job (as W3C Trace Context
+-- headers), so that the spans of the worker running the job can be linked to it.
+ALTER TABLE procrastinate_jobs ADD COLUMN trace_context jsonb;
+ALTER TABLE procrastinate_jobs_archive ADD COLUMN trace_context jsonb;
+
+CREATE TYPE procrastinate_job_to_defer_v2 AS (
+    queue_name character varying,
+    task_name character varying,
+    priority integer,
+    lock text,
+    queueing_lock text,
+    args jsonb,
+    scheduled_at timestamp with time zone,
+    trace_context jsonb
+);
+
+CREATE FUNCTION procrastinate_defer_jobs_v2(
+    jobs procrastinate_job_to_defer_v2[]
+)
+    RETURNS bigint[]
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    job_ids bigint[];
+BEGIN
+    WITH inserted_jobs AS (
+        INSERT INTO procrastinate_jobs (queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at, trace_context)
+        SELECT (job).queue_name,
+               (job).task_name,
+               (job).priority,
+               (job).lock,
+               (job).queueing_lock,
+               (job).args,
+               (job).scheduled_at,
+               (job).trace_context
+        FROM unnest(jobs) AS job
+        RETURNING id
+    )
+    SELECT array_agg(id) FROM inserted_jobs INTO job_ids;
+
+    RETURN job_ids;
+END;
+$$;
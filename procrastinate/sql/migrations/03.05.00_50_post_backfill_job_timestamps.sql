@@ -0,0 +1,20 @@
+-- Initialize the timestamps of the jobs created before
+-- 03.05.00_07_pre_add_job_timestamps.sql from their events, by batches of 10000
+-- jobs. When applied as a single script, all the batches run in the same
+-- transaction: on a large procrastinate_jobs table, you may want to run the batches
+-- in their own transactions first (see the migrations documentation), this script
+-- then has nothing left to update.
+DO $$
+DECLARE
+    _batch_start bigint;
+    _max_id bigint;
+BEGIN
+    SELECT min(id), max(id) INTO _batch_start, _max_id FROM procrastinate_jobs;
+    WHILE _batch_start <= _max_id LOOP
+        PERFORM procrastinate_backfill_job_timestamps_v1(_batch_start, _batch_start + 10000);
+        _batch_start := _batch_start + 10000;
+    END LOOP;
+END;
+$$;
+
+DROP FUNCTION procrastinate_backfill_job_timestamps_v1(bigint, bigint);
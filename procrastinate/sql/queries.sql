@@ -6,8 +6,8 @@
 -- defer_jobs --
 -- Create and enqueue one or more jobs
 SELECT  unnest(
-  procrastinate_defer_jobs_v1(
-    %(jobs)s::procrastinate_job_to_defer_v1[]
+  procrastinate_defer_jobs_v2(
+    %(jobs)s::procrastinate_job_to_defer_v2[]
   )
 ) AS id;
 
@@ -18,23 +18,26 @@ SELECT procrastinate_defer_periodic_job_v2(%(queue)s, %(lock)s, %(queueing_lock)
 
 -- fetch_job --
 -- Get the first awaiting job
-SELECT id, status, task_name, priority, lock, queueing_lock, args, scheduled_at, queue_name, attempts, worker_id
+SELECT id, status, task_name, priority, lock, queueing_lock, args, scheduled_at, queue_name, attempts, worker_id,
+       created_at, started_at, trace_context
     FROM procrastinate_fetch_job_v2(%(queues)s::varchar[], %(worker_id)s);
 
+-- fetch_jobs --
+-- Get the first awaiting jobs, up to a given number of jobs
+SELECT id, status, task_name, priority, lock, queueing_lock, args, scheduled_at, queue_name, attempts, worker_id,
+       created_at, started_at, trace_context
+    FROM procrastinate_fetch_jobs_v1(%(queues)s::varchar[], %(worker_id)s, %(limit)s)
+    ORDER BY priority DESC, id ASC;
+
 -- select_stalled_jobs_by_started --
 -- Get running jobs that started more than a given time ago
-SELECT job.id, status, task_name, priority, lock, queueing_lock,
-       args, scheduled_at, queue_name, attempts, worker_id,
-       MAX(event.at) AS started_at
-    FROM procrastinate_jobs job
-    JOIN procrastinate_events event
-      ON event.job_id = job.id
-WHERE event.type = 'started'
-  AND job.status = 'doing'
-  AND (%(queue)s::varchar IS NULL OR job.queue_name = %(queue)s)
-  AND (%(task_name)s::varchar IS NULL OR job.task_name = %(task_name)s)
-GROUP BY job.id
-  HAVING MAX(event.at) < NOW() - (%(nb_seconds)s || 'SECOND')::INTERVAL
+SELECT id, status, task_name, priority, lock, queueing_lock,
+       args, scheduled_at, queue_name, attempts, worker_id, created_at, started_at
+    FROM procrastinate_jobs
+WHERE status = 'doing'
+  AND started_at < NOW() - (%(nb_seconds)s || 'SECOND')::INTERVAL
+  AND (%(queue)s::varchar IS NULL OR queue_name = %(queue)s)
+  AND (%(task_name)s::varchar IS NULL OR task_name = %(task_name)s)
 
 -- select_stalled_jobs_by_heartbeat --
 -- Get running jobs of stalled workers (with absent or outdated heartbeat)
@@ -44,7 +47,7 @@ WITH stalled_workers AS (
     WHERE last_heartbeat < NOW() - (%(seconds_since_heartbeat)s || ' SECOND')::INTERVAL
 )
 SELECT job.id, status, task_name, priority, lock, queueing_lock,
-       args, scheduled_at, queue_name, attempts, job.worker_id
+       args, scheduled_at, queue_name, attempts, job.worker_id, created_at, started_at
   FROM procrastinate_jobs job
  LEFT JOIN stalled_workers sw ON sw.id = job.worker_id
  WHERE job.status = 'doing'
@@ -53,25 +56,132 @@ SELECT job.id, status, task_name, priority, lock, queueing_lock,
    AND (job.worker_id IS NULL OR sw.id IS NOT NULL)
 
 -- delete_old_jobs --
--- Delete jobs that have been in a final state for longer than nb_hours
-DELETE FROM procrastinate_jobs
-WHERE id IN (
-    SELECT job.id FROM (
-        SELECT DISTINCT ON (job.id) job.*, event.at AS latest_at
-            FROM procrastinate_jobs job
-            JOIN procrastinate_events event
-              ON job.id = event.job_id
-            ORDER BY job.id, event.at DESC
-    ) AS job
-    WHERE job.status = ANY(%(statuses)s::procrastinate_job_status[])
-      AND (%(queue)s::varchar IS NULL OR job.queue_name = %(queue)s)
-      AND latest_at < NOW() - (%(nb_hours)s || 'HOUR')::INTERVAL
+-- Delete jobs that have been in a final state for longer than nb_hours, oldest first,
+-- up to chunk_size jobs (all of them if NULL). Returns the number of deleted jobs.
+WITH old_jobs AS (
+    SELECT id
+        FROM procrastinate_jobs
+        WHERE finished_at < NOW() - (%(nb_hours)s || 'HOUR')::INTERVAL
+          AND status = ANY(%(statuses)s::procrastinate_job_status[])
+          AND (%(queue)s::varchar IS NULL OR queue_name = %(queue)s)
+        ORDER BY finished_at
+        LIMIT %(chunk_size)s
+        FOR UPDATE SKIP LOCKED
+), deleted_jobs AS (
+    DELETE FROM procrastinate_jobs
+        WHERE id IN (SELECT id FROM old_jobs)
+        RETURNING id
+)
+SELECT count(*) AS count FROM deleted_jobs;
+
+-- archive_old_jobs --
+-- Move jobs that have been in a final state for longer than nb_hours, and their
+-- events, to the archive tables, oldest first, up to chunk_size jobs (all of them if
+-- NULL). Returns the number of archived jobs.
+WITH old_jobs AS (
+    SELECT id
+        FROM procrastinate_jobs
+        WHERE finished_at < NOW() - (%(nb_hours)s || 'HOUR')::INTERVAL
+          AND status = ANY(%(statuses)s::procrastinate_job_status[])
+          AND (%(queue)s::varchar IS NULL OR queue_name = %(queue)s)
+        ORDER BY finished_at
+        LIMIT %(chunk_size)s
+        FOR UPDATE SKIP LOCKED
+), deleted_jobs AS (
+    -- The events are deleted by cascade, but archived_events still sees them
+    DELETE FROM procrastinate_jobs
+        WHERE id IN (SELECT id FROM old_jobs)
+        RETURNING *
+), archived_events AS (
+    INSERT INTO procrastinate_events_archive (id, job_id, type, at)
+        SELECT id, job_id, type, at
+            FROM procrastinate_events
+            WHERE job_id IN (SELECT id FROM old_jobs)
+), archived_jobs AS (
+    INSERT INTO procrastinate_jobs_archive (
+        id, queue_name, task_name, priority, lock, queueing_lock, args, status,
+        scheduled_at, attempts, abort_requested, worker_id, created_at, started_at,
+        finished_at, trace_context
+    )
+        SELECT id, queue_name, task_name, priority, lock, queueing_lock, args, status,
+               scheduled_at, attempts, abort_requested, worker_id, created_at,
+               started_at, finished_at, trace_context
+            FROM deleted_jobs
+        RETURNING id
+)
+SELECT count(*) AS count FROM archived_jobs;
+
+-- delete_archived_jobs --
+-- Delete archived jobs that finished more than nb_hours ago, oldest first, up to
+-- chunk_size jobs (all of them if NULL). Their archived events are deleted by
+-- cascade. Returns the number of deleted jobs.
+WITH old_jobs AS (
+    SELECT id
+        FROM procrastinate_jobs_archive
+        WHERE finished_at < NOW() - (%(nb_hours)s || 'HOUR')::INTERVAL
+          AND (%(queue)s::varchar IS NULL OR queue_name = %(queue)s)
+        ORDER BY finished_at
+        LIMIT %(chunk_size)s
+        FOR UPDATE SKIP LOCKED
+), deleted_jobs AS (
+    DELETE FROM procrastinate_jobs_archive
+        WHERE id IN (SELECT id FROM old_jobs)
+        RETURNING id
 )
+SELECT count(*) AS count FROM deleted_jobs;
+
+-- set_recorded_events --
+-- Set the types of the events recorded for the jobs of a queue ('*' for all queues)
+INSERT INTO procrastinate_event_settings (queue_name, event_types)
+    VALUES (%(queue)s, %(event_types)s::procrastinate_job_event_type[])
+    ON CONFLICT (queue_name) DO UPDATE SET event_types = EXCLUDED.event_types;
+
+-- enable_job_counts --
+-- Start counting the jobs per queue, task and status in procrastinate_job_counts
+SELECT procrastinate_enable_job_counts_v1();
+
+-- disable_job_counts --
+-- Stop counting the jobs in procrastinate_job_counts
+SELECT procrastinate_disable_job_counts_v1();
+
+-- compact_job_counts --
+-- Sum up the deltas of procrastinate_job_counts
+SELECT procrastinate_compact_job_counts_v1();
+
+-- create_events_partitions --
+-- Create the daily partitions of the events table, from today to days_ahead days
+-- ahead. Returns the number of created partitions.
+SELECT procrastinate_create_events_partitions_v1(
+    NOW(), NOW() + %(days_ahead)s * INTERVAL '1 day'
+) AS count;
+
+-- drop_events_partitions --
+-- Drop the daily partitions of the events table that are entirely older than
+-- nb_days. Returns the number of dropped partitions.
+SELECT procrastinate_drop_events_partitions_v1(
+    NOW() - %(nb_days)s * INTERVAL '1 day'
+) AS count;
 
 -- finish_job --
 -- Finish a job, changing it from "doing" to "succeeded" or "failed"
 SELECT procrastinate_finish_job_v1(%(job_id)s, %(status)s, %(delete_job)s);
 
+-- finish_job_and_fetch_next --
+-- Finish a job, then get the next awaiting job for the same worker
+SELECT id, status, task_name, priority, lock, queueing_lock, args, scheduled_at, queue_name, attempts, worker_id,
+       created_at, started_at, trace_context
+    FROM procrastinate_finish_job_and_fetch_next_v1(
+        %(job_id)s, %(status)s, %(delete_job)s, %(queues)s::varchar[], %(worker_id)s
+    );
+
+-- finish_jobs --
+-- Finish several jobs at once, changing them from "doing" to their end status
+SELECT procrastinate_finish_jobs_v1(
+    %(job_ids)s::bigint[],
+    %(statuses)s::procrastinate_job_status[],
+    %(delete_jobs)s::boolean[]
+);
+
 -- cancel_job --
 -- Cancel a job, changing it from "todo" to "cancelled" or mark for abortion
 SELECT procrastinate_cancel_job_v1(%(job_id)s, %(abort)s, %(delete_job)s) AS id;
@@ -84,6 +194,16 @@ SELECT status FROM procrastinate_jobs WHERE id = %(job_id)s;
 -- Retry a job, changing it from "doing" to "todo" or from "failed" to "todo"
 SELECT procrastinate_retry_job_v2(%(job_id)s, %(retry_at)s, %(new_priority)s, %(new_queue_name)s, %(new_lock)s);
 
+-- retry_jobs --
+-- Retry several jobs at once, changing them from "doing" to "todo"
+SELECT procrastinate_retry_jobs_v1(
+    %(job_ids)s::bigint[],
+    %(retry_ats)s::timestamptz[],
+    %(new_priorities)s::integer[],
+    %(new_queue_names)s::varchar[],
+    %(new_locks)s::varchar[]
+);
+
 -- listen_queue --
 -- In this one, the argument is an identifier, shoud not be escaped the same way
 LISTEN {channel_name};
@@ -93,11 +213,59 @@ LISTEN {channel_name};
 SELECT to_regclass('procrastinate_jobs') as check;
 
 -- count_jobs_status --
--- Count the number of jobs per status
-SELECT count(*) AS count, status FROM procrastinate_jobs GROUP BY status;
+-- Count the number of jobs per status, from procrastinate_job_counts if enabled
+SELECT sum(count)::bigint AS count, status
+  FROM procrastinate_job_counts
+ WHERE procrastinate_job_counts_enabled_v1()
+ GROUP BY status
+HAVING sum(count) <> 0
+UNION ALL
+SELECT count(*) AS count, status
+  FROM procrastinate_jobs
+ WHERE NOT procrastinate_job_counts_enabled_v1()
+ GROUP BY status;
 
 -- list_jobs --
--- Get list of jobs
+-- Get list of jobs, including the archived jobs if include_archived is true, at most
+-- limit jobs (all of them if NULL) with an id greater than after_id (keyset
+-- pagination: job ids start at 1). Each table is sorted and limited on its own, so
+-- that they are both read through their primary key.
+WITH jobs AS (
+    (
+        SELECT id, queue_name, task_name, priority, lock, queueing_lock, args, status,
+               scheduled_at, attempts, abort_requested, worker_id, created_at,
+               started_at, finished_at, trace_context
+          FROM procrastinate_jobs
+         WHERE (%(id)s::bigint IS NULL OR id = %(id)s)
+           AND (%(queue_name)s::varchar IS NULL OR queue_name = %(queue_name)s)
+           AND (%(task_name)s::varchar IS NULL OR task_name = %(task_name)s)
+           AND (%(status)s::procrastinate_job_status IS NULL OR status = %(status)s)
+           AND (%(lock)s::varchar IS NULL OR lock = %(lock)s)
+           AND (%(queueing_lock)s::varchar IS NULL OR queueing_lock = %(queueing_lock)s)
+           AND (%(worker_id)s::bigint IS NULL OR worker_id = %(worker_id)s)
+           AND id > COALESCE(%(after_id)s::bigint, 0)
+         ORDER BY id
+         LIMIT %(limit)s
+    )
+    UNION ALL
+    (
+        SELECT id, queue_name, task_name, priority, lock, queueing_lock, args, status,
+               scheduled_at, attempts, abort_requested, worker_id, created_at,
+               started_at, finished_at, trace_context
+          FROM procrastinate_jobs_archive
+         WHERE (%(id)s::bigint IS NULL OR id = %(id)s)
+           AND (%(queue_name)s::varchar IS NULL OR queue_name = %(queue_name)s)
+           AND (%(task_name)s::varchar IS NULL OR task_name = %(task_name)s)
+           AND (%(status)s::procrastinate_job_status IS NULL OR status = %(status)s)
+           AND (%(lock)s::varchar IS NULL OR lock = %(lock)s)
+           AND (%(queueing_lock)s::varchar IS NULL OR queueing_lock = %(queueing_lock)s)
+           AND (%(worker_id)s::bigint IS NULL OR worker_id = %(worker_id)s)
+           AND id > COALESCE(%(after_id)s::bigint, 0)
+           AND %(include_archived)s::boolean
+         ORDER BY id
+         LIMIT %(limit)s
+    )
+)
 SELECT id,
        queue_name,
        task_name,
@@ -109,78 +277,76 @@ SELECT id,
        scheduled_at,
        attempts,
        abort_requested,
-       worker_id
-  FROM procrastinate_jobs
- WHERE (%(id)s::bigint IS NULL OR id = %(id)s)
-   AND (%(queue_name)s::varchar IS NULL OR queue_name = %(queue_name)s)
-   AND (%(task_name)s::varchar IS NULL OR task_name = %(task_name)s)
-   AND (%(status)s::procrastinate_job_status IS NULL OR status = %(status)s)
-   AND (%(lock)s::varchar IS NULL OR lock = %(lock)s)
-   AND (%(queueing_lock)s::varchar IS NULL OR queueing_lock = %(queueing_lock)s)
-   AND (%(worker_id)s::bigint IS NULL OR worker_id = %(worker_id)s)
- ORDER BY id ASC;
+       worker_id,
+       created_at,
+       started_at,
+       finished_at,
+       trace_context
+  FROM jobs
+ ORDER BY id ASC
+ LIMIT %(limit)s;
 
 -- list_queues --
--- Get list of queues and number of jobs per queue
-WITH jobs AS (
-   SELECT id,
-          queue_name,
-          task_name,
-          lock,
-          args,
-          status,
-          scheduled_at,
-          attempts
+-- Get list of queues and number of jobs per queue. The jobs are counted from
+-- procrastinate_job_counts if enabled, unless they are filtered by lock.
+WITH use_counts AS (
+   SELECT %(lock)s::varchar IS NULL AND procrastinate_job_counts_enabled_v1() AS enabled
+), jobs AS (
+   SELECT queue_name, task_name, status, count
+     FROM procrastinate_job_counts
+    WHERE (SELECT enabled FROM use_counts)
+   UNION ALL
+   SELECT queue_name, task_name, status, 1 AS count
      FROM procrastinate_jobs
+    WHERE NOT (SELECT enabled FROM use_counts)
+      AND (%(lock)s::varchar IS NULL OR lock = %(lock)s)
+), stats AS (
+   SELECT queue_name,
+          status,
+          sum(count)::bigint AS jobs_count
+     FROM jobs
     WHERE (%(queue_name)s::varchar IS NULL OR queue_name = %(queue_name)s)
       AND (%(task_name)s::varchar IS NULL OR task_name = %(task_name)s)
       AND (%(status)s::procrastinate_job_status IS NULL OR status = %(status)s)
-      AND (%(lock)s::varchar IS NULL OR lock = %(lock)s)
+    GROUP BY queue_name, status
+   HAVING sum(count) <> 0
 )
 SELECT queue_name AS name,
-       COUNT(id) AS jobs_count,
-       (WITH stats AS (
-           SELECT status,
-                  COUNT(*) AS jobs_count
-             FROM jobs
-            WHERE queue_name = j.queue_name
-            GROUP BY status
-           )
-           SELECT json_object_agg(status, jobs_count) FROM stats
-       ) AS stats
-  FROM jobs AS j
+       sum(jobs_count)::bigint AS jobs_count,
+       json_object_agg(status, jobs_count) AS stats
+  FROM stats
  GROUP BY name
  ORDER BY name;
 
 -- list_tasks --
--- Get list of tasks and number of jobs per task
-WITH jobs AS (
-   SELECT id,
-          queue_name,
-          task_name,
-          lock,
-          args,
-          status,
-          scheduled_at,
-          attempts
+-- Get list of tasks and number of jobs per task. The jobs are counted from
+-- procrastinate_job_counts if enabled, unless they are filtered by lock.
+WITH use_counts AS (
+   SELECT %(lock)s::varchar IS NULL AND procrastinate_job_counts_enabled_v1() AS enabled
+), jobs AS (
+   SELECT queue_name, task_name, status, count
+     FROM procrastinate_job_counts
+    WHERE (SELECT enabled FROM use_counts)
+   UNION ALL
+   SELECT queue_name, task_name, status, 1 AS count
      FROM procrastinate_jobs
+    WHERE NOT (SELECT enabled FROM use_counts)
+      AND (%(lock)s::varchar IS NULL OR lock = %(lock)s)
+), stats AS (
+   SELECT task_name,
+          status,
+          sum(count)::bigint AS jobs_count
+     FROM jobs
     WHERE (%(queue_name)s::varchar IS NULL OR queue_name = %(queue_name)s)
       AND (%(task_name)s::varchar IS NULL OR task_name = %(task_name)s)
       AND (%(status)s::procrastinate_job_status IS NULL OR status = %(status)s)
-      AND (%(lock)s::varchar IS NULL OR lock = %(lock)s)
+    GROUP BY task_name, status
+   HAVING sum(count) <> 0
 )
 SELECT task_name AS name,
-       COUNT(id) AS jobs_count,
-       (WITH stats AS (
-           SELECT status,
-                  COUNT(*) AS jobs_count
-             FROM jobs
-            WHERE task_name = j.task_name
-            GROUP BY status
-           )
-           SELECT json_object_agg(status, jobs_count) FROM stats
-       ) AS stats
-  FROM jobs AS j
+       sum(jobs_count)::bigint AS jobs_count,
+       json_object_agg(status, jobs_count) AS stats
+  FROM stats
  GROUP BY name
  ORDER BY name;
 
@@ -39,6 +39,17 @@ CREATE TYPE procrastinate_job_to_defer_v1 AS (
     scheduled_at timestamp with time zone
 );
 
+CREATE TYPE procrastinate_job_to_defer_v2 AS (
+    queue_name character varying,
+    task_name character varying,
+    priority integer,
+    lock text,
+    queueing_lock text,
+    args jsonb,
+    scheduled_at timestamp with time zone,
+    trace_context jsonb
+);
+
 -- Tables
 
 CREATE TABLE procrastinate_workers(
@@ -59,6 +70,11 @@ CREATE TABLE procrastinate_jobs (
     attempts integer DEFAULT 0 NOT NULL,
     abort_requested boolean DEFAULT false NOT NULL,
     worker_id bigint REFERENCES procrastinate_workers(id) ON DELETE SET NULL,
+    created_at timestamp with time zone DEFAULT NOW(),
+    started_at timestamp with time zone,
+    finished_at timestamp with time zone,
+    -- W3C Trace Context headers of the span that deferred the job
+    trace_context jsonb,
     CONSTRAINT check_not_todo_abort_requested CHECK (NOT (status = 'todo' AND abort_requested = true))
 );
 
@@ -78,6 +94,52 @@ CREATE TABLE procrastinate_events (
     at timestamp with time zone DEFAULT NOW() NULL
 );
 
+-- Types of the events recorded for the jobs of a queue ('*' for all the queues),
+-- all of them if event_types is NULL or if the queue has no setting
+CREATE TABLE procrastinate_event_settings (
+    queue_name character varying(128) PRIMARY KEY,
+    event_types procrastinate_job_event_type[]
+);
+
+-- Finished jobs and their events can be moved to these tables (see the
+-- archive_old_jobs builtin task), so that procrastinate_jobs stays small
+CREATE TABLE procrastinate_jobs_archive (
+    id bigint PRIMARY KEY,
+    queue_name character varying(128) NOT NULL,
+    task_name character varying(128) NOT NULL,
+    priority integer NOT NULL,
+    lock text,
+    queueing_lock text,
+    args jsonb NOT NULL,
+    status procrastinate_job_status NOT NULL,
+    scheduled_at timestamp with time zone NULL,
+    attempts integer NOT NULL,
+    abort_requested boolean NOT NULL,
+    worker_id bigint,
+    created_at timestamp with time zone,
+    started_at timestamp with time zone,
+    finished_at timestamp with time zone,
+    trace_context jsonb
+);
+
+CREATE TABLE procrastinate_events_archive (
+    id bigint PRIMARY KEY,
+    job_id bigint NOT NULL REFERENCES procrastinate_jobs_archive ON DELETE CASCADE,
+    type procrastinate_job_event_type,
+    at timestamp with time zone NULL
+);
+
+-- Opt-in counters of the jobs per queue, task and status (see
+-- procrastinate_enable_job_counts_v1). The triggers insert the changes as deltas
+-- rather than updating a counter, so that workers don't contend on the same rows,
+-- and procrastinate_compact_job_counts_v1 sums the deltas up from time to time.
+CREATE TABLE procrastinate_job_counts (
+    queue_name character varying(128) NOT NULL,
+    task_name character varying(128) NOT NULL,
+    status procrastinate_job_status NOT NULL,
+    count bigint NOT NULL
+);
+
 -- Constraints & Indices
 
 -- this prevents from having several jobs with the same queueing lock in the "todo" state
@@ -92,8 +154,17 @@ CREATE INDEX procrastinate_jobs_queue_name_idx_v1 ON procrastinate_jobs(queue_na
 CREATE INDEX procrastinate_jobs_id_lock_idx_v1 ON procrastinate_jobs (id, lock) WHERE status = ANY (ARRAY['todo'::procrastinate_job_status, 'doing'::procrastinate_job_status]);
 CREATE INDEX procrastinate_jobs_priority_idx_v1 ON procrastinate_jobs(priority desc, id asc) WHERE (status = 'todo'::procrastinate_job_status);
 
+-- these are used to delete old jobs and find stalled jobs without reading the events
+CREATE INDEX procrastinate_jobs_started_at_idx_v1 ON procrastinate_jobs(started_at) WHERE status = 'doing'::procrastinate_job_status;
+CREATE INDEX procrastinate_jobs_finished_at_idx_v1 ON procrastinate_jobs(finished_at) WHERE finished_at IS NOT NULL;
+
 CREATE INDEX procrastinate_events_job_id_fkey_v1 ON procrastinate_events(job_id);
 
+CREATE INDEX procrastinate_jobs_archive_finished_at_idx_v1 ON procrastinate_jobs_archive(finished_at);
+CREATE INDEX procrastinate_events_archive_job_id_fkey_v1 ON procrastinate_events_archive(job_id);
+
+CREATE INDEX procrastinate_job_counts_queue_name_task_name_status_idx_v1 ON procrastinate_job_counts(queue_name, task_name, status);
+
 CREATE INDEX procrastinate_periodic_defers_job_id_fkey_v1 ON procrastinate_periodic_defers(job_id);
 
 CREATE INDEX idx_procrastinate_workers_last_heartbeat ON procrastinate_workers(last_heartbeat);
@@ -126,6 +197,34 @@ BEGIN
 END;
 $$;
 
+CREATE FUNCTION procrastinate_defer_jobs_v2(
+    jobs procrastinate_job_to_defer_v2[]
+)
+    RETURNS bigint[]
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    job_ids bigint[];
+BEGIN
+    WITH inserted_jobs AS (
+        INSERT INTO procrastinate_jobs (queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at, trace_context)
+        SELECT (job).queue_name,
+               (job).task_name,
+               (job).priority,
+               (job).lock,
+               (job).queueing_lock,
+               (job).args,
+               (job).scheduled_at,
+               (job).trace_context
+        FROM unnest(jobs) AS job
+        RETURNING id
+    )
+    SELECT array_agg(id) FROM inserted_jobs INTO job_ids;
+
+    RETURN job_ids;
+END;
+$$;
+
 CREATE FUNCTION procrastinate_defer_periodic_job_v2(
     _queue_name character varying,
     _lock character varying,
@@ -201,8 +300,25 @@ AS $$
 DECLARE
 	found_jobs procrastinate_jobs;
 BEGIN
-    WITH candidate AS (
-        SELECT jobs.*
+    SELECT * FROM procrastinate_fetch_jobs_v1(target_queue_names, p_worker_id, 1)
+        INTO found_jobs;
+
+    RETURN found_jobs;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_fetch_jobs_v1(
+    target_queue_names character varying[],
+    p_worker_id bigint,
+    p_limit integer
+)
+    RETURNS SETOF procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT jobs.id
             FROM procrastinate_jobs AS jobs
             WHERE
                 -- reject the job if its lock has earlier or higher priority jobs
@@ -232,16 +348,14 @@ BEGIN
                 AND jobs.status = 'todo'
                 AND (target_queue_names IS NULL OR jobs.queue_name = ANY( target_queue_names ))
                 AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
-            ORDER BY jobs.priority DESC, jobs.id ASC LIMIT 1
+            ORDER BY jobs.priority DESC, jobs.id ASC LIMIT p_limit
             FOR UPDATE OF jobs SKIP LOCKED
     )
     UPDATE procrastinate_jobs
-        SET status = 'doing', worker_id = p_worker_id
-        FROM candidate
-        WHERE procrastinate_jobs.id = candidate.id
-        RETURNING procrastinate_jobs.* INTO found_jobs;
-
- RETURN found_jobs;
+        SET status = 'doing', worker_id = p_worker_id, started_at = NOW()
+        FROM candidates
+        WHERE procrastinate_jobs.id = candidates.id
+        RETURNING procrastinate_jobs.*;
 END;
 $$;
 
@@ -263,6 +377,7 @@ BEGIN
         UPDATE procrastinate_jobs
         SET status = end_status,
             abort_requested = false,
+            finished_at = NOW(),
             attempts = CASE status
                 WHEN 'doing' THEN attempts + 1 ELSE attempts
             END
@@ -275,6 +390,66 @@ BEGIN
 END;
 $$;
 
+CREATE FUNCTION procrastinate_finish_jobs_v1(
+    job_ids bigint[],
+    end_statuses procrastinate_job_status[],
+    delete_jobs boolean[]
+)
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _deleted_count integer;
+    _updated_count integer;
+BEGIN
+    IF EXISTS (
+        SELECT FROM unnest(end_statuses) AS end_status
+            WHERE end_status NOT IN ('succeeded', 'failed', 'aborted')
+    ) THEN
+        RAISE 'End statuses should be either "succeeded", "failed" or "aborted" (job ids: %)', job_ids;
+    END IF;
+    -- A single statement per operation, whatever the number of jobs, so that the
+    -- statement-level triggers only run once
+    DELETE FROM procrastinate_jobs
+        USING unnest(job_ids, delete_jobs) AS jobs(id, delete_job)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND jobs.delete_job
+            AND procrastinate_jobs.status IN ('todo', 'doing');
+    GET DIAGNOSTICS _deleted_count = ROW_COUNT;
+    UPDATE procrastinate_jobs
+        SET status = jobs.end_status,
+            abort_requested = false,
+            finished_at = NOW(),
+            attempts = CASE procrastinate_jobs.status
+                WHEN 'doing' THEN procrastinate_jobs.attempts + 1 ELSE procrastinate_jobs.attempts
+            END
+        FROM unnest(job_ids, end_statuses, delete_jobs) AS jobs(id, end_status, delete_job)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND NOT jobs.delete_job
+            AND procrastinate_jobs.status IN ('todo', 'doing');
+    GET DIAGNOSTICS _updated_count = ROW_COUNT;
+    IF _deleted_count + _updated_count <> cardinality(job_ids) THEN
+        RAISE 'Some jobs were not found or not in "doing" or "todo" status (job ids: %)', job_ids;
+    END IF;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_finish_job_and_fetch_next_v1(
+    job_id bigint,
+    end_status procrastinate_job_status,
+    delete_job boolean,
+    target_queue_names character varying[],
+    p_worker_id bigint
+)
+    RETURNS procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM procrastinate_finish_job_v1(job_id, end_status, delete_job);
+    RETURN procrastinate_fetch_job_v2(target_queue_names, p_worker_id);
+END;
+$$;
+
 CREATE FUNCTION procrastinate_cancel_job_v1(job_id bigint, abort boolean, delete_job boolean)
     RETURNS bigint
     LANGUAGE plpgsql
@@ -293,12 +468,16 @@ BEGIN
             SET abort_requested = true,
                 status = CASE status
                     WHEN 'todo' THEN 'cancelled'::procrastinate_job_status ELSE status
+                END,
+                finished_at = CASE status
+                    WHEN 'todo' THEN NOW() ELSE finished_at
                 END
             WHERE id = job_id AND status IN ('todo', 'doing')
             RETURNING id INTO _job_id;
         ELSE
             UPDATE procrastinate_jobs
-            SET status = 'cancelled'::procrastinate_job_status
+            SET status = 'cancelled'::procrastinate_job_status,
+                finished_at = NOW()
             WHERE id = job_id AND status = 'todo'
             RETURNING id INTO _job_id;
         END IF;
@@ -324,7 +503,8 @@ BEGIN
     INTO _abort_requested;
     IF _abort_requested THEN
         UPDATE procrastinate_jobs
-        SET status = 'failed'::procrastinate_job_status
+        SET status = 'failed'::procrastinate_job_status,
+            finished_at = NOW()
         WHERE id = job_id AND status = 'doing'
         RETURNING id INTO _job_id;
     ELSE
@@ -334,7 +514,8 @@ BEGIN
             scheduled_at = retry_at,
             priority = COALESCE(new_priority, priority),
             queue_name = COALESCE(new_queue_name, queue_name),
-            lock = COALESCE(new_lock, lock)
+            lock = COALESCE(new_lock, lock),
+            finished_at = NULL
         WHERE id = job_id AND status = 'doing'
         RETURNING id INTO _job_id;
     END IF;
@@ -363,7 +544,8 @@ BEGIN
     INTO _current_status, _abort_requested;
     IF _current_status = 'doing' AND _abort_requested THEN
         UPDATE procrastinate_jobs
-        SET status = 'failed'::procrastinate_job_status
+        SET status = 'failed'::procrastinate_job_status,
+            finished_at = NOW()
         WHERE id = job_id AND status = 'doing'
         RETURNING id INTO _job_id;
     ELSE
@@ -373,7 +555,8 @@ BEGIN
             scheduled_at = retry_at,
             priority = COALESCE(new_priority, priority),
             queue_name = COALESCE(new_queue_name, queue_name),
-            lock = COALESCE(new_lock, lock)
+            lock = COALESCE(new_lock, lock),
+            finished_at = NULL
         WHERE id = job_id AND status IN ('doing', 'failed')
         RETURNING id INTO _job_id;
     END IF;
@@ -385,17 +568,97 @@ BEGIN
 END;
 $$;
 
-CREATE FUNCTION procrastinate_notify_queue_job_inserted_v1()
+CREATE FUNCTION procrastinate_retry_jobs_v1(
+    job_ids bigint[],
+    retry_ats timestamp with time zone[],
+    new_priorities integer[],
+    new_queue_names character varying[],
+    new_locks character varying[]
+)
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _updated_count integer;
+BEGIN
+    -- Like procrastinate_retry_job_v2, but in a single statement: the jobs whose
+    -- abortion was requested fail, the other ones are retried
+    UPDATE procrastinate_jobs
+        SET status = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN 'failed'::procrastinate_job_status
+                ELSE 'todo'::procrastinate_job_status
+            END,
+            attempts = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.attempts
+                ELSE procrastinate_jobs.attempts + 1
+            END,
+            scheduled_at = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.scheduled_at
+                ELSE jobs.retry_at
+            END,
+            priority = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.priority
+                ELSE COALESCE(jobs.new_priority, procrastinate_jobs.priority)
+            END,
+            queue_name = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.queue_name
+                ELSE COALESCE(jobs.new_queue_name, procrastinate_jobs.queue_name)
+            END,
+            finished_at = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN NOW()
+            END,
+            lock = CASE
+                WHEN procrastinate_jobs.status = 'doing' AND procrastinate_jobs.abort_requested
+                    THEN procrastinate_jobs.lock
+                ELSE COALESCE(jobs.new_lock, procrastinate_jobs.lock)
+            END
+        FROM unnest(job_ids, retry_ats, new_priorities, new_queue_names, new_locks)
+            AS jobs(id, retry_at, new_priority, new_queue_name, new_lock)
+        WHERE procrastinate_jobs.id = jobs.id
+            AND procrastinate_jobs.status IN ('doing', 'failed');
+    GET DIAGNOSTICS _updated_count = ROW_COUNT;
+    IF _updated_count <> cardinality(job_ids) THEN
+        RAISE 'Some jobs were not found or have an invalid status to retry (job ids: %)', job_ids;
+    END IF;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_notify_queue_jobs_inserted_v1()
     RETURNS trigger
     LANGUAGE plpgsql
 AS $$
 DECLARE
-    payload TEXT;
+    _queue record;
+    _total_count bigint := 0;
 BEGIN
-    SELECT json_build_object('type', 'job_inserted', 'job_id', NEW.id)::text INTO payload;
-	PERFORM pg_notify('procrastinate_queue_v1#' || NEW.queue_name, payload);
-	PERFORM pg_notify('procrastinate_any_queue_v1', payload);
-	RETURN NEW;
+    -- Statement-level trigger: a single notification is sent per queue, whatever
+    -- the number of jobs inserted by the statement
+    FOR _queue IN
+        SELECT queue_name, count(*) AS job_count
+        FROM new_jobs
+        WHERE status = 'todo'::procrastinate_job_status
+        GROUP BY queue_name
+    LOOP
+        PERFORM pg_notify(
+            'procrastinate_queue_v1#' || _queue.queue_name,
+            json_build_object('type', 'job_inserted', 'job_count', _queue.job_count)::text
+        );
+        _total_count := _total_count + _queue.job_count;
+    END LOOP;
+
+    IF _total_count > 0 THEN
+        PERFORM pg_notify(
+            'procrastinate_any_queue_v1',
+            json_build_object('type', 'job_inserted', 'job_count', _total_count)::text
+        );
+    END IF;
+    RETURN NULL;
 END;
 $$;
 
@@ -413,14 +676,36 @@ BEGIN
 END;
 $$;
 
-CREATE FUNCTION procrastinate_trigger_function_status_events_insert_v1()
+CREATE FUNCTION procrastinate_event_recorded_v1(
+    p_queue_name character varying,
+    p_type procrastinate_job_event_type
+)
+    RETURNS boolean
+    LANGUAGE sql
+    STABLE
+AS $$
+    SELECT coalesce((
+        SELECT settings.event_types IS NULL OR p_type = ANY(settings.event_types)
+        FROM procrastinate_event_settings settings
+        WHERE settings.queue_name IN (p_queue_name, '*')
+        ORDER BY settings.queue_name = '*'
+        LIMIT 1
+    ), true);
+$$;
+
+CREATE FUNCTION procrastinate_trigger_function_status_events_insert_v2()
     RETURNS trigger
     LANGUAGE plpgsql
 AS $$
 BEGIN
     INSERT INTO procrastinate_events(job_id, type)
-        VALUES (NEW.id, 'deferred'::procrastinate_job_event_type);
-	RETURN NEW;
+        SELECT new_jobs.id, 'deferred'::procrastinate_job_event_type
+        FROM new_jobs
+        WHERE new_jobs.status = 'todo'::procrastinate_job_status
+            AND procrastinate_event_recorded_v1(
+                new_jobs.queue_name, 'deferred'::procrastinate_job_event_type
+            );
+	RETURN NULL;
 END;
 $$;
 
@@ -462,19 +747,40 @@ BEGIN
     INSERT INTO procrastinate_events(job_id, type)
         SELECT NEW.id, t.event_type
         FROM t
-        WHERE t.event_type IS NOT NULL;
+        WHERE t.event_type IS NOT NULL
+            AND procrastinate_event_recorded_v1(NEW.queue_name, t.event_type);
 	RETURN NEW;
 END;
 $$;
 
-CREATE FUNCTION procrastinate_trigger_function_scheduled_events_v1()
+CREATE FUNCTION procrastinate_trigger_function_scheduled_events_v2()
     RETURNS trigger
     LANGUAGE plpgsql
 AS $$
 BEGIN
     INSERT INTO procrastinate_events(job_id, type, at)
-        VALUES (NEW.id, 'scheduled'::procrastinate_job_event_type, NEW.scheduled_at);
+        SELECT new_jobs.id, 'scheduled'::procrastinate_job_event_type, new_jobs.scheduled_at
+        FROM new_jobs
+        WHERE new_jobs.scheduled_at IS NOT NULL
+            AND new_jobs.status = 'todo'::procrastinate_job_status
+            AND procrastinate_event_recorded_v1(
+                new_jobs.queue_name, 'scheduled'::procrastinate_job_event_type
+            );
+	RETURN NULL;
+END;
+$$;
 
+CREATE FUNCTION procrastinate_trigger_function_scheduled_events_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF procrastinate_event_recorded_v1(
+        NEW.queue_name, 'scheduled'::procrastinate_job_event_type
+    ) THEN
+        INSERT INTO procrastinate_events(job_id, type, at)
+            VALUES (NEW.id, 'scheduled'::procrastinate_job_event_type, NEW.scheduled_at);
+    END IF;
 	RETURN NEW;
 END;
 $$;
@@ -484,8 +790,12 @@ CREATE FUNCTION procrastinate_trigger_abort_requested_events_procedure_v1()
     LANGUAGE plpgsql
 AS $$
 BEGIN
-    INSERT INTO procrastinate_events(job_id, type)
-        VALUES (NEW.id, 'abort_requested'::procrastinate_job_event_type);
+    IF procrastinate_event_recorded_v1(
+        NEW.queue_name, 'abort_requested'::procrastinate_job_event_type
+    ) THEN
+        INSERT INTO procrastinate_events(job_id, type)
+            VALUES (NEW.id, 'abort_requested'::procrastinate_job_event_type);
+    END IF;
     RETURN NEW;
 END;
 $$;
@@ -546,31 +856,282 @@ BEGIN
 END;
 $$;
 
+CREATE FUNCTION procrastinate_trigger_function_job_counts_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+            SELECT new_jobs.queue_name, new_jobs.task_name, new_jobs.status, count(*)
+            FROM new_jobs
+            GROUP BY new_jobs.queue_name, new_jobs.task_name, new_jobs.status;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+            SELECT old_jobs.queue_name, old_jobs.task_name, old_jobs.status, -count(*)
+            FROM old_jobs
+            GROUP BY old_jobs.queue_name, old_jobs.task_name, old_jobs.status;
+    ELSE
+        INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+            SELECT changes.queue_name, changes.task_name, changes.status, sum(changes.delta)
+            FROM (
+                SELECT new_jobs.queue_name, new_jobs.task_name, new_jobs.status, 1 AS delta
+                FROM new_jobs
+                UNION ALL
+                SELECT old_jobs.queue_name, old_jobs.task_name, old_jobs.status, -1 AS delta
+                FROM old_jobs
+            ) AS changes
+            GROUP BY changes.queue_name, changes.task_name, changes.status
+            HAVING sum(changes.delta) <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_job_counts_enabled_v1()
+    RETURNS boolean
+    LANGUAGE sql
+    STABLE
+AS $$
+    SELECT EXISTS (
+        SELECT FROM pg_trigger
+        WHERE tgrelid = 'procrastinate_jobs'::regclass
+            AND tgname = 'procrastinate_trigger_job_counts_insert_v1'
+    );
+$$;
+
+CREATE FUNCTION procrastinate_enable_job_counts_v1()
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF procrastinate_job_counts_enabled_v1() THEN
+        RETURN;
+    END IF;
+
+    -- Creating the triggers blocks the writes to procrastinate_jobs until the end
+    -- of the transaction, so the initial counts can't miss a change
+    CREATE TRIGGER procrastinate_trigger_job_counts_insert_v1
+        AFTER INSERT ON procrastinate_jobs
+        REFERENCING NEW TABLE AS new_jobs
+        FOR EACH STATEMENT
+        EXECUTE PROCEDURE procrastinate_trigger_function_job_counts_v1();
+    CREATE TRIGGER procrastinate_trigger_job_counts_update_v1
+        AFTER UPDATE ON procrastinate_jobs
+        REFERENCING OLD TABLE AS old_jobs NEW TABLE AS new_jobs
+        FOR EACH STATEMENT
+        EXECUTE PROCEDURE procrastinate_trigger_function_job_counts_v1();
+    CREATE TRIGGER procrastinate_trigger_job_counts_delete_v1
+        AFTER DELETE ON procrastinate_jobs
+        REFERENCING OLD TABLE AS old_jobs
+        FOR EACH STATEMENT
+        EXECUTE PROCEDURE procrastinate_trigger_function_job_counts_v1();
+
+    DELETE FROM procrastinate_job_counts;
+    INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+        SELECT queue_name, task_name, status, count(*)
+        FROM procrastinate_jobs
+        GROUP BY queue_name, task_name, status;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_disable_job_counts_v1()
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    DROP TRIGGER IF EXISTS procrastinate_trigger_job_counts_insert_v1 ON procrastinate_jobs;
+    DROP TRIGGER IF EXISTS procrastinate_trigger_job_counts_update_v1 ON procrastinate_jobs;
+    DROP TRIGGER IF EXISTS procrastinate_trigger_job_counts_delete_v1 ON procrastinate_jobs;
+    DELETE FROM procrastinate_job_counts;
+END;
+$$;
+
+-- Sums up the deltas recorded by the triggers. Concurrent deltas are left for the
+-- next call, so this can run anytime.
+CREATE FUNCTION procrastinate_compact_job_counts_v1()
+    RETURNS void
+    LANGUAGE sql
+AS $$
+    WITH deltas AS (
+        DELETE FROM procrastinate_job_counts
+        RETURNING queue_name, task_name, status, count
+    )
+    INSERT INTO procrastinate_job_counts (queue_name, task_name, status, count)
+        SELECT queue_name, task_name, status, sum(count)
+        FROM deltas
+        GROUP BY queue_name, task_name, status
+        HAVING sum(count) <> 0;
+$$;
+
+-- procrastinate_events can optionally be partitioned by day (UTC) on the "at"
+-- column, so that old events are removed by dropping partitions instead of
+-- deleting rows. Daily partitions are named procrastinate_events_YYYYMMDD, events
+-- that fall outside of them go to procrastinate_events_default.
+CREATE FUNCTION procrastinate_create_events_partitions_v1(
+    start_at timestamp with time zone,
+    end_at timestamp with time zone
+)
+    RETURNS integer
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    partition_day date;
+    partition_name text;
+    partition_start timestamp with time zone;
+    partition_end timestamp with time zone;
+    created integer := 0;
+BEGIN
+    IF NOT EXISTS (
+        SELECT FROM pg_partitioned_table WHERE partrelid = 'procrastinate_events'::regclass
+    ) THEN
+        RAISE 'procrastinate_events is not partitioned'
+            USING ERRCODE = 'object_not_in_prerequisite_state';
+    END IF;
+
+    FOR partition_day IN
+        SELECT generate_series(
+            (start_at AT TIME ZONE 'UTC')::date,
+            (end_at AT TIME ZONE 'UTC')::date,
+            '1 day'::interval
+        )::date
+    LOOP
+        partition_name := 'procrastinate_events_' || to_char(partition_day, 'YYYYMMDD');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        partition_start := partition_day::timestamp AT TIME ZONE 'UTC';
+        partition_end := (partition_day + 1)::timestamp AT TIME ZONE 'UTC';
+        -- The events of that day that went to the default partition (e.g. scheduled
+        -- events) are moved to the new partition before attaching it
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE procrastinate_events INCLUDING DEFAULTS)',
+            partition_name
+        );
+        EXECUTE format(
+            'WITH moved AS ('
+            '    DELETE FROM procrastinate_events_default WHERE at >= %L AND at < %L'
+            '    RETURNING *'
+            ') INSERT INTO %I SELECT * FROM moved',
+            partition_start, partition_end, partition_name
+        );
+        EXECUTE format(
+            'ALTER TABLE procrastinate_events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, partition_start, partition_end
+        );
+        created := created + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_drop_events_partitions_v1(before timestamp with time zone)
+    RETURNS integer
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    partition_name text;
+    dropped integer := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'procrastinate_events'::regclass
+            AND child.relname ~ '^procrastinate_events_[0-9]{8}$'
+            AND (to_date(right(child.relname, 8), 'YYYYMMDD') + 1)::timestamp
+                AT TIME ZONE 'UTC' <= before
+        ORDER BY child.relname
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE procrastinate_events DETACH PARTITION %I', partition_name
+        );
+        EXECUTE format('DROP TABLE %I', partition_name);
+        dropped := dropped + 1;
+    END LOOP;
+    RETURN dropped;
+END;
+$$;
+
+-- Turns procrastinate_events into a partitioned table, with partitions for its
+-- existing events and for the next 7 days. The events are copied, so this locks
+-- the table for a while on large databases.
+CREATE FUNCTION procrastinate_partition_events_v1()
+    RETURNS void
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    first_at timestamp with time zone;
+BEGIN
+    IF EXISTS (
+        SELECT FROM pg_partitioned_table WHERE partrelid = 'procrastinate_events'::regclass
+    ) THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE procrastinate_events
+        DROP CONSTRAINT procrastinate_events_pkey,
+        DROP CONSTRAINT procrastinate_events_job_id_fkey;
+    DROP INDEX procrastinate_events_job_id_fkey_v1;
+    ALTER TABLE procrastinate_events RENAME TO procrastinate_events_unpartitioned;
+
+    -- The partition key has to be part of the primary key
+    CREATE TABLE procrastinate_events (
+        id bigint DEFAULT nextval('procrastinate_events_id_seq') NOT NULL,
+        job_id bigint NOT NULL,
+        type procrastinate_job_event_type,
+        at timestamp with time zone DEFAULT NOW() NOT NULL,
+        CONSTRAINT procrastinate_events_pkey PRIMARY KEY (id, at),
+        CONSTRAINT procrastinate_events_job_id_fkey FOREIGN KEY (job_id)
+            REFERENCES procrastinate_jobs ON DELETE CASCADE
+    ) PARTITION BY RANGE (at);
+    CREATE INDEX procrastinate_events_job_id_fkey_v1 ON procrastinate_events(job_id);
+    CREATE TABLE procrastinate_events_default PARTITION OF procrastinate_events DEFAULT;
+    ALTER SEQUENCE procrastinate_events_id_seq OWNED BY procrastinate_events.id;
+
+    SELECT min(events.at) INTO first_at FROM procrastinate_events_unpartitioned events;
+    PERFORM procrastinate_create_events_partitions_v1(
+        LEAST(first_at, NOW()), NOW() + '7 days'::interval
+    );
+    INSERT INTO procrastinate_events (id, job_id, type, at)
+        SELECT events.id, events.job_id, events.type, COALESCE(events.at, '-infinity')
+        FROM procrastinate_events_unpartitioned events;
+    DROP TABLE procrastinate_events_unpartitioned;
+END;
+$$;
+
 -- Triggers
 
-CREATE TRIGGER procrastinate_jobs_notify_queue_job_inserted_v1
+CREATE TRIGGER procrastinate_jobs_notify_queue_jobs_inserted_v1
     AFTER INSERT ON procrastinate_jobs
-    FOR EACH ROW WHEN ((new.status = 'todo'::procrastinate_job_status))
-    EXECUTE PROCEDURE procrastinate_notify_queue_job_inserted_v1();
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_notify_queue_jobs_inserted_v1();
 
 CREATE TRIGGER procrastinate_jobs_notify_queue_job_aborted_v1
     AFTER UPDATE OF abort_requested ON procrastinate_jobs
     FOR EACH ROW WHEN ((old.abort_requested = false AND new.abort_requested = true AND new.status = 'doing'::procrastinate_job_status))
     EXECUTE PROCEDURE procrastinate_notify_queue_abort_job_v1();
 
-CREATE TRIGGER procrastinate_trigger_status_events_update_v1
+CREATE TRIGGER procrastinate_trigger_status_events_update_v2
     AFTER UPDATE OF status ON procrastinate_jobs
-    FOR EACH ROW
+    FOR EACH ROW WHEN ((old.status IS DISTINCT FROM new.status))
     EXECUTE PROCEDURE procrastinate_trigger_function_status_events_update_v1();
 
-CREATE TRIGGER procrastinate_trigger_status_events_insert_v1
+CREATE TRIGGER procrastinate_trigger_status_events_insert_v2
+    AFTER INSERT ON procrastinate_jobs
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_status_events_insert_v2();
+
+CREATE TRIGGER procrastinate_trigger_scheduled_events_insert_v2
     AFTER INSERT ON procrastinate_jobs
-    FOR EACH ROW WHEN ((new.status = 'todo'::procrastinate_job_status))
-    EXECUTE PROCEDURE procrastinate_trigger_function_status_events_insert_v1();
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_scheduled_events_v2();
 
-CREATE TRIGGER procrastinate_trigger_scheduled_events_v1
-    AFTER UPDATE OR INSERT ON procrastinate_jobs
-    FOR EACH ROW WHEN ((new.scheduled_at IS NOT NULL AND new.status = 'todo'::procrastinate_job_status))
+CREATE TRIGGER procrastinate_trigger_scheduled_events_update_v2
+    AFTER UPDATE OF status, scheduled_at ON procrastinate_jobs
+    FOR EACH ROW WHEN ((new.scheduled_at IS NOT NULL AND new.status = 'todo'::procrastinate_job_status AND (old.status IS DISTINCT FROM new.status OR old.scheduled_at IS DISTINCT FROM new.scheduled_at)))
     EXECUTE PROCEDURE procrastinate_trigger_function_scheduled_events_v1();
 
 CREATE TRIGGER procrastinate_trigger_abort_requested_events_v1
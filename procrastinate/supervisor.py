@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from typing import Any
+
+from procrastinate import app, exceptions, profiling, signals, utils, worker
+
+logger = logging.getLogger(__name__)
+
+#: How often the supervisor checks that its worker processes are still running
+CHECK_INTERVAL = 1.0
+#: Maximum time, in seconds, before restarting a worker process that keeps crashing.
+#: A worker process crashing sooner than that after it started crashed repeatedly.
+MAX_RESTART_DELAY = 60.0
+
+
+class Supervisor:
+    """
+    Runs a worker in each of several forked processes, so that jobs can use all
+    the cores of the machine. Worker processes that crash are restarted, and stop
+    signals received by the supervisor are forwarded to the worker processes, which
+    stop gracefully. A worker process that keeps crashing right after it starts
+    (e.g. because the database is down) is restarted less and less often.
+
+    The import paths of the app are imported once, before forking, and only the first
+    worker process runs the periodic deferrer.
+    """
+
+    def __init__(
+        self,
+        app: app.App,
+        processes: int,
+        check_interval: float = CHECK_INTERVAL,
+        **worker_options: Any,
+    ):
+        self.app = app
+        self.processes = processes
+        self.check_interval = check_interval
+        self.worker_options = worker_options
+
+        self._processes: list[multiprocessing.process.BaseProcess] = []
+        # Per worker process index
+        self._started_at: dict[int, float] = {}
+        self._failures: dict[int, int] = {}
+        self._restart_at: dict[int, float] = {}
+        self._stop_event = asyncio.Event()
+
+    def stop(self) -> None:
+        if self._stop_event.is_set():
+            return
+        logger.info(
+            "Stop requested, stopping worker processes",
+            extra={"action": "stopping_supervisor"},
+        )
+        self._stop_event.set()
+
+    def get_worker_options(self, index: int) -> app.WorkerOptions:
+        """
+        Options of the worker running in the process at the given index
+        """
+        options: app.WorkerOptions = {**self.app.worker_defaults, **self.worker_options}
+        name = options.get("name", worker.WORKER_NAME)
+        if name:
+            options["name"] = f"{name}-{index}"
+        options["run_periodic_deferrer"] = index == 0 and options.get(
+            "run_periodic_deferrer", True
+        )
+        # Each worker process serves its own metrics, on consecutive ports
+        metrics_port = options.get("metrics_port")
+        if metrics_port is not None:
+            options["metrics_port"] = metrics_port + index
+        # and writes its own profiles
+        if options.get("profile_tasks") or options.get("profile_rate"):
+            options["profile_directory"] = os.path.join(
+                options.get("profile_directory", profiling.PROFILE_DIRECTORY),
+                str(index),
+            )
+        return options
+
+    def _start_process(self, index: int) -> multiprocessing.process.BaseProcess:
+        process = multiprocessing.get_context("fork").Process(
+            target=_run_worker,
+            args=(self.app, self.get_worker_options(index)),
+            name=f"procrastinate-worker-{index}",
+        )
+        process.start()
+        self._started_at[index] = time.monotonic()
+        logger.info(
+            f"Started worker process {index} (pid {process.pid})",
+            extra={
+                "action": "start_worker_process",
+                "index": index,
+                "pid": process.pid,
+            },
+        )
+        return process
+
+    def _check_processes(self) -> bool:
+        """
+        Restart the worker processes that crashed. Return whether some worker
+        processes are still running, or will be restarted.
+        """
+        now = time.monotonic()
+        for index, process in enumerate(self._processes):
+            if process.is_alive() or process.exitcode == 0:
+                continue
+
+            if index not in self._restart_at:
+                if now - self._started_at.get(index, now) < MAX_RESTART_DELAY:
+                    self._failures[index] = self._failures.get(index, 0) + 1
+                else:
+                    self._failures[index] = 1
+                delay = self._get_restart_delay(self._failures[index])
+                logger.warning(
+                    f"Worker process {index} (pid {process.pid}) exited with code "
+                    f"{process.exitcode}, restarting it in {delay:.0f}s",
+                    extra={
+                        "action": "restart_worker_process",
+                        "index": index,
+                        "pid": process.pid,
+                        "exit_code": process.exitcode,
+                        "delay": delay,
+                    },
+                )
+                self._restart_at[index] = now + delay
+
+            if now >= self._restart_at[index]:
+                del self._restart_at[index]
+                self._processes[index] = self._start_process(index)
+
+        return any(
+            process.is_alive() or process.exitcode != 0 for process in self._processes
+        )
+
+    def _get_restart_delay(self, failures: int) -> float:
+        # A crashed worker process is restarted right away, then the delay doubles
+        # each time it crashes again soon after starting
+        if failures <= 1:
+            return 0.0
+        return min(self.check_interval * 2 ** (failures - 1), MAX_RESTART_DELAY)
+
+    async def run(self) -> None:
+        # The connections and threads of the pool would be shared with the forked
+        # processes
+        if self.app.connector.pool_externally_set:
+            raise exceptions.ExternalPoolNotSupported
+
+        self.app.perform_import_paths()
+        # Database connections cannot be shared with forked processes: each worker
+        # process opens its own.
+        await self.app.close_async()
+
+        self._stop_event.clear()
+        self._started_at, self._failures, self._restart_at = {}, {}, {}
+        self._processes = [
+            self._start_process(index) for index in range(self.processes)
+        ]
+        try:
+            with signals.on_stop(self.stop):
+                while not self._stop_event.is_set() and self._check_processes():
+                    await utils.wait_any(
+                        self._stop_event.wait(), asyncio.sleep(self.check_interval)
+                    )
+
+                for process in self._processes:
+                    if process.is_alive():
+                        process.terminate()
+                for process in self._processes:
+                    await utils.sync_to_async(process.join)
+        finally:
+            # Only reached with running processes if the supervisor is interrupted
+            # while waiting for them to stop
+            for process in self._processes:
+                if process.is_alive():
+                    process.kill()
+
+        logger.info(
+            "Stopped worker processes", extra={"action": "stop_worker_processes"}
+        )
+
+
+def _run_worker(app: app.App, worker_options: app.WorkerOptions) -> None:
+    """
+    Entrypoint of the worker processes
+    """
+    # Stop signals are forwarded by the supervisor. Interrupts sent to the whole
+    # process group (e.g. Ctrl-C in a terminal) are blocked so that the workers
+    # receive a single stop signal, as a second one aborts the running jobs.
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT})
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+
+    asyncio.run(_run_worker_async(app, worker_options))
+
+
+async def _run_worker_async(app: app.App, worker_options: app.WorkerOptions) -> None:
+    async with app.open_async():
+        await app.run_worker_async(**worker_options)
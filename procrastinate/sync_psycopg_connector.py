@@ -12,7 +12,7 @@ import psycopg.types.json
 import psycopg_pool
 from typing_extensions import LiteralString
 
-from procrastinate import connector, exceptions, manager
+from procrastinate import connector, exceptions, manager, sql, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -44,12 +44,24 @@ def wrap_exceptions() -> Generator[None, None, None]:
         raise exceptions.ConnectorException from exc
 
 
+def get_prepare(query: LiteralString, prepare_statements: bool) -> bool | None:
+    """
+    Value of the ``prepare`` argument of ``cursor.execute`` for the query: the hot
+    queries of the worker are prepared on their first execution on each connection,
+    the other ones when psycopg decides to (see ``Connection.prepare_threshold``).
+    """
+    if not prepare_statements:
+        return False
+    return True if query in sql.prepared_queries else None
+
+
 class SyncPsycopgConnector(connector.BaseConnector):
     def __init__(
         self,
         *,
         json_dumps: Callable | None = None,
         json_loads: Callable | None = None,
+        prepare_statements: bool = True,
         **kwargs: Any,
     ):
         """
@@ -61,8 +73,9 @@ class SyncPsycopgConnector(connector.BaseConnector):
         you will need to initialize it yourself and pass it to the connector
         through the ``App.open`` method.
 
-        All other arguments than ``json_dumps`` and ``json_loads`` are passed
-        to ``psycopg_pool.ConnectionPool`` (see psycopg documentation__).
+        All other arguments than ``json_dumps``, ``json_loads`` and
+        ``prepare_statements`` are passed to ``psycopg_pool.ConnectionPool`` (see
+        psycopg documentation__).
 
         ``json_dumps`` and ``json_loads`` are used to configure new connections
         created by the pool with ``psycopg.types.json.set_json_dumps`` and
@@ -80,12 +93,16 @@ class SyncPsycopgConnector(connector.BaseConnector):
             A function to deserialize JSON objects from a string. If not
             provided, JSON objects will be deserialized using psycopg's default
             JSON deserializer.
-
+        prepare_statements :
+            If True (the default), the queries run by the workers for each job
+            are prepared on the server, on each connection. Set it to False to never
+            prepare statements, e.g. behind PgBouncer in transaction pooling mode.
         """
         self._pool: psycopg_pool.ConnectionPool | None = None
         self._pool_externally_set: bool = False
         self._json_loads = json_loads
         self._json_dumps = json_dumps
+        self._prepare_statements = prepare_statements
         self._pool_args = kwargs
 
     def get_sync_connector(self) -> connector.BaseConnector:
@@ -155,31 +172,50 @@ class SyncPsycopgConnector(connector.BaseConnector):
         return {key: self._wrap_value(value) for key, value in arguments.items()}
 
     @contextlib.contextmanager
-    def _get_cursor(self) -> Iterator[psycopg.Cursor[psycopg.rows.DictRow]]:
-        with self.pool.connection() as connection:
-            with connection.cursor(row_factory=psycopg.rows.dict_row) as cursor:
-                if self._json_loads:
-                    psycopg.types.json.set_json_loads(
-                        loads=self._json_loads, context=cursor
-                    )
-
-                if self._json_dumps:
-                    psycopg.types.json.set_json_dumps(
-                        dumps=self._json_dumps, context=cursor
-                    )
-                yield cursor
+    def _get_cursor(
+        self, query: LiteralString
+    ) -> Iterator[psycopg.Cursor[psycopg.rows.DictRow]]:
+        with self.measure_query(query) as timer:
+            with self.pool.connection() as connection:
+                timer.acquired()
+                with connection.cursor(row_factory=psycopg.rows.dict_row) as cursor:
+                    if self._json_loads:
+                        psycopg.types.json.set_json_loads(
+                            loads=self._json_loads, context=cursor
+                        )
+
+                    if self._json_dumps:
+                        psycopg.types.json.set_json_dumps(
+                            dumps=self._json_dumps, context=cursor
+                        )
+                    yield cursor
+                    timer.set_row_count(cursor.rowcount)
+
+    def _execute(
+        self,
+        cursor: psycopg.Cursor[psycopg.rows.DictRow],
+        query: LiteralString,
+        arguments: dict[str, Any],
+    ) -> None:
+        cursor.execute(
+            query,
+            self._wrap_json(arguments),
+            prepare=get_prepare(query, self._prepare_statements),
+        )
 
+    @tracing.traced_query
     @wrap_exceptions()
     def execute_query(self, query: LiteralString, **arguments: Any) -> None:
-        with self.pool.connection() as conn:
-            conn.execute(query, self._wrap_json(arguments))
+        with self._get_cursor(query) as cursor:
+            self._execute(cursor, query, arguments)
 
+    @tracing.traced_query
     @wrap_exceptions()
     def execute_query_one(
         self, query: LiteralString, **arguments: Any
     ) -> dict[str, Any]:
-        with self._get_cursor() as cursor:
-            cursor.execute(query, self._wrap_json(arguments))
+        with self._get_cursor(query) as cursor:
+            self._execute(cursor, query, arguments)
 
             result = cursor.fetchone()
 
@@ -187,11 +223,12 @@ class SyncPsycopgConnector(connector.BaseConnector):
                 raise exceptions.NoResult
             return result
 
+    @tracing.traced_query
     @wrap_exceptions()
     def execute_query_all(
         self, query: LiteralString, **arguments: Any
     ) -> list[dict[str, Any]]:
-        with self._get_cursor() as cursor:
-            cursor.execute(query, self._wrap_json(arguments))
+        with self._get_cursor(query) as cursor:
+            self._execute(cursor, query, arguments)
 
             return cursor.fetchall()
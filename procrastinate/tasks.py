@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import datetime
+import inspect
 import logging
 from typing import Callable, Generic, TypedDict, cast
 
 from typing_extensions import NotRequired, ParamSpec, TypeVar, Unpack
 
 from procrastinate import app as app_module
-from procrastinate import blueprints, exceptions, jobs, manager, types, utils
+from procrastinate import blueprints, exceptions, executors, jobs, manager, types, utils
 from procrastinate import retry as retry_module
 
 logger = logging.getLogger(__name__)
@@ -80,6 +81,7 @@ class Task(Generic[P, R, Args]):
         # task specific settings
         retry: retry_module.RetryValue = False,
         pass_context: bool = False,
+        executor: str | None = None,
         # default defer arguments
         queue: str,
         priority: int = jobs.DEFAULT_PRIORITY,
@@ -113,6 +115,16 @@ class Task(Generic[P, R, Args]):
         #: Default queueing lock. The queuing lock can be overridden when a job
         #: is deferred.
         self.queueing_lock: str | None = queueing_lock
+        #: Name of the executor running the jobs of this task. ``None`` runs
+        #: synchronous tasks in the default thread pool, ``"process"`` runs them
+        #: in the worker process pool, and any other name in the worker thread
+        #: pool of that name.
+        self.executor: str | None = executor
+
+        if executor == executors.PROCESS_EXECUTOR and inspect.iscoroutinefunction(func):
+            raise ValueError(
+                f"Task {self.name} is asynchronous and cannot run in the process pool"
+            )
 
     def add_namespace(self, namespace: str) -> None:
         """
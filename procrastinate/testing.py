@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import asyncio
 import datetime
+import heapq
 import json
 import threading
 import typing
-from collections import Counter
-from collections.abc import Iterable
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Sequence
 from itertools import count
 from typing import Any
 
@@ -32,22 +33,42 @@ class InMemoryConnector(connector.BaseAsyncConnector):
 
     While implementing the Connector interface, it also adds a few
     methods and attributes to ease testing.
+
+    Like the database, the connector indexes the jobs (per queue, lock,
+    queueing lock and scheduled time), so that fetching and deferring a job
+    takes the same time whatever the number of jobs. The indexes are kept up to
+    date by the queries: if you change the rows of `jobs` directly, assign
+    `jobs` again to rebuild them.
     """
 
     def __init__(self):
         self.reset()
         self.reverse_queries = {value: key for key, value in sql.queries.items()}
         self.reverse_queries[schema.SchemaManager.get_schema()] = "apply_schema"
-        #: Mapping of ``{<job id>: <Job database row as a dictionary>}``
-        self.jobs: dict[int, JobRow] = {}
+        self.reverse_queries[schema.PARTITION_EVENTS_QUERY] = "partition_events"
+
+    @property
+    def jobs(self) -> dict[int, JobRow]:
+        """
+        Mapping of ``{<job id>: <Job database row as a dictionary>}``
+        """
+        return self._jobs
+
+    @jobs.setter
+    def jobs(self, jobs: dict[int, JobRow]) -> None:
+        self._jobs = jobs
+        self._indexes_outdated = True
 
     def reset(self) -> None:
         """
         Removes anything the in-memory pseudo-database contains, to ensure test
         independence.
         """
-        self.jobs: dict[int, JobRow] = {}
+        self.jobs = {}
         self.events: dict[int, list[EventRow]] = {}
+        self.jobs_archive: dict[int, JobRow] = {}
+        self.events_archive: dict[int, list[EventRow]] = {}
+        self.event_settings: dict[str, list[str] | None] = {}
         self.workers: dict[int, datetime.datetime] = {}
         self.job_counter = count(1)
         self.queries: list[tuple[str, dict[str, Any]]] = []
@@ -68,7 +89,8 @@ class InMemoryConnector(connector.BaseAsyncConnector):
         """
         query_name = self.reverse_queries[query]
         self.queries.append((query_name, arguments))
-        return await getattr(self, f"{query_name}_{suffix}")(**arguments)
+        with self.measure_query(query):
+            return await getattr(self, f"{query_name}_{suffix}")(**arguments)
 
     def make_dynamic_query(self, query, **identifiers: str) -> str:
         return query.format(**identifiers)
@@ -86,6 +108,20 @@ class InMemoryConnector(connector.BaseAsyncConnector):
     ) -> list[dict[str, Any]]:
         return await self.generic_execute(query, "all", **arguments)
 
+    async def execute_queries_async(
+        self, queries: Sequence[dict[str, Any]]
+    ) -> list[list[dict[str, Any]]]:
+        results = []
+        for query in queries:
+            # Queries without results only have a "run" method
+            query_name = self.reverse_queries[query["query"]]
+            if hasattr(self, f"{query_name}_all"):
+                results.append(await self.execute_query_all_async(**query))
+            else:
+                await self.execute_query_async(**query)
+                results.append([])
+        return results
+
     async def listen_notify(
         self, on_notification: connector.Notify, channels: Iterable[str]
     ) -> None:
@@ -126,14 +162,12 @@ class InMemoryConnector(connector.BaseAsyncConnector):
         )
 
         if duplicate is None:
-            current_queueing_locks = {
-                job["queueing_lock"]
-                for job in self.jobs.values()
-                if job["status"] == "todo"
-            } - {None}
-
             duplicate = next(
-                (lock for lock in new_queueing_locks if lock in current_queueing_locks),
+                (
+                    lock
+                    for lock in new_queueing_locks
+                    if self._get_todo_job_by_queueing_lock(lock)
+                ),
                 None,
             )
 
@@ -160,20 +194,30 @@ class InMemoryConnector(connector.BaseAsyncConnector):
                 "attempts": 0,
                 "abort_requested": False,
                 "worker_id": None,
+                "created_at": utils.utcnow(),
+                "started_at": None,
+                "finished_at": None,
+                "trace_context": job.trace_context,
             }
             self.events[id] = []
             if job.scheduled_at:
-                self.events[id].append({"type": "scheduled", "at": job.scheduled_at})
-            self.events[id].append({"type": "deferred", "at": utils.utcnow()})
+                self._record_event(job_row, "scheduled", at=job.scheduled_at)
+            self._record_event(job_row, "deferred")
+            self._index_job(job_row)
+            job_rows.append(job_row)
 
+        # Like the statement-level trigger, send one notification per queue
+        job_counts = Counter(job.queue_name for job in jobs)
+        for queue_name, job_count in job_counts.items():
             await self._notify(
-                job.queue_name,
-                {
-                    "type": "job_inserted",
-                    "job_id": id,
-                },
+                manager.get_channel_for_queues([queue_name]),
+                {"type": "job_inserted", "job_count": job_count},
+            )
+        if jobs:
+            await self._notify(
+                manager.get_channel_for_queues(),
+                {"type": "job_inserted", "job_count": len(jobs)},
             )
-            job_rows.append(job_row)
 
         return job_rows
 
@@ -208,6 +252,145 @@ class InMemoryConnector(connector.BaseAsyncConnector):
         )
         return job_rows[0]
 
+    def _rebuild_indexes(self) -> None:
+        # Jobs to do, per queue, as heaps of (-priority, id): jobs with a lock are
+        # only added when they are the next job of their lock (see _release_lock)
+        self._ready_jobs: defaultdict[str, list[tuple[int, int]]] = defaultdict(list)
+        # Jobs to do later, as a heap of (scheduled_at, id)
+        self._scheduled_jobs: list[tuple[datetime.datetime, int]] = []
+        # Jobs to do, per lock, as heaps of (-priority, id)
+        self._lock_jobs: defaultdict[str, list[tuple[int, int]]] = defaultdict(list)
+        # Ids of the jobs being done, per lock
+        self._lock_holders: defaultdict[str, set[int]] = defaultdict(set)
+        # Id of the job to do, per queueing lock
+        self._queueing_locks: dict[str, int] = {}
+        self._indexes_outdated = False
+
+        for job_row in self._jobs.values():
+            self._index_job(job_row)
+
+    def _ensure_indexes(self) -> None:
+        if self._indexes_outdated:
+            self._rebuild_indexes()
+
+    # The indexes are never cleaned up when a job changes: their entries are
+    # checked against the job rows when they are read, and dropped if outdated.
+    # Each change only adds the entries matching the new state of the job.
+
+    def _index_job(self, job_row: JobRow) -> None:
+        """Index a job that was inserted or changed"""
+        self._ensure_indexes()
+        lock = job_row.get("lock")
+        status = job_row.get("status")
+        if status == "todo":
+            queueing_lock = job_row.get("queueing_lock")
+            if queueing_lock is not None:
+                self._queueing_locks[queueing_lock] = job_row["id"]
+            if lock is None:
+                self._push_ready_job(job_row)
+            else:
+                heapq.heappush(
+                    self._lock_jobs[lock], (-job_row["priority"], job_row["id"])
+                )
+        elif status == "doing" and lock is not None:
+            self._lock_holders[lock].add(job_row["id"])
+
+        if lock is not None:
+            self._release_lock(lock)
+
+    def _remove_job(self, job_id: int) -> JobRow:
+        job_row = self._jobs.pop(job_id)
+        lock = job_row.get("lock")
+        if lock is not None:
+            self._release_lock(lock)
+        return job_row
+
+    def _push_ready_job(self, job_row: JobRow) -> None:
+        scheduled_at = job_row["scheduled_at"]
+        if scheduled_at and scheduled_at > utils.utcnow():
+            heapq.heappush(self._scheduled_jobs, (scheduled_at, job_row["id"]))
+        else:
+            heapq.heappush(
+                self._ready_jobs[job_row["queue_name"]],
+                (-job_row["priority"], job_row["id"]),
+            )
+
+    def _is_lock_held(self, lock: str) -> bool:
+        holders = self._lock_holders.get(lock)
+        if not holders:
+            return False
+        for job_id in list(holders):
+            job_row = self._jobs.get(job_id)
+            if not job_row or job_row["status"] != "doing" or job_row["lock"] != lock:
+                holders.discard(job_id)
+        return bool(holders)
+
+    def _get_next_lock_job(self, lock: str) -> JobRow | None:
+        """
+        The job to do with the highest priority (then the lowest id) among the jobs
+        with this lock, whatever their queue and scheduled time
+        """
+        heap = self._lock_jobs.get(lock)
+        while heap:
+            priority, job_id = heap[0]
+            job_row = self._jobs.get(job_id)
+            if (
+                job_row
+                and job_row["status"] == "todo"
+                and job_row["lock"] == lock
+                and -job_row["priority"] == priority
+            ):
+                return job_row
+            heapq.heappop(heap)
+        return None
+
+    def _release_lock(self, lock: str) -> None:
+        """Make the next job of the lock ready, if the lock is not held"""
+        self._ensure_indexes()
+        if self._is_lock_held(lock):
+            return
+        job_row = self._get_next_lock_job(lock)
+        if job_row:
+            self._push_ready_job(job_row)
+
+    def _get_todo_job_by_queueing_lock(self, queueing_lock: str) -> JobRow | None:
+        self._ensure_indexes()
+        job_id = self._queueing_locks.get(queueing_lock)
+        job_row = self._jobs.get(job_id) if job_id is not None else None
+        if (
+            job_row
+            and job_row["status"] == "todo"
+            and job_row["queueing_lock"] == queueing_lock
+        ):
+            return job_row
+        return None
+
+    def _is_next_lock_job(self, job_row: JobRow) -> bool:
+        lock = job_row["lock"]
+        return lock is None or (
+            not self._is_lock_held(lock) and self._get_next_lock_job(lock) is job_row
+        )
+
+    def _get_ready_job(self, queue_name: str, now: datetime.datetime) -> JobRow | None:
+        """The job that can be fetched next from the queue, if any"""
+        heap = self._ready_jobs.get(queue_name)
+        while heap:
+            priority, job_id = heap[0]
+            job_row = self._jobs.get(job_id)
+            if (
+                job_row
+                and job_row["status"] == "todo"
+                and job_row["queue_name"] == queue_name
+                and -job_row["priority"] == priority
+                and not (job_row["scheduled_at"] and job_row["scheduled_at"] > now)
+                and self._is_next_lock_job(job_row)
+            ):
+                return job_row
+            # Either the entry is outdated, or the job waits for its lock: it is
+            # indexed again when the lock is released
+            heapq.heappop(heap)
+        return None
+
     @property
     def current_locks(self) -> Iterable[str]:
         return {
@@ -222,7 +405,22 @@ class InMemoryConnector(connector.BaseAsyncConnector):
             if job["status"] in {"failed", "succeeded"}
         ]
 
-    async def _notify(self, queue_name: str, notification: jobs.Notification) -> None:
+    def _record_event(
+        self, job_row: JobRow, type: str, at: datetime.datetime | None = None
+    ) -> None:
+        queue_name = job_row["queue_name"]
+        if queue_name in self.event_settings:
+            event_types = self.event_settings[queue_name]
+        else:
+            event_types = self.event_settings.get(manager.ALL_QUEUES)
+        if event_types is None or type in event_types:
+            self.events[job_row["id"]].append(
+                {"type": type, "at": at or utils.utcnow()}
+            )
+
+    async def _notify(
+        self, channels: Iterable[str], notification: jobs.Notification
+    ) -> None:
         """
         Instead of directly awaiting on_notification, we check the current thread.
         If we are not on the same thread as the one where the loop was saved,
@@ -231,11 +429,7 @@ class InMemoryConnector(connector.BaseAsyncConnector):
         if not self.on_notification:
             return
 
-        destination_channels = {
-            "procrastinate_any_queue_v1",
-            f"procrastinate_queue_v1#{queue_name}",
-        }
-        for channel in set(self.notify_channels).intersection(destination_channels):
+        for channel in set(self.notify_channels).intersection(channels):
             coro = self.on_notification(
                 channel=channel, payload=json.dumps(notification)
             )
@@ -261,55 +455,102 @@ class InMemoryConnector(connector.BaseAsyncConnector):
 
     async def fetch_job_one(self, queues: Iterable[str] | None, worker_id: int) -> dict:
         assert worker_id in self.workers, f"Worker {worker_id} not found"
+        self._ensure_indexes()
 
-        filtered_jobs = [
-            job
-            for job in self.jobs.values()
+        now = utils.utcnow()
+        while self._scheduled_jobs and self._scheduled_jobs[0][0] <= now:
+            scheduled_at, job_id = heapq.heappop(self._scheduled_jobs)
+            job_row = self._jobs.get(job_id)
             if (
-                job["status"] == "todo"
-                and (queues is None or job["queue_name"] in queues)
-                and (not job["scheduled_at"] or job["scheduled_at"] <= utils.utcnow())
-                and job["lock"] not in self.current_locks
-            )
-        ]
-
-        filtered_jobs.sort(key=lambda job: (-job["priority"], job["id"]))
+                job_row
+                and job_row["status"] == "todo"
+                and job_row["scheduled_at"] == scheduled_at
+            ):
+                heapq.heappush(
+                    self._ready_jobs[job_row["queue_name"]],
+                    (-job_row["priority"], job_id),
+                )
 
-        if not filtered_jobs:
+        ready_jobs = [
+            job_row
+            for queue_name in list(self._ready_jobs if queues is None else queues)
+            if (job_row := self._get_ready_job(queue_name, now))
+        ]
+        if not ready_jobs:
             return {"id": None}
 
-        job = filtered_jobs[0]
+        job = min(ready_jobs, key=lambda job: (-job["priority"], job["id"]))
+        heapq.heappop(self._ready_jobs[job["queue_name"]])
         job["status"] = "doing"
         job["worker_id"] = worker_id
-        self.events[job["id"]].append({"type": "started", "at": utils.utcnow()})
+        job["started_at"] = utils.utcnow()
+        self._index_job(job)
+        self._record_event(job, "started")
         return job
 
+    async def fetch_jobs_all(
+        self, queues: Iterable[str] | None, worker_id: int, limit: int
+    ) -> list[dict]:
+        fetched_jobs = []
+        for _ in range(limit):
+            job = await self.fetch_job_one(queues=queues, worker_id=worker_id)
+            if job["id"] is None:
+                break
+            fetched_jobs.append(job)
+        return fetched_jobs
+
     async def finish_job_run(self, job_id: int, status: str, delete_job: bool) -> None:
         if delete_job:
-            self.jobs.pop(job_id)
+            self._remove_job(job_id)
             return
 
         job_row = self.jobs[job_id]
         job_row["status"] = status
         job_row["attempts"] += 1
         job_row["abort_requested"] = False
-        self.events[job_id].append({"type": status, "at": utils.utcnow()})
+        job_row["finished_at"] = utils.utcnow()
+        self._index_job(job_row)
+        self._record_event(job_row, status)
+
+    async def finish_job_and_fetch_next_one(
+        self,
+        job_id: int,
+        status: str,
+        delete_job: bool,
+        queues: Iterable[str] | None,
+        worker_id: int,
+    ) -> dict:
+        await self.finish_job_run(job_id=job_id, status=status, delete_job=delete_job)
+        return await self.fetch_job_one(queues=queues, worker_id=worker_id)
+
+    async def finish_jobs_run(
+        self, job_ids: list[int], statuses: list[str], delete_jobs: list[bool]
+    ) -> None:
+        for job_id, status, delete_job in zip(job_ids, statuses, delete_jobs):
+            await self.finish_job_run(
+                job_id=job_id, status=status, delete_job=delete_job
+            )
 
     async def cancel_job_one(self, job_id: int, abort: bool, delete_job: bool) -> dict:
         job_row = self.jobs[job_id]
 
         if job_row["status"] == "todo":
             if delete_job:
-                self.jobs.pop(job_id)
+                self._remove_job(job_id)
                 return {"id": job_id}
 
             job_row["status"] = "cancelled"
+            job_row["finished_at"] = utils.utcnow()
+            self._index_job(job_row)
             return {"id": job_id}
 
         if abort:
             job_row["abort_requested"] = True
             await self._notify(
-                job_row["queue_name"],
+                [
+                    *manager.get_channel_for_queues(),
+                    *manager.get_channel_for_queues([job_row["queue_name"]]),
+                ],
                 {
                     "type": "abort_job_requested",
                     "job_id": job_id,
@@ -326,30 +567,55 @@ class InMemoryConnector(connector.BaseAsyncConnector):
     async def retry_job_run(
         self,
         job_id: int,
-        retry_at: datetime.datetime,
+        retry_at: datetime.datetime | None,
         new_priority: int | None = None,
         new_queue_name: str | None = None,
         new_lock: str | None = None,
     ) -> None:
         job_row = self.jobs[job_id]
+        previous_lock = job_row["lock"]
         job_row["status"] = "todo"
         job_row["attempts"] += 1
         job_row["scheduled_at"] = retry_at
+        job_row["finished_at"] = None
         if new_priority is not None:
             job_row["priority"] = new_priority
         if new_queue_name is not None:
             job_row["queue_name"] = new_queue_name
         if new_lock is not None:
             job_row["lock"] = new_lock
-        self.events[job_id].append({"type": "scheduled", "at": retry_at})
-        self.events[job_id].append({"type": "deferred_for_retry", "at": utils.utcnow()})
+        self._index_job(job_row)
+        if previous_lock is not None and previous_lock != job_row["lock"]:
+            self._release_lock(previous_lock)
+        if retry_at:
+            self._record_event(job_row, "scheduled", at=retry_at)
+        self._record_event(job_row, "deferred_for_retry")
+
+    async def retry_jobs_run(
+        self,
+        job_ids: list[int],
+        retry_ats: list[datetime.datetime | None],
+        new_priorities: list[int | None],
+        new_queue_names: list[str | None],
+        new_locks: list[str | None],
+    ) -> None:
+        for job_id, retry_at, new_priority, new_queue_name, new_lock in zip(
+            job_ids, retry_ats, new_priorities, new_queue_names, new_locks
+        ):
+            await self.retry_job_run(
+                job_id=job_id,
+                retry_at=retry_at,
+                new_priority=new_priority,
+                new_queue_name=new_queue_name,
+                new_lock=new_lock,
+            )
 
     async def select_stalled_jobs_by_started_all(self, nb_seconds, queue, task_name):
         return (
             job
             for job in self.jobs.values()
             if job["status"] == "doing"
-            and self.events[job["id"]][-1]["at"]
+            and job["started_at"]
             < utils.utcnow() - datetime.timedelta(seconds=nb_seconds)
             and queue in (job["queue_name"], None)
             and task_name in (job["task_name"], None)
@@ -373,17 +639,53 @@ class InMemoryConnector(connector.BaseAsyncConnector):
             )
         )
 
-    async def delete_old_jobs_run(self, nb_hours, queue, statuses):
-        for id, job in list(self.jobs.items()):
-            if (
-                job["status"] in statuses
-                and (
-                    max(e["at"] for e in self.events[id])
-                    < utils.utcnow() - datetime.timedelta(hours=nb_hours)
-                )
+    def _get_old_jobs(self, nb_hours, queue, statuses, chunk_size) -> list[JobRow]:
+        return sorted(
+            (
+                job
+                for job in self.jobs.values()
+                if job["status"] in statuses
+                and job["finished_at"]
+                and job["finished_at"]
+                < utils.utcnow() - datetime.timedelta(hours=nb_hours)
                 and queue in (job["queue_name"], None)
-            ):
-                self.jobs.pop(id)
+            ),
+            key=lambda job: job["finished_at"],
+        )[:chunk_size]
+
+    async def delete_old_jobs_one(self, nb_hours, queue, statuses, chunk_size):
+        old_jobs = self._get_old_jobs(nb_hours, queue, statuses, chunk_size)
+        for job in old_jobs:
+            self._remove_job(job["id"])
+        return {"count": len(old_jobs)}
+
+    async def archive_old_jobs_one(self, nb_hours, queue, statuses, chunk_size):
+        old_jobs = self._get_old_jobs(nb_hours, queue, statuses, chunk_size)
+        for job in old_jobs:
+            self.jobs_archive[job["id"]] = self._remove_job(job["id"])
+            self.events_archive[job["id"]] = self.events.pop(job["id"], [])
+        return {"count": len(old_jobs)}
+
+    async def delete_archived_jobs_one(self, nb_hours, queue, chunk_size):
+        old_jobs = sorted(
+            (
+                job
+                for job in self.jobs_archive.values()
+                if job["finished_at"]
+                < utils.utcnow() - datetime.timedelta(hours=nb_hours)
+                and queue in (job["queue_name"], None)
+            ),
+            key=lambda job: job["finished_at"],
+        )[:chunk_size]
+        for job in old_jobs:
+            self.jobs_archive.pop(job["id"])
+            self.events_archive.pop(job["id"], None)
+        return {"count": len(old_jobs)}
+
+    async def set_recorded_events_run(
+        self, queue: str, event_types: list[str] | None
+    ) -> None:
+        self.event_settings[queue] = event_types
 
     async def listen_for_jobs_run(self) -> None:
         pass
@@ -391,15 +693,46 @@ class InMemoryConnector(connector.BaseAsyncConnector):
     async def apply_schema_run(self) -> None:
         pass
 
-    async def list_jobs_all(self, **kwargs):
+    async def enable_job_counts_run(self) -> None:
+        # Jobs are always counted on the fly in memory
+        pass
+
+    async def disable_job_counts_run(self) -> None:
+        pass
+
+    async def compact_job_counts_run(self) -> None:
+        pass
+
+    async def partition_events_run(self) -> None:
+        pass
+
+    async def create_events_partitions_one(self, days_ahead: int) -> dict:
+        # Events are not partitioned in memory
+        return {"count": 0}
+
+    async def drop_events_partitions_one(self, nb_days: int) -> dict:
+        return {"count": 0}
+
+    async def list_jobs_all(
+        self,
+        include_archived: bool = False,
+        limit: int | None = None,
+        after_id: int | None = None,
+        **kwargs,
+    ):
         jobs: list[JobRow] = []
-        for job in self.jobs.values():
+        all_jobs = list(self.jobs.values())
+        if include_archived:
+            all_jobs = [*all_jobs, *self.jobs_archive.values()]
+        for job in sorted(all_jobs, key=lambda job: job["id"]):
+            if after_id is not None and job["id"] <= after_id:
+                continue
             if all(
                 expected is None or str(job[key]) == str(expected)
                 for key, expected in kwargs.items()
             ):
                 jobs.append(job)
-        return iter(jobs)
+        return iter(jobs[:limit])
 
     async def list_queues_all(self, **kwargs):
         result: list[dict] = []
@@ -443,6 +776,7 @@ class InMemoryConnector(connector.BaseAsyncConnector):
     async def set_job_status_run(self, id, status):
         id = int(id)
         self.jobs[id]["status"] = status
+        self._index_job(self.jobs[id])
 
     async def check_connection_one(self):
         return {"check": self.table_exists or None}
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import inspect
+from collections.abc import Mapping
+from typing import Any, Callable, TypeVar
+
+from procrastinate import sql
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:
+    trace = None
+
+TRACER_NAME = "procrastinate"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def is_enabled() -> bool:
+    """
+    Whether spans are emitted, which is the case when ``opentelemetry-api`` is
+    installed. Spans are only exported once an OpenTelemetry SDK is configured.
+    """
+    return trace is not None
+
+
+def start_span(
+    name: str,
+    kind: str = "internal",
+    attributes: Mapping[str, Any] | None = None,
+    trace_context: Mapping[str, str] | None = None,
+) -> contextlib.AbstractContextManager[Any]:
+    """
+    Start a span, as the current span. With ``trace_context`` (see `inject`), its
+    parent is the span that injected it (if any) instead of the current span.
+    """
+    if trace is None:
+        return contextlib.nullcontext()
+
+    return trace.get_tracer(TRACER_NAME).start_as_current_span(
+        name,
+        context=propagate.extract(trace_context) if trace_context is not None else None,
+        kind=trace.SpanKind[kind.upper()],
+        attributes=attributes,
+    )
+
+
+def inject() -> dict[str, str] | None:
+    """
+    Trace context of the current span, as W3C Trace Context headers, or None if
+    there is no current span.
+    """
+    if trace is None:
+        return None
+
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier or None
+
+
+def set_attributes(attributes: Mapping[str, Any]) -> None:
+    """Set attributes on the current span"""
+    if trace is None:
+        return
+
+    trace.get_current_span().set_attributes(attributes)
+
+
+def record_exception(exception: BaseException) -> None:
+    """Record an exception on the current span, and mark it as failed"""
+    if trace is None:
+        return
+
+    span = trace.get_current_span()
+    span.record_exception(exception)
+    span.set_status(trace.Status(trace.StatusCode.ERROR, str(exception)))
+
+
+def query_span(query: str) -> contextlib.AbstractContextManager[Any]:
+    name = sql.query_names.get(query, "query")
+    return start_span(
+        name,
+        kind="client",
+        attributes={"db.system.name": "postgresql", "db.operation.name": name},
+    )
+
+
+def traced_query(func: F) -> F:
+    """
+    Decorate the ``execute_query*`` methods of a connector, so that each query
+    gets a span, named after the query (see `sql.queries`). This is a no-op if
+    tracing is not enabled.
+    """
+    if trace is None:
+        return func
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(self, query: str, **arguments: Any) -> Any:
+            with query_span(query):
+                return await func(self, query, **arguments)
+
+        return async_wrapper  # type: ignore
+
+    @functools.wraps(func)
+    def wrapper(self, query: str, **arguments: Any) -> Any:
+        with query_span(query):
+            return func(self, query, **arguments)
+
+    return wrapper  # type: ignore
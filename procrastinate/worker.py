@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import cProfile
 import functools
 import inspect
 import logging
@@ -9,15 +10,21 @@ import time
 from collections.abc import Awaitable, Iterable
 from typing import Any, Callable
 
+import attr
+
 from procrastinate import (
     app,
     exceptions,
+    executors,
     job_context,
     jobs,
+    metrics,
     periodic,
+    profiling,
     retry,
     signals,
     tasks,
+    tracing,
     types,
     utils,
 )
@@ -28,6 +35,22 @@ WORKER_NAME = "worker"
 WORKER_CONCURRENCY = 1  # maximum number of parallel jobs
 FETCH_JOB_POLLING_INTERVAL = 5.0  # seconds
 ABORT_JOB_POLLING_INTERVAL = 5.0  # seconds
+ACK_BATCH_SIZE = 1  # 1 means that jobs are acknowledged one by one
+ACK_BATCH_INTERVAL = 0.05  # seconds
+
+
+@attr.dataclass(frozen=True, kw_only=True)
+class JobAcknowledgement:
+    """
+    The outcome of a job, waiting in the worker buffer to be persisted
+    """
+
+    job: jobs.Job
+    status: jobs.Status
+    retry_decision: retry.RetryDecision | None
+    delete_job: bool
+    context: job_context.JobContext
+    job_result: job_context.JobResult | None
 
 
 class Worker:
@@ -47,6 +70,16 @@ class Worker:
         install_signal_handlers: bool = True,
         update_heartbeat_interval: float = 10.0,
         stalled_worker_timeout: float = 30.0,
+        ack_batch_size: int = ACK_BATCH_SIZE,
+        ack_batch_interval: float = ACK_BATCH_INTERVAL,
+        process_pool_size: int | None = None,
+        thread_pool_size: int | None = None,
+        thread_pools: dict[str, int] | None = None,
+        run_periodic_deferrer: bool = True,
+        metrics_port: int | None = None,
+        profile_tasks: Iterable[str] | None = None,
+        profile_rate: float = 0.0,
+        profile_directory: str = profiling.PROFILE_DIRECTORY,
     ):
         self.app = app
         self.queues = queues
@@ -65,6 +98,13 @@ class Worker:
         self.install_signal_handlers = install_signal_handlers
         self.update_heartbeat_interval = update_heartbeat_interval
         self.stalled_worker_timeout = stalled_worker_timeout
+        self.ack_batch_size = ack_batch_size
+        self.ack_batch_interval = ack_batch_interval
+        self.process_pool_size = process_pool_size
+        self.thread_pool_size = thread_pool_size
+        self.thread_pools = thread_pools or {}
+        self.run_periodic_deferrer = run_periodic_deferrer
+        self.metrics_port = metrics_port
 
         if self.worker_name:
             self.logger = logger.getChild(self.worker_name)
@@ -76,10 +116,37 @@ class Worker:
         self._loop_task: asyncio.Future | None = None
         self._new_job_event = asyncio.Event()
         self._running_jobs: dict[asyncio.Task, job_context.JobContext] = {}
+        self._slots_handed_over: set[asyncio.Task] = set()
         self._job_semaphore = asyncio.Semaphore(self.concurrency)
         self._stop_event = asyncio.Event()
         self.shutdown_graceful_timeout = shutdown_graceful_timeout
         self._job_ids_to_abort: dict[int, job_context.AbortReason] = dict()
+        self._ack_buffer: list[JobAcknowledgement] = []
+        self._ack_buffer_not_empty = asyncio.Event()
+        self._ack_buffer_full = asyncio.Event()
+        # Monotonic times of the last heartbeat and poll of the jobs to abort, which
+        # may also be sent along with the acknowledgements
+        self._heartbeat_updated_at = time.monotonic()
+        self._jobs_to_abort_polled_at = time.monotonic()
+        self._process_pool: executors.ProcessPool | None = None
+        self._thread_pools = executors.ThreadPools(
+            default_size=self.thread_pool_size, sizes=self.thread_pools
+        )
+        # Metrics are only collected when they are served
+        self.metrics: metrics.WorkerMetrics | None = None
+        if self.metrics_port is not None:
+            self.metrics = metrics.WorkerMetrics(
+                concurrency=self.concurrency,
+                running_jobs=lambda: len(self._running_jobs),
+            )
+        self._metrics_server: asyncio.Server | None = None
+        self.profiler: profiling.Profiler | None = None
+        if profile_tasks or profile_rate:
+            self.profiler = profiling.Profiler(
+                task_names=profile_tasks or (),
+                rate=profile_rate,
+                directory=profile_directory,
+            )
 
     def stop(self):
         if self._stop_event.is_set():
@@ -139,7 +206,34 @@ class Worker:
         retry_decision: retry.RetryDecision | None,
         context: job_context.JobContext,
         job_result: job_context.JobResult | None,
-    ):
+    ) -> jobs.Job | None:
+        """
+        Persist the outcome of a job. When possible, the next job is fetched in
+        the same query and returned, so that it can run in the freed slot.
+        """
+        delete_job = {
+            jobs.DeleteJobCondition.ALWAYS: True,
+            jobs.DeleteJobCondition.NEVER: False,
+            jobs.DeleteJobCondition.SUCCESSFUL: status == jobs.Status.SUCCEEDED,
+        }[self.delete_jobs]
+        acknowledgement = JobAcknowledgement(
+            job=job,
+            status=status,
+            retry_decision=retry_decision,
+            delete_job=delete_job,
+            context=context,
+            job_result=job_result,
+        )
+
+        if self.ack_batch_size > 1:
+            # The buffer is flushed by the _acknowledge_jobs side task, or at shutdown
+            self._ack_buffer.append(acknowledgement)
+            self._ack_buffer_not_empty.set()
+            if len(self._ack_buffer) >= self.ack_batch_size:
+                self._ack_buffer_full.set()
+            return None
+
+        next_job = None
         if retry_decision:
             await self.app.job_manager.retry_job(
                 job=job,
@@ -148,16 +242,25 @@ class Worker:
                 priority=retry_decision.priority,
                 queue=retry_decision.queue,
             )
-        else:
-            delete_job = {
-                jobs.DeleteJobCondition.ALWAYS: True,
-                jobs.DeleteJobCondition.NEVER: False,
-                jobs.DeleteJobCondition.SUCCESSFUL: status == jobs.Status.SUCCEEDED,
-            }[self.delete_jobs]
+        elif self._stop_event.is_set():
             await self.app.job_manager.finish_job(
                 job=job, status=status, delete_job=delete_job
             )
+        else:
+            assert self.worker_id is not None
+            next_job = await self.app.job_manager.finish_job_and_fetch_next(
+                job=job,
+                status=status,
+                delete_job=delete_job,
+                queues=self.queues,
+                worker_id=self.worker_id,
+            )
+
+        self._job_acknowledged(acknowledgement)
+        return next_job
 
+    def _job_acknowledged(self, acknowledgement: JobAcknowledgement):
+        job = acknowledgement.job
         assert job.id
         self._job_ids_to_abort.pop(job.id, None)
 
@@ -165,12 +268,195 @@ class Worker:
             f"Acknowledged job completion {job.call_string}",
             extra=self._log_extra(
                 action="finish_task",
-                context=context,
-                status=status,
-                job_result=job_result,
+                context=acknowledgement.context,
+                status=acknowledgement.status,
+                job_result=acknowledgement.job_result,
             ),
         )
 
+    async def _acknowledge_jobs(self):
+        while True:
+            await self._ack_buffer_not_empty.wait()
+            # Give the batch a chance to fill up before sending it
+            await utils.wait_any(
+                self._ack_buffer_full.wait(),
+                asyncio.sleep(self.ack_batch_interval),
+            )
+
+            flush_task = asyncio.create_task(self._flush_acknowledgements())
+            try:
+                await asyncio.shield(flush_task)
+            except asyncio.CancelledError:
+                await flush_task
+                raise
+
+    async def _flush_acknowledgements(self):
+        """
+        Persist the status of all the buffered jobs, with one query for the
+        finished jobs and one for the jobs to retry. The heartbeat and the poll of
+        the jobs to abort are sent along if they are due soon, and all the queries
+        are pipelined if the connector runs them atomically.
+        """
+        acknowledgements, self._ack_buffer = self._ack_buffer, []
+        self._ack_buffer_not_empty.clear()
+        self._ack_buffer_full.clear()
+
+        to_finish = [ack for ack in acknowledgements if not ack.retry_decision]
+        to_retry = [ack for ack in acknowledgements if ack.retry_decision]
+        if await self._pipeline_acknowledgements(
+            to_finish=to_finish, to_retry=to_retry
+        ):
+            for ack in acknowledgements:
+                self._job_acknowledged(ack)
+            return
+
+        for batch, persist in (
+            (to_finish, self._finish_jobs),
+            (to_retry, self._retry_jobs),
+        ):
+            if not batch:
+                continue
+            try:
+                await persist(batch)
+            except Exception as exc:
+                # A single faulty job should not prevent the others from being
+                # acknowledged
+                self.logger.warning(
+                    f"Could not acknowledge {len(batch)} jobs at once, "
+                    "acknowledging them one by one",
+                    exc_info=exc,
+                    extra=self._log_extra(
+                        action="batch_acknowledgement_failed",
+                        context=None,
+                        job_result=None,
+                    ),
+                )
+                for ack in batch:
+                    try:
+                        await persist([ack])
+                    except Exception as exc:
+                        self.logger.exception(
+                            f"Could not acknowledge job completion {ack.job.call_string}",
+                            exc_info=exc,
+                            extra=self._log_extra(
+                                action="acknowledgement_failed",
+                                context=ack.context,
+                                job_result=ack.job_result,
+                            ),
+                        )
+                        continue
+                    self._job_acknowledged(ack)
+                continue
+
+            for ack in batch:
+                self._job_acknowledged(ack)
+
+    async def _pipeline_acknowledgements(
+        self,
+        to_finish: list[JobAcknowledgement],
+        to_retry: list[JobAcknowledgement],
+    ) -> bool:
+        """
+        Send the acknowledgements, the heartbeat and the poll of the jobs to abort
+        (if they are due in less than half their interval) together. Returns False
+        if the connector cannot run them atomically, if there is a single query to
+        send, or if the pipeline failed, in which case the acknowledgements are to
+        be persisted separately.
+        """
+        # Otherwise, after a failure, the acknowledgements that were applied would
+        # be persisted again, and fail
+        if not self.app.connector.queries_are_atomic:
+            return False
+
+        assert self.worker_id is not None
+        pipeline = self.app.job_manager.pipeline()
+
+        now = time.monotonic()
+        update_heartbeat = (
+            now - self._heartbeat_updated_at >= self.update_heartbeat_interval / 2
+        )
+        if update_heartbeat:
+            pipeline.update_heartbeat(worker_id=self.worker_id)
+        abort_index = None
+        if (
+            self._running_jobs
+            and now - self._jobs_to_abort_polled_at
+            >= self.abort_job_polling_interval / 2
+        ):
+            abort_index = pipeline.list_jobs_to_abort()
+
+        if to_finish:
+            pipeline.finish_jobs_by_ids(**self._finish_jobs_kwargs(to_finish))
+        if to_retry:
+            pipeline.retry_jobs_by_ids(**self._retry_jobs_kwargs(to_retry))
+
+        if len(pipeline) < 2:
+            return False
+
+        try:
+            results = await pipeline.execute_async()
+        except Exception as exc:
+            self.logger.debug(
+                "Could not send the acknowledgements in a pipeline, sending them "
+                "separately",
+                exc_info=exc,
+                extra=self._log_extra(
+                    action="pipeline_acknowledgement_failed",
+                    context=None,
+                    job_result=None,
+                ),
+            )
+            return False
+
+        if update_heartbeat:
+            self._heartbeat_updated_at = now
+        if abort_index is not None:
+            self._jobs_to_abort_polled_at = now
+            self._handle_abort_jobs_requested(results[abort_index])
+        return True
+
+    def _finish_jobs_kwargs(
+        self, acknowledgements: list[JobAcknowledgement]
+    ) -> dict[str, Any]:
+        job_ids = []
+        for ack in acknowledgements:
+            assert ack.job.id
+            job_ids.append(ack.job.id)
+
+        return {
+            "job_ids": job_ids,
+            "statuses": [ack.status for ack in acknowledgements],
+            "delete_jobs": [ack.delete_job for ack in acknowledgements],
+        }
+
+    def _retry_jobs_kwargs(
+        self, acknowledgements: list[JobAcknowledgement]
+    ) -> dict[str, Any]:
+        job_ids = []
+        decisions = []
+        for ack in acknowledgements:
+            assert ack.job.id and ack.retry_decision
+            job_ids.append(ack.job.id)
+            decisions.append(ack.retry_decision)
+
+        return {
+            "job_ids": job_ids,
+            "retry_ats": [decision.retry_at for decision in decisions],
+            "priorities": [decision.priority for decision in decisions],
+            "queues": [decision.queue for decision in decisions],
+            "locks": [decision.lock for decision in decisions],
+        }
+
+    async def _finish_jobs(self, acknowledgements: list[JobAcknowledgement]):
+        await self.app.job_manager.finish_jobs_by_ids_async(
+            **self._finish_jobs_kwargs(acknowledgements)
+        )
+
+    async def _retry_jobs(self, acknowledgements: list[JobAcknowledgement]):
+        await self.app.job_manager.retry_jobs_by_ids_async(
+            **self._retry_jobs_kwargs(acknowledgements)
+        )
+
     def _log_job_outcome(
         self,
         status: jobs.Status,
@@ -213,6 +499,24 @@ class Worker:
         """
         Processes a given job and persists its status
         """
+        job = context.job
+        with tracing.start_span(
+            f"run {job.task_name}",
+            kind="consumer",
+            attributes={
+                "messaging.system": "procrastinate",
+                "messaging.operation.type": "process",
+                "messaging.destination.name": job.queue,
+                "messaging.message.id": str(job.id),
+                "procrastinate.task.name": job.task_name,
+                "procrastinate.job.attempts": job.attempts,
+            },
+            # Jobs deferred without tracing start their own trace
+            trace_context=job.trace_context or {},
+        ):
+            await self._run_job(context)
+
+    async def _run_job(self, context: job_context.JobContext):
         task = self.app.tasks.get(context.job.task_name)
         job_retry = None
         exc_info = False
@@ -221,6 +525,9 @@ class Worker:
 
         job_result = job_context.JobResult(start_timestamp=context.start_timestamp)
 
+        if self.metrics:
+            self.metrics.job_started(job)
+
         try:
             if not task:
                 raise exceptions.TaskNotFound
@@ -241,12 +548,23 @@ class Worker:
 
             exc_info: bool | BaseException = False
 
-            async def ensure_async() -> Callable[..., Awaitable]:
+            async def ensure_async(
+                profile: cProfile.Profile | None = None,
+            ) -> Callable[..., Awaitable]:
                 await_func: Callable[..., Awaitable]
-                if inspect.iscoroutinefunction(task.func):
+                if task.executor == executors.PROCESS_EXECUTOR:
+                    assert self._process_pool
+                    await_func = functools.partial(self._process_pool.run, task)
+                elif inspect.iscoroutinefunction(task.func):
                     await_func = task
+                    if profile:
+                        await_func = profiling.profile_coroutine_function(task, profile)
                 else:
-                    await_func = functools.partial(utils.sync_to_async, task)
+                    await_func = functools.partial(
+                        self._thread_pools.run_in_pool,
+                        task.executor,
+                        profiling.profile_function(task, profile) if profile else task,
+                    )
 
                 job_args = [context] if task.pass_context else []
                 task_result = await await_func(*job_args, **job.task_kwargs)
@@ -263,10 +581,21 @@ class Worker:
 
                 return task_result
 
-            job_result.result = await ensure_async()
+            profiler = self.profiler
+            if (
+                profiler
+                # Jobs running in child processes are not profiled
+                and task.executor != executors.PROCESS_EXECUTOR
+                and profiler.should_profile(task.name)
+            ):
+                with profiler.profile(task.name) as profile:
+                    job_result.result = await ensure_async(profile)
+            else:
+                job_result.result = await ensure_async()
 
         except BaseException as e:
             exc_info = e
+            tracing.record_exception(e)
 
             # aborted job can be retried if it is caused by a shutdown.
             if not (isinstance(e, exceptions.JobAborted)) or (
@@ -305,70 +634,113 @@ class Worker:
                 job_retry=job_retry,
                 exc_info=exc_info,
             )
+            if self.metrics:
+                self.metrics.job_ended(
+                    job,
+                    outcome="retried" if job_retry else status.value,
+                    duration=job_result.end_timestamp - job_result.start_timestamp
+                    if job_result.start_timestamp
+                    else None,
+                )
 
-            persist_job_status_task = asyncio.create_task(
-                self._persist_job_status(
-                    job=job,
-                    status=status,
-                    retry_decision=retry_decision,
-                    context=context,
-                    job_result=job_result,
+            with tracing.start_span(
+                "persist job status",
+                attributes={"procrastinate.job.status": status.value},
+            ):
+                persist_job_status_task = asyncio.create_task(
+                    self._persist_job_status(
+                        job=job,
+                        status=status,
+                        retry_decision=retry_decision,
+                        context=context,
+                        job_result=job_result,
+                    )
                 )
-            )
-            try:
-                await asyncio.shield(persist_job_status_task)
-            except asyncio.CancelledError:
-                await persist_job_status_task
-                raise
+                next_job = None
+                try:
+                    next_job = await asyncio.shield(persist_job_status_task)
+                except asyncio.CancelledError:
+                    next_job = await persist_job_status_task
+                    raise
+                finally:
+                    if next_job:
+                        # The next job inherits the slot of this one, without going
+                        # through the semaphore again
+                        current_task = asyncio.current_task()
+                        assert current_task
+                        self._slots_handed_over.add(current_task)
+                        self._start_job(next_job)
+
+    async def _acquire_free_slots(self) -> int:
+        """Claim every job slot that is free right now, without waiting"""
+        slots = 0
+        while not self._job_semaphore.locked():
+            await self._job_semaphore.acquire()
+            slots += 1
+        return slots
 
     async def _fetch_and_process_jobs(self):
         """Fetch and process jobs until there is no job left or asked to stop"""
         while not self._stop_event.is_set():
             acquire_sem_task = asyncio.create_task(self._job_semaphore.acquire())
-            job = None
+            slots = 0
+            fetched_jobs: list[jobs.Job] = []
             try:
                 await utils.wait_any(acquire_sem_task, self._stop_event.wait())
                 if self._stop_event.is_set():
                     break
 
+                # Fill every free slot with a single query
+                slots = 1 + await self._acquire_free_slots()
+
                 assert self.worker_id is not None
-                job = await self.app.job_manager.fetch_job(
-                    queues=self.queues, worker_id=self.worker_id
+                fetch_start = time.perf_counter()
+                fetched_jobs = await self.app.job_manager.fetch_jobs(
+                    queues=self.queues, worker_id=self.worker_id, limit=slots
                 )
+                if self.metrics:
+                    self.metrics.jobs_fetched(time.perf_counter() - fetch_start)
             finally:
-                if (not job or self._stop_event.is_set()) and acquire_sem_task.done():
-                    self._job_semaphore.release()
+                if acquire_sem_task.done() and not acquire_sem_task.cancelled():
+                    # Give back the slots that did not get a job
+                    for _ in range(max(slots, 1) - len(fetched_jobs)):
+                        self._job_semaphore.release()
                 self._new_job_event.clear()
 
-            if not job:
+            if not fetched_jobs:
                 break
 
-            job_id = job.id
-
-            context = job_context.JobContext(
-                app=self.app,
-                worker_name=self.worker_name,
-                worker_queues=self.queues,
-                additional_context=self.additional_context.copy()
-                if self.additional_context
-                else {},
-                job=job,
-                abort_reason=lambda: self._job_ids_to_abort.get(job_id)
-                if job_id
-                else None,
-                start_timestamp=time.time(),
-            )
-            job_task = asyncio.create_task(
-                self._process_job(context),
-                name=f"process job {job.task_name}[{job.id}]",
-            )
-            self._running_jobs[job_task] = context
+            for job in fetched_jobs:
+                self._start_job(job)
+
+    def _start_job(self, job: jobs.Job):
+        job_id = job.id
+
+        context = job_context.JobContext(
+            app=self.app,
+            worker_name=self.worker_name,
+            worker_queues=self.queues,
+            additional_context=self.additional_context.copy()
+            if self.additional_context
+            else {},
+            job=job,
+            abort_reason=lambda: self._job_ids_to_abort.get(job_id) if job_id else None,
+            start_timestamp=time.time(),
+        )
+        job_task = asyncio.create_task(
+            self._process_job(context),
+            name=f"process job {job.task_name}[{job.id}]",
+        )
+        self._running_jobs[job_task] = context
 
-            def on_job_complete(task: asyncio.Task):
-                del self._running_jobs[task]
+        def on_job_complete(task: asyncio.Task):
+            del self._running_jobs[task]
+            if task in self._slots_handed_over:
+                self._slots_handed_over.remove(task)
+            else:
                 self._job_semaphore.release()
 
-            job_task.add_done_callback(on_job_complete)
+        job_task.add_done_callback(on_job_complete)
 
     async def run(self):
         """
@@ -383,6 +755,7 @@ class Worker:
             logger.debug(f"Pruned stalled workers: {', '.join(str(pruned_workers))}")
 
         self.worker_id = await self.app.job_manager.register_worker()
+        self._heartbeat_updated_at = self._jobs_to_abort_polled_at = time.monotonic()
         logger.debug(f"Registered worker {self.worker_id} in the database")
 
         self.run_task = asyncio.current_task()
@@ -408,21 +781,38 @@ class Worker:
 
     async def _update_heartbeat(self):
         while True:
-            logger.debug(
-                f"Waiting for {self.update_heartbeat_interval}s before updating worker heartbeat"
+            # The heartbeat may have been sent along with acknowledgements
+            delay = (
+                self._heartbeat_updated_at
+                + self.update_heartbeat_interval
+                - time.monotonic()
             )
-            await asyncio.sleep(self.update_heartbeat_interval)
+            if delay > 0:
+                logger.debug(
+                    f"Waiting for {delay:.3f}s before updating worker heartbeat"
+                )
+                await asyncio.sleep(delay)
+                continue
 
             logger.debug(f"Updating heartbeat of worker {self.worker_id}")
             assert self.worker_id is not None
+            self._heartbeat_updated_at = time.monotonic()
             await self.app.job_manager.update_heartbeat(self.worker_id)
 
     async def _poll_jobs_to_abort(self):
         while True:
-            logger.debug(
-                f"waiting for {self.abort_job_polling_interval}s before querying jobs to abort"
+            # The jobs to abort may have been polled along with acknowledgements
+            delay = (
+                self._jobs_to_abort_polled_at
+                + self.abort_job_polling_interval
+                - time.monotonic()
             )
-            await asyncio.sleep(self.abort_job_polling_interval)
+            if delay > 0:
+                logger.debug(f"waiting for {delay:.3f}s before querying jobs to abort")
+                await asyncio.sleep(delay)
+                continue
+
+            self._jobs_to_abort_polled_at = time.monotonic()
             if not self._running_jobs:
                 logger.debug("Not querying jobs to abort because no job is running")
                 continue
@@ -466,6 +856,8 @@ class Worker:
             log_message = "Received a request to abort a job but the job has no associated task. No action to perform"
         elif not asyncio.iscoroutinefunction(task.func):
             log_message = "Received a request to abort a synchronous job. Job is responsible for aborting by checking context.should_abort"
+            if task.executor == executors.PROCESS_EXECUTOR and self._process_pool:
+                self._process_pool.request_abort(context.job.id, reason)
         else:
             log_message = "Received a request to abort an asynchronous job. Cancelling asyncio task"
             process_job_task.cancel()
@@ -492,10 +884,19 @@ class Worker:
                 ),
             )
 
-        if self._running_jobs:
-            await asyncio.wait(
-                self._running_jobs, timeout=self.shutdown_graceful_timeout
-            )
+        # A job fetched along with the acknowledgement of another one may start
+        # while we wait, so we keep waiting until no job is left.
+        loop = asyncio.get_running_loop()
+        deadline = (
+            None
+            if self.shutdown_graceful_timeout is None
+            else loop.time() + self.shutdown_graceful_timeout
+        )
+        while self._running_jobs:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            _, pending = await asyncio.wait(self._running_jobs, timeout=timeout)
+            if pending:
+                break
 
         # As a reminder, tasks have a done callback that
         # removes them from the self._running_jobs dict,
@@ -512,6 +913,22 @@ class Worker:
             )
             await self._abort_running_jobs()
 
+        if self._ack_buffer:
+            await self._flush_acknowledgements()
+
+        if self._process_pool:
+            await self._process_pool.shutdown()
+            self._process_pool = None
+        await self._thread_pools.shutdown()
+
+        if self.profiler:
+            self.profiler.write()
+
+        if self._metrics_server:
+            self._metrics_server.close()
+            await self._metrics_server.wait_closed()
+            self._metrics_server = None
+
         assert self.worker_id is not None
         await self.app.job_manager.unregister_worker(self.worker_id)
         logger.debug(f"Unregistered finished worker {self.worker_id} from the database")
@@ -525,18 +942,67 @@ class Worker:
         )
 
     async def _abort_running_jobs(self):
-        for task, context in self._running_jobs.items():
-            self._abort_job(task, context, job_context.AbortReason.SHUTDOWN)
+        while self._running_jobs:
+            for task, context in self._running_jobs.items():
+                self._abort_job(task, context, job_context.AbortReason.SHUTDOWN)
+
+            await asyncio.gather(*self._running_jobs, return_exceptions=True)
+
+    async def _start_process_pool(self):
+        """Start the process pool, if some tasks need it"""
+        process_tasks = {
+            task
+            for task in self.app.tasks.values()
+            if task.executor == executors.PROCESS_EXECUTOR
+        }
+        if not process_tasks:
+            return
 
-        await asyncio.gather(*self._running_jobs, return_exceptions=True)
+        # Child processes import the task modules once, when they start
+        import_paths = dict.fromkeys(
+            [
+                *self.app.import_paths,
+                *(task.full_path.rsplit(".", 1)[0] for task in process_tasks),
+            ]
+        )
+        self._process_pool = executors.ProcessPool(
+            size=self.process_pool_size, import_paths=import_paths
+        )
+        await self._process_pool.start()
+
+    def _start_thread_pools(self):
+        for task in self.app.tasks.values():
+            if task.executor in (None, executors.PROCESS_EXECUTOR):
+                continue
+            if task.executor not in self.thread_pools:
+                self.logger.warning(
+                    f"Task {task.name} uses the executor {task.executor!r} which is "
+                    "not configured on this worker, its jobs will run in the default "
+                    "thread pool",
+                    extra=self._log_extra(
+                        action="unknown_task_executor",
+                        context=None,
+                        job_result=None,
+                        task_name=task.name,
+                        executor=task.executor,
+                    ),
+                )
+        self._thread_pools.start()
 
     def _start_side_tasks(self) -> list[asyncio.Task]:
         """Start side tasks such as periodic deferrer and notification listener"""
         side_tasks = [
             asyncio.create_task(self._update_heartbeat(), name="update_heartbeats"),
-            asyncio.create_task(self._periodic_deferrer(), name="deferrer"),
             asyncio.create_task(self._poll_jobs_to_abort(), name="poll_jobs_to_abort"),
         ]
+        if self.run_periodic_deferrer:
+            side_tasks.append(
+                asyncio.create_task(self._periodic_deferrer(), name="deferrer")
+            )
+        if self.ack_batch_size > 1:
+            side_tasks.append(
+                asyncio.create_task(self._acknowledge_jobs(), name="acknowledge_jobs")
+            )
         if self.listen_notify:
             listener_coro = self.app.job_manager.listen_for_jobs(
                 on_notification=self._handle_notification,
@@ -558,7 +1024,17 @@ class Worker:
         self._new_job_event.clear()
         self._stop_event.clear()
         self._running_jobs = {}
+        self._slots_handed_over = set()
         self._job_semaphore = asyncio.Semaphore(self.concurrency)
+        self._ack_buffer = []
+        self._ack_buffer_not_empty.clear()
+        self._ack_buffer_full.clear()
+        if self.metrics and self.metrics_port is not None:
+            self._metrics_server = await metrics.start_http_server(
+                self.metrics, port=self.metrics_port
+            )
+        await self._start_process_pool()
+        self._start_thread_pools()
         side_tasks = self._start_side_tasks()
 
         context = (
@@ -3,6 +3,7 @@ from __future__ import annotations
 import functools
 import itertools
 import json
+import os
 import time
 
 import procrastinate
@@ -130,3 +131,17 @@ counter = itertools.count()
 @cron_app.task(priority=7, pass_context=True)
 def tick(context, timestamp):
     print("tick", next(counter), context.job.priority, timestamp)
+
+
+process_app = procrastinate.App(
+    connector=procrastinate.PsycopgConnector(
+        json_dumps=json_dumps, json_loads=json_loads
+    )
+)
+
+
+@process_app.task(executor="process", pass_context=True, retry=1)
+def process_task(context, value):
+    if context.job.attempts == 0:
+        raise Exception("This should fail")
+    print("process_task", value, os.getpid())
@@ -6,18 +6,21 @@ import time
 import pytest
 
 from procrastinate import app as app_module
-from procrastinate.contrib import aiopg
+from procrastinate.contrib import aiopg, asyncpg
 from procrastinate.exceptions import JobAborted
 from procrastinate.job_context import JobContext
 from procrastinate.jobs import Status
 
 
-@pytest.fixture(params=["psycopg_connector", "aiopg_connector"])
+@pytest.fixture(params=["psycopg_connector", "aiopg_connector", "asyncpg_connector"])
 async def async_app(request, psycopg_connector, connection_params):
     app = app_module.App(
         connector={
             "psycopg_connector": psycopg_connector,
             "aiopg_connector": aiopg.AiopgConnector(**connection_params),
+            "asyncpg_connector": asyncpg.AsyncpgConnector(
+                database=connection_params["dbname"]
+            ),
         }[request.param]
     )
     async with app.open_async():
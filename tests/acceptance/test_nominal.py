@@ -101,6 +101,51 @@ Try 2
     assert stderr.count(expected_log) == 2
 
 
+def test_process_executor(defer, running_worker):
+    defer("process_task", app="process_app", value=3)
+
+    process = running_worker(app="process_app")
+    time.sleep(3)
+    process.send_signal(signal.SIGINT)
+    stdout, stderr = process.communicate()
+    print(stdout, stderr)
+
+    # The job runs in a child process, and is retried after its first failure
+    lines = [line for line in stdout.splitlines() if line.startswith("process_task")]
+    assert len(lines) == 1
+    _, value, pid = lines[0].split()
+    assert value == "3"
+    assert int(pid) != process.pid
+    assert stderr.count("ended with status: Error, to retry") == 1
+    assert "Stopped worker" in stderr
+
+
+def test_worker_processes(defer, process_env):
+    for i in range(4):
+        defer("sum_task", a=i, b=10)
+
+    process = subprocess.Popen(
+        ["procrastinate", "-vvv", "worker", "--processes", "2"],
+        env=process_env(app="app"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    time.sleep(3)
+    process.send_signal(signal.SIGTERM)
+    stdout, stderr = process.communicate()
+    print(stdout, stderr)
+
+    assert sorted(stdout.splitlines()) == ["10", "11", "12", "13"]
+    assert "Launching 2 worker processes on all queues" in stderr
+    assert "Started worker process 0" in stderr
+    assert "Started worker process 1" in stderr
+    # Both workers received the stop signal and stopped gracefully
+    assert stderr.count("Stopped worker on all queues") == 2
+    assert "Stopped worker processes" in stderr
+    assert process.returncode == 0
+
+
 @pytest.mark.parametrize("app", ["app", "app_aiopg"])
 def test_priority(defer, worker, app):
     defer("sum_task", ["--priority", "5"], a=5, b=7)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import math
 
 import pytest
 
@@ -18,3 +19,43 @@ def aio_benchmark(benchmark):
             benchmark(func, *args, **kwargs)
 
     return _wrapper
+
+
+@pytest.fixture
+def aio_benchmark_pedantic(benchmark):
+    """
+    Benchmark a coroutine function, running the ``setup`` coroutine function before
+    each round, outside of the measures.
+    """
+
+    def _wrapper(func, *, setup=None, rounds=5):
+        event_loop = asyncio.get_event_loop()
+
+        def run_setup():
+            event_loop.run_until_complete(setup())
+
+        benchmark.pedantic(
+            lambda: event_loop.run_until_complete(func()),
+            setup=run_setup if setup else None,
+            rounds=rounds,
+        )
+
+    return _wrapper
+
+
+@pytest.fixture
+def record_percentiles(benchmark):
+    """
+    Store the 50th, 90th and 99th percentiles of the rounds in the extra info of the
+    benchmark, so that they are part of the JSON output.
+    """
+
+    def _():
+        if not benchmark.stats:  # --benchmark-disable
+            return
+        data = sorted(benchmark.stats.stats.data)
+        for percentile in (50, 90, 99):
+            index = max(math.ceil(percentile / 100 * len(data)) - 1, 0)
+            benchmark.extra_info[f"p{percentile}"] = data[index]
+
+    return _
@@ -3,15 +3,18 @@ from __future__ import annotations
 import pytest
 
 from procrastinate import app as app_module
-from procrastinate.contrib import aiopg
+from procrastinate.contrib import aiopg, asyncpg
 
 
-@pytest.fixture(params=["psycopg_connector", "aiopg_connector"])
+@pytest.fixture(params=["psycopg_connector", "aiopg_connector", "asyncpg_connector"])
 async def async_app(request, psycopg_connector, connection_params):
     app = app_module.App(
         connector={
             "psycopg_connector": psycopg_connector,
             "aiopg_connector": aiopg.AiopgConnector(**connection_params),
+            "asyncpg_connector": asyncpg.AsyncpgConnector(
+                database=connection_params["dbname"]
+            ),
         }[request.param]
     )
     async with app.open_async():
@@ -45,3 +48,15 @@ def test_benchmark_1000_async_batch_jobs(aio_benchmark, async_app: app_module.Ap
         await async_app.run_worker_async(queues=["default"], wait=False)
 
     aio_benchmark(defer_and_process_jobs)
+
+
+@pytest.mark.benchmark
+def test_benchmark_10000_async_batch_defer(aio_benchmark, async_app: app_module.App):
+    @async_app.task(queue="default", name="simple_task")
+    async def simple_task():
+        pass
+
+    async def defer_jobs():
+        await simple_task.batch_defer_async(*[{} for _ in range(10000)])
+
+    aio_benchmark(defer_jobs)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from procrastinate import app as app_module
+
+INSERT_JOBS = """
+    INSERT INTO procrastinate_jobs
+        (queue_name, task_name, status, created_at, started_at, finished_at)
+    SELECT
+        'default',
+        'backlog_task',
+        '{status}',
+        NOW() - interval '1 day',
+        CASE WHEN '{status}' = 'todo' THEN NULL ELSE NOW() - interval '1 day' END,
+        CASE WHEN '{status}' = 'todo' THEN NULL ELSE NOW() - interval '1 day' END
+    FROM generate_series(1, {count})
+"""
+
+
+@pytest.fixture
+def backlog(request, connection_params, db_execute):
+    """
+    Fill the database with the number of jobs to do and finished jobs given by the
+    --backlog-jobs and --backlog-finished-jobs options
+    """
+    with db_execute(connection_params["dbname"]) as execute:
+        # Skip the triggers, which would create an event per job
+        execute("SET session_replication_role = replica")
+        execute(
+            INSERT_JOBS.format(
+                status="succeeded",
+                count=int(request.config.getoption("--backlog-finished-jobs")),
+            )
+        )
+        execute(
+            INSERT_JOBS.format(
+                status="todo", count=int(request.config.getoption("--backlog-jobs"))
+            )
+        )
+        execute("SET session_replication_role = DEFAULT")
+        execute("ANALYZE procrastinate_jobs")
+
+
+@pytest.fixture
+async def async_app(backlog, psycopg_connector):
+    app = app_module.App(connector=psycopg_connector)
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+def test_benchmark_fetch_job_backlog(
+    aio_benchmark_pedantic, record_percentiles, async_app: app_module.App
+):
+    event_loop = asyncio.get_event_loop()
+    worker_id = event_loop.run_until_complete(async_app.job_manager.register_worker())
+
+    async def fetch_job():
+        job = await async_app.job_manager.fetch_job(queues=None, worker_id=worker_id)
+        assert job is not None
+
+    aio_benchmark_pedantic(fetch_job, rounds=200)
+
+    record_percentiles()
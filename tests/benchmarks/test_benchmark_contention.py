@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from procrastinate import app as app_module
+from procrastinate import psycopg_connector, worker
+
+JOBS = 1000
+
+
+@pytest.fixture
+async def pool_app(request, psycopg_connection_params):
+    """An app whose pool has a connection per worker, plus one for deferring"""
+    workers = getattr(request, "param", 1)
+    connector = psycopg_connector.PsycopgConnector(
+        **psycopg_connection_params, min_size=workers + 1, max_size=workers + 1
+    )
+    app = app_module.App(connector=connector)
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("pool_app", [1, 4, 16], indirect=True, ids="{}_workers".format)
+def test_benchmark_skip_locked_contention(
+    aio_benchmark_pedantic, pool_app: app_module.App, request
+):
+    workers = request.node.callspec.params["pool_app"]
+
+    @pool_app.task(queue="default", name="simple_task")
+    async def simple_task():
+        pass
+
+    async def defer_jobs():
+        await simple_task.batch_defer_async(*[{} for _ in range(JOBS)])
+
+    async def process_jobs():
+        # Each worker fetches one job at a time, so that they all compete for the
+        # same rows
+        await asyncio.gather(
+            *(
+                worker.Worker(
+                    pool_app,
+                    queues=["default"],
+                    name=f"worker-{i}",
+                    concurrency=1,
+                    wait=False,
+                    listen_notify=False,
+                    install_signal_handlers=False,
+                    run_periodic_deferrer=False,
+                ).run()
+                for i in range(workers)
+            )
+        )
+
+    aio_benchmark_pedantic(process_jobs, setup=defer_jobs)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("locks", [1, 10, 100])
+def test_benchmark_shared_locks(
+    aio_benchmark_pedantic, pool_app: app_module.App, locks: int
+):
+    done = 0
+    all_done = asyncio.Event()
+
+    @pool_app.task(queue="default", name="locked_task")
+    async def locked_task():
+        nonlocal done
+        done += 1
+        if done == JOBS:
+            all_done.set()
+
+    async def defer_jobs():
+        nonlocal done
+        done = 0
+        all_done.clear()
+        await pool_app.job_manager.batch_defer_jobs_async(
+            [locked_task.configure(lock=f"lock-{i % locks}").job for i in range(JOBS)]
+        )
+
+    async def process_jobs():
+        # With wait=False, the worker would stop as soon as the only jobs left are
+        # locked by running jobs, so it waits and is stopped once all jobs ran
+        lock_worker = worker.Worker(
+            pool_app,
+            queues=["default"],
+            concurrency=10,
+            fetch_job_polling_interval=0.01,
+            install_signal_handlers=False,
+            run_periodic_deferrer=False,
+        )
+        worker_task = asyncio.create_task(lock_worker.run())
+        await all_done.wait()
+        lock_worker.stop()
+        await worker_task
+
+    aio_benchmark_pedantic(process_jobs, setup=defer_jobs)
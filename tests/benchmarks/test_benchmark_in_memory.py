@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import tracemalloc
+
+import pytest
+
+from procrastinate import app as app_module
+from procrastinate import testing
+
+JOBS = 500
+
+
+@pytest.fixture
+async def in_memory_app():
+    app = app_module.App(connector=testing.InMemoryConnector())
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("concurrency", [1, 100, 10_000])
+def test_benchmark_in_memory_worker(
+    aio_benchmark_pedantic, benchmark, in_memory_app: app_module.App, concurrency: int
+):
+    """
+    Run the real worker loop without a database, so that the benchmark measures
+    the Python overhead of deferring and running jobs
+    """
+    connector = in_memory_app.connector
+    assert isinstance(connector, testing.InMemoryConnector)
+
+    @in_memory_app.task(queue="default", name="simple_task")
+    async def simple_task():
+        pass
+
+    async def defer_jobs():
+        connector.reset()
+        await simple_task.batch_defer_async(*[{} for _ in range(JOBS)])
+
+    async def process_jobs():
+        await in_memory_app.run_worker_async(
+            queues=["default"],
+            concurrency=concurrency,
+            wait=False,
+            listen_notify=False,
+            install_signal_handlers=False,
+            delete_jobs="always",
+        )
+        assert not connector.jobs
+
+    aio_benchmark_pedantic(process_jobs, setup=defer_jobs, rounds=10)
+
+    # Measure the memory in a separate run, as tracing it slows everything down
+    event_loop = asyncio.get_event_loop()
+    event_loop.run_until_complete(defer_jobs())
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        event_loop.run_until_complete(process_jobs())
+        end, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    benchmark.extra_info["peak_memory_per_job"] = (peak - start) / JOBS
+    benchmark.extra_info["retained_memory_per_job"] = (end - start) / JOBS
+    if benchmark.stats:  # --benchmark-disable
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info["us_per_job"] = mean / JOBS * 1_000_000
+        benchmark.extra_info["jobs_per_second"] = JOBS / mean
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from procrastinate import app as app_module
+from procrastinate import worker
+
+
+@pytest.fixture
+async def async_app(psycopg_connector):
+    app = app_module.App(connector=psycopg_connector)
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+def test_benchmark_defer_to_start_latency(
+    aio_benchmark_pedantic, record_percentiles, async_app: app_module.App
+):
+    started = asyncio.Event()
+
+    @async_app.task(queue="default", name="latency_task")
+    async def latency_task():
+        started.set()
+
+    # Polling only happens every hour: jobs are started on the NOTIFY sent when
+    # they are deferred
+    latency_worker = worker.Worker(
+        async_app,
+        queues=["default"],
+        fetch_job_polling_interval=3600,
+        install_signal_handlers=False,
+        run_periodic_deferrer=False,
+    )
+
+    async def setup():
+        started.clear()
+
+    async def defer_and_wait_for_start():
+        await latency_task.defer_async()
+        await started.wait()
+
+    event_loop = asyncio.get_event_loop()
+    worker_task = event_loop.create_task(latency_worker.run())
+    try:
+        # Wait for the worker to listen before deferring the measured jobs
+        event_loop.run_until_complete(asyncio.sleep(0.5))
+        aio_benchmark_pedantic(defer_and_wait_for_start, setup=setup, rounds=200)
+    finally:
+        latency_worker.stop()
+        event_loop.run_until_complete(worker_task)
+
+    record_percentiles()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from procrastinate import app as app_module
+from procrastinate import periodic
+
+PERIODIC_TASKS = 500
+
+
+@pytest.fixture
+async def async_app(psycopg_connector):
+    app = app_module.App(connector=psycopg_connector)
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+def test_benchmark_periodic_deferrer(aio_benchmark_pedantic, async_app):
+    # The periodic tasks all run every minute, with a different periodic id
+    for i in range(PERIODIC_TASKS):
+
+        @async_app.periodic(cron="* * * * *", periodic_id=f"periodic-{i}")
+        @async_app.task(name=f"periodic_task_{i}")
+        async def periodic_task(timestamp: int):
+            pass
+
+    deferrer = periodic.PeriodicDeferrer(registry=async_app.periodic_registry)
+    at = time.time()
+
+    async def next_minute():
+        nonlocal at
+        at += 60
+
+    async def defer_periodic_jobs():
+        await deferrer.defer_jobs(jobs_to_defer=deferrer.get_previous_tasks(at=at))
+        deferrer.get_next_tick(at=at)
+
+    aio_benchmark_pedantic(defer_periodic_jobs, setup=next_minute)
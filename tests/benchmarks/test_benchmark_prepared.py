@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from procrastinate import app as app_module
+from procrastinate import jobs, psycopg_connector
+
+JOBS = 200
+
+
+@pytest.fixture(params=[True, False], ids=["prepared", "not_prepared"])
+async def async_app(request, psycopg_connection_params):
+    app = app_module.App(
+        connector=psycopg_connector.PsycopgConnector(
+            prepare_statements=request.param, **psycopg_connection_params
+        )
+    )
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+def test_benchmark_prepared_statements(aio_benchmark_pedantic, async_app):
+    """
+    Run the queries of the worker for each job, with and without preparing them
+    """
+    job_manager = async_app.job_manager
+    event_loop = asyncio.get_event_loop()
+    worker_id = event_loop.run_until_complete(job_manager.register_worker())
+
+    @async_app.task(queue="default", name="simple_task")
+    async def simple_task():
+        pass
+
+    async def defer_jobs():
+        await simple_task.batch_defer_async(*[{} for _ in range(JOBS)])
+
+    async def process_jobs():
+        for _ in range(JOBS):
+            job = await job_manager.fetch_job(queues=None, worker_id=worker_id)
+            assert job
+            await job_manager.finish_job(
+                job=job, status=jobs.Status.SUCCEEDED, delete_job=False
+            )
+            await job_manager.update_heartbeat(worker_id=worker_id)
+
+    aio_benchmark_pedantic(process_jobs, setup=defer_jobs, rounds=10)
@@ -71,6 +71,22 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         "@pytest.mark.skip_before_version works",
     )
 
+    parser.addoption(
+        "--backlog-jobs",
+        action="store",
+        type=int,
+        default=10_000,
+        help="Number of jobs to do in the database for the backlog benchmarks",
+    )
+
+    parser.addoption(
+        "--backlog-finished-jobs",
+        action="store",
+        type=int,
+        default=100_000,
+        help="Number of finished jobs in the database for the backlog benchmarks",
+    )
+
 
 def pytest_configure(config):
     # register an additional marker
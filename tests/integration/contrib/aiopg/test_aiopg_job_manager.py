@@ -35,10 +35,10 @@ async def test_delete_old_jobs_job_todo(
 ):
     job = await deferred_job_factory(queue="queue_a")
 
-    # We fake its started event timestamp
+    # We fake its creation timestamp
     await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=at - INTERVAL '2 hours'"
-        f"WHERE job_id={job.id}"
+        f"UPDATE procrastinate_jobs SET created_at=created_at - INTERVAL '2 hours'"
+        f"WHERE id={job.id}"
     )
 
     await pg_job_manager.delete_old_jobs(nb_hours=0)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import pytest
+
+from procrastinate.contrib.asyncpg import asyncpg_connector as asyncpg
+
+
+@pytest.fixture
+async def asyncpg_connector_factory(connection_params):
+    connectors = []
+
+    async def _(*, open: bool = True, **kwargs):
+        connector = asyncpg.AsyncpgConnector(
+            database=connection_params["dbname"], **kwargs
+        )
+        connectors.append(connector)
+        if open:
+            await connector.open_async()
+        return connector
+
+    yield _
+    for connector in connectors:
+        await connector.close_async()
+
+
+@pytest.fixture
+async def asyncpg_connector(asyncpg_connector_factory) -> asyncpg.AsyncpgConnector:
+    return await asyncpg_connector_factory()
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+
+import asgiref.sync
+import attr
+import pytest
+
+from procrastinate import exceptions, manager
+
+
+@pytest.mark.parametrize(
+    "method_name, expected",
+    [
+        ("execute_query_one_async", {"json": {"a": "a", "b": "foo"}}),
+        ("execute_query_all_async", [{"json": {"a": "a", "b": "foo"}}]),
+    ],
+)
+async def test_execute_query_json_dumps(
+    asyncpg_connector_factory, method_name, expected
+):
+    class NotJSONSerializableByDefault:
+        pass
+
+    def encode(obj):
+        if isinstance(obj, NotJSONSerializableByDefault):
+            return "foo"
+        raise TypeError()
+
+    query = "SELECT %(arg)s::jsonb as json"
+    arg = {"a": "a", "b": NotJSONSerializableByDefault()}
+    json_dumps = functools.partial(json.dumps, default=encode)
+    connector = await asyncpg_connector_factory(json_dumps=json_dumps)
+    method = getattr(connector, method_name)
+
+    result = await method(query, arg=arg)
+    assert result == expected
+
+
+async def test_json_loads(asyncpg_connector_factory):
+    @attr.dataclass
+    class Param:
+        p: int
+
+    def decode(dct):
+        if "b" in dct:
+            dct["b"] = Param(p=dct["b"])
+        return dct
+
+    json_loads = functools.partial(json.loads, object_hook=decode)
+
+    query = "SELECT %(arg)s::jsonb as json"
+    arg = {"a": 1, "b": 2}
+    connector = await asyncpg_connector_factory(json_loads=json_loads)
+
+    result = await connector.execute_query_one_async(query, arg=arg)
+    assert result["json"] == {"a": 1, "b": Param(p=2)}
+
+
+async def test_init(asyncpg_connector_factory):
+    called = []
+
+    async def init(connection):
+        called.append(connection)
+
+    connector = await asyncpg_connector_factory(init=init, min_size=1)
+
+    assert len(called) == 1
+    # The JSON codecs are still set
+    result = await connector.execute_query_one_async(
+        "SELECT %(arg)s::jsonb as json", arg={"a": 1}
+    )
+    assert result == {"json": {"a": 1}}
+
+
+async def test_wrap_exceptions(asyncpg_connector):
+    query = """SELECT procrastinate_defer_jobs_v2(
+        ARRAY[
+            ROW(
+                'queue'::character varying,
+                'foo'::character varying,
+                0::integer,
+                NULL::text,
+                'same_queueing_lock'::text,
+                '{}'::jsonb,
+                NULL::timestamptz,
+                NULL::jsonb
+            )
+        ]::procrastinate_job_to_defer_v2[]
+    ) AS id;"""
+    await asyncpg_connector.execute_query_async(query)
+    with pytest.raises(exceptions.UniqueViolation) as excinfo:
+        await asyncpg_connector.execute_query_async(query)
+    assert excinfo.value.constraint_name == manager.QUEUEING_LOCK_CONSTRAINT
+    assert excinfo.value.queueing_lock == "same_queueing_lock"
+
+
+async def test_execute_query(asyncpg_connector):
+    assert (
+        await asyncpg_connector.execute_query_async(
+            "COMMENT ON TABLE \"procrastinate_jobs\" IS 'foo' "
+        )
+        is None
+    )
+    result = await asyncpg_connector.execute_query_one_async(
+        "SELECT obj_description('public.procrastinate_jobs'::regclass)"
+    )
+    assert result == {"obj_description": "foo"}
+
+    result = await asyncpg_connector.execute_query_all_async(
+        "SELECT obj_description('public.procrastinate_jobs'::regclass)"
+    )
+    assert result == [{"obj_description": "foo"}]
+
+
+async def test_execute_query_one_no_result(asyncpg_connector):
+    with pytest.raises(exceptions.NoResult):
+        await asyncpg_connector.execute_query_one_async("SELECT 1 WHERE false")
+
+
+async def test_execute_query_interpolate(asyncpg_connector):
+    result = await asyncpg_connector.execute_query_one_async(
+        "SELECT %(foo)s as foo, %(bar)s::int + %(bar)s::int as bar;", foo="a", bar=1
+    )
+    assert result == {"foo": "a", "bar": 2}
+
+
+async def test_execute_query_text_parameter(asyncpg_connector):
+    # asyncpg only accepts str for text parameters
+    result = await asyncpg_connector.execute_query_one_async(
+        "SELECT (%(nb_hours)s || ' HOUR')::INTERVAL as interval;", nb_hours=2
+    )
+    assert str(result["interval"]) == "2:00:00"
+
+
+async def test_execute_query_simultaneous(asyncpg_connector):
+    # two coroutines doing execute_query_async simulteneously
+    async def query():
+        await asyncpg_connector.execute_query_async("SELECT 1")
+
+    await asyncio.gather(query(), query())
+
+
+async def test_get_sync_connector(asyncpg_connector):
+    result = []
+
+    @asgiref.sync.sync_to_async
+    def f():
+        sync_conn = asyncpg_connector.get_sync_connector()
+        result.append(sync_conn.execute_query_one("SELECT 1 as one"))
+
+    await f()
+    assert result == [{"one": 1}]
+
+
+async def test_close_async(asyncpg_connector):
+    await asyncpg_connector.execute_query_async("SELECT 1")
+    pool = asyncpg_connector._pool
+    await asyncpg_connector.close_async()
+    assert pool.is_closing() is True
+    assert asyncpg_connector._pool is None
+
+
+async def test_close_async_external_pool(asyncpg_connector_factory):
+    connector = await asyncpg_connector_factory()
+    other = await asyncpg_connector_factory(open=False)
+    await other.open_async(connector.pool)
+
+    await other.close_async()
+    assert connector.pool.is_closing() is False
+
+
+async def test_listen_notify(asyncpg_connector):
+    channel = "somechannel"
+    event = asyncio.Event()
+    received_args: list[dict] = []
+
+    async def handle_notification(*, channel: str, payload: str):
+        event.set()
+        received_args.append({"channel": channel, "payload": payload})
+
+    task = asyncio.ensure_future(
+        asyncpg_connector.listen_notify(
+            channels=[channel], on_notification=handle_notification
+        )
+    )
+    try:
+        await asyncio.sleep(0.1)
+        await asyncpg_connector.execute_query_async(
+            f"""NOTIFY "{channel}", 'somepayload' """
+        )
+        await asyncio.wait_for(event.wait(), timeout=1)
+        args = received_args.pop()
+        assert args["channel"] == "somechannel"
+        assert args["payload"] == "somepayload"
+    except asyncio.TimeoutError:
+        pytest.fail("Notify not received within 1 sec")
+    finally:
+        task.cancel()
+
+
+async def test_listen_notify_listeners_removed(asyncpg_connector_factory):
+    connector = await asyncpg_connector_factory(min_size=1, max_size=2)
+
+    async def handle_notification(*, channel: str, payload: str):
+        pass
+
+    task = asyncio.ensure_future(
+        connector.listen_notify(
+            channels=["somechannel"], on_notification=handle_notification
+        )
+    )
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # The connection is back in the pool, without its listener
+    async with connector.pool.acquire() as connection:
+        result = await connection.fetchval("SELECT pg_listening_channels()")
+    assert result is None
+
+
+async def test_loop_notify_stop_when_connection_closed(asyncpg_connector):
+    async with asyncpg_connector.pool.acquire() as connection:
+        task = asyncio.ensure_future(
+            asyncpg_connector._loop_notify(connection=connection, timeout=0.01)
+        )
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        connection.terminate()
+        try:
+            await asyncio.wait_for(task, 0.1)
+        except asyncio.TimeoutError:
+            pytest.fail("Failed to detect that connection was closed and stop")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import functools
+
+import pytest
+
+from procrastinate import exceptions, jobs, manager
+
+
+@pytest.fixture
+def pg_job_manager(asyncpg_connector):
+    return manager.JobManager(connector=asyncpg_connector)
+
+
+@pytest.fixture
+def get_all(asyncpg_connector):
+    async def f(table, *fields):
+        return await asyncpg_connector.execute_query_all_async(
+            f"SELECT {', '.join(fields)} FROM {table}"
+        )
+
+    return f
+
+
+@pytest.fixture
+def deferred_job_factory(deferred_job_factory, pg_job_manager):
+    return functools.partial(deferred_job_factory, job_manager=pg_job_manager)
+
+
+async def test_defer_fetch_finish(pg_job_manager, deferred_job_factory):
+    job = await deferred_job_factory(queue="queue_a", task_kwargs={"a": [1, "b"]})
+    worker_id = await pg_job_manager.register_worker()
+
+    fetched = await pg_job_manager.fetch_job(queues=None, worker_id=worker_id)
+    assert fetched is not None
+    assert fetched.id == job.id
+    assert fetched.task_kwargs == {"a": [1, "b"]}
+
+    await pg_job_manager.finish_job(
+        job=fetched, status=jobs.Status.SUCCEEDED, delete_job=False
+    )
+    assert (
+        await pg_job_manager.get_job_status_async(job_id=fetched.id)
+        == jobs.Status.SUCCEEDED
+    )
+
+
+async def test_batch_defer(pg_job_manager, job_factory, get_all):
+    await pg_job_manager.batch_defer_jobs_async(
+        jobs=[job_factory(id=None), job_factory(id=None, lock="a")]
+    )
+
+    assert len(await get_all("procrastinate_jobs", "id")) == 2
+
+
+async def test_defer_queueing_lock(pg_job_manager, deferred_job_factory):
+    await deferred_job_factory(queueing_lock="a")
+
+    with pytest.raises(exceptions.AlreadyEnqueued):
+        await deferred_job_factory(queueing_lock="a")
+
+
+async def test_delete_old_jobs_job_todo(
+    get_all,
+    pg_job_manager,
+    psycopg_connector,
+    deferred_job_factory,
+):
+    job = await deferred_job_factory(queue="queue_a")
+
+    # We fake its creation timestamp
+    await psycopg_connector.execute_query_async(
+        f"UPDATE procrastinate_jobs SET created_at=created_at - INTERVAL '2 hours'"
+        f"WHERE id={job.id}"
+    )
+
+    await pg_job_manager.delete_old_jobs(nb_hours=0)
+    assert len(await get_all("procrastinate_jobs", "id")) == 1
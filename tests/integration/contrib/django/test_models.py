@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import asyncio
 import datetime
+from unittest.mock import ANY
 
 import pytest
+from django.db import connection
 
 import procrastinate
 import procrastinate.contrib.django
@@ -30,6 +32,10 @@ def test_procrastinate_job(db):
         "queueing_lock": None,
         "abort_requested": False,
         "worker_id": None,
+        "created_at": ANY,
+        "started_at": None,
+        "finished_at": None,
+        "trace_context": None,
     }
 
 
@@ -109,6 +115,28 @@ def test_procrastinate_event(db):
     assert now - one_sec < at < now + one_sec
 
 
+def test_procrastinate_job_archive(db):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO procrastinate_jobs_archive "
+            "(id, queue_name, task_name, priority, lock, queueing_lock, args, "
+            "status, scheduled_at, attempts, abort_requested, worker_id, "
+            "finished_at, trace_context) VALUES (1, 'default', 'test_task', 0, "
+            "NULL, NULL, '{\"a\": 1}', 'succeeded', NULL, 1, false, NULL, NOW(), "
+            '\'{"traceparent": "00-ab-cd-01"}\')'
+        )
+        cursor.execute(
+            "INSERT INTO procrastinate_events_archive (id, job_id, type, at) "
+            "VALUES (1, 1, 'succeeded', NOW())"
+        )
+
+    job = models.ProcrastinateJobArchive.objects.get(id=1)
+    assert job.procrastinate_job.status == "succeeded"
+    assert job.procrastinate_job.task_kwargs == {"a": 1}
+    assert job.procrastinate_job.trace_context == {"traceparent": "00-ab-cd-01"}
+    assert job.procrastinateeventarchive_set.get().type == "succeeded"
+
+
 async def test_procrastinate_periodic_defers(db):
     @procrastinate.contrib.django.app.periodic(cron="* * * * *", periodic_id="bar")
     @procrastinate.contrib.django.app.task(name="foo")
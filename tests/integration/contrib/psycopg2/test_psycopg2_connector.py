@@ -146,3 +146,17 @@ def test_close(psycopg2_connector):
     pool = psycopg2_connector._pool
     psycopg2_connector.close()
     assert pool.closed is True
+
+
+def test_execute_query_instrumentation(psycopg2_connector, mocker):
+    psycopg2_connector.instrumentation = instrumentation = mocker.Mock()
+
+    psycopg2_connector.execute_query_all("SELECT generate_series(1, 3)")
+
+    instrumentation.assert_called_once_with(
+        query_name="query",
+        pool_wait=mocker.ANY,
+        duration=mocker.ANY,
+        row_count=3,
+        error=None,
+    )
@@ -5,6 +5,7 @@ import dataclasses
 import datetime
 import logging
 import os
+from unittest.mock import ANY
 
 import pytest
 
@@ -87,6 +88,22 @@ async def test_worker(entrypoint, cli_app, mocker):
     )
 
 
+async def test_worker_processes(entrypoint, cli_app, mocker):
+    Supervisor = mocker.patch("procrastinate.supervisor.Supervisor")
+    Supervisor.return_value.run = mocker.AsyncMock()
+    cli_app.run_worker_async = mocker.AsyncMock()
+
+    result = await entrypoint("worker --queues a,b --processes 3 --concurrency=10")
+
+    assert "Launching 3 worker processes on a, b" in result.stderr.strip()
+    assert result.exit_code == 0
+    Supervisor.assert_called_once_with(
+        cli_app, processes=3, queues=["a", "b"], concurrency=10
+    )
+    Supervisor.return_value.run.assert_awaited_once_with()
+    cli_app.run_worker_async.assert_not_called()
+
+
 async def test_schema_apply(entrypoint, cli_app, mocker):
     apply_schema_async = mocker.patch(
         "procrastinate.schema.SchemaManager.apply_schema_async"
@@ -95,7 +112,17 @@ async def test_schema_apply(entrypoint, cli_app, mocker):
 
     assert result.stderr.strip() == "Applying schema\nDone"
     assert result.exit_code == 0
-    apply_schema_async.assert_called_once_with()
+    apply_schema_async.assert_called_once_with(partitioned_events=False)
+
+
+async def test_schema_apply_partitioned_events(entrypoint, cli_app, mocker):
+    apply_schema_async = mocker.patch(
+        "procrastinate.schema.SchemaManager.apply_schema_async"
+    )
+    result = await entrypoint("schema --apply --partitioned-events")
+
+    assert result.exit_code == 0
+    apply_schema_async.assert_called_once_with(partitioned_events=True)
 
 
 async def test_schema_read(entrypoint):
@@ -170,6 +197,10 @@ async def test_defer(entrypoint, cli_app, connector):
             "priority": 0,
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         }
     }
 
@@ -197,6 +228,10 @@ async def test_defer_priority(entrypoint, cli_app, connector):
             "priority": 5,
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         }
     }
 
@@ -229,6 +264,10 @@ async def test_defer_at(entrypoint, cli_app, connector):
             "priority": 0,
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         }
     }
 
@@ -260,6 +299,10 @@ async def test_defer_in(entrypoint, cli_app, connector):
         "priority": 0,
         "abort_requested": False,
         "worker_id": None,
+        "created_at": ANY,
+        "started_at": None,
+        "finished_at": None,
+        "trace_context": None,
     }
     assert (
         now + datetime.timedelta(seconds=9)
@@ -326,6 +369,10 @@ async def test_defer_unknown(entrypoint, cli_app, connector):
             "priority": 0,
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         }
     }
 
@@ -0,0 +1,234 @@
+"""
+Each scenario is played against Postgres and against the InMemoryConnector, which
+must give the same results
+"""
+
+from __future__ import annotations
+
+import datetime
+from collections.abc import Awaitable, Iterable
+from typing import Any, Callable
+
+import pytest
+
+from procrastinate import exceptions, jobs, manager, testing, utils
+
+Scenario = Callable[[manager.JobManager], Awaitable[Any]]
+
+PAST = utils.utcnow() - datetime.timedelta(hours=1)
+FUTURE = utils.utcnow() + datetime.timedelta(days=1)
+
+
+@pytest.fixture
+def assert_parity(psycopg_connector):
+    async def _(scenario: Scenario):
+        expected = await scenario(manager.JobManager(connector=psycopg_connector))
+        result = await scenario(
+            manager.JobManager(connector=testing.InMemoryConnector())
+        )
+        assert result == expected
+        return result
+
+    return _
+
+
+class Jobs:
+    """
+    Defers and fetches jobs, and names them by their order of deferral, as the ids
+    depend on the database
+    """
+
+    def __init__(self, job_manager: manager.JobManager):
+        self.job_manager = job_manager
+        self.ids: list[int] = []
+        self.worker_id: int | None = None
+
+    async def defer(
+        self,
+        queue: str = "default",
+        priority: int = 0,
+        lock: str | None = None,
+        queueing_lock: str | None = None,
+        scheduled_at: datetime.datetime | None = None,
+    ) -> int | str:
+        try:
+            job = await self.job_manager.defer_job_async(
+                jobs.Job(
+                    id=None,
+                    queue=queue,
+                    priority=priority,
+                    lock=lock,
+                    queueing_lock=queueing_lock,
+                    task_name="task",
+                    scheduled_at=scheduled_at,
+                )
+            )
+        except exceptions.AlreadyEnqueued:
+            return "already enqueued"
+        assert job.id
+        self.ids.append(job.id)
+        return len(self.ids) - 1
+
+    async def fetch(self, queues: Iterable[str] | None = None) -> int | None:
+        if self.worker_id is None:
+            self.worker_id = await self.job_manager.register_worker()
+        job = await self.job_manager.fetch_job(queues=queues, worker_id=self.worker_id)
+        return self.ids.index(job.id) if job and job.id else None
+
+    async def fetch_all(self, queues: Iterable[str] | None = None) -> list[int]:
+        fetched = []
+        while (job := await self.fetch(queues=queues)) is not None:
+            fetched.append(job)
+        return fetched
+
+    async def fetch_many(self, limit: int) -> list[int]:
+        if self.worker_id is None:
+            self.worker_id = await self.job_manager.register_worker()
+        fetched_jobs = await self.job_manager.fetch_jobs(
+            queues=None, worker_id=self.worker_id, limit=limit
+        )
+        return [self.ids.index(job.id) for job in fetched_jobs if job.id]
+
+    async def finish(self, job: int, delete_job: bool = False) -> None:
+        await self.job_manager.finish_job_by_id_async(
+            job_id=self.ids[job], status=jobs.Status.SUCCEEDED, delete_job=delete_job
+        )
+
+    async def retry(self, job: int, retry_at: datetime.datetime, **kwargs) -> None:
+        await self.job_manager.retry_job_by_id_async(
+            job_id=self.ids[job], retry_at=retry_at, **kwargs
+        )
+
+    async def cancel(self, job: int, delete_job: bool = False) -> bool:
+        return await self.job_manager.cancel_job_by_id_async(
+            job_id=self.ids[job], delete_job=delete_job
+        )
+
+    async def statuses(self) -> list[str]:
+        return [
+            (await self.job_manager.get_job_status_async(job_id)).value
+            for job_id in self.ids
+        ]
+
+
+async def test_fetch_order(assert_parity):
+    async def scenario(job_manager):
+        j = Jobs(job_manager)
+        for queue, priority in [("a", 0), ("b", 5), ("a", 5), ("b", -1), ("a", 0)]:
+            await j.defer(queue=queue, priority=priority)
+        await j.defer(queue="a", priority=10, scheduled_at=FUTURE)
+        await j.defer(queue="a", priority=1, scheduled_at=PAST)
+        return await j.fetch_all(queues=["a"]), await j.fetch_all()
+
+    assert await assert_parity(scenario) == ([2, 6, 0, 4], [1, 3])
+
+
+async def test_fetch_locks(assert_parity):
+    async def scenario(job_manager):
+        j = Jobs(job_manager)
+        await j.defer(queue="a", lock="l")
+        # Blocks job 0 from another queue, then is blocked by job 2
+        await j.defer(queue="b", priority=5, lock="l")
+        # Blocks the other jobs with the same lock, even if it's scheduled later
+        await j.defer(queue="a", priority=10, lock="l", scheduled_at=FUTURE)
+        await j.defer(queue="a", lock="m")
+        await j.defer(queue="a", lock="m")
+        await j.defer(queue="a")
+
+        results: list[Any] = [await j.fetch_all(queues=["a"])]
+        await j.retry(3, retry_at=PAST)
+        results.append(await j.fetch_all())
+        await j.finish(3)
+        results.append(await j.fetch_all())
+        await j.cancel(2)
+        results.append(await j.fetch_all())
+        await j.finish(1)
+        results.append(await j.fetch_all())
+        results.append(await j.statuses())
+        return results
+
+    assert await assert_parity(scenario) == [
+        [3, 5],
+        [3],
+        [4],
+        [1],
+        [0],
+        ["doing", "succeeded", "cancelled", "succeeded", "doing", "doing"],
+    ]
+
+
+async def test_fetch_jobs_limit(assert_parity):
+    async def scenario(job_manager):
+        j = Jobs(job_manager)
+        for priority, lock in [(0, "a"), (0, "a"), (5, None), (0, None), (1, "b")]:
+            await j.defer(priority=priority, lock=lock)
+        return await j.fetch_many(limit=10), await j.fetch_many(limit=10)
+
+    assert await assert_parity(scenario) == ([2, 4, 0, 3], [])
+
+
+async def test_retry(assert_parity):
+    async def scenario(job_manager):
+        j = Jobs(job_manager)
+        await j.defer(lock="a")
+        await j.defer(lock="a")
+        await j.defer(queue="b")
+
+        results: list[Any] = [await j.fetch(), await j.fetch()]
+        # The retried job still blocks the other jobs of its lock
+        await j.retry(0, retry_at=FUTURE)
+        results.append(await j.fetch_all())
+        await j.retry(2, retry_at=PAST, priority=3, queue="c", lock="a")
+        results.append(await j.fetch_all(queues=["b"]))
+        results.append(await j.fetch_all())
+        # Retrying with another lock releases the previous one
+        await j.retry(2, retry_at=PAST, lock="c")
+        results.append(await j.fetch_all())
+        results.append(await j.statuses())
+        return results
+
+    assert await assert_parity(scenario) == [
+        0,
+        2,
+        [],
+        [],
+        [2],
+        [2],
+        ["todo", "todo", "doing"],
+    ]
+
+
+async def test_cancel(assert_parity):
+    async def scenario(job_manager):
+        j = Jobs(job_manager)
+        await j.defer(lock="a", scheduled_at=FUTURE)
+        await j.defer(lock="a")
+        await j.defer(lock="a")
+
+        results: list[Any] = [await j.fetch_all()]
+        results.append(await j.cancel(0, delete_job=True))
+        results.append(await j.fetch_all())
+        results.append(await j.cancel(1))
+        results.append(await j.cancel(2))
+        await j.finish(1)
+        results.append(await j.fetch_all())
+        return results
+
+    assert await assert_parity(scenario) == [[], True, [1], False, True, []]
+
+
+async def test_queueing_lock(assert_parity):
+    async def scenario(job_manager):
+        j = Jobs(job_manager)
+        results: list[Any] = [
+            await j.defer(queueing_lock="a"),
+            await j.defer(queueing_lock="a"),
+            await j.defer(queueing_lock="b"),
+        ]
+        await j.fetch()
+        results.append(await j.defer(queueing_lock="a"))
+        await j.cancel(1)
+        results.append(await j.defer(queueing_lock="b"))
+        return results
+
+    assert await assert_parity(scenario) == [0, "already enqueued", 1, 2, 3]
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import functools
+import json
+from unittest.mock import ANY
 
 import pytest
 
@@ -53,6 +56,7 @@ def fetched_job_factory(deferred_job_factory, pg_job_manager, worker_id):
         ({"queue": "queue_a"}, None),
         ({"queue": "queue_a"}, ["queue_a"]),
         ({"scheduled_at": conftest.aware_datetime(2000, 1, 1)}, None),
+        ({"trace_context": {"traceparent": "00-ab-cd-01"}}, None),
     ],
 )
 async def test_fetch_job(
@@ -61,10 +65,16 @@ async def test_fetch_job(
     # Now add the job we're testing
     job = await deferred_job_factory(**job_kwargs)
 
-    expected_job = job.evolve(status="doing", worker_id=worker_id)
-    assert (
-        await pg_job_manager.fetch_job(queues=fetch_queues, worker_id=worker_id)
-        == expected_job
+    fetched_job = await pg_job_manager.fetch_job(
+        queues=fetch_queues, worker_id=worker_id
+    )
+
+    assert fetched_job.created_at and fetched_job.started_at
+    assert fetched_job == job.evolve(
+        status="doing",
+        worker_id=worker_id,
+        created_at=fetched_job.created_at,
+        started_at=fetched_job.started_at,
     )
 
 
@@ -126,6 +136,49 @@ async def test_fetch_job_no_result(
     )
 
 
+async def test_fetch_jobs(pg_job_manager, deferred_job_factory, worker_id):
+    job_a = await deferred_job_factory(priority=0)
+    job_b = await deferred_job_factory(priority=5)
+    await deferred_job_factory(priority=0)
+
+    fetched_jobs = await pg_job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=2
+    )
+
+    assert fetched_jobs == [
+        job.evolve(
+            status="doing",
+            worker_id=worker_id,
+            created_at=fetched_job.created_at,
+            started_at=fetched_job.started_at,
+        )
+        for job, fetched_job in zip([job_b, job_a], fetched_jobs)
+    ]
+
+
+async def test_fetch_jobs_one_job_per_lock(
+    pg_job_manager, deferred_job_factory, worker_id
+):
+    job_a = await deferred_job_factory(lock="lock_1")
+    await deferred_job_factory(lock="lock_1")
+    job_c = await deferred_job_factory(lock="lock_2")
+
+    fetched_jobs = await pg_job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=10
+    )
+
+    assert [job.id for job in fetched_jobs] == [job_a.id, job_c.id]
+
+
+async def test_fetch_jobs_no_result(pg_job_manager, fetched_job_factory, worker_id):
+    await fetched_job_factory()
+
+    assert (
+        await pg_job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=10)
+        == []
+    )
+
+
 @pytest.mark.parametrize(
     "filter_args",
     [
@@ -139,15 +192,15 @@ async def test_get_stalled_jobs_by_started__yes(
 ):
     job = await fetched_job_factory(queue="queue_a", task_name="task_1")
 
-    # We fake its started event timestamp
+    # We fake its start timestamp
     await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=at - INTERVAL '35 minutes'"
-        f"WHERE job_id={job.id}"
+        f"UPDATE procrastinate_jobs SET started_at=started_at - INTERVAL '35 minutes'"
+        f"WHERE id={job.id}"
     )
 
     with pytest.warns(DeprecationWarning, match=".*nb_seconds.*"):
         result = await pg_job_manager.get_stalled_jobs(**filter_args)
-    assert result == [job]
+    assert [stalled_job.id for stalled_job in result] == [job.id]
 
 
 @pytest.mark.parametrize(
@@ -163,10 +216,10 @@ async def test_get_stalled_jobs_by_started__no(
 ):
     job = await fetched_job_factory(queue="queue_a", task_name="task_1")
 
-    # We fake its started event timestamp
+    # We fake its start timestamp
     await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=at - INTERVAL '35 minutes'"
-        f"WHERE job_id={job.id}"
+        f"UPDATE procrastinate_jobs SET started_at=started_at - INTERVAL '35 minutes'"
+        f"WHERE id={job.id}"
     )
 
     with pytest.warns(DeprecationWarning, match=".*nb_seconds.*"):
@@ -175,36 +228,18 @@ async def test_get_stalled_jobs_by_started__no(
 
 
 async def test_get_stalled_jobs_by_started__retries__no(
-    pg_job_manager, fetched_job_factory, psycopg_connector
+    pg_job_manager, fetched_job_factory, psycopg_connector, worker_id
 ):
     job = await fetched_job_factory(queue="queue_a", task_name="task_1")
 
-    # We fake previous tries
+    # The job was deferred and started 1h ago, it failed so it was retried, and it
+    # just started again now.
     await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=now() - INTERVAL '1 hour'"
-        f"WHERE job_id={job.id} AND type='deferred'"
+        f"UPDATE procrastinate_jobs SET created_at=now() - INTERVAL '1 hour', "
+        f"started_at=now() - INTERVAL '1 hour' WHERE id={job.id}"
     )
-    await psycopg_connector.execute_query_async(
-        f"INSERT INTO procrastinate_events (job_id, type, at) VALUES"
-        f"({job.id}, 'started', now() - INTERVAL '1 hour')"
-    )
-    await psycopg_connector.execute_query_async(
-        f"INSERT INTO procrastinate_events (job_id, type, at) VALUES"
-        f"({job.id}, 'deferred_for_retry', now() - INTERVAL '59 minutes')"
-    )
-    events = await psycopg_connector.execute_query_all_async(
-        f"SELECT at, type FROM procrastinate_events "
-        f"WHERE job_id={job.id} ORDER BY at ASC"
-    )
-
-    # Sanity checks: We're in the situation where 1h ago, the job has been deferred,
-    # started, it failed so it was retried, and it just started again now.
-    assert [e["type"] for e in events] == [
-        "deferred",
-        "started",
-        "deferred_for_retry",
-        "started",
-    ]
+    await pg_job_manager.retry_job(job)
+    await pg_job_manager.fetch_job(queues=None, worker_id=worker_id)
 
     # It should not be considered stalled
     with pytest.warns(DeprecationWarning, match=".*nb_seconds.*"):
@@ -213,45 +248,26 @@ async def test_get_stalled_jobs_by_started__retries__no(
 
 
 async def test_get_stalled_jobs_by_started__retries__yes(
-    pg_job_manager, fetched_job_factory, psycopg_connector
+    pg_job_manager, fetched_job_factory, psycopg_connector, worker_id
 ):
     job = await fetched_job_factory(queue="queue_a", task_name="task_1")
 
-    # We fake previous tries
-    await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=now() - INTERVAL '1 hour'"
-        f"WHERE job_id={job.id} AND type='deferred'"
-    )
+    # The job was deferred and started 1h ago, it failed so it was retried, and it
+    # started again 40 minutes ago.
     await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=now() - INTERVAL '40 minutes'"
-        f"WHERE job_id={job.id} AND type='started'"
+        f"UPDATE procrastinate_jobs SET created_at=now() - INTERVAL '1 hour', "
+        f"started_at=now() - INTERVAL '1 hour' WHERE id={job.id}"
     )
+    await pg_job_manager.retry_job(job)
+    await pg_job_manager.fetch_job(queues=None, worker_id=worker_id)
     await psycopg_connector.execute_query_async(
-        f"INSERT INTO procrastinate_events (job_id, type, at) VALUES"
-        f"({job.id}, 'started', now() - INTERVAL '1 hour')"
-    )
-    await psycopg_connector.execute_query_async(
-        f"INSERT INTO procrastinate_events (job_id, type, at) VALUES"
-        f"({job.id}, 'deferred_for_retry', now() - INTERVAL '59 minutes')"
-    )
-    events = await psycopg_connector.execute_query_all_async(
-        f"SELECT at, type FROM procrastinate_events "
-        f"WHERE job_id={job.id} ORDER BY at ASC"
+        f"UPDATE procrastinate_jobs SET started_at=now() - INTERVAL '40 minutes'"
+        f"WHERE id={job.id}"
     )
 
-    # Sanity checks: We're in the situation where 1h ago, the job has been deferred,
-    # started, it failed so it was retried, and it started again 40 minutes ago.
-    assert [e["type"] for e in events] == [
-        "deferred",
-        "started",
-        "deferred_for_retry",
-        "started",
-    ]
-
-    # It should not be considered stalled
     with pytest.warns(DeprecationWarning, match=".*nb_seconds.*"):
         result = await pg_job_manager.get_stalled_jobs(nb_seconds=1800)
-    assert result == [job]
+    assert [stalled_job.id for stalled_job in result] == [job.id]
 
 
 @pytest.mark.parametrize(
@@ -385,10 +401,10 @@ async def test_delete_old_jobs_job_todo(
 ):
     job = await deferred_job_factory(queue="queue_a")
 
-    # We fake its started event timestamp
+    # We fake its creation timestamp
     await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=at - INTERVAL '2 hours'"
-        f"WHERE job_id={job.id}"
+        f"UPDATE procrastinate_jobs SET created_at=created_at - INTERVAL '2 hours'"
+        f"WHERE id={job.id}"
     )
 
     await pg_job_manager.delete_old_jobs(nb_hours=0)
@@ -403,16 +419,32 @@ async def test_delete_old_jobs_job_doing(
 ):
     job = await fetched_job_factory(queue="queue_a")
 
-    # We fake its started event timestamp
+    # We fake its start timestamp
     await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=at - INTERVAL '2 hours'"
-        f"WHERE job_id={job.id}"
+        f"UPDATE procrastinate_jobs SET started_at=started_at - INTERVAL '2 hours'"
+        f"WHERE id={job.id}"
     )
 
     await pg_job_manager.delete_old_jobs(nb_hours=0)
     assert len(await get_all("procrastinate_jobs", "id")) == 1
 
 
+async def test_delete_old_jobs_without_events(
+    get_all, pg_job_manager, fetched_job_factory
+):
+    await pg_job_manager.set_recorded_events_async([])
+    job = await fetched_job_factory(queue="queue_a")
+    await pg_job_manager.finish_job(
+        job=job, status=jobs.Status.SUCCEEDED, delete_job=False
+    )
+    assert await get_all("procrastinate_events", "id") == []
+
+    await pg_job_manager.delete_old_jobs(nb_hours=1)
+
+    # The job just finished, even though no event says so
+    assert await get_all("procrastinate_jobs", "id") == [{"id": job.id}]
+
+
 @pytest.mark.parametrize(
     "status, nb_hours, queue, include_failed, expected_job_count",
     [
@@ -445,10 +477,10 @@ async def test_delete_old_jobs_parameters(
     # We finish the job
     await pg_job_manager.finish_job(job, status=status, delete_job=False)
 
-    # We fake its started event timestamp
+    # We fake its end timestamp
     await psycopg_connector.execute_query_async(
-        f"UPDATE procrastinate_events SET at=at - INTERVAL '2 hours'"
-        f"WHERE job_id={job.id}"
+        f"UPDATE procrastinate_jobs SET finished_at=finished_at - INTERVAL '2 hours'"
+        f"WHERE id={job.id}"
     )
 
     await pg_job_manager.delete_old_jobs(
@@ -458,6 +490,104 @@ async def test_delete_old_jobs_parameters(
     assert jobs_count == expected_job_count
 
 
+async def test_delete_old_jobs_chunks(
+    get_all, pg_job_manager, psycopg_connector, fetched_job_factory
+):
+    for _ in range(5):
+        job = await fetched_job_factory(queue="queue_a")
+        await pg_job_manager.finish_job(
+            job, status=jobs.Status.SUCCEEDED, delete_job=False
+        )
+    recent_job = await fetched_job_factory(queue="queue_a")
+    await pg_job_manager.finish_job(
+        recent_job, status=jobs.Status.SUCCEEDED, delete_job=False
+    )
+    await psycopg_connector.execute_query_async(
+        f"UPDATE procrastinate_jobs SET finished_at=finished_at - INTERVAL '2 hours'"
+        f"WHERE id <> {recent_job.id}"
+    )
+
+    deleted = await pg_job_manager.delete_old_jobs(nb_hours=1, chunk_size=2)
+
+    assert deleted == 5
+    assert await get_all("procrastinate_jobs", "id") == [{"id": recent_job.id}]
+    assert {
+        row["job_id"] for row in await get_all("procrastinate_events", "job_id")
+    } == {recent_job.id}
+
+
+async def test_archive_old_jobs(
+    get_all, pg_job_manager, psycopg_connector, fetched_job_factory
+):
+    old_jobs = []
+    for _ in range(3):
+        job = await fetched_job_factory(queue="queue_a")
+        await pg_job_manager.finish_job(
+            job, status=jobs.Status.SUCCEEDED, delete_job=False
+        )
+        old_jobs.append(job.id)
+    recent_job = await fetched_job_factory(queue="queue_a")
+    await pg_job_manager.finish_job(
+        recent_job, status=jobs.Status.SUCCEEDED, delete_job=False
+    )
+    await psycopg_connector.execute_query_async(
+        f"UPDATE procrastinate_jobs SET finished_at=finished_at - INTERVAL '2 hours'"
+        f"WHERE id <> {recent_job.id}"
+    )
+    await psycopg_connector.execute_query_async(
+        'UPDATE procrastinate_jobs SET trace_context=\'{"traceparent": "00-ab-cd-01"}\''
+        f"WHERE id = {old_jobs[0]}"
+    )
+
+    archived = await pg_job_manager.archive_old_jobs(nb_hours=1, chunk_size=2)
+
+    assert archived == 3
+    assert await get_all("procrastinate_jobs", "id") == [{"id": recent_job.id}]
+    assert await get_all("procrastinate_jobs_archive", "id", "status") == [
+        {"id": job_id, "status": "succeeded"} for job_id in old_jobs
+    ]
+    archived_events = await get_all("procrastinate_events_archive", "job_id", "type")
+    assert [
+        event["type"] for event in archived_events if event["job_id"] == old_jobs[0]
+    ] == ["deferred", "started", "succeeded"]
+    assert {
+        row["job_id"] for row in await get_all("procrastinate_events", "job_id")
+    } == {recent_job.id}
+
+    listed = await pg_job_manager.list_jobs_async(include_archived=True)
+    assert [job.id for job in listed] == [*old_jobs, recent_job.id]
+    assert listed[0].trace_context == {"traceparent": "00-ab-cd-01"}
+    assert [job.id for job in await pg_job_manager.list_jobs_async()] == [recent_job.id]
+
+
+async def test_delete_archived_jobs(
+    get_all, pg_job_manager, psycopg_connector, fetched_job_factory
+):
+    for _ in range(3):
+        job = await fetched_job_factory(queue="queue_a")
+        await pg_job_manager.finish_job(
+            job, status=jobs.Status.FAILED, delete_job=False
+        )
+    recent_job = await fetched_job_factory(queue="queue_a")
+    await pg_job_manager.finish_job(
+        recent_job, status=jobs.Status.SUCCEEDED, delete_job=False
+    )
+    await pg_job_manager.archive_old_jobs(nb_hours=0, include_failed=True)
+    await psycopg_connector.execute_query_async(
+        "UPDATE procrastinate_jobs_archive "
+        "SET finished_at=finished_at - INTERVAL '2 hours' "
+        f"WHERE id <> {recent_job.id}"
+    )
+
+    deleted = await pg_job_manager.delete_archived_jobs(nb_hours=1, chunk_size=2)
+
+    assert deleted == 3
+    assert await get_all("procrastinate_jobs_archive", "id") == [{"id": recent_job.id}]
+    assert {
+        row["job_id"] for row in await get_all("procrastinate_events_archive", "job_id")
+    } == {recent_job.id}
+
+
 async def test_finish_job(get_all, pg_job_manager, fetched_job_factory):
     job = await fetched_job_factory(queue="queue_a")
 
@@ -472,6 +602,35 @@ async def test_finish_job(get_all, pg_job_manager, fetched_job_factory):
     assert await get_all("procrastinate_jobs", "status", "attempts") == expected
 
 
+async def test_job_timestamps(pg_job_manager, fetched_job_factory):
+    job = await fetched_job_factory(queue="queue_a")
+
+    (fetched,) = await pg_job_manager.list_jobs_async(id=job.id)
+    assert fetched.created_at <= fetched.started_at <= utils.utcnow()
+    assert fetched.finished_at is None
+
+    await pg_job_manager.finish_job(
+        job=job, status=jobs.Status.FAILED, delete_job=False
+    )
+    (finished,) = await pg_job_manager.list_jobs_async(id=job.id)
+    assert fetched.started_at <= finished.finished_at <= utils.utcnow()
+
+    await pg_job_manager.retry_job_by_id_async(job_id=job.id, retry_at=utils.utcnow())
+    (retried,) = await pg_job_manager.list_jobs_async(id=job.id)
+    assert retried.finished_at is None
+    assert retried.created_at == fetched.created_at
+
+
+async def test_job_timestamps_cancel(pg_job_manager, deferred_job_factory):
+    job = await deferred_job_factory(queue="queue_a")
+
+    await pg_job_manager.cancel_job_by_id_async(job.id)
+
+    (cancelled,) = await pg_job_manager.list_jobs_async(id=job.id)
+    assert cancelled.started_at is None
+    assert cancelled.created_at <= cancelled.finished_at <= utils.utcnow()
+
+
 @pytest.mark.parametrize("delete_job", [False, True])
 async def test_finish_job_wrong_initial_status(
     pg_job_manager, fetched_job_factory, delete_job
@@ -543,6 +702,197 @@ async def test_retry_job_with_additional_params(
     assert job2.lock == "some_lock"
 
 
+async def test_finish_job_and_fetch_next(
+    get_all, pg_job_manager, fetched_job_factory, deferred_job_factory, worker_id
+):
+    job = await fetched_job_factory(lock="lock_1")
+    next_job = await deferred_job_factory(lock="lock_1")
+
+    fetched_job = await pg_job_manager.finish_job_and_fetch_next(
+        job=job,
+        status=jobs.Status.SUCCEEDED,
+        delete_job=False,
+        queues=None,
+        worker_id=worker_id,
+    )
+
+    assert fetched_job.started_at
+    assert fetched_job == next_job.evolve(
+        status="doing",
+        worker_id=worker_id,
+        created_at=fetched_job.created_at,
+        started_at=fetched_job.started_at,
+    )
+    rows = await get_all("procrastinate_jobs", "id", "status")
+    assert sorted(rows, key=lambda row: row["id"]) == [
+        {"id": job.id, "status": "succeeded"},
+        {"id": next_job.id, "status": "doing"},
+    ]
+
+
+async def test_finish_job_and_fetch_next_no_result(
+    pg_job_manager, fetched_job_factory, deferred_job_factory, worker_id
+):
+    job = await fetched_job_factory(queue="queue_a")
+    await deferred_job_factory(queue="queue_b")
+
+    assert (
+        await pg_job_manager.finish_job_and_fetch_next(
+            job=job,
+            status=jobs.Status.FAILED,
+            delete_job=True,
+            queues=["queue_a"],
+            worker_id=worker_id,
+        )
+        is None
+    )
+
+
+async def test_finish_jobs_by_ids_async(get_all, pg_job_manager, fetched_job_factory):
+    job_a = await fetched_job_factory(queue="queue_a")
+    job_b = await fetched_job_factory(queue="queue_a")
+    await fetched_job_factory(queue="queue_a")
+
+    await pg_job_manager.finish_jobs_by_ids_async(
+        job_ids=[job_a.id, job_b.id],
+        statuses=[jobs.Status.SUCCEEDED, jobs.Status.FAILED],
+        delete_jobs=[False, False],
+    )
+
+    rows = await get_all("procrastinate_jobs", "id", "status", "attempts")
+    assert sorted(rows, key=lambda row: row["id"]) == [
+        {"id": job_a.id, "status": "succeeded", "attempts": 1},
+        {"id": job_b.id, "status": "failed", "attempts": 1},
+        {"id": job_b.id + 1, "status": "doing", "attempts": 0},
+    ]
+
+
+async def test_finish_jobs_by_ids_async_delete_jobs(
+    get_all, pg_job_manager, fetched_job_factory
+):
+    job_a = await fetched_job_factory(queue="queue_a")
+    job_b = await fetched_job_factory(queue="queue_a")
+
+    await pg_job_manager.finish_jobs_by_ids_async(
+        job_ids=[job_a.id, job_b.id],
+        statuses=[jobs.Status.SUCCEEDED, jobs.Status.FAILED],
+        delete_jobs=[True, False],
+    )
+
+    assert await get_all("procrastinate_jobs", "id", "status") == [
+        {"id": job_b.id, "status": "failed"}
+    ]
+
+
+async def test_finish_jobs_by_ids_async_is_atomic(
+    get_all, pg_job_manager, fetched_job_factory
+):
+    job = await fetched_job_factory(queue="queue_a")
+
+    with pytest.raises(exceptions.ConnectorException):
+        await pg_job_manager.finish_jobs_by_ids_async(
+            job_ids=[job.id, job.id + 1],
+            statuses=[jobs.Status.SUCCEEDED, jobs.Status.SUCCEEDED],
+            delete_jobs=[False, False],
+        )
+
+    assert await get_all("procrastinate_jobs", "status") == [{"status": "doing"}]
+
+
+async def test_retry_jobs_by_ids_async(pg_job_manager, fetched_job_factory, worker_id):
+    job_a = await fetched_job_factory(queue="queue_a")
+    job_b = await fetched_job_factory(queue="queue_a")
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    await pg_job_manager.retry_jobs_by_ids_async(
+        job_ids=[job_a.id, job_b.id],
+        retry_ats=[now, now],
+        priorities=[None, 5],
+        queues=["queue_b", None],
+        locks=[None, "some_lock"],
+    )
+
+    retried_jobs = await pg_job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=2
+    )
+
+    assert [
+        (job.id, job.attempts, job.priority, job.queue, job.lock)
+        for job in retried_jobs
+    ] == [
+        (job_b.id, 1, 5, "queue_a", "some_lock"),
+        (job_a.id, 1, 0, "queue_b", job_a.lock),
+    ]
+
+
+async def test_retry_jobs_by_ids_async_abort_requested(
+    get_all, pg_job_manager, fetched_job_factory
+):
+    job_a = await fetched_job_factory(queue="queue_a")
+    job_b = await fetched_job_factory(queue="queue_a")
+    await pg_job_manager.cancel_job_by_id_async(job_a.id, abort=True)
+
+    await pg_job_manager.retry_jobs_by_ids_async(
+        job_ids=[job_a.id, job_b.id],
+        retry_ats=[None, None],
+        priorities=[5, 5],
+        queues=[None, None],
+        locks=[None, None],
+    )
+
+    rows = await get_all("procrastinate_jobs", "id", "status", "attempts", "priority")
+    assert sorted(rows, key=lambda row: row["id"]) == [
+        {"id": job_a.id, "status": "failed", "attempts": 0, "priority": 0},
+        {"id": job_b.id, "status": "todo", "attempts": 1, "priority": 5},
+    ]
+
+
+async def test_retry_jobs_by_ids_async_is_atomic(
+    get_all, pg_job_manager, fetched_job_factory
+):
+    job = await fetched_job_factory(queue="queue_a")
+
+    with pytest.raises(exceptions.ConnectorException):
+        await pg_job_manager.retry_jobs_by_ids_async(
+            job_ids=[job.id, job.id + 1],
+            retry_ats=[None, None],
+            priorities=[None, None],
+            queues=[None, None],
+            locks=[None, None],
+        )
+
+    assert await get_all("procrastinate_jobs", "status") == [{"status": "doing"}]
+
+
+async def test_retry_jobs_by_ids_async_without_retry_at(
+    get_all, pg_job_manager, fetched_job_factory
+):
+    job_a = await fetched_job_factory(queue="queue_a")
+    job_b = await fetched_job_factory(queue="queue_a")
+
+    await pg_job_manager.retry_job(job=job_a)
+    await pg_job_manager.retry_jobs_by_ids_async(
+        job_ids=[job_b.id],
+        retry_ats=[None],
+        priorities=[None],
+        queues=[None],
+        locks=[None],
+    )
+
+    # Both jobs are retried the same way, without a scheduled_at (so without
+    # depending on the clock of the worker) nor a scheduled event
+    retried_jobs = await get_all("procrastinate_jobs", "id", "status", "scheduled_at")
+    assert sorted(retried_jobs, key=lambda row: row["id"]) == [
+        {"id": job_a.id, "status": "todo", "scheduled_at": None},
+        {"id": job_b.id, "status": "todo", "scheduled_at": None},
+    ]
+    events = await get_all("procrastinate_events", "job_id", "type")
+    assert sorted(
+        event["type"] for event in events if event["job_id"] == job_a.id
+    ) == sorted(event["type"] for event in events if event["job_id"] == job_b.id)
+    assert "scheduled" not in {event["type"] for event in events}
+
+
 async def test_enum_synced(psycopg_connector):
     # If this test breaks, it means you've changed either the task_status PG enum
     # or the python procrastinate.jobs.Status Enum without updating the other.
@@ -676,6 +1026,132 @@ async def test_defer_job_violate_queueing_lock(pg_job_manager, job_factory):
     assert cause.queueing_lock == "same_queueing_lock"
 
 
+async def test_batch_events(pg_job_manager, get_all, job_factory, worker_id):
+    scheduled_at = conftest.aware_datetime(2000, 1, 1)
+    first, second, third = await pg_job_manager.batch_defer_jobs_async(
+        jobs=[
+            job_factory(id=0, queue="queue_a", lock=None),
+            job_factory(id=0, queue="queue_a", lock=None),
+            job_factory(id=0, queue="queue_a", lock=None, scheduled_at=scheduled_at),
+        ]
+    )
+    fetched = await pg_job_manager.fetch_jobs(
+        queues=["queue_a"], worker_id=worker_id, limit=3
+    )
+    assert len(fetched) == 3
+    await pg_job_manager.finish_jobs_by_ids_async(
+        job_ids=[first.id, second.id],
+        statuses=[jobs.Status.SUCCEEDED, jobs.Status.FAILED],
+        delete_jobs=[False, False],
+    )
+
+    result = await get_all("procrastinate_events", "id", "job_id", "type", "at")
+    events: dict[int, list] = {}
+    for row in sorted(result, key=lambda row: row["id"]):
+        events.setdefault(row["job_id"], []).append(row)
+
+    # Events of all the jobs inserted by a statement are recorded together, in
+    # the order of the jobs
+    assert [row["type"] for row in events[first.id]] == [
+        "deferred",
+        "started",
+        "succeeded",
+    ]
+    assert [row["type"] for row in events[second.id]] == [
+        "deferred",
+        "started",
+        "failed",
+    ]
+    assert [row["type"] for row in events[third.id]] == [
+        "scheduled",
+        "deferred",
+        "started",
+    ]
+    assert events[third.id][0]["at"] == scheduled_at
+
+
+async def test_events_only_on_status_changes(
+    pg_job_manager, psycopg_connector, get_all, job_factory
+):
+    job = await pg_job_manager.defer_job_async(
+        job=job_factory(scheduled_at=conftest.aware_datetime(2100, 1, 1))
+    )
+
+    # Updates that change neither the status nor the schedule record no event
+    await psycopg_connector.execute_query_async(
+        f"UPDATE procrastinate_jobs SET priority = 5, status = status "
+        f"WHERE id = {job.id}"
+    )
+    await psycopg_connector.execute_query_async(
+        f"UPDATE procrastinate_jobs SET scheduled_at = scheduled_at WHERE id = {job.id}"
+    )
+
+    events = await get_all("procrastinate_events", "type")
+    assert sorted(event["type"] for event in events) == ["deferred", "scheduled"]
+
+
+async def test_set_recorded_events(pg_job_manager, get_all, job_factory, worker_id):
+    await pg_job_manager.set_recorded_events_async([])
+    await pg_job_manager.set_recorded_events_async(
+        ["started", "failed"], queue="queue_a"
+    )
+    # Replaces the previous setting of the queue
+    await pg_job_manager.set_recorded_events_async(["failed"], queue="queue_a")
+
+    job_a1, job_a2, job_b = await pg_job_manager.batch_defer_jobs_async(
+        jobs=[
+            job_factory(id=0, queue=queue, lock=None)
+            for queue in ["queue_a", "queue_a", "queue_b"]
+        ]
+    )
+    await pg_job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=3)
+    await pg_job_manager.finish_jobs_by_ids_async(
+        job_ids=[job_a1.id, job_a2.id, job_b.id],
+        statuses=[jobs.Status.SUCCEEDED, jobs.Status.FAILED, jobs.Status.FAILED],
+        delete_jobs=[False, False, False],
+    )
+
+    result = await get_all("procrastinate_events", "job_id", "type")
+    assert result == [{"job_id": job_a2.id, "type": "failed"}]
+
+
+async def test_batch_defer_jobs_notifications(
+    pg_job_manager, psycopg_connector, job_factory
+):
+    received = []
+
+    async def on_notification(*, channel: str, payload: str):
+        received.append((channel, json.loads(payload)))
+
+    listen_task = asyncio.create_task(
+        psycopg_connector.listen_notify(
+            on_notification=on_notification,
+            channels=[
+                *manager.get_channel_for_queues(),
+                *manager.get_channel_for_queues(["queue_a", "queue_b"]),
+            ],
+        )
+    )
+    try:
+        await asyncio.sleep(0.1)
+        await pg_job_manager.batch_defer_jobs_async(
+            jobs=[
+                job_factory(id=0, queue=queue, lock=None, queueing_lock=None)
+                for queue in ["queue_a", "queue_b", "queue_a", "queue_a"]
+            ]
+        )
+        await asyncio.sleep(0.2)
+    finally:
+        listen_task.cancel()
+
+    # A single notification per queue and per statement
+    assert sorted(received) == [
+        ("procrastinate_any_queue_v1", {"type": "job_inserted", "job_count": 4}),
+        ("procrastinate_queue_v1#queue_a", {"type": "job_inserted", "job_count": 3}),
+        ("procrastinate_queue_v1#queue_b", {"type": "job_inserted", "job_count": 1}),
+    ]
+
+
 async def test_batch_defer_jobs_violate_queueing_lock(
     pg_job_manager, get_all, job_factory
 ):
@@ -770,7 +1246,7 @@ async def fixture_jobs(pg_job_manager, job_factory, worker_id):
 
 async def test_list_jobs_dict(fixture_jobs, pg_job_manager):
     j1, *_ = fixture_jobs
-    assert (await pg_job_manager.list_jobs_async())[0] == j1
+    assert (await pg_job_manager.list_jobs_async())[0] == j1.evolve(created_at=ANY)
 
 
 @pytest.mark.parametrize(
@@ -790,6 +1266,44 @@ async def test_list_jobs(fixture_jobs, kwargs, expected, pg_job_manager):
     ] == expected
 
 
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"limit": 2}, [1, 2]),
+        ({"after_id": 2}, [3, 4]),
+        ({"after_id": 1, "limit": 2}, [2, 3]),
+        ({"after_id": 1, "limit": 2, "queue": "q1"}, [2]),
+        ({"after_id": 1, "limit": 2, "include_archived": True}, [2, 3]),
+    ],
+)
+async def test_list_jobs_limit_after_id(fixture_jobs, kwargs, expected, pg_job_manager):
+    assert [
+        job.id for job in await pg_job_manager.list_jobs_async(**kwargs)
+    ] == expected
+
+
+async def test_iter_jobs_async_archived(
+    fixture_jobs, pg_job_manager, psycopg_connector
+):
+    await psycopg_connector.execute_query_async(
+        "UPDATE procrastinate_jobs SET finished_at = NOW() - INTERVAL '2 hours' "
+        "WHERE id = 3"
+    )
+    await pg_job_manager.archive_old_jobs(nb_hours=1)
+
+    assert [
+        job.id
+        async for job in pg_job_manager.iter_jobs_async(
+            include_archived=True, page_size=1
+        )
+    ] == [1, 2, 3, 4]
+    assert [job.id async for job in pg_job_manager.iter_jobs_async(page_size=2)] == [
+        1,
+        2,
+        4,
+    ]
+
+
 async def test_list_queues_dict(fixture_jobs, pg_job_manager):
     assert (await pg_job_manager.list_queues_async())[0] == {
         "name": "q1",
@@ -855,3 +1369,78 @@ async def test_list_tasks(fixture_jobs, pg_job_manager, kwargs, expected):
     assert [
         e["name"] for e in await pg_job_manager.list_tasks_async(**kwargs)
     ] == expected
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"queue": "q1"},
+        {"task": "task_bar"},
+        {"status": "todo"},
+        {"lock": "lock2"},
+    ],
+)
+async def test_list_queues_and_tasks_job_counts(fixture_jobs, pg_job_manager, kwargs):
+    expected_queues = await pg_job_manager.list_queues_async(**kwargs)
+    expected_tasks = await pg_job_manager.list_tasks_async(**kwargs)
+
+    await pg_job_manager.enable_job_counts_async()
+
+    assert await pg_job_manager.list_queues_async(**kwargs) == expected_queues
+    assert await pg_job_manager.list_tasks_async(**kwargs) == expected_tasks
+
+
+async def test_job_counts(
+    fixture_jobs, get_all, pg_job_manager, psycopg_connector, worker_id
+):
+    _, j2, *_ = fixture_jobs
+    await pg_job_manager.enable_job_counts_async()
+    # Enabling twice doesn't count the jobs twice
+    await pg_job_manager.enable_job_counts_async()
+
+    await pg_job_manager.retry_job_by_id_async(j2.id, retry_at=utils.utcnow())
+    await pg_job_manager.fetch_job(queues=["q1"], worker_id=worker_id)
+    await psycopg_connector.execute_query_async(
+        "DELETE FROM procrastinate_jobs WHERE queue_name = 'q2'"
+    )
+    await pg_job_manager.compact_job_counts_async()
+
+    assert await pg_job_manager.list_queues_async() == [
+        {
+            "name": "q1",
+            "jobs_count": 2,
+            "todo": 1,
+            "doing": 1,
+            "succeeded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "aborted": 0,
+        },
+        {
+            "name": "q3",
+            "jobs_count": 1,
+            "todo": 0,
+            "doing": 1,
+            "succeeded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "aborted": 0,
+        },
+    ]
+    counts = await get_all(
+        "procrastinate_job_counts", "queue_name", "task_name", "status", "count"
+    )
+    assert sorted(counts, key=lambda row: (row["queue_name"], row["task_name"])) == [
+        {"queue_name": "q1", "task_name": "task_bar", "status": "todo", "count": 1},
+        {"queue_name": "q1", "task_name": "task_foo", "status": "doing", "count": 1},
+        {"queue_name": "q3", "task_name": "task_bar", "status": "doing", "count": 1},
+    ]
+
+    await pg_job_manager.disable_job_counts_async()
+
+    assert await get_all("procrastinate_job_counts", "count") == []
+    assert [queue["name"] for queue in await pg_job_manager.list_queues_async()] == [
+        "q1",
+        "q3",
+    ]
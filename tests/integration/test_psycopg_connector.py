@@ -8,7 +8,13 @@ import asgiref.sync
 import attr
 import pytest
 
-from procrastinate import exceptions, manager, psycopg_connector, sync_psycopg_connector
+from procrastinate import (
+    exceptions,
+    manager,
+    psycopg_connector,
+    sql,
+    sync_psycopg_connector,
+)
 
 
 @pytest.fixture
@@ -283,3 +289,93 @@ async def test_get_sync_connector__not_open(not_opened_psycopg_connector):
     assert isinstance(sync, sync_psycopg_connector.SyncPsycopgConnector)
     assert not_opened_psycopg_connector.get_sync_connector() is sync
     assert sync._pool_args == not_opened_psycopg_connector._pool_args
+
+
+async def test_execute_query_instrumentation(psycopg_connector, mocker):
+    psycopg_connector.instrumentation = instrumentation = mocker.Mock()
+
+    await psycopg_connector.execute_query_all_async(sql.queries["check_connection"])
+
+    instrumentation.assert_called_once_with(
+        query_name="check_connection",
+        pool_wait=mocker.ANY,
+        duration=mocker.ANY,
+        row_count=1,
+        error=None,
+    )
+    assert instrumentation.call_args.kwargs["pool_wait"] >= 0
+
+
+async def test_execute_query_instrumentation_error(psycopg_connector, mocker):
+    psycopg_connector.instrumentation = instrumentation = mocker.Mock()
+
+    with pytest.raises(exceptions.ConnectorException):
+        await psycopg_connector.execute_query_async("SELECT nope")
+
+    assert instrumentation.call_args.kwargs["error"] is not None
+
+
+@pytest.mark.parametrize("prepare_statements, expected", [(True, 1), (False, 0)])
+async def test_execute_query_prepare_statements(
+    psycopg_connector_factory, prepare_statements, expected
+):
+    connector = await psycopg_connector_factory(
+        prepare_statements=prepare_statements, min_size=1, max_size=1
+    )
+    result = await connector.execute_query_one_async(sql.queries["register_worker"])
+    # psycopg would prepare any query after a few executions
+    for _ in range(10):
+        await connector.execute_query_async(
+            sql.queries["update_heartbeat"], worker_id=result["worker_id"]
+        )
+
+    result = await connector.execute_query_one_async(
+        "SELECT count(*) FROM pg_prepared_statements "
+        "WHERE position('procrastinate_update_heartbeat_v1' in statement) > 0"
+    )
+    assert result == {"count": expected}
+
+
+async def test_execute_queries_async(psycopg_connector):
+    results = await psycopg_connector.execute_queries_async(
+        [
+            {"query": "COMMENT ON TABLE \"procrastinate_jobs\" IS 'foo' "},
+            {"query": "SELECT %(foo)s as foo UNION ALL SELECT 'baz'", "foo": "bar"},
+        ]
+    )
+    assert results == [[], [{"foo": "bar"}, {"foo": "baz"}]]
+
+    result = await psycopg_connector.execute_query_one_async(
+        "SELECT obj_description('public.procrastinate_jobs'::regclass)"
+    )
+    assert result == {"obj_description": "foo"}
+
+
+@pytest.mark.parametrize(
+    "pool_kwargs, expected", [({}, True), ({"kwargs": {"autocommit": True}}, False)]
+)
+async def test_queries_are_atomic(psycopg_connector_factory, pool_kwargs, expected):
+    connector = await psycopg_connector_factory(**pool_kwargs)
+
+    assert connector.queries_are_atomic is expected
+
+
+async def test_execute_queries_async_error(psycopg_connector, mocker):
+    psycopg_connector.instrumentation = instrumentation = mocker.Mock()
+
+    with pytest.raises(exceptions.ConnectorException):
+        await psycopg_connector.execute_queries_async(
+            [
+                {"query": "COMMENT ON TABLE \"procrastinate_jobs\" IS 'foo' "},
+                {"query": "SELECT nope"},
+            ]
+        )
+
+    assert instrumentation.call_count == 2
+    assert all(call.kwargs["error"] for call in instrumentation.call_args_list)
+
+    # The queries run in a single transaction
+    result = await psycopg_connector.execute_query_one_async(
+        "SELECT obj_description('public.procrastinate_jobs'::regclass)"
+    )
+    assert result == {"obj_description": None}
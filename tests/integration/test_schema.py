@@ -19,3 +19,93 @@ async def test_apply_schema_async(db_factory, monkeypatch):
 
     async with app.open_async():
         await app.schema_manager.apply_schema_async()
+
+
+async def test_apply_schema_partitioned_events(db_factory, monkeypatch):
+    monkeypatch.setenv("PGDATABASE", "procrastinate_test")
+    db_factory(dbname="procrastinate_test")
+    app = App(connector=PsycopgConnector())
+
+    async with app.open_async():
+        await app.schema_manager.apply_schema_async(partitioned_events=True)
+        # Already partitioned: nothing happens
+        await app.schema_manager.partition_events_async()
+        connector = app.connector
+        await connector.execute_query_async(
+            "INSERT INTO procrastinate_jobs (queue_name, task_name, args) "
+            "VALUES ('default', 'foo', '{}')"
+        )
+        await connector.execute_query_async(
+            "UPDATE procrastinate_events SET at = NOW() - INTERVAL '10 days'"
+        )
+        await connector.execute_query_async(
+            "INSERT INTO procrastinate_jobs (queue_name, task_name, args) "
+            "VALUES ('default', 'foo', '{}')"
+        )
+
+        # The partitions of the next 7 days were created with the table
+        assert await app.job_manager.create_events_partitions(days_ahead=7) == 0
+        assert await app.job_manager.create_events_partitions(days_ahead=9) == 2
+
+        # The event of the first job, 10 days ago, is in the default partition until
+        # a partition is created for its day
+        assert await app.job_manager.drop_events_partitions(nb_days=5) == 0
+        events = await connector.execute_query_all_async(
+            "SELECT tableoid::regclass::text AS partition, job_id "
+            "FROM procrastinate_events ORDER BY job_id"
+        )
+        assert events[0]["partition"] == "procrastinate_events_default"
+        assert events[1]["partition"].startswith("procrastinate_events_2")
+
+        await connector.execute_query_async(
+            "SELECT procrastinate_create_events_partitions_v1("
+            "NOW() - INTERVAL '10 days', NOW())"
+        )
+        assert await app.job_manager.drop_events_partitions(nb_days=5) == 5
+        events = await connector.execute_query_all_async(
+            "SELECT job_id FROM procrastinate_events"
+        )
+        assert events == [{"job_id": 2}]
+
+
+async def test_partition_events_existing_events(db_factory, monkeypatch):
+    monkeypatch.setenv("PGDATABASE", "procrastinate_test")
+    db_factory(dbname="procrastinate_test")
+    app = App(connector=PsycopgConnector())
+
+    async with app.open_async():
+        await app.schema_manager.apply_schema_async()
+        connector = app.connector
+        await connector.execute_query_async(
+            "INSERT INTO procrastinate_jobs (queue_name, task_name, args) "
+            "SELECT 'default', 'foo', '{}' FROM generate_series(1, 3)"
+        )
+        await connector.execute_query_async(
+            "UPDATE procrastinate_events SET at = NOW() - job_id * INTERVAL '1 day'"
+        )
+
+        await app.schema_manager.partition_events_async()
+
+        events = await connector.execute_query_all_async(
+            "SELECT tableoid::regclass::text AS partition, id, job_id "
+            "FROM procrastinate_events ORDER BY id"
+        )
+        assert [(event["id"], event["job_id"]) for event in events] == [
+            (1, 1),
+            (2, 2),
+            (3, 3),
+        ]
+        assert len({event["partition"] for event in events}) == 3
+
+        # Deleting a job still deletes its events, and new events get new ids
+        await connector.execute_query_async(
+            "DELETE FROM procrastinate_jobs WHERE id = 1"
+        )
+        await connector.execute_query_async(
+            "INSERT INTO procrastinate_jobs (queue_name, task_name, args) "
+            "VALUES ('default', 'foo', '{}')"
+        )
+        events = await connector.execute_query_all_async(
+            "SELECT id FROM procrastinate_events ORDER BY id"
+        )
+        assert events == [{"id": 2}, {"id": 3}, {"id": 4}]
@@ -91,3 +91,17 @@ def test_close(sync_psycopg_connector):
     pool = sync_psycopg_connector._pool
     sync_psycopg_connector.close()
     assert pool.closed is True
+
+
+def test_execute_query_instrumentation(sync_psycopg_connector, mocker):
+    sync_psycopg_connector.instrumentation = instrumentation = mocker.Mock()
+
+    sync_psycopg_connector.execute_query_all("SELECT generate_series(1, 3)")
+
+    instrumentation.assert_called_once_with(
+        query_name="query",
+        pool_wait=mocker.ANY,
+        duration=mocker.ANY,
+        row_count=3,
+        error=None,
+    )
@@ -6,6 +6,7 @@ import subprocess
 import warnings
 
 import packaging.version
+import psycopg
 import pytest
 from django.core import management
 from django.db import connection
@@ -92,6 +93,50 @@ def test_migration(schema_database, migrations_database, run_migrations):
     assert not m.statements
 
 
+def test_job_timestamps_migration_records_no_event(migrations_database):
+    migration_name = "03.05.00_07_pre_add_job_timestamps.sql"
+    with psycopg.connect("", dbname=migrations_database, autocommit=True) as connection:
+        index = [migration.name for migration in migration_files].index(migration_name)
+        for migration in migration_files[:index]:
+            connection.execute(migration.read_text())
+
+        connection.execute(
+            """INSERT INTO procrastinate_jobs (id, queue_name, task_name, args, scheduled_at)
+            VALUES
+                (1, 'queue', 'task', '{}', NOW() + INTERVAL '1 hour'),
+                (2, 'queue', 'task', '{}', NULL),
+                (3, 'queue', 'task', '{}', NULL),
+                (4, 'queue', 'task', '{}', NULL)"""
+        )
+        connection.execute(
+            "UPDATE procrastinate_jobs SET status = 'doing' WHERE id IN (2, 3, 4)"
+        )
+        connection.execute(
+            "UPDATE procrastinate_jobs SET status = 'succeeded' WHERE id IN (3, 4)"
+        )
+        connection.execute("DELETE FROM procrastinate_events WHERE job_id = 4")
+        query = "SELECT job_id, type, at FROM procrastinate_events ORDER BY id"
+        events = connection.execute(query).fetchall()
+
+        for migration in migration_files[index:]:
+            connection.execute(migration.read_text())
+
+        assert connection.execute(query).fetchall() == events
+        rows = connection.execute(
+            """SELECT created_at, started_at, finished_at
+            FROM procrastinate_jobs ORDER BY id"""
+        ).fetchall()
+        assert [tuple(bool(value) for value in row) for row in rows] == [
+            (True, False, False),
+            (True, True, False),
+            (True, False, True),
+            (True, False, True),
+        ]
+        assert not connection.execute(
+            "SELECT FROM pg_proc WHERE proname = 'procrastinate_backfill_job_timestamps_v1'"
+        ).fetchall()
+
+
 def test_django_migrations_run_properly(django_db):
     # At this point, with the db fixture, we have all migrations applied
     with connection.cursor() as cursor:
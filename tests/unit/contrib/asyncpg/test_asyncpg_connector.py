@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncpg
+import pytest
+
+from procrastinate import exceptions, manager
+from procrastinate.contrib.asyncpg import asyncpg_connector
+
+
+@pytest.fixture
+def connector():
+    return asyncpg_connector.AsyncpgConnector()
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("SELECT 1", ("SELECT 1", ())),
+        (
+            "SELECT %(a)s, %(b)s, %(a)s",
+            ("SELECT $1, $2, $1", ("a", "b")),
+        ),
+        ("SELECT %(a)s || '%%'", ("SELECT $1 || '%'", ("a",))),
+    ],
+)
+def test_convert_query(query, expected):
+    assert asyncpg_connector.convert_query(query) == expected
+
+
+@pytest.mark.parametrize(
+    "status, expected",
+    [("UPDATE 3", 3), ("INSERT 0 1", 1), ("LISTEN", -1), ("SELECT 10", 10)],
+)
+def test_get_row_count(status, expected):
+    assert asyncpg_connector.get_row_count(status) == expected
+
+
+async def test_adapt_pool_args_init(mocker):
+    called = []
+
+    async def init(connection):
+        called.append(connection)
+
+    args = asyncpg_connector.AsyncpgConnector._adapt_pool_args(
+        pool_args={"init": init, "max_size": 3}, json_dumps=None, json_loads=None
+    )
+
+    assert args["init"] is not init
+    assert args["max_size"] == 3
+
+    connection = mocker.AsyncMock()
+    await args["init"](connection)
+
+    assert called == [connection]
+    assert [call.args for call in connection.set_type_codec.call_args_list] == [
+        ("json",),
+        ("jsonb",),
+    ]
+
+
+async def test_wrap_exceptions_unique_violation():
+    @asyncpg_connector.wrap_exceptions()
+    async def corofunc():
+        raise asyncpg.UniqueViolationError.new(
+            {
+                "C": "23505",
+                "M": "duplicate key value violates unique constraint",
+                "n": manager.QUEUEING_LOCK_CONSTRAINT,
+                "D": "Key (queueing_lock)=(some_lock) already exists.",
+            }
+        )
+
+    with pytest.raises(exceptions.UniqueViolation) as excinfo:
+        await corofunc()
+
+    assert excinfo.value.constraint_name == manager.QUEUEING_LOCK_CONSTRAINT
+    assert excinfo.value.queueing_lock == "some_lock"
+
+
+@pytest.mark.parametrize("exc_type", [asyncpg.PostgresError, asyncpg.InterfaceError])
+async def test_wrap_exceptions_wraps(exc_type):
+    @asyncpg_connector.wrap_exceptions()
+    async def corofunc():
+        raise exc_type("foo")
+
+    with pytest.raises(exceptions.ConnectorException):
+        await corofunc()
+
+
+async def test_wrap_exceptions_success():
+    @asyncpg_connector.wrap_exceptions()
+    async def corofunc(a, b):
+        return a, b
+
+    assert await corofunc(1, 2) == (1, 2)
+
+
+@pytest.mark.parametrize(
+    "method_name",
+    [
+        "_create_pool",
+        "close_async",
+        "execute_query_async",
+        "execute_query_one_async",
+        "execute_query_all_async",
+        "listen_notify",
+    ],
+)
+def test_wrap_exceptions_applied(method_name, connector):
+    assert hasattr(getattr(connector, method_name), "__wrapped__")
+
+
+async def test_listen_notify_pool_one_connection(mocker, caplog, connector):
+    pool = mocker.Mock(**{"get_max_size.return_value": 1})
+    await connector.open_async(pool)
+    caplog.clear()
+
+    await connector.listen_notify(None, None)
+
+    assert {e.action for e in caplog.records} == {"listen_notify_disabled"}
+
+
+@pytest.fixture
+def fake_connector():
+    class FakeConnector(asyncpg_connector.AsyncpgConnector):
+        create_pool_called = False
+        create_pool_args = None
+
+        async def _create_pool(self, pool_args):
+            self.create_pool_called = True
+            self.create_pool_args = pool_args
+            return object()
+
+    return FakeConnector()
+
+
+async def test_open_async_no_pool_specified(fake_connector):
+    await fake_connector.open_async()
+
+    assert fake_connector._pool_externally_set is False
+    assert fake_connector.create_pool_called is True
+    assert fake_connector.create_pool_args == fake_connector._pool_args
+
+
+async def test_open_async_pool_argument_specified(fake_connector):
+    pool = object()
+    await fake_connector.open_async(pool)
+
+    assert fake_connector._pool_externally_set is True
+    assert fake_connector.create_pool_called is False
+    assert fake_connector._pool == pool
+
+
+def test_get_pool(connector):
+    with pytest.raises(exceptions.AppNotOpen):
+        _ = connector.pool
+
+
+def test_get_sync_connector(connector):
+    assert connector.get_sync_connector() is connector
@@ -1,8 +1,28 @@
 from __future__ import annotations
 
+import datetime
+
 from procrastinate import jobs
-from procrastinate.contrib.django import admin
+from procrastinate.contrib.django import admin, models
 
 
 def test_emoji_mapping():
     assert set(admin.JOB_STATUS_EMOJI_MAPPING) == {e.value for e in jobs.Status}
+
+
+def test_get_last_event():
+    created_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    started_at = created_at + datetime.timedelta(minutes=1)
+    finished_at = created_at + datetime.timedelta(minutes=2)
+    job = models.ProcrastinateJob(status="todo", created_at=created_at)
+    assert admin.get_last_event(job) == {"type": "deferred", "at": created_at}
+
+    job.status, job.started_at = "doing", started_at
+    assert admin.get_last_event(job) == {"type": "started", "at": started_at}
+
+    job.status, job.finished_at = "failed", finished_at
+    assert admin.get_last_event(job) == {"type": "failed", "at": finished_at}
+
+
+def test_get_last_event_no_timestamp():
+    assert admin.get_last_event(models.ProcrastinateJob(status="todo")) is None
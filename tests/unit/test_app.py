@@ -321,3 +321,13 @@ def test_replace_connector(app: app_module.App):
         assert len(cast(testing.InMemoryConnector, app.connector).jobs) == 0
 
     assert len(cast(testing.InMemoryConnector, app.connector).jobs) == 1
+
+
+def test_query_stats(app: app_module.App):
+    assert app.query_stats is app.connector.instrumentation
+
+
+def test_query_stats_replaced(app: app_module.App, mocker):
+    app.connector.instrumentation = mocker.Mock()
+
+    assert app.query_stats is None
@@ -3,10 +3,14 @@ from __future__ import annotations
 import time
 from typing import cast
 
+import pytest
+
 from procrastinate import builtin_tasks, job_context
 from procrastinate.app import App
 from procrastinate.testing import InMemoryConnector
 
+from .. import conftest
+
 
 async def test_remove_old_jobs(app: App, job_factory):
     job = job_factory()
@@ -29,6 +33,148 @@ async def test_remove_old_jobs(app: App, job_factory):
                 "nb_hours": 2,
                 "queue": "queue_a",
                 "statuses": ["succeeded", "failed", "cancelled", "aborted"],
+                "chunk_size": None,
+            },
+        )
+    ]
+
+
+async def test_remove_old_jobs_chunks(app: App, job_factory, mocker):
+    job = job_factory()
+    connector = cast(InMemoryConnector, app.connector)
+    connector.jobs = {
+        id: {
+            "id": id,
+            "status": "succeeded",
+            "queue_name": "queue_a",
+            "finished_at": conftest.aware_datetime(2000, 1, 1),
+        }
+        for id in range(1, 6)
+    }
+    sleep = mocker.patch("asyncio.sleep")
+
+    deleted = await builtin_tasks.remove_old_jobs(
+        job_context.JobContext(
+            app=app, job=job, abort_reason=lambda: None, start_timestamp=time.time()
+        ),
+        max_hours=2,
+        chunk_size=2,
+        chunk_pause=0.5,
+    )
+
+    assert deleted == 5
+    assert connector.jobs == {}
+    assert [query for query, _ in connector.queries] == ["delete_old_jobs"] * 3
+    assert sleep.call_args_list == [mocker.call(0.5)] * 2
+
+
+async def test_archive_old_jobs(app: App, job_factory):
+    job = job_factory()
+    connector = cast(InMemoryConnector, app.connector)
+    connector.jobs = {
+        1: {
+            "id": 1,
+            "status": "aborted",
+            "queue_name": "queue_a",
+            "finished_at": conftest.aware_datetime(2000, 1, 1),
+        }
+    }
+
+    archived = await builtin_tasks.archive_old_jobs(
+        job_context.JobContext(
+            app=app, job=job, abort_reason=lambda: None, start_timestamp=time.time()
+        ),
+        max_hours=2,
+        queue="queue_a",
+        archive_aborted=True,
+    )
+
+    assert archived == 1
+    assert connector.queries == [
+        (
+            "archive_old_jobs",
+            {
+                "nb_hours": 2,
+                "queue": "queue_a",
+                "statuses": ["succeeded", "aborted"],
+                "chunk_size": None,
             },
         )
     ]
+    assert list(connector.jobs_archive) == [1]
+
+
+async def test_remove_archived_jobs(app: App, job_factory):
+    job = job_factory()
+    connector = cast(InMemoryConnector, app.connector)
+    connector.jobs_archive = {
+        1: {
+            "id": 1,
+            "status": "failed",
+            "queue_name": "queue_a",
+            "finished_at": conftest.aware_datetime(2000, 1, 1),
+        }
+    }
+
+    deleted = await builtin_tasks.remove_archived_jobs(
+        job_context.JobContext(
+            app=app, job=job, abort_reason=lambda: None, start_timestamp=time.time()
+        ),
+        max_hours=2,
+        queue="queue_a",
+    )
+
+    assert deleted == 1
+    assert connector.queries == [
+        (
+            "delete_archived_jobs",
+            {"nb_hours": 2, "queue": "queue_a", "chunk_size": None},
+        )
+    ]
+    assert connector.jobs_archive == {}
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected_queries",
+    [
+        ({}, [("create_events_partitions", {"days_ahead": 7})]),
+        (
+            {"days_ahead": 2, "keep_days": 30},
+            [
+                ("create_events_partitions", {"days_ahead": 2}),
+                ("drop_events_partitions", {"nb_days": 30}),
+            ],
+        ),
+    ],
+)
+async def test_manage_events_partitions(
+    app: App, job_factory, kwargs, expected_queries
+):
+    connector = cast(InMemoryConnector, app.connector)
+
+    await builtin_tasks.manage_events_partitions(
+        job_context.JobContext(
+            app=app,
+            job=job_factory(),
+            abort_reason=lambda: None,
+            start_timestamp=time.time(),
+        ),
+        **kwargs,
+    )
+
+    assert connector.queries == expected_queries
+
+
+async def test_compact_job_counts(app: App, job_factory):
+    connector = cast(InMemoryConnector, app.connector)
+
+    await builtin_tasks.compact_job_counts(
+        job_context.JobContext(
+            app=app,
+            job=job_factory(),
+            abort_reason=lambda: None,
+            start_timestamp=time.time(),
+        )
+    )
+
+    assert connector.queries == [("compact_job_counts", {})]
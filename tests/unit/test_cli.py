@@ -47,6 +47,39 @@ def test_main(mocker):
         (["worker", "-q", ""], {"command": "worker", "queues": None}),
         (["worker", "--wait"], {"command": "worker", "wait": True}),
         (["worker", "--one-shot"], {"command": "worker", "wait": False}),
+        (
+            ["worker", "--process-pool-size", "4"],
+            {"command": "worker", "process_pool_size": 4},
+        ),
+        (
+            ["worker", "--processes", "4"],
+            {"command": "worker", "processes": 4},
+        ),
+        (
+            ["worker", "--thread-pool-size", "64"],
+            {"command": "worker", "thread_pool_size": 64},
+        ),
+        (
+            ["worker", "--metrics-port", "9090"],
+            {"command": "worker", "metrics_port": 9090},
+        ),
+        (
+            [
+                "worker",
+                "--profile-tasks",
+                "a,b",
+                "--profile-rate",
+                "0.01",
+                "--profile-directory",
+                "profiles",
+            ],
+            {
+                "command": "worker",
+                "profile_tasks": ["a", "b"],
+                "profile_rate": 0.01,
+                "profile_directory": "profiles",
+            },
+        ),
         (
             ["worker", "--no-listen-notify"],
             {"command": "worker", "listen_notify": False},
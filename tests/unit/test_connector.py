@@ -3,7 +3,7 @@ from __future__ import annotations
 import pytest
 
 from procrastinate import connector as connector_module
-from procrastinate import exceptions
+from procrastinate import exceptions, sql
 
 
 def test_open(connector):
@@ -38,3 +38,125 @@ async def test_missing_app_async(method_name, kwargs):
         # Some of this methods are not async but they'll raise
         # before the await is reached.
         await getattr(connector_module.BaseConnector(), method_name)(**kwargs)
+
+
+async def test_execute_queries_async(mocker):
+    connector = connector_module.BaseConnector()
+    execute_query_all_async = mocker.patch.object(
+        connector, "execute_query_all_async", side_effect=[[{"a": 1}], []]
+    )
+
+    results = await connector.execute_queries_async(
+        [{"query": "SELECT 1", "a": 1}, {"query": "SELECT 2"}]
+    )
+
+    assert results == [[{"a": 1}], []]
+    assert execute_query_all_async.call_args_list == [
+        mocker.call(query="SELECT 1", a=1),
+        mocker.call(query="SELECT 2"),
+    ]
+
+
+def test_query_stats():
+    stats = connector_module.QueryStats(window=2)
+    stats(query_name="a", pool_wait=0.5, duration=1.0, row_count=1, error=None)
+    stats(query_name="a", pool_wait=0.1, duration=3.0, row_count=None, error=None)
+    stats(query_name="a", pool_wait=None, duration=2.0, row_count=0, error=ValueError())
+
+    assert stats.summary() == {
+        "a": {
+            "calls": 3,
+            "errors": 1,
+            "duration_mean": 2.5,
+            "duration_p50": 2.0,
+            "duration_p95": 3.0,
+            "duration_p99": 3.0,
+            "duration_max": 3.0,
+            "pool_wait_mean": 0.3,
+            "pool_wait_p50": 0.1,
+            "pool_wait_p95": 0.5,
+            "pool_wait_p99": 0.5,
+            "pool_wait_max": 0.5,
+        }
+    }
+
+
+def test_query_stats_no_pool():
+    stats = connector_module.QueryStats()
+    stats(query_name="a", pool_wait=None, duration=1.0, row_count=1, error=None)
+
+    summary = stats.summary()["a"]
+    assert summary["duration_max"] == 1.0
+    assert summary["pool_wait_max"] is None
+
+
+def test_query_stats_reset():
+    stats = connector_module.QueryStats()
+    stats(query_name="a", pool_wait=None, duration=1.0, row_count=1, error=None)
+    stats.reset()
+
+    assert stats.summary() == {}
+
+
+def test_instrumentation_default():
+    connector = connector_module.BaseConnector()
+
+    assert isinstance(connector.instrumentation, connector_module.QueryStats)
+    assert connector.instrumentation is connector.instrumentation
+
+
+def test_measure_query(mocker):
+    connector = connector_module.BaseConnector()
+    connector.instrumentation = instrumentation = mocker.Mock()
+
+    with connector.measure_query(sql.queries["defer_jobs"]) as timer:
+        timer.acquired()
+        timer.set_row_count(2)
+
+    instrumentation.assert_called_once_with(
+        query_name="defer_jobs",
+        pool_wait=mocker.ANY,
+        duration=mocker.ANY,
+        row_count=2,
+        error=None,
+    )
+    assert instrumentation.call_args.kwargs["pool_wait"] >= 0
+
+
+def test_measure_query_error(mocker):
+    connector = connector_module.BaseConnector()
+    connector.instrumentation = instrumentation = mocker.Mock()
+    error = ValueError()
+
+    with pytest.raises(ValueError):
+        with connector.measure_query("SELECT 1") as timer:
+            timer.set_row_count(-1)
+            raise error
+
+    instrumentation.assert_called_once_with(
+        query_name="query",
+        pool_wait=None,
+        duration=mocker.ANY,
+        row_count=None,
+        error=error,
+    )
+
+
+def test_measure_query_disabled():
+    connector = connector_module.BaseConnector()
+    connector.instrumentation = None
+
+    with connector.measure_query("SELECT 1"):
+        pass
+
+
+def test_measure_query_instrumentation_error(mocker, caplog):
+    connector = connector_module.BaseConnector()
+    connector.instrumentation = mocker.Mock(side_effect=ValueError)
+
+    with connector.measure_query("SELECT 1"):
+        pass
+
+    assert [record.action for record in caplog.records] == [
+        "query_instrumentation_error"
+    ]
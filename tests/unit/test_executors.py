@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures.process
+import os
+import threading
+import time
+
+import pytest
+
+from procrastinate import blueprints, executors, job_context
+
+# Tasks running in the process pool need to be importable from the child processes
+blueprint = blueprints.Blueprint()
+
+
+@blueprint.task(executor="process")
+def process_task(a, b):
+    return a + b, os.getpid()
+
+
+@blueprint.task(executor="process")
+def failing_process_task():
+    raise ValueError("Nope")
+
+
+@blueprint.task(executor="process")
+def crashing_process_task():
+    os._exit(1)
+
+
+@blueprint.task(executor="process", pass_context=True)
+def process_task_with_context(context, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if context.should_abort():
+            return context.job.id, "aborted"
+        time.sleep(0.01)
+    return context.job.id, "not aborted"
+
+
+@blueprint.task(executor="slow_io")
+def thread_task():
+    return threading.current_thread().name
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    pool = executors.ProcessPool(size=2, import_paths=[__name__])
+    asyncio.run(pool.start())
+    yield pool
+    asyncio.run(pool.shutdown())
+
+
+@pytest.fixture
+def context(app, job_factory):
+    return job_context.JobContext(
+        app=app,
+        job=job_factory(id=1),
+        start_timestamp=time.time(),
+        abort_reason=lambda: None,
+    )
+
+
+async def test_process_pool_run(process_pool):
+    result, pid = await process_pool.run(process_task, a=1, b=2)
+
+    assert result == 3
+    assert pid != os.getpid()
+
+
+async def test_process_pool_run_exception(process_pool):
+    with pytest.raises(ValueError, match="Nope"):
+        await process_pool.run(failing_process_task)
+
+
+async def test_process_pool_run_with_context(process_pool, context):
+    assert await process_pool.run(process_task_with_context, context, timeout=0) == (
+        1,
+        "not aborted",
+    )
+
+
+async def test_process_pool_request_abort(process_pool, context):
+    run_task = asyncio.create_task(
+        process_pool.run(process_task_with_context, context, timeout=5)
+    )
+    await asyncio.sleep(0.2)
+
+    process_pool.request_abort(1, job_context.AbortReason.SHUTDOWN)
+
+    assert await asyncio.wait_for(run_task, timeout=5) == (1, "aborted")
+    # The abort request is forgotten once the job is over
+    assert process_pool._aborted_job_ids == set()
+
+
+async def test_process_pool_request_abort_does_not_block(process_pool, mocker):
+    released, written = threading.Event(), threading.Event()
+
+    def write(*args):
+        released.wait(5)
+        written.set()
+
+    abort_requests = process_pool._abort_requests
+    mock_abort_requests = process_pool._abort_requests = mocker.MagicMock()
+    mock_abort_requests.__setitem__.side_effect = write
+    try:
+        # Returns while the write to the manager is still blocked
+        process_pool.request_abort(1, job_context.AbortReason.SHUTDOWN)
+        assert not written.is_set()
+        released.set()
+        # Wait for the write to be done
+        await asyncio.wrap_future(
+            process_pool._abort_requests_writer.submit(lambda: None)
+        )
+    finally:
+        released.set()
+        process_pool._aborted_job_ids.discard(1)
+        process_pool._abort_requests = abort_requests
+
+    mock_abort_requests.__setitem__.assert_called_once_with(
+        1, job_context.AbortReason.SHUTDOWN.value
+    )
+
+
+async def test_process_pool_run_child_crash(caplog):
+    pool = executors.ProcessPool(size=1, import_paths=[__name__])
+    await pool.start()
+    try:
+        with pytest.raises(concurrent.futures.process.BrokenProcessPool):
+            await pool.run(crashing_process_task)
+
+        # The job failed, and the pool was restarted for the next ones
+        result, _ = await pool.run(process_task, a=1, b=2)
+        assert result == 3
+    finally:
+        await pool.shutdown()
+
+    assert [record.action for record in caplog.records] == ["restart_process_pool"]
+
+
+async def test_process_pool_not_started():
+    pool = executors.ProcessPool(size=1, import_paths=[])
+
+    with pytest.raises(AssertionError):
+        await pool.run(process_task, a=1, b=2)
+
+
+@pytest.fixture
+async def thread_pools():
+    pools = executors.ThreadPools(default_size=2, sizes={"slow_io": 1})
+    pools.start()
+    yield pools
+    await pools.shutdown()
+
+
+async def test_thread_pools_run_named_pool(thread_pools):
+    assert (await thread_pools.run(thread_task)).startswith("procrastinate-slow_io")
+
+
+async def test_thread_pools_run_default_pool(thread_pools, mocker):
+    mocker.patch.object(thread_task, "executor", None)
+
+    thread_name = await thread_pools.run(thread_task)
+
+    assert thread_name.startswith("procrastinate_")
+
+
+async def test_thread_pools_run_unknown_pool(thread_pools, mocker):
+    mocker.patch.object(thread_task, "executor", "unknown")
+
+    assert (await thread_pools.run(thread_task)).startswith("procrastinate_")
+
+
+async def test_thread_pools_run_in_pool(thread_pools):
+    thread_name = await thread_pools.run_in_pool(
+        "slow_io", lambda: threading.current_thread().name
+    )
+
+    assert thread_name.startswith("procrastinate-slow_io")
+
+
+async def test_thread_pools_run_without_default_pool():
+    pools = executors.ThreadPools(default_size=None, sizes={})
+    pools.start()
+
+    thread_name = await pools.run(thread_task)
+    await pools.shutdown()
+
+    assert not thread_name.startswith("procrastinate")
+
+
+def test_thread_pools_reserved_name():
+    with pytest.raises(ValueError, match="reserved for the process pool"):
+        executors.ThreadPools(default_size=None, sizes={"process": 2})
+
+
+async def test_thread_pools_shutdown(thread_pools):
+    await thread_pools.shutdown()
+
+    assert thread_pools.get_executor("slow_io") is None
+    assert thread_pools.get_executor(None) is None
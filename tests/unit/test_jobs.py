@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import datetime
+from unittest.mock import ANY
 
 import pytest
 
@@ -28,6 +29,8 @@ def test_job_get_context(job_factory, scheduled_at, context_scheduled_at):
         task_kwargs={"a": "b"},
         scheduled_at=scheduled_at,
         attempts=42,
+        created_at=scheduled_at,
+        started_at=scheduled_at,
     )
 
     assert job.log_context() == {
@@ -44,6 +47,10 @@ def test_job_get_context(job_factory, scheduled_at, context_scheduled_at):
         "call_string": "mytask[12](a='b')",
         "abort_requested": False,
         "worker_id": None,
+        "created_at": context_scheduled_at,
+        "started_at": context_scheduled_at,
+        "finished_at": None,
+        "trace_context": None,
     }
 
 
@@ -83,6 +90,10 @@ async def test_job_deferrer_defer_async(job_factory, job_manager, connector):
             "task_name": "mytask",
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         }
     }
 
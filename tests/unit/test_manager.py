@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import datetime
 import uuid
+from unittest.mock import ANY
 
 import pytest
 
@@ -42,6 +43,10 @@ async def test_manager_defer_job(job_manager, job_factory, connector):
             "task_name": "bla",
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         }
     }
 
@@ -84,6 +89,10 @@ async def test_manager_batch_defer_jobs(job_manager, job_factory, connector):
             "task_name": "bla",
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         },
         2: {
             "args": {"a": "c"},
@@ -98,6 +107,10 @@ async def test_manager_batch_defer_jobs(job_manager, job_factory, connector):
             "task_name": "bla",
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         },
     }
 
@@ -180,10 +193,34 @@ async def test_fetch_job_no_suitable_job(job_manager, worker_id):
 async def test_fetch_job(job_manager, job_factory, worker_id):
     job = job_factory(id=None)
     await job_manager.defer_job_async(job=job)
-    expected_job = job.evolve(id=1, status="doing", worker_id=worker_id)
+    expected_job = job.evolve(
+        id=1, status="doing", worker_id=worker_id, created_at=ANY, started_at=ANY
+    )
     assert await job_manager.fetch_job(queues=None, worker_id=worker_id) == expected_job
 
 
+async def test_fetch_jobs(job_manager, job_factory, worker_id):
+    job = job_factory(id=None, lock=None)
+    await job_manager.batch_defer_jobs_async(jobs=[job, job, job])
+
+    fetched_jobs = await job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=2
+    )
+
+    assert fetched_jobs == [
+        job.evolve(
+            id=1, status="doing", worker_id=worker_id, created_at=ANY, started_at=ANY
+        ),
+        job.evolve(
+            id=2, status="doing", worker_id=worker_id, created_at=ANY, started_at=ANY
+        ),
+    ]
+
+
+async def test_fetch_jobs_no_suitable_job(job_manager, worker_id):
+    assert await job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=5) == []
+
+
 async def test_get_stalled_jobs_by_started_not_stalled(job_manager, job_factory):
     job = job_factory(id=1)
     await job_manager.defer_job_async(job=job)
@@ -197,8 +234,14 @@ async def test_get_stalled_jobs_by_started_stalled(
     job = job_factory()
     await job_manager.defer_job_async(job=job)
     await job_manager.fetch_job(queues=None, worker_id=worker_id)
-    connector.events[1][-1]["at"] = conftest.aware_datetime(2000, 1, 1)
-    expected_job = job.evolve(id=1, status="doing", worker_id=worker_id)
+    connector.jobs[1]["started_at"] = conftest.aware_datetime(2000, 1, 1)
+    expected_job = job.evolve(
+        id=1,
+        status="doing",
+        worker_id=worker_id,
+        created_at=ANY,
+        started_at=conftest.aware_datetime(2000, 1, 1),
+    )
     with pytest.warns(DeprecationWarning, match=".*nb_seconds.*"):
         assert await job_manager.get_stalled_jobs(nb_seconds=1000) == [expected_job]
 
@@ -216,7 +259,9 @@ async def test_get_stalled_jobs_by_heartbeat_stalled(
     await job_manager.defer_job_async(job=job)
     await job_manager.fetch_job(queues=None, worker_id=worker_id)
     connector.workers = {1: conftest.aware_datetime(2000, 1, 1)}
-    expected_job = job.evolve(id=1, status="doing", worker_id=worker_id)
+    expected_job = job.evolve(
+        id=1, status="doing", worker_id=worker_id, created_at=ANY, started_at=ANY
+    )
     assert await job_manager.get_stalled_jobs() == [expected_job]
 
 
@@ -245,6 +290,33 @@ async def test_update_heartbeat(job_manager, connector, worker_id):
     assert first_heartbeat < connector.workers[worker_id] < utils.utcnow()
 
 
+async def test_pipeline(job_manager, job_factory, connector, worker_id):
+    await job_manager.defer_job_async(job=job_factory())
+    await job_manager.defer_job_async(job=job_factory())
+    await job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=2)
+    await job_manager.cancel_job_by_id_async(job_id=2, abort=True)
+
+    pipeline = job_manager.pipeline()
+    assert (
+        pipeline.finish_jobs_by_ids(
+            job_ids=[1], statuses=[jobs.Status.SUCCEEDED], delete_jobs=[False]
+        )
+        == 0
+    )
+    assert pipeline.update_heartbeat(worker_id=worker_id) == 1
+    assert pipeline.list_jobs_to_abort() == 2
+    assert len(pipeline) == 3
+
+    connector.queries = []
+    assert await pipeline.execute_async() == [None, None, [2]]
+    assert [query[0] for query in connector.queries] == [
+        "finish_jobs",
+        "update_heartbeat",
+        "list_jobs_to_abort",
+    ]
+    assert connector.jobs[1]["status"] == "succeeded"
+
+
 async def test_prune_stalled_workers(job_manager, connector, worker_id):
     assert len(connector.workers) == 1
 
@@ -271,14 +343,154 @@ async def test_prune_stalled_workers(job_manager, connector, worker_id):
 async def test_delete_old_jobs(
     job_manager, job_factory, connector, include_failed, statuses, mocker
 ):
-    await job_manager.delete_old_jobs(
+    deleted = await job_manager.delete_old_jobs(
         nb_hours=5, queue="marsupilami", include_failed=include_failed
     )
+    assert deleted == 0
     assert connector.queries == [
         (
             "delete_old_jobs",
-            {"nb_hours": 5, "queue": "marsupilami", "statuses": statuses},
+            {
+                "nb_hours": 5,
+                "queue": "marsupilami",
+                "statuses": statuses,
+                "chunk_size": None,
+            },
+        )
+    ]
+
+
+async def test_delete_old_jobs_chunks(job_manager, job_factory, connector, worker_id):
+    for _ in range(3):
+        job = await job_manager.defer_job_async(job=job_factory(id=None, lock=None))
+        await job_manager.fetch_job(queues=None, worker_id=worker_id)
+        await job_manager.finish_job(
+            job, status=jobs.Status.SUCCEEDED, delete_job=False
+        )
+    for job_row in connector.jobs.values():
+        job_row["finished_at"] -= datetime.timedelta(hours=2)
+
+    deleted = await job_manager.delete_old_jobs(nb_hours=1, chunk_size=2)
+
+    assert deleted == 3
+    assert connector.jobs == {}
+    # The second chunk isn't full, so there's no need for a third query
+    queries = [query for query, _ in connector.queries]
+    assert queries.count("delete_old_jobs") == 2
+
+
+async def test_delete_archived_jobs(job_manager, job_factory, connector, worker_id):
+    for _ in range(3):
+        job = await job_manager.defer_job_async(job=job_factory(id=None, lock=None))
+        await job_manager.fetch_job(queues=None, worker_id=worker_id)
+        await job_manager.finish_job(
+            job, status=jobs.Status.SUCCEEDED, delete_job=False
         )
+    for job_row in connector.jobs.values():
+        job_row["finished_at"] -= datetime.timedelta(hours=2)
+    await job_manager.archive_old_jobs(nb_hours=1)
+
+    deleted = await job_manager.delete_archived_jobs(nb_hours=1, chunk_size=2)
+
+    assert deleted == 3
+    assert connector.jobs_archive == {}
+    assert connector.events_archive == {}
+    assert connector.queries[-1] == (
+        "delete_archived_jobs",
+        {"nb_hours": 1, "queue": None, "chunk_size": 2},
+    )
+
+
+@pytest.mark.parametrize(
+    "method", ["delete_old_jobs", "archive_old_jobs", "delete_archived_jobs"]
+)
+@pytest.mark.parametrize("chunk_size", [0, -1])
+async def test_process_old_jobs_invalid_chunk_size(
+    job_manager, connector, method, chunk_size
+):
+    with pytest.raises(ValueError):
+        await getattr(job_manager, method)(nb_hours=1, chunk_size=chunk_size)
+
+    assert connector.queries == []
+
+
+async def test_archive_old_jobs(job_manager, job_factory, connector, worker_id):
+    job = await job_manager.defer_job_async(job=job_factory(id=None))
+    await job_manager.fetch_job(queues=None, worker_id=worker_id)
+    await job_manager.finish_job(job, status=jobs.Status.FAILED, delete_job=False)
+    connector.jobs[1]["finished_at"] -= datetime.timedelta(hours=2)
+
+    archived = await job_manager.archive_old_jobs(nb_hours=1, include_failed=True)
+
+    assert archived == 1
+    assert connector.jobs == {}
+    assert list(connector.jobs_archive) == [1]
+    assert connector.queries[-1] == (
+        "archive_old_jobs",
+        {
+            "nb_hours": 1,
+            "queue": None,
+            "statuses": ["succeeded", "failed"],
+            "chunk_size": None,
+        },
+    )
+
+
+async def test_list_jobs_include_archived(job_manager, job_factory, connector):
+    job = await job_manager.defer_job_async(job=job_factory())
+    connector.jobs_archive[1] = connector.jobs.pop(1)
+
+    assert await job_manager.list_jobs_async() == []
+    assert await job_manager.list_jobs_async(include_archived=True) == [
+        job.evolve(created_at=ANY)
+    ]
+
+
+@pytest.mark.parametrize(
+    "event_types, queue, expected",
+    [
+        (
+            ["failed"],
+            "marsupilami",
+            {"queue": "marsupilami", "event_types": ["failed"]},
+        ),
+        ((), None, {"queue": "*", "event_types": []}),
+        (None, None, {"queue": "*", "event_types": None}),
+    ],
+)
+async def test_set_recorded_events_async(
+    job_manager, connector, event_types, queue, expected
+):
+    await job_manager.set_recorded_events_async(event_types, queue=queue)
+
+    assert connector.queries == [("set_recorded_events", expected)]
+    assert connector.event_settings == {expected["queue"]: expected["event_types"]}
+
+
+async def test_job_counts_async(job_manager, connector):
+    await job_manager.enable_job_counts_async()
+    await job_manager.compact_job_counts_async()
+    await job_manager.disable_job_counts_async()
+
+    assert connector.queries == [
+        ("enable_job_counts", {}),
+        ("compact_job_counts", {}),
+        ("disable_job_counts", {}),
+    ]
+
+
+def test_job_counts(job_manager, connector):
+    job_manager.enable_job_counts()
+    job_manager.disable_job_counts()
+
+    assert connector.queries == [("enable_job_counts", {}), ("disable_job_counts", {})]
+
+
+def test_set_recorded_events(job_manager, connector):
+    job_manager.set_recorded_events(["failed"], queue="marsupilami")
+
+    assert connector.queries == [
+        ("set_recorded_events", {"queue": "marsupilami", "event_types": ["failed"]})
     ]
 
 
@@ -307,6 +519,78 @@ async def test_finish_job_with_deletion(job_manager, job_factory, connector):
     assert 1 not in connector.jobs
 
 
+async def test_finish_job_and_fetch_next(
+    job_manager, job_factory, connector, worker_id
+):
+    job = job_factory(id=None, lock=None)
+    await job_manager.batch_defer_jobs_async(jobs=[job, job])
+    fetched_job = await job_manager.fetch_job(queues=None, worker_id=worker_id)
+    assert fetched_job
+
+    next_job = await job_manager.finish_job_and_fetch_next(
+        job=fetched_job,
+        status=jobs.Status.SUCCEEDED,
+        delete_job=False,
+        queues=None,
+        worker_id=worker_id,
+    )
+
+    assert connector.queries[-1] == (
+        "finish_job_and_fetch_next",
+        {
+            "job_id": 1,
+            "status": "succeeded",
+            "delete_job": False,
+            "queues": None,
+            "worker_id": worker_id,
+        },
+    )
+    assert connector.jobs[1]["status"] == "succeeded"
+    assert next_job == job.evolve(
+        id=2, status="doing", worker_id=worker_id, created_at=ANY, started_at=ANY
+    )
+
+
+async def test_finish_job_and_fetch_next_no_suitable_job(
+    job_manager, job_factory, worker_id
+):
+    await job_manager.defer_job_async(job=job_factory(id=None))
+    fetched_job = await job_manager.fetch_job(queues=None, worker_id=worker_id)
+    assert fetched_job
+
+    assert (
+        await job_manager.finish_job_and_fetch_next(
+            job=fetched_job,
+            status=jobs.Status.FAILED,
+            delete_job=False,
+            queues=None,
+            worker_id=worker_id,
+        )
+        is None
+    )
+
+
+async def test_finish_jobs_by_ids_async(job_manager, job_factory, connector):
+    job = job_factory(id=None, lock=None)
+    await job_manager.batch_defer_jobs_async(jobs=[job, job])
+
+    await job_manager.finish_jobs_by_ids_async(
+        job_ids=[1, 2],
+        statuses=[jobs.Status.SUCCEEDED, jobs.Status.FAILED],
+        delete_jobs=[False, True],
+    )
+    assert connector.queries[-1] == (
+        "finish_jobs",
+        {
+            "job_ids": [1, 2],
+            "statuses": ["succeeded", "failed"],
+            "delete_jobs": [False, True],
+        },
+    )
+    assert connector.jobs[1]["status"] == "succeeded"
+    assert 2 not in connector.jobs
+
+
 def test_cancel_todo_job(job_manager, job_factory, connector):
     job = job_factory(id=1)
     job_manager.defer_job(job=job)
@@ -425,6 +709,30 @@ async def test_retry_job(job_manager, job_factory, connector):
     )
 
 
+async def test_retry_jobs_by_ids_async(job_manager, job_factory, connector):
+    job = job_factory(id=None, lock=None)
+    await job_manager.batch_defer_jobs_async(jobs=[job, job])
+    retry_at = conftest.aware_datetime(2000, 1, 1)
+
+    await job_manager.retry_jobs_by_ids_async(
+        job_ids=[1, 2],
+        retry_ats=[retry_at, retry_at],
+        priorities=[7, None],
+        queues=[None, "some_queue"],
+        locks=["some_lock", None],
+    )
+    assert connector.queries[-1] == (
+        "retry_jobs",
+        {
+            "job_ids": [1, 2],
+            "retry_ats": [retry_at, retry_at],
+            "new_priorities": [7, None],
+            "new_queue_names": [None, "some_queue"],
+            "new_locks": ["some_lock", None],
+        },
+    )
+
+
 @pytest.mark.parametrize(
     "queues, channels",
     [
@@ -580,13 +888,37 @@ def test_retry_job_by_id(job_manager, connector, job_factory, dt):
 async def test_list_jobs_async(job_manager, job_factory):
     job = await job_manager.defer_job_async(job=job_factory())
 
-    assert await job_manager.list_jobs_async() == [job]
+    assert await job_manager.list_jobs_async() == [job.evolve(created_at=ANY)]
+
+
+async def test_list_jobs_async_limit_after_id(job_manager, job_factory):
+    for _ in range(4):
+        await job_manager.defer_job_async(job=job_factory())
+
+    jobs = await job_manager.list_jobs_async(limit=2, after_id=1)
+
+    assert [job.id for job in jobs] == [2, 3]
+
+
+async def test_iter_jobs_async(job_manager, job_factory, connector):
+    for _ in range(5):
+        await job_manager.defer_job_async(job=job_factory())
+    connector.queries = []
+
+    jobs = [job async for job in job_manager.iter_jobs_async(page_size=2)]
+
+    assert [job.id for job in jobs] == [1, 2, 3, 4, 5]
+    assert [(query["after_id"], query["limit"]) for _, query in connector.queries] == [
+        (None, 2),
+        (2, 2),
+        (4, 2),
+    ]
 
 
 def test_list_jobs(job_manager, job_factory):
     job = job_manager.defer_job(job=job_factory())
 
-    assert job_manager.list_jobs() == [job]
+    assert job_manager.list_jobs() == [job.evolve(created_at=ANY)]
 
 
 async def test_list_queues_async(job_manager, job_factory):
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+
+import pytest
+
+from procrastinate import metrics
+
+from .. import conftest
+
+
+def test_counter_render():
+    counter = metrics.Counter("jobs_total", "Number of jobs", ["task"])
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('b"\\\n')
+
+    assert counter.render() == [
+        "# HELP jobs_total Number of jobs",
+        "# TYPE jobs_total counter",
+        'jobs_total{task="a"} 3.0',
+        'jobs_total{task="b\\"\\\\\\n"} 1.0',
+    ]
+
+
+def test_gauge_render():
+    gauge = metrics.Gauge("running", "Running jobs", lambda: 4)
+
+    assert gauge.render()[2:] == ["running 4.0"]
+
+
+def test_histogram_render():
+    histogram = metrics.Histogram("duration", "Duration", ["task"], buckets=[1, 0.1])
+    histogram.observe(0.1, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(10, "a")
+
+    assert histogram.render()[2:] == [
+        'duration_bucket{task="a",le="0.1"} 1.0',
+        'duration_bucket{task="a",le="1.0"} 2.0',
+        'duration_bucket{task="a",le="+Inf"} 3.0',
+        'duration_sum{task="a"} 10.6',
+        'duration_count{task="a"} 3.0',
+    ]
+
+
+@pytest.fixture
+def worker_metrics():
+    return metrics.WorkerMetrics(concurrency=4, running_jobs=lambda: 1)
+
+
+def test_worker_metrics_job_started(worker_metrics, job_factory):
+    job = job_factory(
+        task_name="t",
+        queue="q",
+        created_at=conftest.aware_datetime(2000, 1, 1),
+        scheduled_at=conftest.aware_datetime(2000, 1, 1, second=10),
+        started_at=conftest.aware_datetime(2000, 1, 1, second=12),
+    )
+
+    worker_metrics.job_started(job)
+
+    assert worker_metrics.jobs_started.values == {("t", "q"): 1}
+    assert worker_metrics.job_queue_wait.sums == {("t", "q"): 2}
+
+
+def test_worker_metrics_job_started_not_scheduled(worker_metrics, job_factory):
+    created_at = conftest.aware_datetime(2000, 1, 1)
+    job = job_factory(
+        task_name="t",
+        queue="q",
+        created_at=created_at,
+        started_at=created_at + datetime.timedelta(seconds=3),
+    )
+
+    worker_metrics.job_started(job)
+
+    assert worker_metrics.job_queue_wait.sums == {("t", "q"): 3}
+
+
+def test_worker_metrics_job_started_no_timestamps(worker_metrics, job_factory):
+    worker_metrics.job_started(job_factory(task_name="t", queue="q"))
+
+    assert worker_metrics.jobs_started.values == {("t", "q"): 1}
+    assert worker_metrics.job_queue_wait.sums == {}
+
+
+def test_worker_metrics_job_ended(worker_metrics, job_factory):
+    job = job_factory(task_name="t", queue="q")
+
+    worker_metrics.job_ended(job, outcome="succeeded", duration=0.5)
+    worker_metrics.job_ended(job, outcome="retried", duration=None)
+
+    assert worker_metrics.jobs_ended.values == {
+        ("t", "q", "succeeded"): 1,
+        ("t", "q", "retried"): 1,
+    }
+    assert worker_metrics.job_duration.sums == {("t", "q"): 0.5}
+
+
+def test_worker_metrics_render(worker_metrics):
+    worker_metrics.jobs_fetched(0.002)
+
+    rendered = worker_metrics.render()
+
+    assert 'procrastinate_fetch_duration_seconds_bucket{le="0.005"} 1.0\n' in rendered
+    assert "procrastinate_worker_concurrency 4.0\n" in rendered
+    assert "procrastinate_worker_running_jobs 1.0\n" in rendered
+    assert "procrastinate_worker_saturation 0.25\n" in rendered
+
+
+async def request(port: int, request_line: str) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{request_line}\r\nHost: localhost\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+@pytest.fixture
+async def metrics_server(worker_metrics):
+    server = await metrics.start_http_server(worker_metrics, port=0, host="127.0.0.1")
+    yield server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+
+async def test_start_http_server(metrics_server, worker_metrics):
+    response = await request(metrics_server, "GET /metrics HTTP/1.1")
+
+    headers, body = response.split(b"\r\n\r\n")
+    assert headers.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert f"Content-Type: {metrics.CONTENT_TYPE}".encode() in headers
+    assert body == worker_metrics.render().encode()
+
+
+@pytest.mark.parametrize(
+    "request_line, status",
+    [
+        ("GET /other HTTP/1.1", b"404 Not Found"),
+        ("POST /metrics HTTP/1.1", b"405 Method Not Allowed"),
+    ],
+)
+async def test_start_http_server_error(metrics_server, request_line, status):
+    response = await request(metrics_server, request_line)
+
+    assert response.startswith(b"HTTP/1.1 " + status)
+
+
+async def test_start_http_server_head(metrics_server):
+    response = await request(metrics_server, "HEAD /metrics HTTP/1.1")
+
+    assert response.endswith(b"\r\n\r\n")
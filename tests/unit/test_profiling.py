@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import pstats
+
+import pytest
+
+from procrastinate import profiling
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return profiling.Profiler(task_names=["foo"], directory=tmp_path)
+
+
+def function_names(stats: pstats.Stats) -> set[str]:
+    return {name for _, _, name in stats.stats}  # type: ignore
+
+
+def test_should_profile(profiler):
+    assert profiler.should_profile("foo") is True
+    assert profiler.should_profile("bar") is False
+
+
+def test_should_profile_rate(mocker):
+    mocker.patch("random.random", return_value=0.05)
+
+    assert profiling.Profiler(rate=0.1).should_profile("bar") is True
+    assert profiling.Profiler(rate=0.01).should_profile("bar") is False
+
+
+def test_should_profile_already_profiling(profiler):
+    with profiler.profile("foo"):
+        assert profiler.should_profile("foo") is False
+
+    assert profiler.should_profile("foo") is True
+    # Nothing was profiled
+    assert profiler.stats == {}
+
+
+def some_work():
+    return sum(range(10))
+
+
+def test_profile(profiler, tmp_path):
+    for _ in range(2):
+        with profiler.profile("foo") as profile:
+            profiling.profile_function(some_work, profile)()
+    profiler.write()
+
+    stats = pstats.Stats(str(tmp_path / "foo.prof"))
+    assert "some_work" in function_names(stats)
+    assert [
+        calls
+        for (_, _, name), (calls, *_) in stats.stats.items()  # type: ignore
+        if name == "some_work"
+    ] == [2]
+
+
+def test_profile_write_error(tmp_path, caplog):
+    (tmp_path / "file").touch()
+    profiler = profiling.Profiler(directory=tmp_path / "file")
+
+    with profiler.profile("foo") as profile:
+        profiling.profile_function(some_work, profile)()
+    profiler.write()
+
+    assert [record.action for record in caplog.records] == ["write_profile_error"]
+    assert "foo" in profiler.stats
+
+
+def test_profile_write_interval(tmp_path, mocker):
+    monotonic = mocker.patch("time.monotonic", return_value=100.0)
+    profiler = profiling.Profiler(directory=tmp_path, write_interval=10)
+    path = tmp_path / "foo.prof"
+
+    with profiler.profile("foo") as profile:
+        profiling.profile_function(some_work, profile)()
+    # Not written after each job
+    assert not path.exists()
+
+    monotonic.return_value = 110.0
+    with profiler.profile("foo") as profile:
+        profiling.profile_function(some_work, profile)()
+    assert path.exists()
+    path.unlink()
+
+    # Nothing left to write
+    profiler.write()
+    assert not path.exists()
+
+
+def test_profile_function_enable_error(mocker):
+    profile = mocker.Mock(spec=cProfile.Profile, **{"enable.side_effect": ValueError})
+
+    assert profiling.profile_function(some_work, profile)() == 45
+    profile.disable.assert_not_called()
+
+
+async def test_profile_coroutine_function():
+    profile = cProfile.Profile()
+
+    async def job(a):
+        await asyncio.sleep(0)
+        some_work()
+        return a
+
+    async def other():
+        some_work()
+
+    other_task = asyncio.create_task(other())
+    assert await profiling.profile_coroutine_function(job, profile)(a=1) == 1
+    await other_task
+
+    names = function_names(pstats.Stats(profile))
+    assert "job" in names
+    # The other coroutine ran while the job was suspended
+    assert "other" not in names
+
+
+async def test_profile_coroutine_function_exception():
+    profile = cProfile.Profile()
+
+    async def job():
+        await asyncio.sleep(0)
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        await profiling.profile_coroutine_function(job, profile)()
+
+
+async def test_profile_coroutine_function_cancelled():
+    profile = cProfile.Profile()
+    cancelled = False
+
+    async def job():
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    task = asyncio.create_task(profiling.profile_coroutine_function(job, profile)())
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert cancelled is True
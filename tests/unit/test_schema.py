@@ -25,3 +25,19 @@ async def test_apply_schema_async(app, connector):
     await app.schema_manager.apply_schema_async()
 
     assert connector.queries == [("apply_schema", {})]
+
+
+def test_apply_schema_partitioned_events(app, connector):
+    # The schema is sent with its "%" escaped
+    schema = app.schema_manager.get_schema().replace("%", "%%")
+    connector.reverse_queries[schema] = "apply_schema"
+    connector.set_schema_version_run = lambda *a, **kw: None
+    app.schema_manager.apply_schema(partitioned_events=True)
+
+    assert connector.queries == [("apply_schema", {}), ("partition_events", {})]
+
+
+async def test_partition_events_async(app, connector):
+    await app.schema_manager.partition_events_async()
+
+    assert connector.queries == [("partition_events", {})]
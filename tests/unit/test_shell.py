@@ -67,6 +67,9 @@ async def test_list_jobs(
                 "lock": None,
                 "status": None,
                 "worker_id": None,
+                "include_archived": False,
+                "limit": 1000,
+                "after_id": None,
             },
         )
     ]
@@ -118,6 +121,9 @@ async def test_list_jobs_filters(
                 "lock": "lock2",
                 "status": "todo",
                 "worker_id": None,
+                "include_archived": False,
+                "limit": 1000,
+                "after_id": None,
             },
         )
     ]
@@ -161,6 +167,48 @@ async def test_list_jobs_details(
     ]
 
 
+async def test_list_jobs_archived(
+    shell: shell_module.ProcrastinateShell,
+    connector: testing.InMemoryConnector,
+    capsys: pytest.CaptureFixture,
+):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="queue1",
+                task_name="task1",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            ),
+            t.JobToDefer(
+                queue_name="queue2",
+                task_name="task2",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            ),
+        ]
+    )
+    connector.jobs[1].update(status="succeeded", finished_at=utils.utcnow())
+    await connector.archive_old_jobs_one(
+        nb_hours=0, queue=None, statuses=["succeeded"], chunk_size=None
+    )
+
+    await utils.sync_to_async(shell.do_list_jobs, "")
+    await utils.sync_to_async(shell.do_list_jobs, "archived")
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        "#2 task2 on queue2 - [todo]",
+        "#1 task1 on queue1 - [succeeded]",
+        "#2 task2 on queue2 - [todo]",
+    ]
+
+
 async def test_list_jobs_empty(
     shell: shell_module.ProcrastinateShell,
     connector: testing.InMemoryConnector,
@@ -526,3 +574,34 @@ async def test_cancel(
     await utils.sync_to_async(shell.do_cancel, "1")
     captured = capsys.readouterr()
     assert captured.out.strip() == "#1 task on queue - [cancelled]"
+
+
+async def test_list_jobs_limit_after(
+    shell: shell_module.ProcrastinateShell,
+    connector: testing.InMemoryConnector,
+    capsys: pytest.CaptureFixture,
+):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="queue",
+                task_name=f"task{i}",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+            for i in range(1, 5)
+        ]
+    )
+
+    await utils.sync_to_async(shell.do_list_jobs, "after=1 limit=2")
+
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        "#2 task2 on queue - [todo]",
+        "#3 task3 on queue - [todo]",
+    ]
+    assert [query["limit"] for _, query in connector.queries] == [2]
+    assert connector.queries[0][1]["after_id"] == 1
@@ -31,3 +31,8 @@ INSERT INTO blou VALUES(%(yay)s)
 
 def test_get_queries():
     assert {"defer_jobs", "fetch_job", "finish_job"} <= set(sql.get_queries())
+
+
+def test_prepared_queries():
+    assert sql.queries["fetch_job"] in sql.prepared_queries
+    assert sql.queries["list_jobs"] not in sql.prepared_queries
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+
+from procrastinate import exceptions, supervisor
+
+
+@pytest.fixture
+def supervisor_(app):
+    return supervisor.Supervisor(app, processes=2, check_interval=0.01)
+
+
+def test_get_worker_options(app):
+    app.worker_defaults = {"concurrency": 4, "name": "w"}
+    supervisor_ = supervisor.Supervisor(app, processes=2, queues=["a"], concurrency=8)
+
+    assert supervisor_.get_worker_options(0) == {
+        "concurrency": 8,
+        "name": "w-0",
+        "queues": ["a"],
+        "run_periodic_deferrer": True,
+    }
+    assert supervisor_.get_worker_options(1) == {
+        "concurrency": 8,
+        "name": "w-1",
+        "queues": ["a"],
+        "run_periodic_deferrer": False,
+    }
+
+
+def test_get_worker_options_default_name(supervisor_):
+    assert supervisor_.get_worker_options(1)["name"] == "worker-1"
+
+
+def test_get_worker_options_no_periodic_deferrer(app):
+    supervisor_ = supervisor.Supervisor(app, processes=2, run_periodic_deferrer=False)
+
+    assert supervisor_.get_worker_options(0)["run_periodic_deferrer"] is False
+
+
+def test_get_worker_options_metrics_port(app):
+    supervisor_ = supervisor.Supervisor(app, processes=2, metrics_port=9090)
+
+    assert supervisor_.get_worker_options(0)["metrics_port"] == 9090
+    assert supervisor_.get_worker_options(1)["metrics_port"] == 9091
+
+
+def test_get_worker_options_profile_directory(app):
+    supervisor_ = supervisor.Supervisor(
+        app, processes=2, profile_rate=0.1, profile_directory="profiles"
+    )
+
+    assert supervisor_.get_worker_options(1)["profile_directory"] == os.path.join(
+        "profiles", "1"
+    )
+
+
+def test_get_worker_options_no_profile(app):
+    supervisor_ = supervisor.Supervisor(app, processes=2)
+
+    assert "profile_directory" not in supervisor_.get_worker_options(1)
+
+
+def test_check_processes(supervisor_, mocker, caplog):
+    caplog.set_level("WARNING")
+    running = mocker.Mock(**{"is_alive.return_value": True})
+    crashed = mocker.Mock(exitcode=1, pid=42, **{"is_alive.return_value": False})
+    restarted = mocker.Mock(**{"is_alive.return_value": True})
+    start_process = mocker.patch.object(
+        supervisor_, "_start_process", return_value=restarted
+    )
+    supervisor_._processes = [running, crashed]
+
+    assert supervisor_._check_processes() is True
+
+    start_process.assert_called_once_with(1)
+    assert supervisor_._processes == [running, restarted]
+    assert [record.action for record in caplog.records] == ["restart_worker_process"]
+
+
+def test_check_processes_backoff(supervisor_, mocker, caplog):
+    caplog.set_level("WARNING")
+    monotonic = mocker.patch("time.monotonic", return_value=100.0)
+    crashed = mocker.Mock(exitcode=1, pid=42, **{"is_alive.return_value": False})
+    start_process = mocker.patch.object(
+        supervisor_, "_start_process", return_value=crashed
+    )
+    supervisor_._processes = [crashed]
+
+    # Restarted right away the first time
+    assert supervisor_._check_processes() is True
+    assert start_process.call_count == 1
+
+    # Then after 2 check intervals, as it crashed again right after starting
+    supervisor_._started_at[0] = 100.0
+    assert supervisor_._check_processes() is True
+    assert start_process.call_count == 1
+    monotonic.return_value = 100.02
+    assert supervisor_._check_processes() is True
+    assert start_process.call_count == 2
+
+    # Then after 4 check intervals
+    supervisor_._started_at[0] = 100.02
+    assert supervisor_._check_processes() is True
+    monotonic.return_value = 100.05
+    assert supervisor_._check_processes() is True
+    assert start_process.call_count == 2
+    monotonic.return_value = 100.06
+    assert supervisor_._check_processes() is True
+    assert start_process.call_count == 3
+
+    assert [record.delay for record in caplog.records] == [0, 0.02, 0.04]
+
+
+def test_check_processes_backoff_reset(supervisor_, mocker):
+    mocker.patch("time.monotonic", return_value=1000.0)
+    crashed = mocker.Mock(exitcode=1, pid=42, **{"is_alive.return_value": False})
+    start_process = mocker.patch.object(supervisor_, "_start_process")
+    supervisor_._processes = [crashed]
+    # It crashed a few times, but ran for a while before crashing again
+    supervisor_._failures[0] = 5
+    supervisor_._started_at[0] = 1000.0 - supervisor.MAX_RESTART_DELAY
+
+    supervisor_._check_processes()
+
+    start_process.assert_called_once_with(0)
+    assert supervisor_._failures[0] == 1
+
+
+def test_get_restart_delay(supervisor_):
+    supervisor_.check_interval = 1
+
+    assert [supervisor_._get_restart_delay(failures) for failures in range(1, 9)] == [
+        0,
+        2,
+        4,
+        8,
+        16,
+        32,
+        60,
+        60,
+    ]
+
+
+def test_check_processes_all_done(supervisor_, mocker):
+    done = mocker.Mock(exitcode=0, **{"is_alive.return_value": False})
+    start_process = mocker.patch.object(supervisor_, "_start_process")
+    supervisor_._processes = [done, done]
+
+    assert supervisor_._check_processes() is False
+
+    start_process.assert_not_called()
+
+
+async def test_run_until_workers_are_done(supervisor_, caplog):
+    caplog.set_level("INFO")
+    supervisor_.worker_options = {"wait": False, "install_signal_handlers": False}
+
+    await asyncio.wait_for(supervisor_.run(), 10)
+
+    assert [process.exitcode for process in supervisor_._processes] == [0, 0]
+    assert [
+        record.action
+        for record in caplog.records
+        if record.name == "procrastinate.supervisor"
+    ] == ["start_worker_process", "start_worker_process", "stop_worker_processes"]
+
+
+async def test_run_stop(supervisor_):
+    run_task = asyncio.create_task(supervisor_.run())
+    await asyncio.sleep(0.5)
+
+    supervisor_.stop()
+    await asyncio.wait_for(run_task, 10)
+
+    # The workers received SIGTERM and stopped gracefully
+    assert [process.exitcode for process in supervisor_._processes] == [0, 0]
+
+
+async def test_run_external_pool(supervisor_, mocker):
+    supervisor_.app.connector._pool_externally_set = True
+    start_process = mocker.patch.object(supervisor_, "_start_process")
+
+    with pytest.raises(exceptions.ExternalPoolNotSupported):
+        await supervisor_.run()
+
+    start_process.assert_not_called()
@@ -3,7 +3,7 @@ from __future__ import annotations
 import psycopg
 import pytest
 
-from procrastinate import exceptions, sync_psycopg_connector
+from procrastinate import exceptions, sql, sync_psycopg_connector
 
 
 def test_wrap_exceptions_wraps():
@@ -70,3 +70,21 @@ def test_get_pool():
 
     with pytest.raises(exceptions.AppNotOpen):
         _ = connector.pool
+
+
+@pytest.mark.parametrize(
+    "query_name, prepare_statements, expected",
+    [
+        ("fetch_job", True, True),
+        ("list_jobs", True, None),
+        ("fetch_job", False, False),
+        ("list_jobs", False, False),
+    ],
+)
+def test_get_prepare(query_name, prepare_statements, expected):
+    assert (
+        sync_psycopg_connector.get_prepare(
+            sql.queries[query_name], prepare_statements=prepare_statements
+        )
+        is expected
+    )
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from unittest.mock import ANY
+
 import pytest
 
 from procrastinate import tasks, utils
@@ -19,6 +21,20 @@ def test_task_init_with_no_name(app: App):
     assert task.name == "tests.unit.test_tasks.task_func"
 
 
+def test_task_init_process_executor(app: App):
+    task = tasks.Task(task_func, blueprint=app, queue="queue", executor="process")
+
+    assert task.executor == "process"
+
+
+def test_task_init_process_executor_async_task(app: App):
+    async def async_task_func():
+        pass
+
+    with pytest.raises(ValueError, match="cannot run in the process pool"):
+        tasks.Task(async_task_func, blueprint=app, queue="queue", executor="process")
+
+
 async def test_task_defer_async(app: App, connector):
     task = tasks.Task(task_func, blueprint=app, queue="queue")
 
@@ -40,6 +56,10 @@ async def test_task_defer_async(app: App, connector):
             "attempts": 0,
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         }
     }
 
@@ -65,6 +85,10 @@ async def test_task_batch_defer_async(app: App, connector):
             "attempts": 0,
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         },
         2: {
             "id": 2,
@@ -79,6 +103,10 @@ async def test_task_batch_defer_async(app: App, connector):
             "attempts": 0,
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         },
     }
 
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import asyncio
-from unittest.mock import AsyncMock
+import json
+from collections import deque
+from unittest.mock import ANY, AsyncMock
 
 import pytest
 
-from procrastinate import exceptions, testing, utils
+from procrastinate import connector as connector_module
+from procrastinate import exceptions, sql, testing, utils
 from procrastinate import types as t
 
 from .. import conftest
@@ -31,6 +34,15 @@ async def test_generic_execute(connector: testing.InMemoryConnector):
     assert result == {"i": "j"}
 
 
+async def test_generic_execute_query_stats(connector: testing.InMemoryConnector):
+    await connector.execute_query_all_async(sql.queries["list_locks"])
+
+    stats = connector.instrumentation
+    assert isinstance(stats, connector_module.QueryStats)
+    assert stats.calls == {"list_locks": 1}
+    assert stats.pool_waits["list_locks"] == deque()
+
+
 async def test_execute_query(connector: testing.InMemoryConnector):
     connector.generic_execute = AsyncMock()
     await connector.execute_query_async("a", b="c")
@@ -88,6 +100,10 @@ async def test_defer_one_job(connector: testing.InMemoryConnector):
             "attempts": 0,
             "abort_requested": False,
             "worker_id": None,
+            "created_at": ANY,
+            "started_at": None,
+            "finished_at": None,
+            "trace_context": None,
         }
     }
     assert connector.jobs[1] == jobs[0]
@@ -241,6 +257,7 @@ async def test_select_stalled_jobs_by_started_all(connector: testing.InMemoryCon
             "status": "succeeded",
             "queue_name": "marsupilami",
             "task_name": "mytask",
+            "started_at": conftest.aware_datetime(2000, 1, 1),
         },
         # This one because it's the wrong queue
         2: {
@@ -248,6 +265,7 @@ async def test_select_stalled_jobs_by_started_all(connector: testing.InMemoryCon
             "status": "doing",
             "queue_name": "other_queue",
             "task_name": "mytask",
+            "started_at": conftest.aware_datetime(2000, 1, 1),
         },
         # This one because of the task
         3: {
@@ -255,6 +273,7 @@ async def test_select_stalled_jobs_by_started_all(connector: testing.InMemoryCon
             "status": "doing",
             "queue_name": "marsupilami",
             "task_name": "my_other_task",
+            "started_at": conftest.aware_datetime(2000, 1, 1),
         },
         # This one because it's not stalled
         4: {
@@ -262,6 +281,7 @@ async def test_select_stalled_jobs_by_started_all(connector: testing.InMemoryCon
             "status": "doing",
             "queue_name": "marsupilami",
             "task_name": "mytask",
+            "started_at": conftest.aware_datetime(2100, 1, 1),
         },
         # We're taking this one.
         5: {
@@ -269,6 +289,7 @@ async def test_select_stalled_jobs_by_started_all(connector: testing.InMemoryCon
             "status": "doing",
             "queue_name": "marsupilami",
             "task_name": "mytask",
+            "started_at": conftest.aware_datetime(2000, 1, 1),
         },
         # And this one
         6: {
@@ -276,16 +297,9 @@ async def test_select_stalled_jobs_by_started_all(connector: testing.InMemoryCon
             "status": "doing",
             "queue_name": "marsupilami",
             "task_name": "mytask",
+            "started_at": conftest.aware_datetime(2000, 1, 1),
         },
     }
-    connector.events = {
-        1: [{"at": conftest.aware_datetime(2000, 1, 1)}],
-        2: [{"at": conftest.aware_datetime(2000, 1, 1)}],
-        3: [{"at": conftest.aware_datetime(2000, 1, 1)}],
-        4: [{"at": conftest.aware_datetime(2100, 1, 1)}],
-        5: [{"at": conftest.aware_datetime(2000, 1, 1)}],
-        6: [{"at": conftest.aware_datetime(2000, 1, 1)}],
-    }
 
     results = await connector.select_stalled_jobs_by_started_all(
         queue="marsupilami", task_name="mytask", nb_seconds=0
@@ -361,28 +375,131 @@ async def test_select_stalled_jobs_by_heartbeat_all(
     assert [job["id"] for job in results] == [5, 6]
 
 
-async def test_delete_old_jobs_run(connector: testing.InMemoryConnector):
+async def test_delete_old_jobs_one(connector: testing.InMemoryConnector):
     connector.jobs = {
         # We're not deleting this job because it's "doing"
-        1: {"id": 1, "status": "doing", "queue_name": "marsupilami"},
+        1: {
+            "id": 1,
+            "status": "doing",
+            "queue_name": "marsupilami",
+            "finished_at": None,
+        },
         # This one because it's the wrong queue
-        2: {"id": 2, "status": "succeeded", "queue_name": "other_queue"},
+        2: {
+            "id": 2,
+            "status": "succeeded",
+            "queue_name": "other_queue",
+            "finished_at": conftest.aware_datetime(2000, 1, 1),
+        },
         # This one is not old enough
-        3: {"id": 3, "status": "succeeded", "queue_name": "marsupilami"},
+        3: {
+            "id": 3,
+            "status": "succeeded",
+            "queue_name": "marsupilami",
+            "finished_at": utils.utcnow(),
+        },
         # This one we delete
-        4: {"id": 4, "status": "succeeded", "queue_name": "marsupilami"},
+        4: {
+            "id": 4,
+            "status": "succeeded",
+            "queue_name": "marsupilami",
+            "finished_at": conftest.aware_datetime(2000, 1, 1),
+        },
+    }
+
+    result = await connector.delete_old_jobs_one(
+        queue="marsupilami", statuses=("succeeded"), nb_hours=1, chunk_size=None
+    )
+    assert result == {"count": 1}
+    assert list(connector.jobs) == [1, 2, 3]
+
+
+async def test_delete_old_jobs_one_chunk(connector: testing.InMemoryConnector):
+    connector.jobs = {
+        id: {
+            "id": id,
+            "status": "succeeded",
+            "queue_name": "marsupilami",
+            "finished_at": conftest.aware_datetime(2000, 1, 10 - id),
+        }
+        for id in range(1, 6)
+    }
+
+    result = await connector.delete_old_jobs_one(
+        queue=None, statuses=["succeeded"], nb_hours=1, chunk_size=2
+    )
+
+    # The jobs that finished first are deleted first
+    assert result == {"count": 2}
+    assert list(connector.jobs) == [1, 2, 3]
+
+
+async def test_archive_old_jobs_one(connector: testing.InMemoryConnector):
+    connector.jobs = {
+        1: {
+            "id": 1,
+            "status": "succeeded",
+            "queue_name": "marsupilami",
+            "finished_at": conftest.aware_datetime(2000, 1, 1),
+        },
+        2: {
+            "id": 2,
+            "status": "succeeded",
+            "queue_name": "marsupilami",
+            "finished_at": utils.utcnow(),
+        },
+    }
+    connector.events = {1: [{"type": "succeeded", "at": utils.utcnow()}], 2: []}
+
+    result = await connector.archive_old_jobs_one(
+        queue=None, statuses=["succeeded"], nb_hours=1, chunk_size=None
+    )
+
+    assert result == {"count": 1}
+    assert list(connector.jobs) == [2]
+    assert list(connector.jobs_archive) == [1]
+    assert connector.events_archive == {1: [{"type": "succeeded", "at": ANY}]}
+    assert list(connector.events) == [2]
+
+
+async def test_delete_archived_jobs_one(connector: testing.InMemoryConnector):
+    connector.jobs_archive = {
+        id: {
+            "id": id,
+            "status": "failed",
+            "queue_name": "marsupilami",
+            "finished_at": conftest.aware_datetime(2000, 1, 10 - id),
+        }
+        for id in range(1, 4)
     }
-    connector.events = {
-        1: [{"type": "succeeded", "at": conftest.aware_datetime(2000, 1, 1)}],
-        2: [{"type": "succeeded", "at": conftest.aware_datetime(2000, 1, 1)}],
-        3: [{"type": "succeeded", "at": utils.utcnow()}],
-        4: [{"type": "succeeded", "at": conftest.aware_datetime(2000, 1, 1)}],
+    connector.jobs_archive[4] = {
+        "id": 4,
+        "status": "succeeded",
+        "queue_name": "marsupilami",
+        "finished_at": utils.utcnow(),
     }
+    connector.events_archive = {id: [] for id in range(1, 5)}
 
-    await connector.delete_old_jobs_run(
-        queue="marsupilami", statuses=("succeeded"), nb_hours=0
+    result = await connector.delete_archived_jobs_one(
+        queue="marsupilami", nb_hours=1, chunk_size=2
     )
-    assert 4 not in connector.jobs
+
+    # The jobs that finished first are deleted first
+    assert result == {"count": 2}
+    assert list(connector.jobs_archive) == [1, 4]
+    assert list(connector.events_archive) == [1, 4]
+
+
+async def test_list_jobs_all_include_archived(connector: testing.InMemoryConnector):
+    connector.jobs = {2: {"id": 2, "queue_name": "a"}}
+    connector.jobs_archive = {
+        1: {"id": 1, "queue_name": "a"},
+        3: {"id": 3, "queue_name": "b"},
+    }
+
+    jobs = await connector.list_jobs_all(include_archived=True, queue_name="a")
+
+    assert [job["id"] for job in jobs] == [1, 2]
 
 
 async def test_fetch_job_one(connector: testing.InMemoryConnector):
@@ -534,6 +651,149 @@ async def test_fetch_job_one_none_lock(connector: testing.InMemoryConnector):
     assert (await connector.fetch_job_one(queues=None, worker_id=1))["id"] == 2
 
 
+async def test_fetch_jobs_all(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="marsupilami",
+                task_name="mytask",
+                priority=priority,
+                lock=lock,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+            for priority, lock in [(0, "a"), (0, "a"), (5, None), (0, None)]
+        ]
+    )
+
+    connector.workers = {1: utils.utcnow()}
+
+    # The second job is skipped because it shares the lock of the first one
+    assert [
+        job["id"]
+        for job in await connector.fetch_jobs_all(queues=None, worker_id=1, limit=5)
+    ] == [3, 1, 4]
+    assert await connector.fetch_jobs_all(queues=None, worker_id=1, limit=5) == []
+
+
+async def test_fetch_job_one_lock_next_job(connector: testing.InMemoryConnector):
+    # Like in the database, a job waits for the jobs with the same lock and a
+    # higher priority, even on other queues or scheduled later
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name=queue_name,
+                task_name="mytask",
+                priority=priority,
+                lock="a",
+                queueing_lock=None,
+                args={},
+                scheduled_at=scheduled_at,
+            )
+            for queue_name, priority, scheduled_at in [
+                ("marsupilami", 0, None),
+                ("other_queue", 5, None),
+                ("marsupilami", 10, conftest.aware_datetime(2100, 1, 1)),
+            ]
+        ]
+    )
+
+    connector.workers = {1: utils.utcnow()}
+
+    assert (await connector.fetch_job_one(queues=["marsupilami"], worker_id=1)) == {
+        "id": None
+    }
+    await connector.retry_job_run(
+        job_id=3, retry_at=conftest.aware_datetime(2000, 1, 1)
+    )
+    assert (await connector.fetch_job_one(queues=None, worker_id=1))["id"] == 3
+    assert (await connector.fetch_job_one(queues=None, worker_id=1)) == {"id": None}
+
+    await connector.finish_job_run(job_id=3, status="succeeded", delete_job=False)
+    assert (await connector.fetch_job_one(queues=None, worker_id=1))["id"] == 2
+    await connector.finish_job_run(job_id=2, status="succeeded", delete_job=True)
+    assert (await connector.fetch_job_one(queues=None, worker_id=1))["id"] == 1
+
+
+async def test_fetch_job_one_scheduled(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="marsupilami",
+                task_name="mytask",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=scheduled_at,
+            )
+            for scheduled_at in [
+                conftest.aware_datetime(2100, 1, 1),
+                conftest.aware_datetime(2000, 1, 1),
+            ]
+        ]
+    )
+
+    connector.workers = {1: utils.utcnow()}
+
+    assert (await connector.fetch_job_one(queues=None, worker_id=1))["id"] == 2
+    assert (await connector.fetch_job_one(queues=None, worker_id=1)) == {"id": None}
+
+    connector.jobs[1]["scheduled_at"] = conftest.aware_datetime(2000, 1, 1)
+    # The rows were changed directly: the indexes need to be rebuilt
+    connector.jobs = connector.jobs
+    assert (await connector.fetch_job_one(queues=None, worker_id=1))["id"] == 1
+
+
+async def test_fetch_job_one_cancelled_lock_job(
+    connector: testing.InMemoryConnector,
+):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="marsupilami",
+                task_name="mytask",
+                priority=0,
+                lock="a",
+                queueing_lock=None,
+                args={},
+                scheduled_at=conftest.aware_datetime(2100, 1, 1) if i == 0 else None,
+            )
+            for i in range(2)
+        ]
+    )
+
+    connector.workers = {1: utils.utcnow()}
+
+    assert (await connector.fetch_job_one(queues=None, worker_id=1)) == {"id": None}
+    await connector.cancel_job_one(job_id=1, abort=False, delete_job=False)
+    assert (await connector.fetch_job_one(queues=None, worker_id=1))["id"] == 2
+
+
+async def test_defer_jobs_all_queueing_lock_after_fetch(
+    connector: testing.InMemoryConnector,
+):
+    job = t.JobToDefer(
+        queue_name="marsupilami",
+        task_name="mytask",
+        priority=0,
+        lock=None,
+        queueing_lock="a",
+        args={},
+        scheduled_at=None,
+    )
+    await connector.defer_jobs_all([job])
+    with pytest.raises(exceptions.UniqueViolation):
+        await connector.defer_jobs_all([job])
+
+    connector.workers = {1: utils.utcnow()}
+    await connector.fetch_job_one(queues=None, worker_id=1)
+
+    await connector.defer_jobs_all([job])
+    assert len(connector.jobs) == 2
+
+
 async def test_finish_job_run(connector: testing.InMemoryConnector):
     await connector.defer_jobs_all(
         [
@@ -598,6 +858,99 @@ async def test_retry_job_run(connector: testing.InMemoryConnector):
     assert len(connector.events[id]) == 4
 
 
+async def test_finish_job_and_fetch_next_one(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="marsupilami",
+                task_name="mytask",
+                priority=0,
+                lock="sher",
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+        ]
+        * 2
+    )
+
+    connector.workers = {1: utils.utcnow()}
+    await connector.fetch_job_one(queues=None, worker_id=1)
+
+    # The next job shares the lock of the finished job, so it is only available
+    # once the first one is finished.
+    next_job = await connector.finish_job_and_fetch_next_one(
+        job_id=1, status="succeeded", delete_job=False, queues=None, worker_id=1
+    )
+
+    assert connector.jobs[1]["status"] == "succeeded"
+    assert next_job["id"] == 2
+    assert next_job["status"] == "doing"
+
+
+async def test_finish_jobs_run(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="marsupilami",
+                task_name="mytask",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+        ]
+        * 2
+    )
+
+    connector.workers = {1: utils.utcnow()}
+    await connector.fetch_jobs_all(queues=None, worker_id=1, limit=2)
+
+    await connector.finish_jobs_run(
+        job_ids=[1, 2], statuses=["succeeded", "failed"], delete_jobs=[False, True]
+    )
+
+    assert connector.jobs[1]["status"] == "succeeded"
+    assert connector.jobs[1]["attempts"] == 1
+    assert 2 not in connector.jobs
+
+
+async def test_retry_jobs_run(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="marsupilami",
+                task_name="mytask",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+        ]
+        * 2
+    )
+
+    connector.workers = {1: utils.utcnow()}
+    await connector.fetch_jobs_all(queues=None, worker_id=1, limit=2)
+
+    retry_at = conftest.aware_datetime(2000, 1, 1)
+    await connector.retry_jobs_run(
+        job_ids=[1, 2],
+        retry_ats=[retry_at, retry_at],
+        new_priorities=[3, None],
+        new_queue_names=[None, "some_queue"],
+        new_locks=[None, None],
+    )
+
+    assert [job["status"] for job in connector.jobs.values()] == ["todo", "todo"]
+    assert connector.jobs[1]["priority"] == 3
+    assert connector.jobs[1]["queue_name"] == "marsupilami"
+    assert connector.jobs[2]["priority"] == 0
+    assert connector.jobs[2]["queue_name"] == "some_queue"
+
+
 async def test_apply_schema_run(connector: testing.InMemoryConnector):
     # If we don't crash, it's enough
     await connector.apply_schema_run()
@@ -637,6 +990,131 @@ async def test_defer_no_notify(connector: testing.InMemoryConnector):
     assert not event.is_set()
 
 
+async def test_defer_notify_once_per_queue(connector: testing.InMemoryConnector):
+    received = []
+
+    async def on_notification(*, channel: str, payload: str):
+        received.append((channel, json.loads(payload)))
+
+    await connector.open_async()
+    await connector.listen_notify(
+        on_notification=on_notification,
+        channels=["procrastinate_any_queue_v1", "procrastinate_queue_v1#a"],
+    )
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name=queue,
+                task_name="foo",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+            for queue in ["a", "b", "a"]
+        ]
+    )
+
+    assert sorted(received) == [
+        ("procrastinate_any_queue_v1", {"type": "job_inserted", "job_count": 3}),
+        ("procrastinate_queue_v1#a", {"type": "job_inserted", "job_count": 2}),
+    ]
+
+
+@pytest.mark.parametrize(
+    "event_settings, expected",
+    [
+        ({}, ["deferred", "started", "succeeded"]),
+        ({"*": []}, []),
+        ({"*": [], "a": ["succeeded"]}, ["succeeded"]),
+        ({"*": ["started"], "b": []}, ["started"]),
+        ({"*": [], "a": None}, ["deferred", "started", "succeeded"]),
+    ],
+)
+async def test_recorded_events(
+    connector: testing.InMemoryConnector, event_settings, expected
+):
+    for queue, event_types in event_settings.items():
+        await connector.set_recorded_events_run(queue=queue, event_types=event_types)
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="a",
+                task_name="foo",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+        ]
+    )
+    worker = await connector.register_worker_one()
+    await connector.fetch_job_one(queues=None, worker_id=worker["worker_id"])
+    await connector.finish_job_run(job_id=1, status="succeeded", delete_job=False)
+
+    assert [event["type"] for event in connector.events[1]] == expected
+
+
+async def test_delete_old_jobs_one_without_events(
+    connector: testing.InMemoryConnector,
+):
+    await connector.set_recorded_events_run(queue="*", event_types=[])
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="a",
+                task_name="foo",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+        ]
+    )
+    worker = await connector.register_worker_one()
+    await connector.fetch_job_one(queues=None, worker_id=worker["worker_id"])
+    await connector.finish_job_run(job_id=1, status="succeeded", delete_job=False)
+
+    await connector.delete_old_jobs_one(
+        nb_hours=1, queue=None, statuses=["succeeded"], chunk_size=None
+    )
+
+    # The job just finished, even though no event says so
+    assert list(connector.jobs) == [1]
+
+
+async def test_job_timestamps(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="a",
+                task_name="foo",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+        ]
+    )
+    job_row = connector.jobs[1]
+    assert job_row["created_at"] <= utils.utcnow()
+    assert job_row["started_at"] is job_row["finished_at"] is None
+
+    worker = await connector.register_worker_one()
+    await connector.fetch_job_one(queues=None, worker_id=worker["worker_id"])
+    assert job_row["created_at"] <= job_row["started_at"] <= utils.utcnow()
+
+    await connector.finish_job_run(job_id=1, status="failed", delete_job=False)
+    assert job_row["started_at"] <= job_row["finished_at"] <= utils.utcnow()
+
+    await connector.retry_job_run(job_id=1, retry_at=utils.utcnow())
+    assert job_row["finished_at"] is None
+
+
 async def test_register_worker(connector: testing.InMemoryConnector):
     then = utils.utcnow()
     assert connector.workers == {}
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from procrastinate import sql, tracing
+from procrastinate.jobs import Status
+from procrastinate.worker import Worker
+
+sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+in_memory_span_exporter = pytest.importorskip(
+    "opentelemetry.sdk.trace.export.in_memory_span_exporter"
+)
+export = pytest.importorskip("opentelemetry.sdk.trace.export")
+
+
+@pytest.fixture
+def spans(mocker):
+    """
+    Spans recorded by a local tracer provider, as setting the global one can only
+    be done once.
+    """
+    exporter = in_memory_span_exporter.InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(exporter))
+    mocker.patch.object(tracing.trace, "get_tracer", provider.get_tracer)
+
+    def get_spans():
+        return {span.name: span for span in exporter.get_finished_spans()}
+
+    return get_spans
+
+
+def test_is_enabled():
+    assert tracing.is_enabled() is True
+
+
+def test_start_span(spans):
+    with tracing.start_span("foo", kind="producer", attributes={"a": 1}):
+        tracing.set_attributes({"b": 2})
+
+    span = spans()["foo"]
+    assert span.kind == tracing.trace.SpanKind.PRODUCER
+    assert span.attributes == {"a": 1, "b": 2}
+    assert span.parent is None
+
+
+def test_start_span_trace_context(spans):
+    with tracing.start_span("parent"):
+        trace_context = tracing.inject()
+
+    with tracing.start_span("unrelated"):
+        with tracing.start_span("child", trace_context=trace_context):
+            pass
+
+    recorded = spans()
+    assert trace_context and "traceparent" in trace_context
+    assert recorded["child"].parent.span_id == recorded["parent"].context.span_id
+
+
+def test_inject_no_current_span(spans):
+    assert tracing.inject() is None
+
+
+def test_record_exception(spans):
+    with tracing.start_span("foo"):
+        tracing.record_exception(ValueError("nope"))
+
+    span = spans()["foo"]
+    assert span.status.status_code == tracing.trace.StatusCode.ERROR
+    assert span.events[0].name == "exception"
+
+
+async def test_traced_query(spans):
+    class Connector:
+        @tracing.traced_query
+        async def execute_query_async(self, query, **arguments):
+            return arguments
+
+        @tracing.traced_query
+        def execute_query(self, query, **arguments):
+            return arguments
+
+    assert await Connector().execute_query_async(sql.queries["defer_jobs"], a=1) == {
+        "a": 1
+    }
+    assert Connector().execute_query("SELECT 1") == {}
+
+    recorded = spans()
+    assert recorded["defer_jobs"].kind == tracing.trace.SpanKind.CLIENT
+    assert recorded["defer_jobs"].attributes == {
+        "db.system.name": "postgresql",
+        "db.operation.name": "defer_jobs",
+    }
+    assert "query" in recorded
+
+
+async def test_defer_span(app, spans):
+    @app.task(queue="yay", name="task_func")
+    def task_func():
+        pass
+
+    job_id = await task_func.defer_async()
+
+    span = spans()["defer task_func"]
+    assert span.kind == tracing.trace.SpanKind.PRODUCER
+    assert span.attributes == {
+        "messaging.system": "procrastinate",
+        "messaging.operation.type": "send",
+        "messaging.destination.name": "yay",
+        "procrastinate.task.name": "task_func",
+        "messaging.message.id": str(job_id),
+    }
+    (row,) = app.connector.jobs.values()
+    assert row["trace_context"]["traceparent"].split("-")[2] == (
+        f"{span.context.span_id:016x}"
+    )
+
+
+async def test_batch_defer_span(app, spans):
+    @app.task(name="task_func")
+    def task_func(a):
+        pass
+
+    await task_func.batch_defer_async({"a": 1}, {"a": 2})
+
+    span = spans()["defer task_func"]
+    assert span.attributes["messaging.batch.message_count"] == 2
+    assert all(row["trace_context"] for row in app.connector.jobs.values())
+
+
+async def test_fetch_span(app, spans):
+    worker_id = await app.job_manager.register_worker()
+    await app.job_manager.fetch_job(queues=["yay"], worker_id=worker_id)
+
+    span = spans()["fetch job"]
+    assert span.attributes == {
+        "messaging.system": "procrastinate",
+        "messaging.operation.type": "receive",
+        "procrastinate.queues": ("yay",),
+    }
+
+
+async def test_run_span(app, spans):
+    @app.task(queue="yay", name="task_func")
+    def task_func():
+        pass
+
+    job_id = await task_func.defer_async()
+    await Worker(app, wait=False).run()
+
+    recorded = spans()
+    span = recorded["run task_func"]
+    assert span.kind == tracing.trace.SpanKind.CONSUMER
+    assert span.parent.span_id == recorded["defer task_func"].context.span_id
+    assert span.attributes["messaging.message.id"] == str(job_id)
+    persist = recorded["persist job status"]
+    assert persist.parent.span_id == span.context.span_id
+    assert persist.attributes == {"procrastinate.job.status": "succeeded"}
+
+
+async def test_run_span_error(app, spans):
+    @app.task(name="task_func")
+    def task_func():
+        raise ValueError("nope")
+
+    job_id = await task_func.defer_async()
+    await Worker(app, wait=False).run()
+    await asyncio.sleep(0.01)
+
+    assert await app.job_manager.get_job_status_async(job_id) == Status.FAILED
+    span = spans()["run task_func"]
+    assert span.status.status_code == tracing.trace.StatusCode.ERROR
@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import datetime
 import signal
+import threading
 from typing import cast
 
 import pytest
@@ -11,8 +12,9 @@ from pytest_mock import MockerFixture
 from procrastinate import utils
 from procrastinate.app import App
 from procrastinate.exceptions import JobAborted
-from procrastinate.job_context import JobContext
+from procrastinate.job_context import AbortReason, JobContext
 from procrastinate.jobs import DEFAULT_QUEUE, Job, Status
+from procrastinate.retry import BaseRetryStrategy, RetryDecision
 from procrastinate.testing import InMemoryConnector
 from procrastinate.worker import Worker
 
@@ -36,6 +38,17 @@ async def worker(app: App, request: pytest.FixtureRequest):
             pass
 
 
+@pytest.fixture
+def atomic_queries(mocker: MockerFixture):
+    # The in-memory connector runs the queries one after the other
+    mocker.patch.object(
+        InMemoryConnector,
+        "queries_are_atomic",
+        new_callable=mocker.PropertyMock,
+        return_value=True,
+    )
+
+
 @pytest.mark.parametrize(
     "available_jobs, concurrency",
     [
@@ -96,6 +109,16 @@ async def test_worker_run_once_log_messages(app: App, caplog):
     }
 
 
+async def test_worker_run_without_periodic_deferrer(app: App, caplog):
+    caplog.set_level("INFO")
+    worker = Worker(app, wait=False, run_periodic_deferrer=False)
+    await asyncio.wait_for(worker.run(), 0.1)
+
+    assert "No periodic task found, periodic deferrer will not run." not in (
+        caplog.messages
+    )
+
+
 async def test_worker_run_wait_listen(worker):
     await start_worker(worker)
     connector = cast(InMemoryConnector, worker.app.connector)
@@ -136,6 +159,77 @@ async def test_worker_run_respects_concurrency(
     complete_tasks.set()
 
 
+@pytest.mark.parametrize("worker", [{"concurrency": 3}], indirect=["worker"])
+async def test_worker_run_fetches_jobs_in_a_single_query(worker: Worker, app: App):
+    complete_tasks = asyncio.Event()
+
+    @app.task
+    async def perform_job():
+        await complete_tasks.wait()
+
+    for _ in range(4):
+        await perform_job.defer_async()
+
+    await start_worker(worker)
+
+    connector = cast(InMemoryConnector, app.connector)
+    fetch_queries = [query for query in connector.queries if query[0] == "fetch_jobs"]
+
+    assert len(fetch_queries) == 1
+    assert fetch_queries[0][1]["limit"] == 3
+
+    complete_tasks.set()
+
+
+async def test_worker_run_fetches_next_job_when_acknowledging(worker: Worker, app: App):
+    @app.task
+    async def perform_job():
+        pass
+
+    job_ids = [await perform_job.defer_async() for _ in range(3)]
+
+    await start_worker(worker)
+
+    connector = cast(InMemoryConnector, app.connector)
+    assert [connector.jobs[job_id]["status"] for job_id in job_ids] == ["succeeded"] * 3
+    assert [query[0] for query in connector.queries if query[0] != "defer_jobs"] == [
+        "prune_stalled_workers",
+        "register_worker",
+        "fetch_jobs",
+        "finish_job_and_fetch_next",
+        "finish_job_and_fetch_next",
+        "finish_job_and_fetch_next",
+        "fetch_jobs",
+    ]
+    # The slot was handed over from job to job, and released at the end
+    assert not worker._job_semaphore.locked()
+    assert not worker._slots_handed_over
+
+
+async def test_worker_does_not_fetch_next_job_when_stopping(app: App, worker):
+    complete_task_event = asyncio.Event()
+
+    @app.task()
+    async def task_func():
+        await complete_task_event.wait()
+
+    job_id = await task_func.defer_async()
+    await task_func.defer_async()
+
+    run_task = await start_worker(worker)
+    worker.stop()
+    complete_task_event.set()
+    await asyncio.wait_for(run_task, timeout=0.1)
+
+    connector = cast(InMemoryConnector, app.connector)
+    assert connector.jobs[job_id]["status"] == "succeeded"
+    assert [job["status"] for job in connector.jobs.values()] == [
+        "succeeded",
+        "todo",
+    ]
+    assert "finish_job_and_fetch_next" not in {query[0] for query in connector.queries}
+
+
 async def test_worker_run_respects_concurrency_variant(worker: Worker, app: App):
     worker.concurrency = 2
 
@@ -184,16 +278,16 @@ async def test_worker_run_fetches_job_on_notification(worker, app: App):
 
     connector = cast(InMemoryConnector, app.connector)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 1
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 1
 
     await asyncio.sleep(0.01)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 1
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 1
 
     await perform_job.defer_async()
     await asyncio.sleep(0.01)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 2
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 2
 
     complete_tasks.set()
 
@@ -209,11 +303,11 @@ async def test_worker_run_respects_polling(worker, app):
     connector = cast(InMemoryConnector, app.connector)
     await asyncio.sleep(0.01)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 1
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 1
 
     await asyncio.sleep(0.07)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 2
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 2
 
 
 @pytest.mark.parametrize(
@@ -262,6 +356,263 @@ async def test_process_job_with_deletion(app: App, worker, fail_task):
     assert job_id not in connector.jobs
 
 
+@pytest.mark.parametrize(
+    "worker", [{"concurrency": 3, "ack_batch_size": 3}], indirect=["worker"]
+)
+async def test_worker_acknowledges_jobs_in_batches(app: App, worker):
+    @app.task()
+    async def task_func():
+        pass
+
+    job_ids = [await task_func.defer_async() for _ in range(3)]
+
+    await start_worker(worker)
+
+    connector = cast(InMemoryConnector, app.connector)
+    assert [query for query in connector.queries if query[0] == "finish_jobs"] == [
+        (
+            "finish_jobs",
+            {
+                "job_ids": job_ids,
+                "statuses": ["succeeded"] * 3,
+                "delete_jobs": [False] * 3,
+            },
+        )
+    ]
+    assert "finish_job" not in {query[0] for query in connector.queries}
+
+
+@pytest.mark.parametrize(
+    "worker",
+    [{"concurrency": 2, "ack_batch_size": 10, "ack_batch_interval": 0.03}],
+    indirect=["worker"],
+)
+async def test_worker_acknowledges_jobs_after_batch_interval(app: App, worker):
+    @app.task()
+    async def succeeding_task():
+        pass
+
+    @app.task(retry=1)
+    async def failing_task():
+        raise ValueError("Nope")
+
+    succeeding_job_id = await succeeding_task.defer_async()
+    failing_job_id = await failing_task.defer_async()
+
+    await start_worker(worker)
+
+    connector = cast(InMemoryConnector, app.connector)
+    assert connector.jobs[succeeding_job_id]["status"] == "doing"
+
+    await asyncio.sleep(0.05)
+
+    assert connector.jobs[succeeding_job_id]["status"] == "succeeded"
+    assert connector.jobs[failing_job_id]["status"] == "todo"
+    query_names = [query[0] for query in connector.queries]
+    assert query_names.count("finish_jobs") == 1
+    assert query_names.count("retry_jobs") == 1
+
+
+@pytest.mark.parametrize("ack_batch_size", [1, 10])
+async def test_worker_retries_jobs_without_retry_at(app: App, ack_batch_size):
+    worker = Worker(
+        app, wait=False, ack_batch_size=ack_batch_size, ack_batch_interval=100
+    )
+
+    class RetryOnceNow(BaseRetryStrategy):
+        def get_retry_decision(self, *, exception, job):
+            return RetryDecision() if job.attempts == 0 else None
+
+    @app.task(retry=RetryOnceNow())
+    async def failing_task():
+        raise ValueError("Nope")
+
+    job_id = await failing_task.defer_async()
+
+    await asyncio.wait_for(worker.run(), 0.1)
+
+    # Batched or not, the job is retried without a scheduled_at, so without a
+    # scheduled event
+    connector = cast(InMemoryConnector, app.connector)
+    assert connector.jobs[job_id]["scheduled_at"] is None
+    assert "scheduled" not in [event["type"] for event in connector.events[job_id]]
+
+
+async def test_worker_flushes_acknowledgements_on_shutdown(app: App):
+    worker = Worker(app, wait=False, ack_batch_size=10, ack_batch_interval=100)
+
+    @app.task()
+    async def task_func():
+        pass
+
+    job_ids = [await task_func.defer_async() for _ in range(2)]
+
+    await asyncio.wait_for(worker.run(), 0.1)
+
+    connector = cast(InMemoryConnector, app.connector)
+    assert [connector.jobs[job_id]["status"] for job_id in job_ids] == [
+        "succeeded",
+        "succeeded",
+    ]
+    assert connector.queries[-2][0] == "finish_jobs"
+    assert connector.queries[-1][0] == "unregister_worker"
+
+
+async def test_worker_acknowledges_jobs_one_by_one_on_batch_failure(
+    app: App, mocker: MockerFixture, caplog
+):
+    worker = Worker(app, wait=False, ack_batch_size=10, ack_batch_interval=100)
+
+    @app.task()
+    async def task_func():
+        pass
+
+    job_ids = [await task_func.defer_async() for _ in range(3)]
+
+    connector = cast(InMemoryConnector, app.connector)
+    finish_job_run = connector.finish_job_run
+
+    async def finish_job_run_failing_second_job(job_id, **kwargs):
+        if job_id == job_ids[1]:
+            raise ValueError("Nope")
+        await finish_job_run(job_id=job_id, **kwargs)
+
+    mocker.patch.object(
+        connector, "finish_job_run", side_effect=finish_job_run_failing_second_job
+    )
+
+    await asyncio.wait_for(worker.run(), 0.1)
+
+    assert [connector.jobs[job_id]["status"] for job_id in job_ids] == [
+        "succeeded",
+        "doing",
+        "succeeded",
+    ]
+    assert [
+        record.action
+        for record in caplog.records
+        if record.levelname in ("WARNING", "ERROR")
+    ] == ["batch_acknowledgement_failed", "acknowledgement_failed"]
+
+
+@pytest.mark.parametrize(
+    "worker",
+    [{"ack_batch_size": 10, "ack_batch_interval": 0.01}],
+    indirect=["worker"],
+)
+async def test_worker_sends_heartbeat_with_acknowledgements(
+    app: App, worker, atomic_queries
+):
+    @app.task()
+    async def task_func():
+        pass
+
+    await start_worker(worker)
+    # The heartbeat is due, but the heartbeat loop sleeps for a long time: it is
+    # sent when the job is acknowledged
+    worker._heartbeat_updated_at -= worker.update_heartbeat_interval
+    await task_func.defer_async()
+    await asyncio.sleep(0.05)
+
+    connector = cast(InMemoryConnector, app.connector)
+    query_names = [query[0] for query in connector.queries]
+    finish_jobs_index = query_names.index("finish_jobs")
+    assert query_names[finish_jobs_index - 1] == "update_heartbeat"
+
+
+@pytest.mark.parametrize(
+    "worker",
+    [
+        {
+            "concurrency": 2,
+            "ack_batch_size": 10,
+            "ack_batch_interval": 0.01,
+            "listen_notify": False,
+            "abort_job_polling_interval": 100,
+        }
+    ],
+    indirect=["worker"],
+)
+async def test_worker_polls_jobs_to_abort_with_acknowledgements(
+    app: App, worker, atomic_queries
+):
+    @app.task(pass_context=True)
+    async def long_task(job_context: JobContext):
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if job_context.should_abort():
+                raise JobAborted()
+
+    @app.task()
+    async def short_task():
+        await asyncio.sleep(0.02)
+
+    long_job_id = await long_task.defer_async()
+    await short_task.defer_async()
+    await start_worker(worker)
+    await app.job_manager.cancel_job_by_id_async(long_job_id, abort=True)
+
+    # The poll is due, but the polling loop sleeps for a long time: the jobs to
+    # abort are polled when the short job is acknowledged
+    worker._jobs_to_abort_polled_at -= worker.abort_job_polling_interval
+    await asyncio.sleep(0.05)
+
+    status = await app.job_manager.get_job_status_async(long_job_id)
+    assert status == Status.ABORTED
+
+
+@pytest.mark.parametrize(
+    "worker",
+    [{"ack_batch_size": 10, "ack_batch_interval": 0.01}],
+    indirect=["worker"],
+)
+async def test_worker_does_not_pipeline_non_atomic_queries(
+    app: App, worker, mocker: MockerFixture
+):
+    @app.task()
+    async def task_func():
+        pass
+
+    connector = cast(InMemoryConnector, app.connector)
+    execute_queries_async = mocker.spy(connector, "execute_queries_async")
+    await start_worker(worker)
+    worker._heartbeat_updated_at -= worker.update_heartbeat_interval
+    job_id = await task_func.defer_async()
+    await asyncio.sleep(0.05)
+
+    assert connector.jobs[job_id]["status"] == "succeeded"
+    execute_queries_async.assert_not_called()
+
+
+async def test_worker_acknowledges_jobs_separately_on_pipeline_failure(
+    app: App, mocker: MockerFixture, atomic_queries
+):
+    worker = Worker(
+        app,
+        wait=False,
+        ack_batch_size=10,
+        ack_batch_interval=100,
+        update_heartbeat_interval=0.02,
+    )
+
+    @app.task()
+    async def task_func():
+        pass
+
+    job_id = await task_func.defer_async()
+
+    connector = cast(InMemoryConnector, app.connector)
+    mocker.patch.object(connector, "execute_queries_async", side_effect=ValueError)
+
+    await asyncio.wait_for(worker.run(), 0.1)
+
+    assert connector.jobs[job_id]["status"] == "succeeded"
+    assert [query[0] for query in connector.queries][-2:] == [
+        "finish_jobs",
+        "unregister_worker",
+    ]
+
+
 async def test_stopping_worker_waits_for_task(app: App, worker):
     complete_task_event = asyncio.Event()
 
@@ -533,6 +884,106 @@ async def test_run_job_raising_job_aborted(app: App, worker, caplog):
     assert "Aborted" in record.message
 
 
+async def test_worker_does_not_start_process_pool_without_process_task(
+    app: App, mocker: MockerFixture
+):
+    process_pool = mocker.patch("procrastinate.executors.ProcessPool")
+
+    @app.task()
+    def task_func():
+        pass
+
+    await task_func.defer_async()
+    await asyncio.wait_for(Worker(app, wait=False).run(), 0.1)
+
+    process_pool.assert_not_called()
+
+
+async def test_worker_runs_process_task_in_process_pool(
+    app: App, mocker: MockerFixture
+):
+    process_pool = mocker.patch("procrastinate.executors.ProcessPool")
+    process_pool.return_value.start = mocker.AsyncMock()
+    process_pool.return_value.run = mocker.AsyncMock(return_value=3)
+    process_pool.return_value.shutdown = mocker.AsyncMock()
+    app.import_paths = ["some.module"]
+
+    @app.task(executor="process")
+    def task_func(a):
+        pass
+
+    job_id = await task_func.defer_async(a=1)
+    worker = Worker(app, wait=False, process_pool_size=3)
+    await asyncio.wait_for(worker.run(), 0.1)
+
+    process_pool.assert_called_once_with(
+        size=3, import_paths={"some.module": None, "tests.unit.test_worker": None}
+    )
+    process_pool.return_value.start.assert_awaited_once_with()
+    process_pool.return_value.run.assert_awaited_once_with(task_func, a=1)
+    process_pool.return_value.shutdown.assert_awaited_once_with()
+    assert worker._process_pool is None
+
+    connector = cast(InMemoryConnector, app.connector)
+    assert connector.jobs[job_id]["status"] == "succeeded"
+
+
+async def test_worker_runs_sync_task_in_named_thread_pool(app: App):
+    thread_names = []
+
+    @app.task(executor="slow_io")
+    def slow_task():
+        thread_names.append(threading.current_thread().name)
+
+    @app.task()
+    def other_task():
+        thread_names.append(threading.current_thread().name)
+
+    await slow_task.defer_async()
+    await other_task.defer_async()
+
+    worker = Worker(app, wait=False, thread_pool_size=2, thread_pools={"slow_io": 1})
+    await asyncio.wait_for(worker.run(), 0.1)
+
+    assert thread_names[0].startswith("procrastinate-slow_io_")
+    assert thread_names[1].startswith("procrastinate_")
+
+
+async def test_worker_warns_about_unknown_executor(app: App, caplog):
+    caplog.set_level("WARNING")
+
+    @app.task(executor="slow_io")
+    def slow_task():
+        pass
+
+    await asyncio.wait_for(Worker(app, wait=False).run(), 0.1)
+
+    assert [record.action for record in caplog.records] == ["unknown_task_executor"]
+
+
+async def test_abort_process_job(app: App, mocker: MockerFixture):
+    @app.task(executor="process")
+    def task_func():
+        pass
+
+    job_id = await task_func.defer_async()
+    job = await app.job_manager.fetch_job(
+        queues=None, worker_id=await app.job_manager.register_worker()
+    )
+    assert job
+    context = JobContext(app=app, job=job, start_timestamp=0, abort_reason=lambda: None)
+    worker = Worker(app)
+    worker._process_pool = mocker.Mock()
+    process_job_task = mocker.Mock()
+
+    worker._abort_job(process_job_task, context, AbortReason.USER_REQUEST)
+
+    worker._process_pool.request_abort.assert_called_once_with(
+        job_id, AbortReason.USER_REQUEST
+    )
+    process_job_task.cancel.assert_not_called()
+
+
 async def test_abort_async_job(app: App, worker):
     @app.task(queue="yay", name="task_func")
     async def task_func():
@@ -706,9 +1157,9 @@ async def test_run_log_actions(app: App, caplog, worker):
         "defer_jobs",
         "prune_stalled_workers",
         "register_worker",
-        "fetch_job",
-        "finish_job",
-        "fetch_job",
+        "fetch_jobs",
+        "finish_job_and_fetch_next",
+        "fetch_jobs",
     ]
 
     logs = {(r.action, r.levelname) for r in caplog.records if hasattr(r, "action")}
@@ -834,3 +1285,84 @@ async def test_worker_prunes_stalled_workers(app: App):
 
     assert worker1_id in connector.workers
     assert worker2_id not in connector.workers
+
+
+async def test_worker_no_metrics(app: App):
+    worker = Worker(app, wait=False)
+
+    assert worker.metrics is None
+
+
+async def test_worker_metrics(app: App, mocker: MockerFixture):
+    server = mocker.Mock(wait_closed=mocker.AsyncMock())
+    start_http_server = mocker.patch(
+        "procrastinate.metrics.start_http_server", return_value=server
+    )
+
+    @app.task(queue="q")
+    async def succeeding_task():
+        pass
+
+    @app.task(queue="q", retry=1)
+    async def failing_task():
+        raise ValueError()
+
+    await succeeding_task.defer_async()
+    await failing_task.defer_async()
+
+    worker = Worker(app, wait=False, metrics_port=9090)
+    await asyncio.wait_for(worker.run(), 0.5)
+
+    assert worker.metrics
+    start_http_server.assert_awaited_once_with(worker.metrics, port=9090)
+    server.close.assert_called_once_with()
+    assert worker.metrics.jobs_started.values == {
+        (succeeding_task.name, "q"): 1,
+        (failing_task.name, "q"): 2,
+    }
+    assert worker.metrics.jobs_ended.values == {
+        (succeeding_task.name, "q", "succeeded"): 1,
+        (failing_task.name, "q", "retried"): 1,
+        (failing_task.name, "q", "failed"): 1,
+    }
+    assert sum(worker.metrics.job_queue_wait.counts[(failing_task.name, "q")]) == 2
+    assert sum(worker.metrics.fetch_duration.counts[()]) >= 1
+
+
+async def test_worker_no_profiler(app: App):
+    worker = Worker(app, wait=False)
+
+    assert worker.profiler is None
+
+
+async def test_worker_profiler(app: App, tmp_path):
+    @app.task(name="profiled_async")
+    async def profiled_async():
+        pass
+
+    @app.task(name="profiled_sync")
+    def profiled_sync():
+        pass
+
+    @app.task(name="not_profiled")
+    def not_profiled():
+        pass
+
+    await profiled_async.defer_async()
+    await profiled_sync.defer_async()
+    await not_profiled.defer_async()
+
+    worker = Worker(
+        app,
+        wait=False,
+        profile_tasks=["profiled_async", "profiled_sync"],
+        profile_directory=str(tmp_path),
+    )
+    await asyncio.wait_for(worker.run(), 0.5)
+
+    assert worker.profiler
+    assert set(worker.profiler.stats) == {"profiled_async", "profiled_sync"}
+    assert {path.name for path in tmp_path.iterdir()} == {
+        "profiled_async.prof",
+        "profiled_sync.prof",
+    }